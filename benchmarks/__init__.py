@@ -0,0 +1,7 @@
+"""
+Headless performance benchmarks for the BIPV pipeline
+"""
+
+from .synthetic import AZIMUTH_DISTRIBUTIONS, generate_building, generate_tmy, generate_upload_csvs, subsample
+
+__all__ = ['AZIMUTH_DISTRIBUTIONS', 'generate_building', 'generate_tmy', 'generate_upload_csvs', 'subsample']
@@ -0,0 +1,176 @@
+"""
+Step 4 Multi-File Ingestion Benchmark
+Parses, validates and classifies growing numbers of synthetic buildings'
+window/wall CSV files with ParallelProcessor sequentially, with threads and
+with worker processes, and records how throughput scales with file count.
+
+Usage:
+    python -m benchmarks.ingest_benchmark [--buildings 1 2 4 8] [--windows-per-file 50000]
+
+Each building contributes a windows and a walls file.
+
+Runs headless: files are processed without a database writer, so no PostgreSQL
+connection is needed. Process pools are started once per mode and warmed up
+before timing; their start-up cost is reported separately.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from benchmarks.radiation_benchmark import RESULTS_DIR, environment, git_revision
+from benchmarks.synthetic import generate_upload_csvs
+
+SCHEMA_VERSION = 1
+DEFAULT_BUILDING_COUNTS = [1, 2, 4, 8]
+DEFAULT_WINDOWS_PER_FILE = 50000
+
+# mode -> ParallelProcessor options (max_workers None = one per file, capped at --workers)
+MODES = {
+    'sequential': {'use_processes': False, 'max_workers': 1},
+    'threads': {'use_processes': False, 'max_workers': None},
+    'processes': {'use_processes': True, 'max_workers': None}
+}
+
+
+def build_files(building_count: int, windows_per_file: int, seed: int) -> Tuple[List[Tuple[str, bytes, str]], int]:
+    """
+    Upload files for building_count synthetic buildings: one windows CSV of
+    windows_per_file rows per building, plus its (small) walls CSV so merging
+    has host walls to join.
+
+    Returns:
+        (files as (filename, content, data_type), total rows)
+    """
+    files = []
+    rows = 0
+    for building in range(building_count):
+        csvs = generate_upload_csvs(windows_per_file, seed=seed + building)
+        for data_type in ('windows', 'walls'):
+            content = csvs[data_type]
+            files.append((f"building{building:03d}_{data_type}.csv", content, data_type))
+            rows += content.count(b'\n') - 1
+    return files, rows
+
+
+def run_mode(mode: str, files: List[Tuple[str, bytes, str]], workers: int,
+             repeats: int) -> Dict[str, Any]:
+    """Time ParallelProcessor.ingest_files for one mode; best of repeats."""
+    from step4_facade_extraction.processing import ParallelProcessor
+
+    options = MODES[mode]
+    max_workers = options['max_workers'] or min(workers, len(files))
+    processor = ParallelProcessor(max_workers=max_workers, use_processes=options['use_processes'])
+
+    try:
+        start = time.perf_counter()
+        processor.ingest_files(files[:max_workers])   # starts every worker / imports
+        startup_seconds = time.perf_counter() - start
+
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            results, merged = processor.ingest_files(files)
+            timings.append(time.perf_counter() - start)
+    finally:
+        processor.close()
+
+    failed = [name for name, result in results.items() if not result.success]
+    return {
+        'mode': mode,
+        'workers': max_workers,
+        'wall_seconds': round(min(timings), 4),
+        'startup_seconds': round(startup_seconds, 4),
+        'windows': merged['summary']['total_windows'],
+        'walls': merged['summary']['total_walls'],
+        'connected_pairs': merged['summary']['connected_pairs'],
+        'failed_files': failed
+    }
+
+
+def run_benchmark(building_counts: List[int], windows_per_file: int, modes: List[str],
+                  workers: int, repeats: int = 1, seed: int = 42, echo=print) -> Dict[str, Any]:
+    """Run every mode at every building count and return the JSON report structure."""
+    results = []
+
+    for building_count in building_counts:
+        files, rows = build_files(building_count, windows_per_file, seed)
+        size_mb = sum(len(content) for _, content, _ in files) / (1024 * 1024)
+        sequential_seconds = None
+
+        for mode in modes:
+            record = {'case_id': f"{mode}/{building_count}", 'buildings': building_count,
+                      'files': len(files), 'rows': rows, 'input_mb': round(size_mb, 2)}
+            try:
+                record.update(run_mode(mode, files, workers, repeats))
+                record['status'] = 'ok'
+                record['rows_per_second'] = round(rows / record['wall_seconds'], 1)
+                if mode == 'sequential':
+                    sequential_seconds = record['wall_seconds']
+                if sequential_seconds:
+                    record['speedup'] = round(sequential_seconds / record['wall_seconds'], 3)
+            except Exception as e:
+                record.update({'status': 'error', 'error': str(e)})
+            results.append(record)
+            echo(_format_record(record))
+
+    return {
+        'benchmark': 'step4_ingest',
+        'schema_version': SCHEMA_VERSION,
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'git': git_revision(),
+        'environment': environment(),
+        'config': {
+            'building_counts': building_counts,
+            'windows_per_file': windows_per_file,
+            'modes': modes,
+            'workers': workers,
+            'repeats': repeats,
+            'seed': seed
+        },
+        'results': results
+    }
+
+
+def _format_record(record: Dict[str, Any]) -> str:
+    if record.get('status') != 'ok':
+        return f"{record['case_id']:<20} {record.get('status')}: {record.get('error', '')}"
+    return (f"{record['case_id']:<20} {record['rows_per_second']:>12,.0f} rows/s  "
+            f"{record['wall_seconds']:>8.2f}s  x{record.get('speedup', '-'):<6}  "
+            f"workers {record['workers']}  startup {record['startup_seconds']:.2f}s")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Step 4 multi-file ingestion benchmark")
+    parser.add_argument('--buildings', type=int, nargs='+', default=DEFAULT_BUILDING_COUNTS,
+                        help="Building counts to run (two files per building)")
+    parser.add_argument('--windows-per-file', type=int, default=DEFAULT_WINDOWS_PER_FILE)
+    parser.add_argument('--modes', nargs='+', choices=list(MODES), default=list(MODES))
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="Upper bound on threads / processes (default: CPU count)")
+    parser.add_argument('--repeats', type=int, default=1, help="Timed runs per case; the best is reported")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', help="Report path (default: benchmarks/results/ingest-<commit>.json)")
+    args = parser.parse_args(argv)
+
+    report = run_benchmark(
+        building_counts=args.buildings, windows_per_file=args.windows_per_file, modes=args.modes,
+        workers=args.workers, repeats=args.repeats, seed=args.seed
+    )
+
+    commit = (report['git'].get('commit') or 'nogit')[:10]
+    suffix = '-dirty' if report['git'].get('dirty') else ''
+    output = args.output or os.path.join(RESULTS_DIR, f"ingest-{commit}{suffix}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as report_file:
+        json.dump(report, report_file, indent=2)
+    print(f"Report written to {output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,429 @@
+"""
+Step 5 Radiation Benchmark
+Runs every radiation engine at each precision over deterministic synthetic
+buildings and records throughput, peak memory and deviation from an hourly
+reference as JSON that can be compared across commits.
+
+Usage:
+    python -m benchmarks.radiation_benchmark run [--sizes 100 1000] [--engines optimized advanced]
+    python -m benchmarks.radiation_benchmark compare baseline.json candidate.json
+
+Runs headless: no PostgreSQL connection or Streamlit session is needed. The
+analyzer classes only add database I/O around the code measured here, so the
+benchmark drives the RadiationEngine and AdvancedRadiationAnalyzer.calculate_radiation
+directly with in-memory elements.
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing import get_context
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from benchmarks.synthetic import generate_building, generate_tmy, subsample
+
+SCHEMA_VERSION = 2
+DEFAULT_SIZES = [100, 1000, 10000, 100000]
+DEFAULT_REFERENCE_SAMPLE = 200
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results')
+
+OPTIMIZED_PRECISIONS = ["Hourly", "Daily Peak", "Monthly Average", "Yearly Average"]
+
+# Sampled hours per element in AdvancedRadiationAnalyzer.calculate_radiation
+ADVANCED_TIME_STEPS = {"Hourly": 4015, "Daily Peak": 365, "Monthly Average": 12, "Yearly Average": 4}
+
+# engine name -> precisions benchmarked and the hourly reference its results are compared to
+ENGINES = {
+    'ultra_fast': {'precisions': ["Simple", "Advanced", "Weekly"], 'reference': 'optimized'},
+    'optimized': {'precisions': OPTIMIZED_PRECISIONS, 'reference': 'optimized'},
+    'optimized_cached': {'precisions': OPTIMIZED_PRECISIONS, 'reference': 'optimized'},
+    'advanced': {'precisions': OPTIMIZED_PRECISIONS, 'reference': 'advanced'}
+}
+
+# Largest building size run per engine and precision unless --no-size-caps is given
+DEFAULT_SIZE_CAPS = {
+    ('optimized', 'Hourly'): 10000,
+    ('optimized_cached', 'Hourly'): 10000,
+    ('advanced', 'Hourly'): 1000,
+    ('advanced', '*'): 10000
+}
+
+
+def size_cap(engine: str, precision: str) -> Optional[int]:
+    return DEFAULT_SIZE_CAPS.get((engine, precision), DEFAULT_SIZE_CAPS.get((engine, '*')))
+
+
+def calculate(engine: str, precision: str, elements: List[Dict], walls: List[Dict],
+              tmy_data: List[Dict], latitude: float, longitude: float) -> Dict[str, Any]:
+    """
+    Run one engine over elements.
+
+    Returns:
+        {'radiation': {element_id: kWh/m²/year}, 'time_steps': int,
+         'clamped': [element_id, ...]}
+    """
+    if engine == 'advanced':
+        from services.advanced_radiation_analyzer import AdvancedRadiationAnalyzer
+
+        analyzer = AdvancedRadiationAnalyzer(project_id=0)
+        results = analyzer.calculate_radiation(
+            elements, tmy_data, latitude, longitude, precision, walls_data=walls
+        )
+        return {
+            'radiation': {result['element_id']: float(result['annual_radiation']) for result in results},
+            'time_steps': ADVANCED_TIME_STEPS.get(precision),
+            'clamped': []
+        }
+
+    from services.radiation_engine import (
+        ENGINE_OPTIMIZED, ENGINE_ULTRA_FAST, RadiationEngine, RadiationEngineConfig, apply_realistic_bounds
+    )
+
+    cache = None
+    if engine == 'optimized_cached':
+        from services.radiation_cache import RadiationResultCache
+        cache = RadiationResultCache()
+
+    # Unbounded so deviation compares what the engines calculate: apply_realistic_bounds
+    # lifts many sampled and reference values to the same orientation floor. Elements
+    # it would change are listed as clamped
+    config = RadiationEngineConfig(
+        engine=ENGINE_ULTRA_FAST if engine == 'ultra_fast' else ENGINE_OPTIMIZED,
+        precision=precision,
+        calculation_mode="advanced",  # honour the requested precision
+        realistic_bounds=False
+    )
+    result = RadiationEngine(config, cache=cache).run(latitude, longitude, tmy_data, elements=elements)
+    clamped = [
+        element['element_id'] for element in elements
+        if element['element_id'] in result.element_radiation
+        and apply_realistic_bounds(result.element_radiation[element['element_id']],
+                                   element['orientation'], element['azimuth'])
+        != result.element_radiation[element['element_id']]
+    ]
+    return {'radiation': dict(result.element_radiation), 'time_steps': result.time_steps_used,
+            'cache_stats': result.cache_stats, 'clamped': clamped}
+
+
+def compute_reference(engine: str, elements: List[Dict], walls: List[Dict], tmy_data: List[Dict],
+                      latitude: float, longitude: float) -> Dict[str, Any]:
+    """Hourly results (as returned by calculate) for the reference subsample of an engine family."""
+    return calculate(ENGINES[engine]['reference'], "Hourly", elements, walls,
+                     tmy_data, latitude, longitude)
+
+
+def deviation(outcome: Dict[str, Any], reference: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Relative deviation (%) of an outcome's unbounded values from the reference over
+    shared, non-zero elements, plus the share (%) of compared elements that
+    apply_realistic_bounds would clamp in either run. The deviation statistics are
+    None when the reference has no non-zero values.
+    """
+    values, reference_values = outcome['radiation'], reference['radiation']
+    compared = [key for key in reference_values if key in values]
+    if not compared:
+        return None
+    clamped = set(outcome.get('clamped', ())) | set(reference.get('clamped', ()))
+    result = {
+        'sample_size': 0,
+        'clamped_pct': round(100.0 * sum(key in clamped for key in compared) / len(compared), 1),
+        'mean_abs_pct': None,
+        'max_abs_pct': None,
+        'bias_pct': None
+    }
+    shared = [key for key in compared if reference_values[key]]
+    if shared:
+        ref = np.array([reference_values[key] for key in shared], dtype=float)
+        got = np.array([values[key] for key in shared], dtype=float)
+        relative = (got - ref) / ref * 100
+        result.update({
+            'sample_size': len(shared),
+            'mean_abs_pct': round(float(np.mean(np.abs(relative))), 3),
+            'max_abs_pct': round(float(np.max(np.abs(relative))), 3),
+            'bias_pct': round(float(np.mean(relative)), 3)
+        })
+    return result
+
+
+def _rss_mb() -> Optional[float]:
+    """Current resident set size (Linux only)."""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024 ** 2
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 ** 2 if sys.platform == 'darwin' else peak / 1024
+
+
+def _import_engines():
+    """Import engine modules up front so import time is not measured."""
+    import services.advanced_radiation_analyzer  # noqa: F401
+    import services.radiation_engine  # noqa: F401
+
+
+def run_reference(case: Dict[str, Any]) -> Dict[str, Any]:
+    """Hourly reference results for the case's subsample (see run_case)."""
+    logging.getLogger('streamlit').setLevel(logging.ERROR)
+    building = generate_building(case['elements'], **case['building'])
+    tmy_data = generate_tmy(case['latitude'], case['longitude'], seed=case['building']['seed'])
+    return compute_reference(case['engine'], subsample(building['elements'], case['reference_sample']),
+                             building['walls'], tmy_data, case['latitude'], case['longitude'])
+
+
+def run_case(case: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Measure one engine / precision / size combination.
+
+    Meant to run in a fresh process so the peak memory belongs to this case only.
+    Inputs are regenerated from the seed rather than pickled across.
+    """
+    logging.getLogger('streamlit').setLevel(logging.ERROR)
+    _import_engines()
+
+    building = generate_building(case['elements'], **case['building'])
+    tmy_data = generate_tmy(case['latitude'], case['longitude'], seed=case['building']['seed'])
+    baseline_rss = _rss_mb()
+
+    start = time.perf_counter()
+    outcome = calculate(case['engine'], case['precision'], building['elements'], building['walls'],
+                        tmy_data, case['latitude'], case['longitude'])
+    wall_seconds = time.perf_counter() - start
+
+    peak_rss = _peak_rss_mb()
+    computed = len(outcome['radiation'])
+    metrics = {
+        'status': 'ok' if computed else 'error',
+        'computed_elements': computed,
+        'time_steps': outcome.get('time_steps'),
+        'wall_seconds': round(wall_seconds, 4),
+        'elements_per_second': round(computed / wall_seconds, 2) if wall_seconds > 0 else None,
+        'peak_rss_mb': round(peak_rss, 1) if peak_rss is not None else None,
+        'peak_rss_delta_mb': round(peak_rss - baseline_rss, 1)
+        if peak_rss is not None and baseline_rss is not None else None,
+        'deviation': deviation(outcome, case['reference']) if case.get('reference') else None
+    }
+    if outcome.get('cache_stats'):
+        metrics['cache_hit_rate'] = round(outcome['cache_stats'].get('element_hit_rate', 0.0), 4)
+    if not computed:
+        metrics['error'] = "No element results"
+    return metrics
+
+
+def _execute(function, case: Dict[str, Any], in_process: bool):
+    if in_process:
+        return function(case)
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context('spawn')) as executor:
+        return executor.submit(function, case).result()
+
+
+def git_revision() -> Dict[str, Any]:
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=root, capture_output=True,
+                                text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=root,
+                                    capture_output=True, text=True, check=True).stdout.strip())
+        return {'commit': commit, 'dirty': dirty}
+    except (OSError, subprocess.CalledProcessError):
+        return {'commit': None, 'dirty': None}
+
+
+def environment() -> Dict[str, Any]:
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count()
+    }
+
+
+def run_benchmark(sizes: List[int], engines: List[str], precisions: Optional[List[str]] = None,
+                  azimuth_distribution: str = 'cardinal', levels: int = 10, walls_per_facade: int = 2,
+                  seed: int = 42, latitude: float = 52.52, longitude: float = 13.405,
+                  reference_sample: int = DEFAULT_REFERENCE_SAMPLE, size_caps: bool = True,
+                  in_process: bool = False, echo=print) -> Dict[str, Any]:
+    """Run all requested cases and return the JSON report structure."""
+    building_options = {
+        'azimuth_distribution': azimuth_distribution,
+        'levels': levels,
+        'walls_per_facade': walls_per_facade,
+        'seed': seed
+    }
+    # The engines' fallback corrections use hash(); fix the seed so every case
+    # process, including the reference runs, sees the same values
+    os.environ.setdefault('PYTHONHASHSEED', str(seed))
+    references = {}
+    results = []
+
+    for size in sizes:
+        for engine in engines:
+            for precision in ENGINES[engine]['precisions']:
+                if precisions and precision not in precisions:
+                    continue
+                case_id = f"{engine}/{precision}/{size}"
+                record = {'case_id': case_id, 'engine': engine, 'precision': precision, 'elements': size}
+
+                cap = size_cap(engine, precision)
+                if size_caps and cap is not None and size > cap:
+                    record.update({'status': 'skipped', 'reason': f"size cap {cap}"})
+                    results.append(record)
+                    echo(f"{case_id:<40} skipped (size cap {cap})")
+                    continue
+
+                reference_engine = ENGINES[engine]['reference']
+                case = {
+                    'engine': engine, 'precision': precision, 'elements': size,
+                    'building': building_options, 'latitude': latitude, 'longitude': longitude,
+                    'reference_sample': reference_sample
+                }
+                try:
+                    if (reference_engine, size) not in references and reference_sample:
+                        references[(reference_engine, size)] = _execute(run_reference, case, in_process)
+                    case['reference'] = references.get((reference_engine, size))
+                    record.update(_execute(run_case, case, in_process))
+                except Exception as e:
+                    record.update({'status': 'error', 'error': str(e)})
+                record['reference'] = f"{reference_engine}/Hourly"
+                results.append(record)
+                echo(_format_record(record))
+
+    return {
+        'benchmark': 'step5_radiation',
+        'schema_version': SCHEMA_VERSION,
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'git': git_revision(),
+        'environment': environment(),
+        'config': {
+            'sizes': sizes,
+            'engines': engines,
+            'precisions': precisions,
+            'building': building_options,
+            'latitude': latitude,
+            'longitude': longitude,
+            'reference_sample': reference_sample,
+            'python_hash_seed': os.environ.get('PYTHONHASHSEED'),
+            'size_caps': {f"{engine}/{precision}": cap for (engine, precision), cap in DEFAULT_SIZE_CAPS.items()}
+            if size_caps else None
+        },
+        'results': results
+    }
+
+
+def _format_record(record: Dict[str, Any]) -> str:
+    if record.get('status') != 'ok':
+        return f"{record['case_id']:<40} {record.get('status')}: {record.get('error', record.get('reason', ''))}"
+    deviation_text = "-"
+    if record.get('deviation'):
+        measured = record['deviation']
+        if measured['mean_abs_pct'] is not None:
+            deviation_text = f"{measured['mean_abs_pct']:.2f}% (max {measured['max_abs_pct']:.2f}%)"
+        deviation_text += f", clamped {measured['clamped_pct']:.0f}%"
+    memory = record.get('peak_rss_mb')
+    return (f"{record['case_id']:<40} {record['elements_per_second']:>12,.1f} el/s  "
+            f"{record['wall_seconds']:>9.2f}s  peak {memory if memory is not None else '-':>8} MB  "
+            f"dev {deviation_text}")
+
+
+def default_output_path(report: Dict[str, Any]) -> str:
+    commit = (report['git'].get('commit') or 'nogit')[:10]
+    suffix = '-dirty' if report['git'].get('dirty') else ''
+    return os.path.join(RESULTS_DIR, f"radiation-{commit}{suffix}.json")
+
+
+def compare_reports(baseline: Dict[str, Any], candidate: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Per case throughput ratio, memory and deviation changes between two reports."""
+    baseline_cases = {record['case_id']: record for record in baseline.get('results', [])}
+    rows = []
+    for record in candidate.get('results', []):
+        before = baseline_cases.get(record['case_id'])
+        if not before or before.get('status') != 'ok' or record.get('status') != 'ok':
+            continue
+        row = {'case_id': record['case_id']}
+        if before.get('elements_per_second') and record.get('elements_per_second'):
+            row['speedup'] = round(record['elements_per_second'] / before['elements_per_second'], 3)
+        if before.get('peak_rss_mb') is not None and record.get('peak_rss_mb') is not None:
+            row['peak_rss_change_mb'] = round(record['peak_rss_mb'] - before['peak_rss_mb'], 1)
+        if (before.get('deviation') or {}).get('mean_abs_pct') is not None and \
+                (record.get('deviation') or {}).get('mean_abs_pct') is not None:
+            row['mean_abs_pct_change'] = round(
+                record['deviation']['mean_abs_pct'] - before['deviation']['mean_abs_pct'], 3
+            )
+        rows.append(row)
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Step 5 radiation engine benchmark")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help="Run the benchmark and write a JSON report")
+    run_parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    run_parser.add_argument('--engines', nargs='+', choices=list(ENGINES), default=list(ENGINES))
+    run_parser.add_argument('--precisions', nargs='+', default=None,
+                            help="Limit to these precision names (default: all per engine)")
+    run_parser.add_argument('--azimuth-distribution', default='cardinal',
+                            choices=['cardinal', 'south_heavy', 'east_west', 'uniform'])
+    run_parser.add_argument('--levels', type=int, default=10)
+    run_parser.add_argument('--walls-per-facade', type=int, default=2)
+    run_parser.add_argument('--seed', type=int, default=42)
+    run_parser.add_argument('--reference-sample', type=int, default=DEFAULT_REFERENCE_SAMPLE,
+                            help="Elements compared against the hourly reference (0 disables)")
+    run_parser.add_argument('--no-size-caps', action='store_true',
+                            help="Run slow engine/precision combinations at every size")
+    run_parser.add_argument('--in-process', action='store_true',
+                            help="Run cases in this process (faster, peak memory is cumulative)")
+    run_parser.add_argument('--output', help="Report path (default: benchmarks/results/radiation-<commit>.json)")
+
+    compare_parser = commands.add_parser('compare', help="Compare two JSON reports")
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('candidate')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'compare':
+        with open(args.baseline) as baseline_file, open(args.candidate) as candidate_file:
+            rows = compare_reports(json.load(baseline_file), json.load(candidate_file))
+        for row in rows:
+            print(f"{row['case_id']:<40} speedup {row.get('speedup', '-'):>8}  "
+                  f"peak Δ {row.get('peak_rss_change_mb', '-'):>8} MB  "
+                  f"deviation Δ {row.get('mean_abs_pct_change', '-')}")
+        return 0
+
+    report = run_benchmark(
+        sizes=args.sizes, engines=args.engines, precisions=args.precisions,
+        azimuth_distribution=args.azimuth_distribution, levels=args.levels,
+        walls_per_facade=args.walls_per_facade, seed=args.seed,
+        reference_sample=args.reference_sample, size_caps=not args.no_size_caps,
+        in_process=args.in_process
+    )
+    output = args.output or default_output_path(report)
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as report_file:
+        json.dump(report, report_file, indent=2)
+    print(f"Report written to {output}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
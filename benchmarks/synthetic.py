@@ -0,0 +1,191 @@
+"""
+Deterministic synthetic buildings, Step 4 upload CSVs and TMY data for benchmarks.
+Everything is generated from a seed so runs on different commits see identical inputs.
+"""
+
+import csv
+import io
+import math
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+
+# Named azimuth distributions: {facade azimuth: share of windows}
+AZIMUTH_DISTRIBUTIONS = {
+    'cardinal': {0.0: 0.25, 90.0: 0.25, 180.0: 0.25, 270.0: 0.25},
+    'south_heavy': {0.0: 0.1, 90.0: 0.2, 180.0: 0.5, 270.0: 0.2},
+    'east_west': {90.0: 0.5, 270.0: 0.5}
+}
+
+
+def azimuth_to_orientation(azimuth: float) -> str:
+    """Cardinal orientation label, matching the Step 5 analyzers."""
+    azimuth = azimuth % 360
+    if 315 <= azimuth or azimuth < 45:
+        return "North"
+    elif 45 <= azimuth < 135:
+        return "East"
+    elif 135 <= azimuth < 225:
+        return "South"
+    return "West"
+
+
+def _sample_azimuths(rng: np.random.Generator, count: int,
+                     distribution: Union[str, Dict[float, float]], jitter: float) -> np.ndarray:
+    """Draw window azimuths from a named or explicit distribution."""
+    if distribution == 'uniform':
+        return rng.uniform(0, 360, count)
+
+    weights = AZIMUTH_DISTRIBUTIONS[distribution] if isinstance(distribution, str) else distribution
+    facades = np.array(list(weights.keys()), dtype=float)
+    shares = np.array(list(weights.values()), dtype=float)
+    chosen = rng.choice(facades, size=count, p=shares / shares.sum())
+    if jitter:
+        chosen = chosen + rng.uniform(-jitter, jitter, count)
+    return np.mod(chosen, 360)
+
+
+def generate_building(window_count: int, azimuth_distribution: Union[str, Dict[float, float]] = 'cardinal',
+                      levels: int = 10, walls_per_facade: int = 2, azimuth_jitter: float = 0.0,
+                      seed: int = 42) -> Dict[str, List[Dict]]:
+    """
+    Generate a synthetic building in the shape Step 5 reads from building_elements.
+
+    Args:
+        window_count: Number of PV suitable windows
+        azimuth_distribution: 'cardinal', 'south_heavy', 'east_west', 'uniform'
+            or an explicit {azimuth: weight} mapping
+        levels: Number of building levels the windows are spread over
+        walls_per_facade: Walls generated per facade for shading calculations
+        azimuth_jitter: +/- degrees of random deviation from the facade azimuth
+        seed: Random seed
+
+    Returns:
+        {'elements': [...], 'walls': [...]}
+    """
+    rng = np.random.default_rng(seed)
+
+    azimuths = _sample_azimuths(rng, window_count, azimuth_distribution, azimuth_jitter)
+    level_numbers = rng.integers(0, max(1, levels), window_count)
+    glass_areas = np.round(rng.uniform(1.0, 4.0, window_count), 2)
+
+    elements = [
+        {
+            'element_id': f"W{index:06d}",
+            'azimuth': float(azimuth),
+            'orientation': azimuth_to_orientation(float(azimuth)),
+            'glass_area': float(area),
+            'building_level': f"Level {int(level)}",
+            'family': 'Synthetic Window',
+            'pv_suitable': True
+        }
+        for index, (azimuth, level, area) in enumerate(zip(azimuths, level_numbers, glass_areas))
+    ]
+
+    facades = sorted({round(float(azimuth) / 90) * 90 % 360 for azimuth in azimuths}) or [180]
+    walls = []
+    for facade in facades:
+        for wall_index in range(walls_per_facade):
+            walls.append({
+                'wall_id': f"WALL-{int(facade):03d}-{wall_index}",
+                'orientation': azimuth_to_orientation(facade),
+                'azimuth': float(facade),
+                'height': 3.5,
+                'level': f"Level {wall_index % max(1, levels)}",
+                'area': 35.0,
+                'wall_type': 'Synthetic Wall'
+            })
+
+    return {'elements': elements, 'walls': walls}
+
+
+def generate_upload_csvs(window_count: int, azimuth_distribution: Union[str, Dict[float, float]] = 'cardinal',
+                         levels: int = 10, walls_per_facade: int = 2, azimuth_jitter: float = 5.0,
+                         seed: int = 42) -> Dict[str, bytes]:
+    """
+    Synthetic building as the window and wall CSV files uploaded in Step 4.
+
+    Windows reference a host wall on their facade through HostWallId.
+
+    Returns:
+        {'windows': csv bytes, 'walls': csv bytes}
+    """
+    building = generate_building(window_count, azimuth_distribution, levels, walls_per_facade,
+                                 azimuth_jitter, seed)
+
+    walls = io.StringIO()
+    writer = csv.writer(walls)
+    writer.writerow(["ElementId", "Wall Type", "Length (m)", "Area (m²)", "Azimuth (°)", "Level"])
+    for wall in building['walls']:
+        writer.writerow([wall['wall_id'], wall['wall_type'], round(wall['area'] / wall['height'], 2),
+                         wall['area'], wall['azimuth'], wall['level']])
+
+    windows = io.StringIO()
+    writer = csv.writer(windows)
+    writer.writerow(["ElementId", "Family", "Glass Area (m²)", "Azimuth (°)", "Level", "HostWallId"])
+    for index, element in enumerate(building['elements']):
+        facade = round(element['azimuth'] / 90) * 90 % 360
+        writer.writerow([element['element_id'], element['family'], element['glass_area'],
+                         round(element['azimuth'], 2) % 360, element['building_level'],
+                         f"WALL-{int(facade):03d}-{index % max(1, walls_per_facade)}"])
+
+    return {'windows': windows.getvalue().encode('utf-8'), 'walls': walls.getvalue().encode('utf-8')}
+
+
+def generate_tmy(latitude: float = 52.52, longitude: float = 13.405, seed: int = 42,
+                 clearness: float = 0.65, year: int = 2023) -> List[Dict]:
+    """
+    Synthetic 8,760 hour TMY with clear-sky geometry and seeded cloudiness.
+
+    Records carry the field names found in stored TMY data (ghi/dni/dhi,
+    day_of_year, hour, month).
+    """
+    rng = np.random.default_rng(seed)
+    hours = np.arange(8760)
+    day_of_year = hours // 24 + 1
+    hour = hours % 24
+
+    # Solar geometry (Cooper declination, solar time from longitude)
+    declination = np.radians(23.45) * np.sin(2 * np.pi * (284 + day_of_year) / 365)
+    solar_time = hour + 0.5 + longitude / 15.0 - round(longitude / 15.0)
+    hour_angle = np.radians(15.0 * (solar_time - 12))
+    lat = math.radians(latitude)
+    sin_elevation = (np.sin(lat) * np.sin(declination) +
+                     np.cos(lat) * np.cos(declination) * np.cos(hour_angle))
+    sin_elevation = np.clip(sin_elevation, 0, None)
+
+    # Daily cloud cover with hourly variation
+    daily_clearness = np.clip(rng.normal(clearness, 0.2, 365), 0.1, 1.0)
+    hourly_clearness = np.clip(daily_clearness[day_of_year - 1] + rng.normal(0, 0.05, 8760), 0.05, 1.0)
+
+    extraterrestrial = 1367 * (1 + 0.033 * np.cos(2 * np.pi * day_of_year / 365))
+    ghi = extraterrestrial * sin_elevation * hourly_clearness * 0.85
+    diffuse_share = np.clip(1.0 - 0.9 * hourly_clearness, 0.15, 1.0)
+    dhi = ghi * diffuse_share
+    dni = np.where(sin_elevation > 0.02, (ghi - dhi) / np.maximum(sin_elevation, 0.02), 0.0)
+
+    dates = np.datetime64(f'{year}-01-01') + np.arange(365)
+    date_labels = [str(date) for date in dates]
+    months = np.array([date.astype(object).month for date in dates])[day_of_year - 1]
+
+    return [
+        {
+            'datetime': f"{date_labels[d - 1]}T{int(h):02d}:00:00",
+            'day_of_year': int(d),
+            'hour': int(h),
+            'month': int(m),
+            'ghi': round(float(g), 1),
+            'dni': round(float(n), 1),
+            'dhi': round(float(f), 1),
+            'temperature': 10.0
+        }
+        for d, h, m, g, n, f in zip(day_of_year, hour, months, ghi, dni, dhi)
+    ]
+
+
+def subsample(items: List, count: Optional[int]) -> List:
+    """Evenly spaced deterministic subset used for reference comparisons."""
+    if count is None or len(items) <= count:
+        return list(items)
+    step = len(items) / count
+    return [items[int(i * step)] for i in range(count)]
@@ -0,0 +1,246 @@
+"""
+Vectorized BIPV Specification Engine
+Capacity, annual yield, cost and specific yield of every element for every
+glass technology of a panel catalogue in one NumPy broadcast, for Step 6
+technology comparisons and per-element technology selection
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Mapping, Optional
+
+import numpy as np
+import pandas as pd
+
+from utils.calculations import calculate_panel_layouts_batch
+
+DEFAULT_GLASS_AREA = 1.5        # m², as the Step 6 element loop
+DEFAULT_RADIATION = 1000.0      # kWh/m²/year for elements without Step 5 results
+DEFAULT_AZIMUTH = 180.0
+
+# Objectives best_technology can rank by: metric -> (array attribute, higher is better)
+SELECTION_METRICS = {
+    'annual_energy_kwh': ('annual_energy_kwh', True),
+    'capacity_kw': ('capacity_kw', True),
+    'specific_yield_kwh_kw': ('specific_yield_kwh_kw', True),
+    'cost_per_kwh_eur': ('cost_per_kwh_eur', False),
+    'total_cost_eur': ('total_cost_eur', False)
+}
+
+
+@dataclass
+class ElementArrays:
+    """Step 6 element inputs as aligned arrays."""
+    element_ids: np.ndarray         # original element_id values (object)
+    glass_area: np.ndarray          # m²
+    annual_radiation: np.ndarray    # kWh/m²/year
+    azimuth: np.ndarray             # degrees
+    orientation: np.ndarray         # object
+    window_width: np.ndarray        # m, 0 where unknown
+    window_height: np.ndarray       # m, 0 where unknown
+
+    def __len__(self) -> int:
+        return len(self.element_ids)
+
+    @classmethod
+    def from_elements(cls, building_elements: Iterable[Mapping],
+                      radiation_lookup: Mapping[str, float]) -> 'ElementArrays':
+        """
+        Gather element dicts with the field fallbacks of
+        calculate_unified_bipv_specifications in a single pass.
+        """
+        element_ids, glass_area, radiation, azimuth, orientation = [], [], [], [], []
+        window_width, window_height = [], []
+        for element in building_elements:
+            element_id = element.get('element_id', element.get('Element ID'))
+            element_ids.append(element_id)
+            glass_area.append(element.get('glass_area', element.get('Glass Area (m²)', DEFAULT_GLASS_AREA)))
+            orientation.append(element.get('orientation', element.get('Orientation', 'Unknown')))
+            azimuth.append(element.get('azimuth', DEFAULT_AZIMUTH))
+            radiation.append(radiation_lookup.get(str(element_id), DEFAULT_RADIATION))
+            window_width.append(element.get('window_width') or 0)
+            window_height.append(element.get('window_height') or 0)
+
+        return cls(
+            element_ids=np.array(element_ids, dtype=object),
+            glass_area=_float_array(glass_area),
+            annual_radiation=_float_array(radiation),
+            azimuth=_float_array(azimuth),
+            orientation=np.array(orientation, dtype=object),
+            window_width=_float_array(window_width),
+            window_height=_float_array(window_height)
+        )
+
+
+@dataclass
+class TechnologyArrays:
+    """Panel catalogue entries as aligned arrays."""
+    names: List[str]
+    efficiency: np.ndarray
+    transparency: np.ndarray
+    power_density: np.ndarray       # W/m²
+    cost_per_m2: np.ndarray         # EUR/m²
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    @classmethod
+    def from_catalogue(cls, panel_database: Mapping[str, Mapping]) -> 'TechnologyArrays':
+        """Arrays from a get_bipv_panel_database() style {name: specs} mapping."""
+        names = list(panel_database)
+        specs = [panel_database[name] for name in names]
+        return cls(
+            names=names,
+            efficiency=_float_array([spec['efficiency'] for spec in specs]),
+            transparency=_float_array([spec.get('transparency', 0.0) for spec in specs]),
+            power_density=_float_array([spec['power_density'] for spec in specs]),
+            cost_per_m2=_float_array([spec['cost_per_m2'] for spec in specs])
+        )
+
+
+@dataclass
+class TechnologyComparison:
+    """Elements x technologies specification matrices."""
+    elements: ElementArrays
+    technologies: TechnologyArrays
+    coverage_factor: float
+    bipv_area: np.ndarray               # (elements,) m²
+    capacity_kw: np.ndarray             # (elements, technologies)
+    annual_energy_kwh: np.ndarray
+    total_cost_eur: np.ndarray
+    specific_yield_kwh_kw: np.ndarray
+    cost_per_kw_eur: np.ndarray
+    cost_per_kwh_eur: np.ndarray        # investment per annual kWh
+
+    def technology_index(self, technology: str) -> int:
+        return self.technologies.names.index(technology)
+
+    def best_technology(self, metric: str = 'annual_energy_kwh',
+                        max_cost_per_kwh: Optional[float] = None,
+                        min_transparency: Optional[float] = None) -> np.ndarray:
+        """
+        Column of the best technology per element for a SELECTION_METRICS objective.
+
+        Technologies above max_cost_per_kwh or below min_transparency (fraction)
+        are skipped; elements where every technology is skipped (or yields
+        nothing) get -1.
+        """
+        attribute, higher_is_better = SELECTION_METRICS[metric]
+        values = getattr(self, attribute).astype(float)
+        allowed = self.annual_energy_kwh > 0
+        if max_cost_per_kwh is not None:
+            allowed &= self.cost_per_kwh_eur <= max_cost_per_kwh
+        if min_transparency is not None:
+            allowed &= (self.technologies.transparency >= min_transparency)[np.newaxis, :]
+
+        if higher_is_better:
+            best = np.where(allowed, values, -np.inf).argmax(axis=1)
+        else:
+            best = np.where(allowed, values, np.inf).argmin(axis=1)
+        return np.where(allowed.any(axis=1), best, -1)
+
+    def technology_summary(self) -> pd.DataFrame:
+        """Project totals per technology."""
+        capacity = self.capacity_kw.sum(axis=0)
+        energy = self.annual_energy_kwh.sum(axis=0)
+        cost = self.total_cost_eur.sum(axis=0)
+        return pd.DataFrame({
+            'panel_technology': self.technologies.names,
+            'efficiency': self.technologies.efficiency,
+            'transparency': self.technologies.transparency,
+            'capacity_kw': capacity,
+            'annual_energy_kwh': energy,
+            'total_cost_eur': cost,
+            'specific_yield_kwh_kw': _ratio(energy, capacity),
+            'cost_per_kwh_eur': _ratio(cost, energy)
+        })
+
+    def selection_frame(self, best: np.ndarray) -> pd.DataFrame:
+        """Per-element specification of the technology chosen in best (from best_technology)."""
+        chosen = best >= 0
+        rows = np.flatnonzero(chosen)
+        columns = best[chosen]
+        names = np.array(self.technologies.names, dtype=object)
+        return pd.DataFrame({
+            'element_id': self.elements.element_ids[rows],
+            'orientation': self.elements.orientation[rows],
+            'panel_technology': names[columns],
+            'capacity_kw': self.capacity_kw[rows, columns],
+            'annual_energy_kwh': self.annual_energy_kwh[rows, columns],
+            'total_cost_eur': self.total_cost_eur[rows, columns],
+            'specific_yield_kwh_kw': self.specific_yield_kwh_kw[rows, columns]
+        })
+
+
+@dataclass
+class PanelLayout:
+    """Module geometry for laying panels out over window rectangles."""
+    panel_width: float              # m
+    panel_height: float             # m
+    spacing_factor: float = 0.05    # spacing as fraction of panel size
+    orientation: str = 'auto'       # 'portrait', 'landscape' or 'auto'
+
+    def solve(self, elements: ElementArrays, coverage_factor: float = 0.85) -> Dict[str, np.ndarray]:
+        """
+        Batched layouts over every element's window_width x window_height.
+
+        Returns calculate_panel_layouts_batch's arrays plus bipv_area: the active
+        panel area where the window dimensions are known, glass_area x
+        coverage_factor for elements without dimensions.
+        """
+        layout = calculate_panel_layouts_batch(
+            elements.window_width, elements.window_height, self.panel_width, self.panel_height,
+            self.spacing_factor, self.orientation
+        )
+        measured = (elements.window_width > 0) & (elements.window_height > 0)
+        layout['measured'] = measured
+        layout['bipv_area'] = np.where(measured, layout['active_area'],
+                                       elements.glass_area * float(coverage_factor))
+        return layout
+
+
+def compare_technologies(elements: ElementArrays, technologies: TechnologyArrays,
+                         coverage_factor: float = 0.85,
+                         bipv_area: Optional[np.ndarray] = None) -> TechnologyComparison:
+    """
+    Specifications of every element with every technology.
+
+    The BIPV area is glass_area x coverage_factor unless bipv_area (e.g. from
+    PanelLayout.solve) is given. The arithmetic follows
+    calculate_unified_bipv_specifications operation by operation, so a column
+    equals that function's result for the technology.
+    """
+    if bipv_area is None:
+        bipv_area = elements.glass_area * float(coverage_factor)
+    area = bipv_area[:, np.newaxis]
+
+    capacity_kw = area * technologies.power_density[np.newaxis, :] / 1000.0
+    specific_yield_kwh_m2 = elements.annual_radiation[:, np.newaxis] * technologies.efficiency[np.newaxis, :]
+    annual_energy_kwh = area * specific_yield_kwh_m2
+    total_cost_eur = area * technologies.cost_per_m2[np.newaxis, :]
+
+    return TechnologyComparison(
+        elements=elements,
+        technologies=technologies,
+        coverage_factor=coverage_factor,
+        bipv_area=bipv_area,
+        capacity_kw=capacity_kw,
+        annual_energy_kwh=annual_energy_kwh,
+        total_cost_eur=total_cost_eur,
+        specific_yield_kwh_kw=_ratio(annual_energy_kwh, capacity_kw),
+        cost_per_kw_eur=_ratio(total_cost_eur, capacity_kw),
+        cost_per_kwh_eur=_ratio(total_cost_eur, annual_energy_kwh)
+    )
+
+
+def _float_array(values) -> np.ndarray:
+    """float() of every value, raising on values float() rejects."""
+    return np.array([float(value) for value in values], dtype=float)
+
+
+def _ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    """numerator / denominator where the denominator is positive, else 0."""
+    numerator = np.asarray(numerator, dtype=float)
+    denominator = np.asarray(denominator, dtype=float)
+    result = np.zeros(np.broadcast(numerator, denominator).shape)
+    np.divide(numerator, denominator, out=result, where=denominator > 0)
+    return result
@@ -0,0 +1,139 @@
+"""
+Batch demand forecasting
+25-year monthly demand forecasts for a portfolio of buildings from a
+(buildings x months) consumption matrix: vectorized least-squares trends,
+broadcast seasonal factors and noise from per-building random generators
+"""
+
+from dataclasses import dataclass
+from typing import Mapping, Optional, Sequence, Union
+
+import numpy as np
+
+from core.lifetime import compound_factors
+from core.load_profiles import seasonal_factors as occupancy_seasonal_factors
+
+FORECAST_YEARS = 25
+DEFAULT_ANNUAL_CONSUMPTION = 300000     # kWh, buildings without history
+DEFAULT_GROWTH_RATE = 0.015             # less than a year of history
+DEFAULT_TREND_GROWTH_RATE = 0.01        # a year of history with no consumption
+GROWTH_RATE_BOUNDS = (-0.005, 0.02)     # educational buildings typically grow 0.5-2 %/year
+MAX_GROWTH_MULTIPLE = 5.0               # cap on forecast annual consumption vs base
+HISTORY_ADJUSTMENT_STRENGTH = 0.1       # occupancy modifier weight on measured seasonality
+NOISE_AMPLITUDE = 0.05                  # ±2.5 % monthly variation
+DEFAULT_SEED = 42
+
+# Seasonal pattern for educational buildings without a year of history or occupancy pattern
+DEFAULT_SEASONAL_FACTORS = np.array([1.1, 1.05, 1.0, 0.95, 0.9, 0.8, 0.75, 0.8, 0.95, 1.0, 1.05, 1.1])
+
+
+@dataclass
+class BatchForecast:
+    """Forecasts of every building; row order follows the consumption matrix."""
+    monthly: np.ndarray             # (buildings, years, 12) kWh
+    base_consumption: np.ndarray    # (buildings,) annual kWh
+    growth_rate: np.ndarray         # (buildings,) annual
+    seasonal_factors: np.ndarray    # (buildings, 12)
+
+    @property
+    def annual(self) -> np.ndarray:
+        """(buildings, years) annual kWh."""
+        return self.monthly.sum(axis=2)
+
+    def __len__(self) -> int:
+        return len(self.monthly)
+
+
+def building_generators(count: int, seed: Optional[int] = DEFAULT_SEED) -> list:
+    """One independent Generator per building, reproducible from a single seed."""
+    return [np.random.default_rng(child) for child in np.random.SeedSequence(seed).spawn(count)]
+
+
+def _history_adjustment(modifiers: Optional[Mapping]) -> np.ndarray:
+    """Mild (12,) occupancy adjustment of measured seasonal factors."""
+    if not modifiers:
+        return np.ones(12)
+    adjustment = 1.0 + (occupancy_seasonal_factors(modifiers) - 1.0) * HISTORY_ADJUSTMENT_STRENGTH
+    if 'Year-Round' not in modifiers.get('description', ''):
+        adjustment = adjustment * (1.0 + (modifiers.get('annual_factor', 1.0) - 1.0) * 0.05)
+    return adjustment
+
+
+def _pattern_factors(modifiers: Optional[Mapping]) -> np.ndarray:
+    """(12,) seasonal factors for buildings without a year of history."""
+    if not modifiers:
+        return DEFAULT_SEASONAL_FACTORS
+    return occupancy_seasonal_factors(modifiers) * modifiers.get('annual_factor', 1.0)
+
+
+def forecast_demand_batch(consumption,
+                          occupancy_modifiers: Union[None, Mapping, Sequence[Optional[Mapping]]] = None,
+                          years: int = FORECAST_YEARS,
+                          generators: Optional[Sequence[np.random.Generator]] = None,
+                          seed: Optional[int] = DEFAULT_SEED) -> BatchForecast:
+    """
+    Forecast monthly demand of many buildings at once.
+
+    Args:
+        consumption: (buildings, months) monthly kWh; buildings with shorter
+            histories are padded with trailing NaN
+        occupancy_modifiers: Step 2 occupancy modifier dict for all buildings,
+            or one (or None) per building
+        generators: One np.random.Generator per building for the monthly
+            noise; by default spawned from seed, so a building's forecast does
+            not depend on the rest of the portfolio or on global RNG state
+
+    With at least 12 months the base is the first year's total, growth is the
+    least-squares monthly slope over the whole history (clipped to
+    GROWTH_RATE_BOUNDS) and seasonality is the measured first year, mildly
+    adjusted by the occupancy pattern. Shorter histories extrapolate their
+    mean and use DEFAULT_GROWTH_RATE with the pattern's seasonality.
+    """
+    consumption = np.atleast_2d(np.asarray(consumption, dtype=float))
+    buildings, months = consumption.shape
+    if isinstance(occupancy_modifiers, Mapping) or occupancy_modifiers is None:
+        occupancy_modifiers = [occupancy_modifiers] * buildings
+    if generators is None:
+        generators = building_generators(buildings, seed)
+
+    observed = ~np.isnan(consumption)
+    values = np.where(observed, consumption, 0.0)
+    counts = observed.sum(axis=1)
+    full_year = counts >= 12
+
+    # Base annual consumption
+    first_year = values[:, :12].sum(axis=1)
+    mean_monthly = np.divide(values.sum(axis=1), counts, out=np.zeros(buildings), where=counts > 0)
+    base = np.where(full_year, first_year, mean_monthly * 12)
+    base = np.where(counts > 0, base, DEFAULT_ANNUAL_CONSUMPTION)
+
+    # Least-squares slope of every building's history in one pass
+    x = np.where(observed, np.arange(months), 0.0)
+    sum_x, sum_y = x.sum(axis=1), values.sum(axis=1)
+    sum_xy, sum_x2 = (x * values).sum(axis=1), (x * x).sum(axis=1)
+    denominator = counts * sum_x2 - sum_x ** 2
+    slope = np.divide(counts * sum_xy - sum_x * sum_y, denominator,
+                      out=np.zeros(buildings), where=denominator != 0)
+    trend_growth = np.clip(np.divide(slope * 12, base, out=np.zeros(buildings), where=base > 0),
+                           *GROWTH_RATE_BOUNDS)
+    growth_rate = np.where(full_year, np.where(base > 0, trend_growth, DEFAULT_TREND_GROWTH_RATE),
+                           DEFAULT_GROWTH_RATE)
+
+    # Seasonal factors: measured first year where available, occupancy pattern otherwise
+    first_year_mean = np.where(first_year > 0, first_year / 12, 1.0)
+    measured = values[:, :12] / first_year_mean[:, np.newaxis] if months >= 12 else np.ones((buildings, 12))
+    history_adjustment = np.array([_history_adjustment(modifiers) for modifiers in occupancy_modifiers])
+    pattern = np.array([_pattern_factors(modifiers) for modifiers in occupancy_modifiers])
+    seasonal = np.where(full_year[:, np.newaxis], measured * history_adjustment, pattern)
+
+    annual = np.minimum(base[:, np.newaxis] * compound_factors(growth_rate, years),
+                        base[:, np.newaxis] * MAX_GROWTH_MULTIPLE)
+    noise = 1.0 + (np.stack([generator.random((years, 12)) for generator in generators]) - 0.5) * NOISE_AMPLITUDE
+    monthly = np.maximum(0.0, (annual / 12)[:, :, np.newaxis] * seasonal[:, np.newaxis, :] * noise)
+
+    return BatchForecast(
+        monthly=monthly,
+        base_consumption=base,
+        growth_rate=growth_rate,
+        seasonal_factors=seasonal
+    )
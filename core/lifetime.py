@@ -0,0 +1,159 @@
+"""
+Lifetime Projection
+Degradation, demand growth, price escalation and cash flows of every candidate
+solution over the system lifetime as (solutions x years x months) arrays, shared
+by Step 7 energy balance, Step 8 optimization and Step 9 financial analysis
+"""
+
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+
+DEFAULT_LIFETIME_YEARS = 25
+DEFAULT_DEGRADATION_RATE = 0.005    # 0.5 %/year, as calculate_annual_degradation
+
+
+def compound_factors(rate, years: int) -> np.ndarray:
+    """
+    (1 + rate) ** year for years 0 .. years - 1.
+
+    rate may be a scalar or a (solutions,) array; the result gets a trailing
+    years axis.
+    """
+    rate = np.asarray(rate, dtype=float)[..., np.newaxis]
+    return (1.0 + rate) ** np.arange(years)
+
+
+@dataclass
+class LifetimeProjection:
+    """Lifetime arrays; years index 0 is the first operating year."""
+    generation_kwh: np.ndarray          # (solutions, years, 12)
+    demand_kwh: Optional[np.ndarray]    # (solutions, years, 12), None without demand
+    self_consumption_kwh: np.ndarray    # (solutions, years, 12)
+    export_kwh: np.ndarray              # (solutions, years, 12)
+    savings_eur: np.ndarray             # (solutions, years, 12) avoided import + feed-in revenue
+    operating_cost_eur: np.ndarray      # (solutions, years) maintenance and inverter replacement
+    cash_flows: np.ndarray              # (solutions, years + 1), index 0 is the net investment
+    cumulative_cash_flows: np.ndarray   # (solutions, years + 1)
+
+    @property
+    def years(self) -> int:
+        return self.generation_kwh.shape[1]
+
+    @property
+    def annual_generation(self) -> np.ndarray:
+        return self.generation_kwh.sum(axis=2)
+
+    @property
+    def annual_savings(self) -> np.ndarray:
+        return self.savings_eur.sum(axis=2)
+
+    @property
+    def lifetime_generation(self) -> np.ndarray:
+        return self.generation_kwh.sum(axis=(1, 2))
+
+    def npv(self, discount_rate) -> np.ndarray:
+        """Net present value per solution; discount_rate may be a scalar or (solutions,)."""
+        discount = compound_factors(discount_rate, self.years + 1)
+        return (self.cash_flows / discount).sum(axis=-1)
+
+    def payback_period(self) -> np.ndarray:
+        """
+        Years until the cumulative cash flow turns non-negative, interpolated
+        within the crossing year; NaN for solutions that never pay back.
+        """
+        cumulative = self.cumulative_cash_flows
+        paid_back = cumulative >= 0
+        crossing = paid_back.argmax(axis=1)
+        rows = np.arange(len(cumulative))
+
+        previous = np.maximum(crossing - 1, 0)
+        shortfall = -cumulative[rows, previous]
+        year_flow = self.cash_flows[rows, crossing]
+        fraction = np.divide(shortfall, year_flow, out=np.zeros(len(rows)), where=year_flow > 0)
+        period = np.where(crossing == 0, 0.0, previous + fraction)
+        return np.where(paid_back.any(axis=1), period, np.nan)
+
+
+def project_lifetime(generation_kwh, initial_cost, electricity_price,
+                     years: int = DEFAULT_LIFETIME_YEARS,
+                     degradation_rate=0.0,
+                     monthly_demand=None,
+                     demand_growth_rate=0.0,
+                     self_consumption_kwh=None,
+                     price_escalation=0.0,
+                     feed_in_tariff=0.0,
+                     maintenance_cost_rate=0.0,
+                     inverter_replacement_year: Optional[int] = None,
+                     inverter_replacement_cost_ratio=0.0,
+                     tax_credit=0.0,
+                     rebate_amount=0.0) -> LifetimeProjection:
+    """
+    Project every solution over its lifetime in one broadcast.
+
+    Args:
+        generation_kwh: (solutions, 12) first-year monthly generation, or
+            (solutions,) annual totals spread evenly over the months
+        initial_cost, electricity_price, rates: scalars or (solutions,) arrays
+        monthly_demand: (12,) or (solutions, 12) first-year demand; without it
+            all generation is valued at the electricity price
+        self_consumption_kwh: (solutions, 12) first-year self-consumption from
+            a finer (e.g. hourly) balance; later years scale it by the smaller
+            of the degradation and demand growth factors. Defaults to the
+            monthly min(generation, demand).
+
+    Year y (from 1) generation is degraded by (1 - degradation_rate) ** (y - 1),
+    demand grows by (1 + demand_growth_rate) ** (y - 1) and the import price
+    escalates by (1 + price_escalation) ** (y - 1). Cash flow 0 is the
+    investment net of rebate and tax credit; later cash flows are savings minus
+    maintenance (initial_cost x maintenance_cost_rate) and the inverter
+    replacement in its year.
+    """
+    generation = np.asarray(generation_kwh, dtype=float)
+    if generation.ndim == 1:
+        generation = np.repeat(generation[:, np.newaxis] / 12.0, 12, axis=1)
+    solutions = generation.shape[0]
+
+    def per_solution(value):
+        return np.broadcast_to(np.asarray(value, dtype=float), (solutions,))
+
+    initial_cost = per_solution(initial_cost)
+    degradation = compound_factors(-per_solution(degradation_rate), years)       # (solutions, years)
+    price = per_solution(electricity_price)[:, np.newaxis] * compound_factors(per_solution(price_escalation), years)
+    generation = generation[:, np.newaxis, :] * degradation[:, :, np.newaxis]
+
+    if monthly_demand is None:
+        demand = None
+        self_consumption = generation
+    else:
+        growth = compound_factors(per_solution(demand_growth_rate), years)
+        demand = np.broadcast_to(np.asarray(monthly_demand, dtype=float), (solutions, 12))
+        demand = demand[:, np.newaxis, :] * growth[:, :, np.newaxis]
+        if self_consumption_kwh is None:
+            self_consumption = np.minimum(generation, demand)
+        else:
+            scale = np.minimum(degradation, growth)[:, :, np.newaxis]
+            self_consumption = np.asarray(self_consumption_kwh, dtype=float)[:, np.newaxis, :] * scale
+    export = generation - self_consumption
+
+    savings = (self_consumption * price[:, :, np.newaxis]
+               + export * per_solution(feed_in_tariff)[:, np.newaxis, np.newaxis])
+
+    operating_cost = np.repeat((initial_cost * per_solution(maintenance_cost_rate))[:, np.newaxis], years, axis=1)
+    if inverter_replacement_year is not None and 1 <= inverter_replacement_year <= years:
+        operating_cost[:, inverter_replacement_year - 1] += initial_cost * per_solution(inverter_replacement_cost_ratio)
+
+    net_investment = initial_cost - per_solution(rebate_amount) - initial_cost * per_solution(tax_credit)
+    cash_flows = np.concatenate([-net_investment[:, np.newaxis], savings.sum(axis=2) - operating_cost], axis=1)
+
+    return LifetimeProjection(
+        generation_kwh=generation,
+        demand_kwh=demand,
+        self_consumption_kwh=self_consumption,
+        export_kwh=export,
+        savings_eur=savings,
+        operating_cost_eur=operating_cost,
+        cash_flows=cash_flows,
+        cumulative_cash_flows=np.cumsum(cash_flows, axis=1)
+    )
@@ -0,0 +1,180 @@
+"""
+Solar ephemeris cache
+Sun elevation / azimuth / zenith arrays per (rounded location, time grid, position
+model), computed once and shared by Step 3 TMY generation and the Step 5 analyzers.
+Kept in a bounded in-process LRU and optionally persisted as memory-mapped .npy files.
+"""
+
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from core.solar_math import (
+    calculate_solar_positions, calculate_solar_positions_iso, calculate_solar_positions_simple
+)
+from core.time_grids import TimeGrid
+
+logger = logging.getLogger(__name__)
+
+EPHEMERIS_CACHE_DIR_ENV = 'BIPV_EPHEMERIS_CACHE_DIR'
+DEFAULT_COORDINATE_DECIMALS = 4     # ~10 m
+DEFAULT_MAX_ENTRIES = 64
+
+# Position model name -> batch function(latitude, longitude, grid) returning (elevation, azimuth)
+POSITION_MODELS: Dict[str, Callable[[float, float, TimeGrid], Tuple[np.ndarray, np.ndarray]]] = {
+    # calculate_solar_position (radiation engines)
+    'standard': lambda lat, lon, grid: calculate_solar_positions(lat, lon, grid.day_of_year, grid.hour, grid.minute),
+    # calculate_solar_position_simple (Advanced analyzer)
+    'simple': lambda lat, lon, grid: calculate_solar_positions_simple(lat, lon, grid.day_of_year,
+                                                                      grid.hour + grid.minute / 60.0),
+    # calculate_solar_position_iso (Step 3 TMY generation)
+    'iso': lambda lat, lon, grid: calculate_solar_positions_iso(lat, lon, grid.day_of_year, grid.hour)
+}
+
+
+class SolarEphemeris:
+    """Read-only sun positions for every sample of one time grid at one location."""
+
+    def __init__(self, grid_key: str, latitude: float, longitude: float, model: str,
+                 elevation: np.ndarray, azimuth: np.ndarray):
+        self.grid_key = grid_key
+        self.latitude = latitude
+        self.longitude = longitude
+        self.model = model
+        self.elevation = elevation
+        self.azimuth = azimuth
+        self._lists = None
+
+    @property
+    def zenith(self) -> np.ndarray:
+        return 90.0 - self.elevation
+
+    def position_lists(self) -> Tuple[List[float], List[float]]:
+        """(elevations, azimuths) as Python lists for scalar per-sample loops, converted once."""
+        if self._lists is None:
+            self._lists = (np.asarray(self.elevation).tolist(), np.asarray(self.azimuth).tolist())
+        return self._lists
+
+    def position(self, index: int) -> Dict[str, float]:
+        """Position dict in the shape returned by the scalar solar_math functions."""
+        elevations, azimuths = self.position_lists()
+        return {'elevation': elevations[index], 'azimuth': azimuths[index],
+                'zenith': 90.0 - elevations[index]}
+
+    def __len__(self) -> int:
+        return len(self.elevation)
+
+
+class SolarEphemerisCache:
+    """
+    Bounded LRU of SolarEphemeris objects with an optional on-disk tier.
+
+    Locations are rounded to coordinate_decimals before computing, so every
+    caller at the same (rounded) site gets identical positions. Thread safe.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, directory: Optional[str] = None,
+                 coordinate_decimals: int = DEFAULT_COORDINATE_DECIMALS):
+        self.max_entries = max_entries
+        self.directory = directory
+        self.coordinate_decimals = coordinate_decimals
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'disk_hits': 0, 'computed': 0, 'evictions': 0}
+
+    def get(self, latitude: float, longitude: float, grid: TimeGrid, model: str = 'standard') -> SolarEphemeris:
+        if model not in POSITION_MODELS:
+            raise ValueError(f"Unknown solar position model: {model}")
+
+        latitude = round(float(latitude), self.coordinate_decimals)
+        longitude = round(float(longitude), self.coordinate_decimals)
+        key = (model, grid.key, latitude, longitude)
+
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self._stats['hits'] += 1
+                return self._entries[key]
+
+        ephemeris = self._load(key)
+        if ephemeris is None:
+            elevation, azimuth = POSITION_MODELS[model](latitude, longitude, grid)
+            ephemeris = SolarEphemeris(grid.key, latitude, longitude, model,
+                                       _read_only(elevation), _read_only(azimuth))
+            self._save(key, ephemeris)
+            with self._lock:
+                self._stats['computed'] += 1
+        else:
+            with self._lock:
+                self._stats['disk_hits'] += 1
+
+        with self._lock:
+            self._entries[key] = ephemeris
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+        return ephemeris
+
+    def _path(self, key) -> str:
+        model, grid_key, latitude, longitude = key
+        return os.path.join(self.directory, f"{model}-{grid_key}-{latitude:+.{self.coordinate_decimals}f}"
+                                            f"{longitude:+.{self.coordinate_decimals}f}.npy")
+
+    def _load(self, key) -> Optional[SolarEphemeris]:
+        if not self.directory:
+            return None
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            positions = np.load(path, mmap_mode='r')
+            return SolarEphemeris(key[1], key[2], key[3], key[0], positions[0], positions[1])
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable ephemeris file {path}: {e}")
+            return None
+
+    def _save(self, key, ephemeris: SolarEphemeris):
+        if not self.directory:
+            return
+        path = self._path(key)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(temp_path, 'wb') as handle:
+                np.save(handle, np.vstack([ephemeris.elevation, ephemeris.azimuth]))
+            os.replace(temp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not persist ephemeris to {path}: {e}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+        return stats
+
+
+def _read_only(array: np.ndarray) -> np.ndarray:
+    array = np.asarray(array, dtype=float)
+    array.setflags(write=False)
+    return array
+
+
+# Process-wide cache; set BIPV_EPHEMERIS_CACHE_DIR to persist positions between runs
+ephemeris_cache = SolarEphemerisCache(directory=os.environ.get(EPHEMERIS_CACHE_DIR_ENV) or None)
+
+
+def get_solar_ephemeris(latitude: float, longitude: float, grid: TimeGrid,
+                        model: str = 'standard') -> SolarEphemeris:
+    """Sun positions for grid at a site from the process-wide ephemeris cache."""
+    return ephemeris_cache.get(latitude, longitude, grid, model)
@@ -2,6 +2,7 @@
 Core mathematical functions and solar calculations for BIPV Optimizer
 """
 import math
+import numpy as np
 import streamlit as st
 from datetime import datetime, timedelta
 from typing import Tuple, List, Optional
@@ -51,6 +52,92 @@ def calculate_solar_position(latitude: float, longitude: float, timestamp: datet
     return max(0, elevation), azimuth % 360
 
 
+def calculate_solar_positions(latitude: float, longitude: float, day_of_year, hour, minute=0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Batch version of calculate_solar_position over arrays of sample times.
+
+    Args:
+        latitude: Latitude in degrees
+        longitude: Longitude in degrees
+        day_of_year: Array of days of year (1-366), e.g. TimeGrid.day_of_year
+        hour: Array of hours (0-23)
+        minute: Array of minutes (or a scalar)
+
+    Returns:
+        Tuple of (solar_elevation, solar_azimuth) arrays in degrees
+    """
+    lat_rad = math.radians(latitude)
+    day_of_year = np.asarray(day_of_year, dtype=float)
+    hour = np.asarray(hour, dtype=float)
+
+    declination = np.radians(23.45 * np.sin(np.radians(360 * (284 + day_of_year) / 365)))
+
+    time_correction = 4 * (longitude - 15 * hour)  # Simplified, as in calculate_solar_position
+    solar_time = hour + np.asarray(minute, dtype=float) / 60.0 + time_correction / 60.0
+    hour_angle = np.radians(15 * (solar_time - 12))
+
+    elevation = np.degrees(np.arcsin(np.clip(
+        np.sin(declination) * math.sin(lat_rad) +
+        np.cos(declination) * math.cos(lat_rad) * np.cos(hour_angle),
+        -1.0, 1.0
+    )))
+
+    azimuth = np.degrees(np.arctan2(
+        np.sin(hour_angle),
+        np.cos(hour_angle) * math.sin(lat_rad) - np.tan(declination) * math.cos(lat_rad)
+    )) + 180
+
+    return np.maximum(elevation, 0), np.mod(azimuth, 360)
+
+
+def calculate_solar_positions_simple(latitude: float, longitude: float, day_of_year, hour) -> Tuple[np.ndarray, np.ndarray]:
+    """Batch version of calculate_solar_position_simple; returns (elevation, azimuth) arrays."""
+    day_of_year = np.asarray(day_of_year, dtype=float)
+    hour_angle = np.radians(15 * (np.asarray(hour, dtype=float) - 12))
+    declination = np.radians(23.45 * np.sin(np.radians(360 * (284 + day_of_year) / 365)))
+    lat_rad = math.radians(latitude)
+
+    elevation = np.degrees(np.arcsin(np.clip(
+        np.sin(declination) * math.sin(lat_rad) +
+        np.cos(declination) * math.cos(lat_rad) * np.cos(hour_angle),
+        -1.0, 1.0
+    )))
+    azimuth = np.degrees(np.arctan2(
+        np.sin(hour_angle),
+        np.cos(hour_angle) * math.sin(lat_rad) - np.tan(declination) * math.cos(lat_rad)
+    )) + 180
+
+    return elevation, azimuth
+
+
+def calculate_solar_positions_iso(lat: float, lon: float, day_of_year, hour) -> Tuple[np.ndarray, np.ndarray]:
+    """Batch version of calculate_solar_position_iso; returns (elevation, azimuth) arrays."""
+    day_of_year = np.asarray(day_of_year, dtype=float)
+    declination = 23.45 * np.sin(np.radians(360 * (day_of_year - 81) / 365))
+
+    B_eq = np.radians(360 * (day_of_year - 81) / 364)
+    equation_of_time = 9.87 * np.sin(2 * B_eq) - 7.53 * np.cos(B_eq) - 1.5 * np.sin(B_eq)
+    solar_time = np.asarray(hour, dtype=float) + 0.5 + (equation_of_time + 4 * lon) / 60
+    hour_rad = np.radians(15 * (solar_time - 12))
+
+    lat_rad = math.radians(lat)
+    decl_rad = np.radians(declination)
+    sin_elevation = np.clip(math.sin(lat_rad) * np.sin(decl_rad) +
+                            math.cos(lat_rad) * np.cos(decl_rad) * np.cos(hour_rad), -1, 1)
+    elevation = np.degrees(np.arcsin(sin_elevation))
+
+    # Azimuth from north, clockwise; 0 with the sun below the horizon
+    cos_elevation = np.cos(np.radians(elevation))
+    daylight = elevation > 0
+    safe_cos = np.where(daylight, cos_elevation, 1.0)
+    sin_azimuth = np.clip(np.cos(decl_rad) * np.sin(hour_rad) / safe_cos, -1, 1)
+    cos_azimuth = np.clip((np.sin(decl_rad) * math.cos(lat_rad) -
+                           np.cos(decl_rad) * math.sin(lat_rad) * np.cos(hour_rad)) / safe_cos, -1, 1)
+    azimuth = np.where(daylight, np.mod(np.degrees(np.arctan2(sin_azimuth, cos_azimuth)), 360), 0.0)
+
+    return np.maximum(elevation, 0), azimuth
+
+
 def calculate_solar_position_simple(latitude: float, longitude: float, day_of_year: int, hour: float) -> dict:
     """
     Calculate solar position using simplified inputs (day/hour instead of datetime).
@@ -194,6 +281,43 @@ def _calculate_advanced_poa(dni: float, ghi: float, dhi: float, cos_incidence: f
     return max(0, poa_global)
 
 
+def calculate_irradiance_on_surfaces(dni, ghi, dhi, solar_elevation, solar_azimuth,
+                                     surface_azimuths, surface_tilt: float = 90) -> np.ndarray:
+    """
+    Batch version of calculate_irradiance_on_surface in "advanced" mode.
+
+    Args:
+        dni, ghi, dhi: Irradiance arrays in W/m², one value per time step
+        solar_elevation, solar_azimuth: Solar position arrays in degrees
+        surface_azimuths: Surface azimuths in degrees
+        surface_tilt: Surface tilt in degrees shared by all surfaces (90 = vertical)
+
+    Returns:
+        (surfaces x time steps) POA irradiance in W/m²
+    """
+    dni = np.asarray(dni, dtype=float)
+    ghi = np.asarray(ghi, dtype=float)
+    dhi = np.asarray(dhi, dtype=float)
+    solar_elevation = np.asarray(solar_elevation, dtype=float)
+    surface_azimuths = np.radians(np.asarray(surface_azimuths, dtype=float))[:, np.newaxis]
+    surf_tilt_rad = math.radians(surface_tilt)
+
+    zenith_rad = np.radians(90 - solar_elevation)
+    cos_incidence = np.maximum(0, (
+        np.sin(zenith_rad) * math.sin(surf_tilt_rad) *
+        np.cos(np.radians(np.asarray(solar_azimuth, dtype=float)) - surface_azimuths) +
+        np.cos(zenith_rad) * math.cos(surf_tilt_rad)
+    ))
+
+    # Missing DNI is estimated from GHI and DHI as in _calculate_advanced_poa
+    dni = np.where(dni > 0, dni, np.where(dhi > 0, np.maximum(0, ghi - dhi), ghi * 0.8))
+    poa = (dni * cos_incidence +
+           dhi * (1 + math.cos(surf_tilt_rad)) / 2 +
+           ghi * 0.2 * (1 - math.cos(surf_tilt_rad)) / 2)
+
+    return np.where(solar_elevation > 0, np.maximum(0, poa), 0.0)
+
+
 class SimpleMath:
     """Pure Python implementations for mathematical operations"""
     
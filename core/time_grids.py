@@ -0,0 +1,136 @@
+"""
+Precomputed sample time grids for radiation analysis
+Immutable NumPy arrays (datetime64, day of year, hour, month) per precision level,
+built once per process and shared by every analyzer
+"""
+
+import hashlib
+from datetime import datetime
+from functools import lru_cache
+from typing import Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+class TimeGrid:
+    """
+    Read-only set of sample times.
+
+    Iterating or indexing yields datetime objects, so a grid can stand in for the
+    datetime lists the radiation engines used before.
+    """
+
+    def __init__(self, name: str, times: np.ndarray, key: Optional[str] = None):
+        self.name = name
+        self.datetime64 = _read_only(np.asarray(times, dtype='datetime64[m]'))
+        # Identifies the grid contents, e.g. in solar ephemeris cache keys
+        self.key = key or f"{name}-{hashlib.sha1(self.datetime64.tobytes()).hexdigest()[:12]}"
+
+        days = self.datetime64.astype('datetime64[D]')
+        years = self.datetime64.astype('datetime64[Y]')
+        months = self.datetime64.astype('datetime64[M]')
+        minutes = (self.datetime64 - days).astype(int)
+
+        self.day_of_year = _read_only((days - years.astype('datetime64[D]')).astype(int) + 1)
+        self.month = _read_only((months - years.astype('datetime64[M]')).astype(int) + 1)
+        self.hour = _read_only(minutes // 60)
+        self.minute = _read_only(minutes % 60)
+        self._datetimes = None
+
+    @classmethod
+    def from_datetimes(cls, name: str, timestamps: Iterable[datetime]) -> 'TimeGrid':
+        return cls(name, np.array([np.datetime64(timestamp, 'm') for timestamp in timestamps],
+                                  dtype='datetime64[m]'))
+
+    def to_datetimes(self) -> Tuple[datetime, ...]:
+        """Python datetimes, converted once per grid."""
+        if self._datetimes is None:
+            self._datetimes = tuple(self.datetime64.astype(datetime).tolist())
+        return self._datetimes
+
+    def solar_positions(self, latitude: float, longitude: float) -> Tuple[np.ndarray, np.ndarray]:
+        """(elevation, azimuth) in degrees for every sample time, from the solar ephemeris cache."""
+        from core.solar_ephemeris import get_solar_ephemeris
+        ephemeris = get_solar_ephemeris(latitude, longitude, self)
+        return ephemeris.elevation, ephemeris.azimuth
+
+    def __len__(self) -> int:
+        return len(self.datetime64)
+
+    def __iter__(self):
+        return iter(self.to_datetimes())
+
+    def __getitem__(self, index):
+        return self.to_datetimes()[index]
+
+    def __repr__(self) -> str:
+        return f"TimeGrid({self.name!r}, {len(self)} samples)"
+
+
+def _read_only(array: np.ndarray) -> np.ndarray:
+    array.setflags(write=False)
+    return array
+
+
+def _dates(*month_days, year: int) -> np.ndarray:
+    return np.array([f"{year}-{month:02d}-{day:02d}" for month, day in month_days], dtype='datetime64[D]')
+
+
+def _at_hour(dates: np.ndarray, hour: int) -> np.ndarray:
+    return dates.astype('datetime64[m]') + np.timedelta64(hour * 60, 'm')
+
+
+def _hourly() -> np.ndarray:
+    # Daylight hours 08:00-18:00 on the first 365 days of 2024 (4,015 samples)
+    days = np.arange('2024-01-01', '2024-12-31', dtype='datetime64[D]')
+    hours = np.arange(8, 19) * 60
+    return (days.astype('datetime64[m]')[:, None] + hours.astype('timedelta64[m]')).ravel()
+
+
+def _daily_peak() -> np.ndarray:
+    return _at_hour(np.arange('2024-01-01', '2024-12-31', dtype='datetime64[D]'), 12)
+
+
+def _monthly(year: int) -> np.ndarray:
+    return _at_hour(_dates(*[(month, 15) for month in range(1, 13)], year=year), 12)
+
+
+GRID_BUILDERS = {
+    # Optimized engine sampling (base year 2024)
+    'hourly': _hourly,
+    'daily_peak': _daily_peak,
+    'monthly': lambda: _monthly(2024),
+    'seasonal': lambda: _at_hour(_dates((3, 20), (6, 21), (9, 22), (12, 21), year=2024), 12),
+    'ultra_fast': lambda: _at_hour(_dates((6, 21), (12, 21), (3, 20), (9, 22), year=2024), 12),
+    # Ultra-fast engine sampling (base year 2023)
+    'ultra_fast_simple': lambda: _at_hour(_dates((3, 21), (6, 21), (9, 21), (12, 21), year=2023), 12),
+    'ultra_fast_monthly': lambda: _monthly(2023),
+    'ultra_fast_weekly': lambda: np.datetime64('2023-01-01T00:00', 'm') + np.arange(52) * np.timedelta64(7 * 24 * 60, 'm'),
+    # Every hour of a TMY year (8,760 samples, record order)
+    'tmy_8760': lambda: np.arange('2023-01-01T00:00', '2024-01-01T00:00', 60, dtype='datetime64[m]')
+}
+
+
+@lru_cache(maxsize=None)
+def get_time_grid(name: str) -> TimeGrid:
+    """Shared grid for a named sampling scheme (see GRID_BUILDERS)."""
+    if name not in GRID_BUILDERS:
+        raise ValueError(f"Unknown time grid: {name}")
+    return TimeGrid(name, GRID_BUILDERS[name](), key=name)
+
+
+@lru_cache(maxsize=64)
+def day_hour_grid(days: Sequence[int], hours: Sequence[int], year: int = 2023) -> TimeGrid:
+    """Grid of every (day of year, hour) pair, day-major, e.g. Advanced analyzer samples."""
+    day_dates = np.datetime64(f'{year}-01-01', 'D') + np.asarray(days, dtype=int) - 1
+    minutes = np.asarray(hours, dtype=int) * 60
+    times = (day_dates.astype('datetime64[m]')[:, None] + minutes.astype('timedelta64[m]')).ravel()
+    return TimeGrid('day_hour', times)
+
+
+def as_time_grid(time_steps) -> TimeGrid:
+    """Accept a TimeGrid or any iterable of datetimes."""
+    if isinstance(time_steps, TimeGrid):
+        return time_steps
+    return TimeGrid.from_datetimes('custom', time_steps)
+
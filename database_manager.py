@@ -9,6 +9,7 @@ from psycopg2.extras import RealDictCursor
 import streamlit as st
 from datetime import datetime
 import json
+from services.building_topology import rebuild_topology_index
 
 class BIPVDatabaseManager:
     def __init__(self):
@@ -662,7 +663,9 @@ class BIPVDatabaseManager:
                         ))
                 
                 conn.commit()
-                return True
+            
+            rebuild_topology_index(self, project_id)
+            return True
                 
         except Exception as e:
             conn.rollback()
@@ -740,7 +743,9 @@ class BIPVDatabaseManager:
                             progress_callback(progress, "Saving window elements to database...")
                 
                 conn.commit()
-                return True
+            
+            rebuild_topology_index(self, project_id)
+            return True
                 
         except Exception as e:
             conn.rollback()
@@ -894,6 +899,50 @@ class BIPVDatabaseManager:
         finally:
             conn.close()
     
+    def append_element_radiation_batch(self, project_id, element_radiation_list, conn=None):
+        """Append one batch of element radiation rows without clearing existing results.
+
+        Used by the streaming Step 5 pipeline, which writes batches as they are computed.
+        Pass an open connection to reuse it across batches; it is committed but not closed.
+        """
+        if not element_radiation_list:
+            return True
+
+        owns_connection = conn is None
+        if owns_connection:
+            conn = self.get_connection()
+            if not conn:
+                return False
+
+        try:
+            with conn.cursor() as cursor:
+                from psycopg2.extras import execute_values
+                execute_values(cursor, """
+                    INSERT INTO element_radiation
+                    (project_id, element_id, annual_radiation, irradiance, orientation_multiplier)
+                    VALUES %s
+                """, [
+                    (
+                        project_id,
+                        element.get('element_id'),
+                        element.get('annual_radiation'),
+                        element.get('irradiance'),
+                        element.get('orientation_multiplier', 1.0)
+                    )
+                    for element in element_radiation_list
+                ], page_size=1000)
+
+                conn.commit()
+                return True
+
+        except Exception as e:
+            conn.rollback()
+            st.error(f"Error appending element radiation batch: {str(e)}")
+            return False
+        finally:
+            if owns_connection:
+                conn.close()
+
     def save_pv_specifications(self, project_id, pv_specs):
         """Save PV specifications"""
         conn = self.get_connection()
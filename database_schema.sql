@@ -69,9 +69,54 @@ CREATE TABLE IF NOT EXISTS element_radiation (
     annual_radiation DECIMAL(12, 2),
     irradiance DECIMAL(10, 2),
     orientation_multiplier DECIMAL(5, 3),
+    irradiance_profile BYTEA,  -- 12 x 24 month x hour-of-day float32 kWh/m² (little-endian)
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Cross-project radiation result cache - content-addressed element results
+CREATE TABLE IF NOT EXISTS radiation_result_cache (
+    cache_key VARCHAR(40) PRIMARY KEY,
+    annual_radiation DECIMAL(12, 4) NOT NULL,
+    key_components JSONB,
+    hit_count INTEGER DEFAULT 0,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    last_used_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Upload registry - which Step 4 upload each project's element tables currently hold
+CREATE TABLE IF NOT EXISTS facade_upload_registry (
+    project_id INTEGER NOT NULL,
+    data_type VARCHAR(20) NOT NULL,
+    file_hash VARCHAR(64) NOT NULL,
+    config_version VARCHAR(40) NOT NULL,
+    filename TEXT,
+    result JSONB,
+    table_rows INTEGER,
+    table_hash VARCHAR(32),
+    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (project_id, data_type)
+);
+
+-- Element change log - element IDs changed by diff re-uploads, pending downstream recomputation
+CREATE TABLE IF NOT EXISTS element_change_log (
+    project_id INTEGER NOT NULL,
+    data_type VARCHAR(20) NOT NULL,
+    element_id VARCHAR(100) NOT NULL,
+    change_type VARCHAR(10) NOT NULL,
+    changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (project_id, data_type, element_id)
+);
+
+-- Building topology index - packed window/wall neighbourhood arrays per project
+CREATE TABLE IF NOT EXISTS building_topology_index (
+    project_id INTEGER PRIMARY KEY,
+    version INTEGER NOT NULL,
+    window_count INTEGER,
+    wall_count INTEGER,
+    arrays BYTEA NOT NULL,
+    built_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
 -- PV specifications table - stores PV technology parameters
 CREATE TABLE IF NOT EXISTS pv_specifications (
     id SERIAL PRIMARY KEY,
@@ -157,6 +202,45 @@ CREATE TABLE IF NOT EXISTS building_walls (
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Radiation analysis sessions - Step 5 run tracking with batch checkpoints for resume
+CREATE TABLE IF NOT EXISTS radiation_analysis_sessions (
+    id SERIAL PRIMARY KEY,
+    project_id INTEGER REFERENCES projects(id) ON DELETE CASCADE,
+    session_key VARCHAR(100) NOT NULL,
+    precision_level VARCHAR(20) NOT NULL,
+    configuration JSONB NOT NULL,
+    status VARCHAR(20) DEFAULT 'running',
+    total_elements INTEGER,
+    completed_elements INTEGER DEFAULT 0,
+    analysis_type VARCHAR(20),
+    config_hash VARCHAR(32),
+    batch_size INTEGER,
+    cursor_position INTEGER DEFAULT 0,
+    completed_batches INTEGER DEFAULT 0,
+    wall_time_seconds DECIMAL(12, 3) DEFAULT 0,
+    elements_per_second DECIMAL(12, 3),
+    resume_count INTEGER DEFAULT 0,
+    element_set_hash VARCHAR(32),
+    start_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    last_checkpoint_at TIMESTAMP,
+    completion_time TIMESTAMP,
+    error_message TEXT,
+    UNIQUE (project_id, session_key),
+    CONSTRAINT radiation_session_status_valid CHECK (status IN ('running', 'completed', 'failed', 'stopped', 'superseded'))
+);
+
+-- Radiation session batches - committed element results per checkpointed batch
+CREATE TABLE IF NOT EXISTS radiation_session_batches (
+    id SERIAL PRIMARY KEY,
+    session_id INTEGER REFERENCES radiation_analysis_sessions(id) ON DELETE CASCADE,
+    batch_index INTEGER NOT NULL,
+    element_count INTEGER NOT NULL,
+    element_results JSONB NOT NULL,
+    batch_seconds DECIMAL(10, 3),
+    committed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE (session_id, batch_index)
+);
+
 -- AI models table - stores machine learning model data and forecasts for Step 7
 CREATE TABLE IF NOT EXISTS ai_models (
     id SERIAL PRIMARY KEY,
@@ -209,6 +293,9 @@ CREATE INDEX IF NOT EXISTS idx_element_radiation_project ON element_radiation(pr
 CREATE INDEX IF NOT EXISTS idx_financial_analysis_project ON financial_analysis(project_id);
 CREATE INDEX IF NOT EXISTS idx_optimization_results_project ON optimization_results(project_id);
 CREATE INDEX IF NOT EXISTS idx_building_walls_project ON building_walls(project_id);
+CREATE INDEX IF NOT EXISTS idx_radiation_sessions_project_status ON radiation_analysis_sessions(project_id, status);
+CREATE INDEX IF NOT EXISTS idx_radiation_session_batches_session ON radiation_session_batches(session_id);
+CREATE INDEX IF NOT EXISTS idx_radiation_result_cache_last_used ON radiation_result_cache(last_used_at);
 CREATE INDEX IF NOT EXISTS idx_ai_models_project ON ai_models(project_id);
 CREATE INDEX IF NOT EXISTS idx_historical_data_project ON historical_data(project_id);
 CREATE INDEX IF NOT EXISTS idx_weather_data_project ON weather_data(project_id);
@@ -9,6 +9,8 @@ import plotly.express as px
 from database_manager import BIPVDatabaseManager
 from utils.consolidated_data_manager import ConsolidatedDataManager
 from utils.session_state_standardizer import BIPVSessionStateManager
+from services.element_diff import ElementDiffIngest
+from services.building_topology import ensure_topology_index, rebuild_topology_index
 
 
 # Initialize database manager
@@ -466,6 +468,25 @@ def save_windows_data_to_database(project_id, windows_df, progress_callback=None
         conn.close()
 
 
+def record_element_changes(project_id, data_type, changes):
+    """Keep what a save changed for later steps; changes is None after a full reload"""
+    element_changes = st.session_state.setdefault('step4_element_changes', {})
+    if changes is None:
+        element_changes[data_type] = {'data_type': data_type, 'full_reload': True}
+    else:
+        element_changes[data_type] = changes.to_dict()
+        if changes.is_empty:
+            return
+    
+    # The table no longer holds the registered upload; its content hash would show
+    # that too, but forgetting the entry spares hashing the table on the next upload
+    from step4_facade_extraction.upload_registry import upload_registry
+    upload_registry.forget_project(project_id, data_type)
+    
+    # Window-wall neighbourhoods for Step 5 shading and the relationship analysis
+    rebuild_topology_index(db_manager, project_id)
+
+
 def render_facade_extraction():
     """Render facade extraction page with proper project data loading"""
     
@@ -678,6 +699,12 @@ def render_facade_extraction():
                 else:
                     st.metric("Window Types", "N/A")
             
+            windows_diff_mode = st.checkbox(
+                "Only apply changed windows", value=True, key="windows_diff_mode",
+                help="Compare with the stored windows by ElementId and apply only additions, changes and "
+                     "removals, so results of unchanged windows are kept"
+            )
+            
             # Save to database
             if st.button("💾 Save Windows Data", key="save_windows_data"):
                 # Create progress bar
@@ -709,7 +736,17 @@ def render_facade_extraction():
                         status_text.text(message)
                     
                     # Call database save with progress callback
-                    if db_manager.save_building_elements_with_progress(project_id, windows_df, update_window_progress):
+                    if windows_diff_mode:
+                        window_changes = ElementDiffIngest(db_manager, project_id, 'windows').apply(
+                            windows_df, update_window_progress)
+                        windows_saved = window_changes is not None
+                    else:
+                        window_changes = None
+                        windows_saved = db_manager.save_building_elements_with_progress(
+                            project_id, windows_df, update_window_progress)
+                    
+                    if windows_saved:
+                        record_element_changes(project_id, 'windows', window_changes)
                         status_text.text("Database save completed!")
                         progress_bar.progress(60)
                         progress_bar.progress(60)
@@ -1016,6 +1053,11 @@ def render_facade_extraction():
                 else:
                     st.metric("Orientations", "N/A")
             
+            walls_diff_mode = st.checkbox(
+                "Only apply changed walls", value=True, key="walls_diff_mode",
+                help="Compare with the stored walls by ElementId and apply only additions, changes and removals"
+            )
+            
             # Save to database
             if st.button("💾 Save Wall Data", key="save_walls_data"):
                 # Create progress bar
@@ -1046,7 +1088,16 @@ def render_facade_extraction():
                         progress_bar.progress(progress)
                         status_text.text(message)
                     
-                    if save_walls_data_to_database(project_id, walls_df, update_wall_progress):
+                    if walls_diff_mode:
+                        wall_changes = ElementDiffIngest(db_manager, project_id, 'walls').apply(
+                            walls_df, update_wall_progress)
+                        walls_saved = wall_changes is not None
+                    else:
+                        wall_changes = None
+                        walls_saved = save_walls_data_to_database(project_id, walls_df, update_wall_progress)
+                    
+                    if walls_saved:
+                        record_element_changes(project_id, 'walls', wall_changes)
                         status_text.text("Database save completed!")
                         progress_bar.progress(80)
                         progress_bar.progress(80)
@@ -1191,42 +1242,26 @@ def render_facade_extraction():
         
         # Show data relationships
         with st.expander("🔍 Data Relationship Analysis", expanded=False):
-            conn = db_manager.get_connection()
-            if conn:
-                try:
-                    with conn.cursor() as cursor:
-                        # Get window-wall relationships
-                        cursor.execute("""
-                            SELECT 
-                                COUNT(DISTINCT be.element_id) as windows,
-                                COUNT(DISTINCT be.host_wall_id) as unique_host_walls,
-                                COUNT(DISTINCT bw.element_id) as available_walls
-                            FROM building_elements be
-                            LEFT JOIN building_walls bw ON be.host_wall_id = bw.element_id AND be.project_id = bw.project_id
-                            WHERE be.project_id = %s
-                        """, (project_id,))
-                        
-                        result = cursor.fetchone()
-                        if result:
-                            windows, host_walls, available_walls = result
-                            
-                            col1, col2, col3 = st.columns(3)
-                            with col1:
-                                st.metric("Windows", windows)
-                            with col2:
-                                st.metric("Host Walls Referenced", host_walls)
-                            with col3:
-                                st.metric("Available Wall Elements", available_walls)
-                                
-                            # Calculate relationship coverage
-                            if host_walls > 0:
-                                coverage = (available_walls / host_walls) * 100 if host_walls > 0 else 0
-                                st.metric("Wall-Window Relationship Coverage", f"{coverage:.1f}%")
-                                
-                except Exception as e:
-                    st.error(f"Error analyzing relationships: {e}")
-                finally:
-                    conn.close()
+            topology = ensure_topology_index(db_manager, project_id)
+            if topology:
+                relationships = topology.relationship_summary()
+                host_walls = relationships['host_walls_referenced']
+                available_walls = relationships['host_walls_available']
+                
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    st.metric("Windows", relationships['windows'])
+                with col2:
+                    st.metric("Host Walls Referenced", host_walls)
+                with col3:
+                    st.metric("Available Wall Elements", available_walls)
+                    
+                # Calculate relationship coverage
+                if host_walls > 0:
+                    coverage = (available_walls / host_walls) * 100
+                    st.metric("Wall-Window Relationship Coverage", f"{coverage:.1f}%")
+            else:
+                st.error("Error analyzing relationships: window-wall index unavailable")
     
     elif windows_uploaded:
         st.warning("⚠️ **Partial Upload**: Window data uploaded, but wall data is still needed for complete analysis")
@@ -12,6 +12,7 @@ from database_manager import db_manager
 from utils.database_helper import db_helper
 from core.solar_math import safe_divide
 from core.carbon_factors import get_grid_carbon_factor, display_carbon_factor_info
+from core.lifetime import project_lifetime
 # Removed ConsolidatedDataManager - using database-only approach
 # Removed session state dependency - using database-only approach
 
@@ -80,21 +81,8 @@ def calculate_co2_savings(annual_energy_kwh, grid_co2_factor, system_lifetime):
     
     return annual_co2_savings, lifetime_co2_savings
 
-def create_cash_flow_analysis(solution_data, financial_params, system_lifetime):
-    """Create detailed cash flow analysis for a solution."""
-    
-    # CRITICAL: Require authentic solution data - no fallback keys
-    initial_cost = solution_data.get('total_cost')
-    if initial_cost is None:
-        raise ValueError("Financial analysis requires authentic 'total_cost' data from optimization")
-    
-    annual_energy = solution_data.get('annual_energy_kwh')
-    if annual_energy is None:
-        raise ValueError("Financial analysis requires authentic 'annual_energy_kwh' data from optimization")
-    
-    # Financial parameters
-    discount_rate = financial_params['discount_rate']
-    electricity_price = financial_params['electricity_price']
+def lifetime_parameters(financial_params):
+    """project_lifetime keyword arguments from the Step 9 financial parameters."""
     # CRITICAL: Require explicit financial parameters - no defaults allowed
     price_escalation = financial_params.get('price_escalation')
     if price_escalation is None:
@@ -121,39 +109,50 @@ def create_cash_flow_analysis(solution_data, financial_params, system_lifetime):
     if rebate_amount is None:
         raise ValueError("Financial analysis requires explicit 'rebate_amount' parameter")
     
-    cash_flows = []
-    annual_details = []
+    return {
+        'degradation_rate': financial_params.get('system_degradation', 0.0),
+        'price_escalation': price_escalation,
+        'maintenance_cost_rate': maintenance_cost_rate,
+        'inverter_replacement_year': int(inverter_replacement_year),
+        'inverter_replacement_cost_ratio': inverter_replacement_cost,
+        'tax_credit': tax_credit,
+        'rebate_amount': rebate_amount
+    }
+
+def create_cash_flow_analysis(solution_data, financial_params, system_lifetime):
+    """Create detailed cash flow analysis for a solution."""
     
-    for year in range(system_lifetime + 1):
-        if year == 0:
-            # Initial investment with incentives
-            net_investment = initial_cost - rebate_amount - (initial_cost * tax_credit)
-            cash_flow = -net_investment
-        else:
-            # Annual benefits
-            escalated_price = electricity_price * ((1 + price_escalation) ** (year - 1))
-            annual_savings = annual_energy * escalated_price
-            
-            # Annual costs
-            maintenance_cost = initial_cost * maintenance_cost_rate
-            
-            # Inverter replacement
-            inverter_cost = 0
-            if year == inverter_replacement_year:
-                inverter_cost = initial_cost * inverter_replacement_cost
-            
-            cash_flow = annual_savings - maintenance_cost - inverter_cost
-        
-        cash_flows.append(cash_flow)
-        
-        annual_details.append({
+    # CRITICAL: Require authentic solution data - no fallback keys
+    initial_cost = solution_data.get('total_cost')
+    if initial_cost is None:
+        raise ValueError("Financial analysis requires authentic 'total_cost' data from optimization")
+    
+    annual_energy = solution_data.get('annual_energy_kwh')
+    if annual_energy is None:
+        raise ValueError("Financial analysis requires authentic 'annual_energy_kwh' data from optimization")
+    
+    projection = project_lifetime(
+        [float(annual_energy)], float(initial_cost), financial_params['electricity_price'],
+        years=system_lifetime, **lifetime_parameters(financial_params)
+    )
+    
+    cash_flows = projection.cash_flows[0].tolist()
+    cumulative_cash_flows = projection.cumulative_cash_flows[0].tolist()
+    annual_savings = [0.0] + projection.annual_savings[0].tolist()
+    maintenance_cost = initial_cost * financial_params['maintenance_cost_rate']
+    inverter_cost = initial_cost * financial_params['inverter_replacement_cost_ratio']
+    
+    annual_details = [
+        {
             'year': year,
-            'cash_flow': cash_flow,
-            'cumulative_cash_flow': sum(cash_flows),
-            'annual_savings': annual_savings if year > 0 else 0,
+            'cash_flow': cash_flows[year],
+            'cumulative_cash_flow': cumulative_cash_flows[year],
+            'annual_savings': annual_savings[year],
             'maintenance_cost': maintenance_cost if year > 0 else 0,
-            'inverter_cost': inverter_cost if year > 0 else 0
-        })
+            'inverter_cost': inverter_cost if year == financial_params['inverter_replacement_year'] else 0
+        }
+        for year in range(system_lifetime + 1)
+    ]
     
     return cash_flows, annual_details
 
@@ -537,25 +536,30 @@ def render_financial_analysis():
                     'system_cost': np.linspace(system_cost * 0.8, system_cost * 1.2, 5)
                 }
                 
-                sensitivity_results = {}
+                # One lifetime projection for every sensitivity case, each varying one parameter
+                case_count = sum(len(values) for values in sensitivity_ranges.values())
+                case_prices = np.full(case_count, float(electricity_price))
+                case_rates = np.full(case_count, financial_params['discount_rate'])
+                case_costs = np.full(case_count, float(system_cost))
+                case_slices = {}
+                offset = 0
                 for param, values in sensitivity_ranges.items():
-                    npv_values = []
-                    for value in values:
-                        temp_params = financial_params.copy()
-                        temp_solution = solution_dict.copy()
-                        
-                        if param == 'electricity_price':
-                            temp_params['electricity_price'] = value
-                        elif param == 'discount_rate':
-                            temp_params['discount_rate'] = value
-                        elif param == 'system_cost':
-                            temp_solution['total_cost'] = value
-                        
-                        temp_cash_flows, _ = create_cash_flow_analysis(temp_solution, temp_params, system_lifetime)
-                        temp_npv = calculate_npv(temp_cash_flows, temp_params['discount_rate'])
-                        npv_values.append(temp_npv)
-                    
-                    sensitivity_results[param] = {'values': values.tolist(), 'npv': npv_values}
+                    case_slices[param] = slice(offset, offset + len(values))
+                    offset += len(values)
+                case_prices[case_slices['electricity_price']] = sensitivity_ranges['electricity_price']
+                case_rates[case_slices['discount_rate']] = sensitivity_ranges['discount_rate']
+                case_costs[case_slices['system_cost']] = sensitivity_ranges['system_cost']
+                
+                sensitivity_projection = project_lifetime(
+                    np.full(case_count, float(annual_energy_kwh)), case_costs, case_prices,
+                    years=system_lifetime, **lifetime_parameters(financial_params)
+                )
+                case_npv = sensitivity_projection.npv(case_rates)
+                
+                sensitivity_results = {
+                    param: {'values': values.tolist(), 'npv': case_npv[case_slices[param]].tolist()}
+                    for param, values in sensitivity_ranges.items()
+                }
                 
                 # Save results
                 total_investment = solution_dict.get('total_cost', solution_dict.get('total_investment', 0))
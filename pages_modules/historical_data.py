@@ -3,6 +3,8 @@ Historical Data Analysis page for BIPV Optimizer
 """
 import streamlit as st
 from core.solar_math import SimpleMath
+from core.demand_forecast import forecast_demand_batch
+from core.load_profiles import BUILDING_TYPE_PARAMETERS, OCCUPANCY_MODIFIERS
 from services.io import parse_csv_content, save_project_data
 from utils.database_helper import db_helper
 from datetime import datetime, timedelta
@@ -36,144 +38,20 @@ def get_forecast_start_date(date_data):
 
 
 def generate_demand_forecast(consumption_data, temperature_data, occupancy_data, date_data=None, occupancy_modifiers=None, building_type=None):
-    """Generate 25-year demand forecast based on historical data and educational building patterns."""
-    import numpy as np
-    from datetime import datetime, timedelta
-    
-    # Calculate base consumption - use annual total, not monthly average
-    if consumption_data:
-        if len(consumption_data) >= 12:
-            # Use full year data
-            base_consumption = sum(consumption_data[:12])  # Annual total
-        else:
-            # Extrapolate to annual from available months
-            monthly_avg = sum(consumption_data) / len(consumption_data)
-            base_consumption = monthly_avg * 12  # Estimate annual total
-    else:
-        base_consumption = 300000  # Default annual consumption in kWh
-    
-    # Calculate growth rate based on data trend
-    if len(consumption_data) >= 12:
-        # Linear trend analysis
-        x = list(range(len(consumption_data)))
-        y = consumption_data
-        n = len(x)
-        sum_x = sum(x)
-        sum_y = sum(y)
-        sum_xy = sum(x[i] * y[i] for i in range(n))
-        sum_x2 = sum(x[i] ** 2 for i in range(n))
-        
-        slope = (n * sum_xy - sum_x * sum_y) / (n * sum_x2 - sum_x ** 2) if (n * sum_x2 - sum_x ** 2) != 0 else 0
-        
-        # Calculate more conservative growth rate
-        if base_consumption > 0:
-            monthly_growth_rate = slope / base_consumption
-            annual_growth_rate = monthly_growth_rate * 12
-            
-            # Apply more conservative caps for educational buildings (typically 0.5-2% annual growth)
-            growth_rate = max(-0.005, min(0.02, annual_growth_rate))  # Cap between -0.5% and 2%
-        else:
-            growth_rate = 0.01  # Default 1% if no base consumption
-    else:
-        growth_rate = 0.015  # Default 1.5% annual growth
-    
-    # Generate seasonal patterns based on historical data and educational building patterns
-    seasonal_factors = []
-    if len(consumption_data) >= 12:
-        # Use actual monthly distribution from historical data
-        total_annual = sum(consumption_data[:12])
-        monthly_avg = total_annual / 12
-        base_seasonal_factors = [c / monthly_avg for c in consumption_data[:12]]
-        
-        # For existing historical data, use actual patterns without heavy modification
-        # Educational building patterns are already reflected in the historical consumption
-        if occupancy_modifiers:
-            # Apply gentle adjustments only, since historical data already shows building patterns
-            modified_factors = []
-            for month_idx, base_factor in enumerate(base_seasonal_factors):
-                # Apply mild seasonal adjustments (reduced impact for historical data)
-                adjustment_strength = 0.1  # Only 10% adjustment strength
-                
-                if month_idx in [5, 6, 7]:  # Summer months (Jun-Aug)
-                    modifier = 1.0 + (occupancy_modifiers['summer_factor'] - 1.0) * adjustment_strength
-                elif month_idx in [11, 0, 1]:  # Winter months (Dec-Feb) 
-                    modifier = 1.0 + (occupancy_modifiers['winter_factor'] - 1.0) * adjustment_strength
-                else:  # Transition months (Mar-May, Sep-Nov)
-                    modifier = 1.0 + (occupancy_modifiers['transition_factor'] - 1.0) * adjustment_strength
-                
-                modified_factor = base_factor * modifier
-                modified_factors.append(modified_factor)
-            
-            # For Year-Round Operation, maintain continuity with historical data
-            if 'Year-Round' in occupancy_modifiers.get('description', ''):
-                # Minimal adjustment for year-round operations
-                seasonal_factors = modified_factors
-            else:
-                # Apply gentle annual operation factor for other patterns
-                annual_factor = 1.0 + (occupancy_modifiers.get('annual_factor', 1.0) - 1.0) * 0.05
-                seasonal_factors = [f * annual_factor for f in modified_factors]
-        else:
-            seasonal_factors = base_seasonal_factors
-    else:
-        # Use educational building pattern from occupancy modifiers or defaults
-        if occupancy_modifiers:
-            # Create pattern based on educational building type
-            base_pattern = [1.0] * 12  # Start with uniform distribution
-            
-            # Apply seasonal modifiers
-            for month_idx in range(12):
-                if month_idx in [5, 6, 7]:  # Summer months (Jun-Aug)
-                    base_pattern[month_idx] *= occupancy_modifiers['summer_factor']
-                elif month_idx in [11, 0, 1]:  # Winter months (Dec-Feb)
-                    base_pattern[month_idx] *= occupancy_modifiers['winter_factor']
-                else:  # Transition months
-                    base_pattern[month_idx] *= occupancy_modifiers['transition_factor']
-            
-            # Apply annual operation factor
-            annual_factor = occupancy_modifiers.get('annual_factor', 1.0)
-            seasonal_factors = [f * annual_factor for f in base_pattern]
-        else:
-            # Default seasonal pattern for educational buildings
-            seasonal_factors = [1.1, 1.05, 1.0, 0.95, 0.9, 0.8, 0.75, 0.8, 0.95, 1.0, 1.05, 1.1]
-    
-    # Generate 25 years of monthly predictions with proper calendar alignment
-    monthly_predictions = []
-    annual_predictions = []
-    
-    # Use a fixed seed for consistent results
-    np.random.seed(42)
-    
-    for year in range(25):
-        # Fixed: Proper annual growth calculation
-        annual_consumption = base_consumption * (1 + growth_rate) ** year
-        
-        # Ensure reasonable bounds - cap at 5x original consumption to prevent astronomical values
-        if annual_consumption > base_consumption * 5:
-            annual_consumption = base_consumption * 5
-        
-        year_monthly = []
-        
-        for month_index in range(12):
-            # Calendar months: 0=Jan, 1=Feb, ..., 11=Dec
-            seasonal_factor = seasonal_factors[month_index]
-            monthly_value = (annual_consumption / 12) * seasonal_factor
-            
-            # Add controlled randomness for realism but keep predictable patterns
-            noise_factor = 1 + (np.random.random() - 0.5) * 0.05  # ±2.5% variation
-            monthly_value *= noise_factor
-            
-            final_value = max(0, monthly_value)
-            monthly_predictions.append(final_value)
-            year_monthly.append(final_value)
-        
-        annual_predictions.append(sum(year_monthly))
+    """
+    Generate 25-year demand forecast based on historical data and educational building patterns.
+
+    Single-building wrapper around core.demand_forecast.forecast_demand_batch.
+    """
+    forecast = forecast_demand_batch([list(consumption_data or [])], occupancy_modifiers)
+    monthly = forecast.monthly[0]
     
     return {
-        'monthly_predictions': monthly_predictions,
-        'annual_predictions': annual_predictions,
-        'growth_rate': growth_rate,
-        'base_consumption': base_consumption,
-        'seasonal_factors': seasonal_factors,
+        'monthly_predictions': monthly.ravel().tolist(),
+        'annual_predictions': monthly.sum(axis=1).tolist(),
+        'growth_rate': float(forecast.growth_rate[0]),
+        'base_consumption': float(forecast.base_consumption[0]),
+        'seasonal_factors': forecast.seasonal_factors[0].tolist(),
         'forecast_start_date': get_forecast_start_date(date_data),
         'model_parameters': {
             'algorithm': 'RandomForest with Educational Building Patterns',
@@ -535,53 +413,20 @@ def render_historical_data():
     with col2:
         building_type = st.selectbox(
             "Building Type",
-            ["University Campus", "K-12 School", "Research Facility", "Library", "Dormitory"],
+            list(BUILDING_TYPE_PARAMETERS),
             help="🏫 Select your building type to apply appropriate energy consumption patterns. Each type has unique characteristics: Universities have complex scheduling, K-12 schools follow academic calendars, research facilities operate year-round with high baseloads, libraries have consistent occupancy, dormitories peak during academic terms.",
             key="building_type_select"
         )
         
         occupancy_pattern = st.selectbox(
             "Occupancy Pattern",
-            ["Academic Year (Sep-Jun)", "Year-Round Operation", "Summer Programs"],
+            list(OCCUPANCY_MODIFIERS),
             help="📅 Define your building's operational schedule. Academic Year (Sep-Jun) shows reduced summer consumption, Year-Round Operation maintains consistent usage, Summer Programs indicate increased summer activity. This affects demand prediction accuracy.",
             key="occupancy_pattern_select"
         )
         
         # Educational building occupancy modifiers that affect energy predictions
-        occupancy_modifiers = {
-            "Academic Year (Sep-Jun)": {
-                "summer_factor": 0.3,  # 30% consumption during summer break
-                "winter_factor": 1.2,  # 120% consumption during peak academic period
-                "transition_factor": 1.0,  # Normal consumption during transition periods
-                "description": "Traditional academic calendar with summer break",
-                "standard": "ASHRAE 90.1 Educational, EN 15603",
-                "peak_hours": "8AM-6PM weekdays",
-                "base_load": 0.20,
-                "annual_factor": 0.85  # Reduced operation during breaks
-            },
-            "Year-Round Operation": {
-                "summer_factor": 1.0,  # Full consumption year-round
-                "winter_factor": 1.1,  # Slightly higher winter consumption
-                "transition_factor": 1.0,  # Consistent operation
-                "description": "Continuous year-round educational operation",
-                "standard": "ASHRAE 90.1 Educational Year-Round",
-                "peak_hours": "7AM-10PM daily",
-                "base_load": 0.25,
-                "annual_factor": 1.0  # Full operation year-round
-            },
-            "Summer Programs": {
-                "summer_factor": 1.3,  # 130% consumption during intensive summer programs
-                "winter_factor": 0.4,  # 40% consumption during winter break
-                "transition_factor": 0.8,  # Reduced spring/fall operation
-                "description": "Intensive summer programs with winter break",
-                "standard": "ASHRAE 90.1 Seasonal Educational",
-                "peak_hours": "6AM-9PM summer",
-                "base_load": 0.15,
-                "annual_factor": 0.75  # Reduced winter operation
-            }
-        }
-        
-        selected_modifier = occupancy_modifiers[occupancy_pattern]
+        selected_modifier = OCCUPANCY_MODIFIERS[occupancy_pattern]
         
         # Display building pattern information
         with st.expander(f"📋 {occupancy_pattern} - Building Standards & Parameters", expanded=False):
@@ -12,7 +12,9 @@ import random
 from database_manager import db_manager
 from utils.database_helper import db_helper
 from core.solar_math import safe_divide
+from core.lifetime import DEFAULT_DEGRADATION_RATE, project_lifetime
 from utils.color_schemes import CHART_COLORS, get_chart_color
+from utils.progress_bus import ProgressBus, format_eta
 # Removed ConsolidatedDataManager - using database-only approach
 # Removed session state dependency - using database-only approach
 
@@ -172,8 +174,13 @@ def evaluate_individual(individual, pv_specs, energy_balance, financial_params,
     except Exception as e:
         return (0.0,)
 
-def simple_genetic_algorithm(pv_specs, energy_balance, financial_params, ga_params, radiation_lookup=None):
-    """Run optimized genetic algorithm with enhanced performance."""
+def simple_genetic_algorithm(pv_specs, energy_balance, financial_params, ga_params, radiation_lookup=None,
+                             progress_bus=None):
+    """Run optimized genetic algorithm with enhanced performance.
+    
+    Fitness evaluations are published on progress_bus (utils.progress_bus.ProgressBus)
+    when given; the bus coalesces repaints so the UI is not redrawn per individual.
+    """
     
     n_elements = len(pv_specs)
     # Optimize population size for better performance vs quality balance
@@ -192,6 +199,9 @@ def simple_genetic_algorithm(pv_specs, energy_balance, financial_params, ga_para
     best_individuals = []
     fitness_history = []
     
+    if progress_bus:
+        progress_bus.set_total(generations * population_size)
+    
     for generation in range(generations):
         # Evaluate population
         fitness_scores = []
@@ -199,6 +209,11 @@ def simple_genetic_algorithm(pv_specs, energy_balance, financial_params, ga_para
             fitness = evaluate_individual(individual, pv_specs, energy_balance, financial_params, radiation_lookup)
             fitness_scores.append(fitness)
         
+        if progress_bus:
+            progress_bus.advance(len(population))
+            progress_bus.set_message(f"Generation {generation + 1}/{generations}")
+            progress_bus.pump()
+        
         # Find best individuals (handle single fitness values)
         pareto_front = []
         for i, fitness in enumerate(fitness_scores):
@@ -252,6 +267,7 @@ def analyze_optimization_results(pareto_solutions, pv_specs, energy_balance, fin
     """Analyze optimization results and generate solution alternatives."""
     
     solutions = []
+    annual_demands = []
     
     for i, (idx, fitness_value, _, individual) in enumerate(pareto_solutions):
         selection_mask = np.array(individual, dtype=bool)
@@ -350,8 +366,26 @@ def analyze_optimization_results(pareto_solutions, pv_specs, energy_balance, fin
             }
             
             solutions.append(solution)
+            annual_demands.append(float(total_annual_demand))
+    
+    solutions_df = pd.DataFrame(solutions)
+    if len(solutions_df) > 0:
+        # Lifetime energy and cash flows of all solutions in one projection
+        include_maintenance = financial_params.get('include_maintenance', True)
+        annual_demand = np.array(annual_demands)
+        projection = project_lifetime(
+            solutions_df['annual_energy_kwh'].to_numpy(),
+            solutions_df['total_investment'].to_numpy(),
+            financial_params.get('electricity_price', 0.25),
+            degradation_rate=financial_params.get('system_degradation', DEFAULT_DEGRADATION_RATE),
+            monthly_demand=np.where(annual_demand > 0, annual_demand, solutions_df['annual_energy_kwh'].to_numpy())[:, np.newaxis] / 12.0,
+            maintenance_cost_rate=0.025 if include_maintenance else 0.0
+        )
+        solutions_df['lifetime_energy_kwh'] = projection.lifetime_generation
+        solutions_df['lifetime_net_savings'] = projection.cumulative_cash_flows[:, -1]
+        solutions_df['payback_years'] = projection.payback_period()
     
-    return pd.DataFrame(solutions)
+    return solutions_df
 
 def render_optimization():
     """Render the genetic algorithm optimization module."""
@@ -798,9 +832,20 @@ def render_optimization():
                     conn.close()
                 
                 # Run genetic algorithm with authentic radiation data
+                ga_progress_bar = st.progress(0)
+                ga_status = st.empty()
+                
+                def render_ga_progress(snapshot):
+                    ga_progress_bar.progress(snapshot['progress'])
+                    ga_status.text(f"🧬 {snapshot['message']} - {snapshot['completed']:,}/{snapshot['total']:,} fitness evaluations ({format_eta(snapshot)})")
+                
+                progress_bus = ProgressBus()
+                progress_bus.subscribe(render_ga_progress)
                 pareto_solutions, fitness_history = simple_genetic_algorithm(
-                    pv_specs, energy_balance, financial_params, ga_params, radiation_lookup
+                    pv_specs, energy_balance, financial_params, ga_params, radiation_lookup,
+                    progress_bus=progress_bus
                 )
+                progress_bus.close()
                 
                 if not pareto_solutions:
                     st.error("Optimization failed to find viable solutions.")
@@ -1525,23 +1570,15 @@ def render_optimization():
                             years_operational = list(range(1, 26))   # Years 1-25 for operations
                             
                             # Initial investment and annual cash flows  
-                            initial_investment = -float(selected_solution['total_cost'])  # Negative cash flow
-                            annual_cash_flow = [annual_savings] * 25
-                            
-                            # Calculate cumulative cash flow including initial investment
-                            cumulative_cash_flow = [initial_investment]  # Start with negative investment
-                            cumulative = initial_investment
-                            
-                            for year_savings in annual_cash_flow:
-                                cumulative += year_savings
-                                cumulative_cash_flow.append(cumulative)
+                            projection = project_lifetime(
+                                [annual_generation], float(selected_solution['total_cost']), electricity_rate
+                            )
+                            annual_cash_flow = projection.cash_flows[0, 1:].tolist()
+                            cumulative_cash_flow = projection.cumulative_cash_flows[0].tolist()
                             
                             # Find break-even year
-                            break_even_year = None
-                            for i, cum_cf in enumerate(cumulative_cash_flow):
-                                if cum_cf >= 0:
-                                    break_even_year = i
-                                    break
+                            paid_back = projection.cumulative_cash_flows[0] >= 0
+                            break_even_year = int(paid_back.argmax()) if paid_back.any() else None
                             
                             fig_cashflow = go.Figure()
                             
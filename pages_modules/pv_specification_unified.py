@@ -13,6 +13,7 @@ from services.io import get_current_project_id
 from database_manager import BIPVDatabaseManager
 from utils.database_helper import db_helper
 from core.solar_math import safe_divide
+from core.bipv_specs import ElementArrays, PanelLayout, TechnologyArrays, compare_technologies
 
 # Standard field names used throughout workflow steps 7-10
 STANDARD_FIELD_NAMES = {
@@ -118,56 +119,115 @@ def standardize_field_names(df):
     standardized_df = df.rename(columns=field_mapping)
     return standardized_df
 
-def calculate_unified_bipv_specifications(building_elements, radiation_lookup, panel_specs, coverage_factor=0.85):
-    """Calculate BIPV specifications with standardized field names for consistent dataflow"""
-    bipv_specifications = []
+def calculate_unified_bipv_specifications(building_elements, radiation_lookup, panel_specs, coverage_factor=0.85,
+                                          panel_layout=None):
+    """
+    Calculate BIPV specifications with standardized field names for consistent dataflow
+    
+    With a PanelLayout, elements with stored window dimensions get the active area
+    of their module layout instead of glass_area x coverage_factor.
+    """
+    elements = ElementArrays.from_elements(building_elements, radiation_lookup)
+    if len(elements) == 0:
+        return standardize_field_names(pd.DataFrame())
+    
+    layout = panel_layout.solve(elements, coverage_factor) if panel_layout else None
+    technology_name = panel_specs.get('technology_name', 'Custom')
+    comparison = compare_technologies(
+        elements, TechnologyArrays.from_catalogue({technology_name: panel_specs}), coverage_factor,
+        bipv_area=layout['bipv_area'] if layout else None
+    )
+    
+    # Create specification with STANDARD field names for workflow consistency
+    df = pd.DataFrame({
+        STANDARD_FIELD_NAMES['element_id']: elements.element_ids,
+        STANDARD_FIELD_NAMES['capacity_kw']: comparison.capacity_kw[:, 0],
+        STANDARD_FIELD_NAMES['annual_energy_kwh']: comparison.annual_energy_kwh[:, 0],
+        STANDARD_FIELD_NAMES['total_cost_eur']: comparison.total_cost_eur[:, 0],
+        STANDARD_FIELD_NAMES['glass_area_m2']: elements.glass_area,
+        STANDARD_FIELD_NAMES['orientation']: elements.orientation,
+        STANDARD_FIELD_NAMES['efficiency']: panel_specs['efficiency'],
+        STANDARD_FIELD_NAMES['transparency']: panel_specs['transparency'],
+        STANDARD_FIELD_NAMES['specific_yield_kwh_kw']: comparison.specific_yield_kwh_kw[:, 0],
+        STANDARD_FIELD_NAMES['power_density_w_m2']: panel_specs['power_density'],
+        # Additional fields for comprehensive analysis
+        'bipv_area_m2': comparison.bipv_area,
+        'azimuth': elements.azimuth,
+        'annual_radiation_kwh_m2': elements.annual_radiation,
+        'coverage_factor': coverage_factor,
+        'panel_technology': technology_name,
+        'cost_per_kw_eur': comparison.cost_per_kw_eur[:, 0]
+    })
+    if layout:
+        measured = layout['measured']
+        df['panel_count'] = np.where(measured, layout['total_panels'], 0)
+        df['panel_orientation'] = np.where(measured, layout['orientation'], None)
+        df['layout_coverage'] = np.where(measured, layout['coverage_ratio'], None)
+    return standardize_field_names(df)
+
+def render_technology_comparison(suitable_elements, radiation_lookup, panel_database, coverage_factor,
+                                 panel_layout=None):
+    """Compare every catalogue technology on the selected elements and the best choice per element"""
+    elements = ElementArrays.from_elements(suitable_elements, radiation_lookup)
+    bipv_area = panel_layout.solve(elements, coverage_factor)['bipv_area'] if panel_layout else None
+    comparison = compare_technologies(
+        elements, TechnologyArrays.from_catalogue(panel_database), coverage_factor, bipv_area=bipv_area
+    )
+    
+    summary = comparison.technology_summary()
+    st.dataframe(summary.rename(columns={
+        'panel_technology': 'Technology', 'efficiency': 'Efficiency', 'transparency': 'Transparency',
+        'capacity_kw': 'Capacity (kW)', 'annual_energy_kwh': 'Annual Energy (kWh)',
+        'total_cost_eur': 'Investment (EUR)', 'specific_yield_kwh_kw': 'Specific Yield (kWh/kW)',
+        'cost_per_kwh_eur': 'Investment per Annual kWh (EUR)'
+    }), use_container_width=True, hide_index=True)
     
-    for element in building_elements:
-        element_id = element.get('element_id', element.get('Element ID'))
-        glass_area = float(element.get('glass_area', element.get('Glass Area (m²)', 1.5)))
-        orientation = element.get('orientation', element.get('Orientation', 'Unknown'))
-        azimuth = float(element.get('azimuth', 180))  # Default South
-        
-        # Get radiation data (ensure float type)
-        annual_radiation = float(radiation_lookup.get(str(element_id), 1000))  # kWh/m²/year
-        
-        # Calculate BIPV system parameters using standard field names (ensure all float types)
-        bipv_area = float(glass_area) * float(coverage_factor)
-        capacity_kw = float(bipv_area) * float(panel_specs['power_density']) / 1000.0  # Convert W/m² to kW
-        
-        # Calculate annual energy yield (ensure all float types)
-        specific_yield_kwh_m2 = float(annual_radiation) * float(panel_specs['efficiency'])
-        annual_energy_kwh = float(bipv_area) * float(specific_yield_kwh_m2)
-        
-        # Calculate costs (ensure all float types)
-        total_cost_eur = float(bipv_area) * float(panel_specs['cost_per_m2'])
-        
-        # Create specification with STANDARD field names for workflow consistency
-        bipv_spec = {
-            STANDARD_FIELD_NAMES['element_id']: element_id,
-            STANDARD_FIELD_NAMES['capacity_kw']: capacity_kw,
-            STANDARD_FIELD_NAMES['annual_energy_kwh']: annual_energy_kwh,
-            STANDARD_FIELD_NAMES['total_cost_eur']: total_cost_eur,
-            STANDARD_FIELD_NAMES['glass_area_m2']: glass_area,
-            STANDARD_FIELD_NAMES['orientation']: orientation,
-            STANDARD_FIELD_NAMES['efficiency']: panel_specs['efficiency'],
-            STANDARD_FIELD_NAMES['transparency']: panel_specs['transparency'],
-            STANDARD_FIELD_NAMES['specific_yield_kwh_kw']: annual_energy_kwh / capacity_kw if capacity_kw > 0 else 0,
-            STANDARD_FIELD_NAMES['power_density_w_m2']: panel_specs['power_density'],
-            # Additional fields for comprehensive analysis
-            'bipv_area_m2': bipv_area,
-            'azimuth': azimuth,
-            'annual_radiation_kwh_m2': annual_radiation,
-            'coverage_factor': coverage_factor,
-            'panel_technology': panel_specs.get('technology_name', 'Custom'),
-            'cost_per_kw_eur': total_cost_eur / capacity_kw if capacity_kw > 0 else 0
-        }
-        
-        bipv_specifications.append(bipv_spec)
+    col1, col2 = st.columns(2)
+    with col1:
+        objective = st.selectbox(
+            "Best technology per element by",
+            options=['annual_energy_kwh', 'cost_per_kwh_eur', 'specific_yield_kwh_kw'],
+            format_func={
+                'annual_energy_kwh': 'Highest annual energy',
+                'cost_per_kwh_eur': 'Lowest investment per annual kWh',
+                'specific_yield_kwh_kw': 'Highest specific yield'
+            }.get,
+            key="technology_comparison_objective"
+        )
+    with col2:
+        min_transparency = st.slider(
+            "Minimum transparency (%)", 0, 80, 0, step=5, key="technology_comparison_transparency",
+            help="Technologies below this visible light transmission are not chosen"
+        )
     
-    # Create DataFrame and apply standardization
-    df = pd.DataFrame(bipv_specifications)
-    return standardize_field_names(df)
+    best = comparison.best_technology(objective, min_transparency=min_transparency / 100)
+    selection = comparison.selection_frame(best)
+    if len(selection) == 0:
+        st.warning("No technology meets the minimum transparency and yields energy on the selected elements")
+        return
+    
+    mix = selection.groupby('panel_technology').agg(
+        elements=('element_id', 'size'),
+        capacity_kw=('capacity_kw', 'sum'),
+        annual_energy_kwh=('annual_energy_kwh', 'sum'),
+        total_cost_eur=('total_cost_eur', 'sum')
+    ).reset_index()
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Best-Mix Capacity", f"{selection['capacity_kw'].sum():.1f} kW")
+    with col2:
+        st.metric("Best-Mix Annual Energy", f"{selection['annual_energy_kwh'].sum():,.0f} kWh")
+    with col3:
+        st.metric("Best-Mix Investment", f"€{selection['total_cost_eur'].sum():,.0f}")
+    
+    fig_mix = px.bar(
+        mix, x='panel_technology', y='elements',
+        title="Best Technology per Element",
+        labels={'panel_technology': 'Technology', 'elements': 'Elements'},
+        hover_data=['capacity_kw', 'annual_energy_kwh', 'total_cost_eur']
+    )
+    st.plotly_chart(fig_mix, use_container_width=True)
 
 def render_bipv_selection_analysis(suitable_elements, all_elements):
     """Render comprehensive BIPV selection analysis with interactive visualizations"""
@@ -569,7 +629,7 @@ def render_pv_specification():
                 cursor.execute("""
                     SELECT DISTINCT element_id, element_type, orientation, azimuth, 
                            glass_area, building_level, family, pv_suitable,
-                           wall_element_id
+                           wall_element_id, window_width, window_height
                     FROM building_elements 
                     WHERE project_id = %s 
                     AND element_type IN ('Window', 'Windows')
@@ -606,6 +666,11 @@ def render_pv_specification():
     
     st.success(f"✅ Found {len(building_elements)} building elements and {len(radiation_elements)} radiation records")
     
+    # Step 4 diff re-uploads drop the radiation of changed windows until Step 5 runs again
+    if isinstance(radiation_analysis_data, dict) and not radiation_analysis_data.get('is_complete', True):
+        st.warning("⚠️ The Step 5 radiation analysis is incomplete - building elements changed since it ran. "
+                   "Elements without radiation results use a default 1,000 kWh/m²/year until Step 5 is re-run.")
+    
     # Display data source validation
     st.info("📊 **Data Sources Verified:**")
     col1, col2 = st.columns(2)
@@ -728,6 +793,46 @@ def render_pv_specification():
             panel_specs = panel_database[selected_panel].copy()
             panel_specs['technology_name'] = selected_panel
     
+    # Module layout over the stored window dimensions (Step 4 Window Width/Height)
+    panel_layout = None
+    with st.expander("📐 Panel Layout from Window Dimensions", expanded=False):
+        use_layout = st.checkbox(
+            "Size systems from window dimensions", value=False,
+            help="Lay modules out in portrait or landscape over each window's width and height; "
+                 "windows without stored dimensions keep the coverage factor"
+        )
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            module_width = st.number_input("Module width (m)", 0.2, 3.0, 1.2, step=0.05)
+        with col2:
+            module_height = st.number_input("Module height (m)", 0.2, 3.0, 0.6, step=0.05)
+        with col3:
+            module_spacing = st.slider("Module spacing (% of size)", 0, 20, 5) / 100
+        
+        if use_layout:
+            panel_layout = PanelLayout(module_width, module_height, module_spacing)
+            layout = panel_layout.solve(ElementArrays.from_elements(suitable_elements, {}), coverage_factor)
+            measured = layout['measured']
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("Windows with Dimensions", f"{int(measured.sum()):,} / {len(measured):,}")
+            with col2:
+                st.metric("Modules Placed", f"{int(layout['total_panels'][measured].sum()):,}")
+            with col3:
+                mean_coverage = layout['coverage_ratio'][measured].mean() if measured.any() else 0
+                st.metric("Average Layout Coverage", f"{mean_coverage:.1%}")
+    
+    # Step 5 radiation per element, shared by the comparison and the specification run
+    radiation_lookup = {
+        str(element.get('element_id')): element.get('annual_radiation', 1000)
+        for element in radiation_elements
+    }
+    
+    # Every catalogue technology on the selected elements, computed in one pass
+    with st.expander("⚖️ Technology Comparison", expanded=False):
+        render_technology_comparison(suitable_elements, radiation_lookup, panel_database, coverage_factor,
+                                     panel_layout)
+    
     # Display selected panel specifications
     st.info(f"""
     **Selected BIPV Technology: {panel_specs['technology_name']}**
@@ -742,12 +847,6 @@ def render_pv_specification():
         
         with st.spinner("Calculating unified BIPV specifications..."):
             
-            # Create radiation lookup from database
-            radiation_lookup = {}
-            for element in radiation_analysis_data.get('element_radiation', []):
-                element_id = str(element.get('element_id'))
-                radiation_lookup[element_id] = element.get('annual_radiation', 1000)
-            
             # Use the pre-calculated suitable_elements (already filtered by azimuth)
             # No need to filter again since we already did azimuth-based filtering above
             
@@ -756,7 +855,8 @@ def render_pv_specification():
                 suitable_elements, 
                 radiation_lookup, 
                 panel_specs, 
-                coverage_factor
+                coverage_factor,
+                panel_layout
             )
             
             if len(bipv_specifications) > 0:
@@ -773,6 +873,7 @@ def render_pv_specification():
                         'installation_factor': 1.2  # Default installation factor
                     },
                     'coverage_factor': coverage_factor,
+                    'panel_layout': panel_layout.__dict__ if panel_layout else None,
                     'technology_used': panel_specs['technology_name'],
                     'calculation_date': datetime.now().isoformat(),
                     'total_elements': len(bipv_specifications)
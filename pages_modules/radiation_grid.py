@@ -12,6 +12,8 @@ from database_manager import db_manager, BIPVDatabaseManager
 from services.advanced_radiation_analyzer import AdvancedRadiationAnalyzer
 from services.optimized_radiation_analyzer import OptimizedRadiationAnalyzer
 from services.ultra_fast_radiation_analyzer import UltraFastRadiationAnalyzer
+from services.element_diff import pending_element_changes
+from services.building_topology import rebuild_topology_index
 from utils.session_state_standardizer import BIPVSessionStateManager
 import time
 
@@ -255,6 +257,13 @@ def render_radiation_grid():
     existing_data = db_manager.get_radiation_analysis_data(project_id)
     has_existing_analysis = existing_data and existing_data.get('element_radiation')
     
+    # Windows changed by a Step 4 diff re-upload since the last analysis
+    pending_changes = pending_element_changes(db_manager, project_id)
+    if has_existing_analysis and pending_changes:
+        st.warning(f"⚠️ **{len(pending_changes):,} window elements changed in Step 4** since this analysis ran; "
+                   "their radiation results are missing or outdated. Re-run the analysis; unchanged "
+                   "elements can be served from the radiation result cache.")
+    
     # Add database check button for debugging
     if st.button("🔍 Check Database for Existing Results", key="check_db_results", help="Check if there are any radiation analysis results in the database"):
         st.info("🔎 **Checking database for radiation analysis results...**")
@@ -485,6 +494,25 @@ def render_radiation_grid():
                                  f"- Method: {precision}\n" + 
                                  (f"- Speed: {calc_per_sec:.0f} calculations/second" if calc_per_sec > 0 else ""))
                         
+                        # Per-session throughput from batch checkpoints (spans resumed runs)
+                        session_throughput = metrics.get('session_throughput')
+                        if session_throughput:
+                            st.session_state.radiation_session_throughput = session_throughput
+                            resumed_note = " (resumed from checkpoint)" if session_throughput.get('resumed') else ""
+                            st.info(f"⏱️ **Session Throughput{resumed_note}**: "
+                                    f"{session_throughput.get('elements_per_second', 0):.1f} elements/s | "
+                                    f"{session_throughput.get('batches', 0)} batches | "
+                                    f"{session_throughput.get('wall_time_seconds', 0):.1f}s wall time")
+                        
+                        # Cross-project result cache hits (repeated building typologies)
+                        cache_stats = metrics.get('cache_stats')
+                        if cache_stats:
+                            st.session_state.radiation_cache_stats = cache_stats
+                            st.info(f"♻️ **Radiation Cache**: {cache_stats.get('cached_elements', 0):,} elements reused, "
+                                    f"{cache_stats.get('computed_elements', 0):,} computed "
+                                    f"({cache_stats.get('element_hit_rate', 0) * 100:.1f}% hit rate, "
+                                    f"{cache_stats.get('store_hits', 0):,} shared-store hits)")
+                        
                         # Show validation summary
                         validation_summary = execution_result.get('validation_summary', {})
                         suitable_elements = validation_summary.get('suitable_elements', 0)
@@ -1297,7 +1325,9 @@ def save_walls_data_to_database(project_id, walls_df):
                 ))
             
             conn.commit()
-            return True
+        
+        rebuild_topology_index(db_manager, project_id)
+        return True
             
     except Exception as e:
         st.error(f"Error saving wall data: {str(e)}")
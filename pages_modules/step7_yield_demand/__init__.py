@@ -4,11 +4,15 @@ Step 7 Yield vs Demand Analysis - Modular Architecture
 This package contains the refactored Step 7 components:
 - data_validation.py: Dependency checking and validation
 - calculation_engine.py: Core energy calculations with caching
+- hourly_balance.py: Hourly (8,760-step) generation vs demand balance
 - ui_components.py: Streamlit UI rendering components
 """
 
 from .data_validation import get_validated_project_data, validate_step7_dependencies
-from .calculation_engine import calculate_monthly_demand, calculate_pv_yields, calculate_energy_balance, save_analysis_results
+from .calculation_engine import (
+    calculate_monthly_demand, calculate_pv_yields, calculate_energy_balance,
+    calculate_hourly_energy_balance, calculate_lifetime_projection, save_analysis_results
+)
 from .ui_components import (
     render_step7_header,
     render_data_usage_info,
@@ -25,6 +29,8 @@ __all__ = [
     'calculate_monthly_demand',
     'calculate_pv_yields',
     'calculate_energy_balance',
+    'calculate_hourly_energy_balance',
+    'calculate_lifetime_projection',
     'save_analysis_results',
     'render_step7_header',
     'render_data_usage_info',
@@ -7,6 +7,13 @@ import numpy as np
 import streamlit as st
 from datetime import datetime as dt
 from database_manager import db_manager
+from core.lifetime import DEFAULT_LIFETIME_YEARS, project_lifetime
+from core.load_profiles import build_load_profiles
+from services.radiation_profiles import load_element_profiles
+from .hourly_balance import (
+    calculate_hourly_balance, monthly_temperature_derating,
+    orientation_groups, orientation_poa, tmy_hourly_arrays
+)
 
 
 def safe_float(value, default=0.0):
@@ -52,6 +59,8 @@ def calculate_monthly_demand(project_id, historical_data):
                 'avg_consumption': avg_consumption,
                 'total_consumption': sum(monthly_demand),
                 'monthly_demand': monthly_demand,
+                'building_type': historical_data.get('building_type'),
+                'occupancy_pattern': historical_data.get('occupancy_pattern'),
                 'is_valid': True
             }
         else:
@@ -73,19 +82,53 @@ def calculate_monthly_demand(project_id, historical_data):
         }
 
 
-def calculate_pv_yields(project_id, pv_specs, tmy_data, environmental_factors=None):
+# Simplified seasonal pattern for elements without an irradiance profile, normalized to sum to 1
+DEFAULT_MONTHLY_DISTRIBUTION = np.array([0.03, 0.05, 0.08, 0.11, 0.14, 0.15, 0.14, 0.12, 0.09, 0.06, 0.03, 0.02])
+DEFAULT_MONTHLY_DISTRIBUTION = DEFAULT_MONTHLY_DISTRIBUTION / DEFAULT_MONTHLY_DISTRIBUTION.sum()
+FALLBACK_ANNUAL_RADIATION = 1200  # kWh/m²/year, Central Europe
+PERFORMANCE_RATIO = 0.85          # Typical for BIPV systems, including thermal losses
+PR_TEMPERATURE_FACTOR = 0.95      # Share of PERFORMANCE_RATIO due to cell temperature (5% loss)
+NON_THERMAL_PERFORMANCE_RATIO = PERFORMANCE_RATIO / PR_TEMPERATURE_FACTOR
+
+
+def _pv_spec_frame(pv_specs):
+    """Step 6 specifications as a DataFrame from the saved pv_data dict, a record list or a DataFrame."""
+    if isinstance(pv_specs, pd.DataFrame):
+        return pv_specs.reset_index(drop=True)
+    if isinstance(pv_specs, dict):
+        pv_specs = pv_specs.get('bipv_specifications') or []
+    return pd.DataFrame(list(pv_specs))
+
+
+def _numeric_column(frame, names, default):
+    """First of names present in frame as floats, falling back per row to later names and default."""
+    values = pd.Series(np.nan, index=frame.index)
+    for name in names:
+        if name in frame:
+            values = values.fillna(pd.to_numeric(frame[name], errors='coerce'))
+    return values.fillna(default).to_numpy(dtype=float)
+
+
+def calculate_pv_yields(project_id, pv_specs, tmy_data, environmental_factors=None,
+                        latitude=None, longitude=None):
     """
     Calculate PV energy yields using authentic TMY data and environmental factors.
     
+    Each system's annual yield uses its own Step 5 radiation (the Step 6
+    annual_radiation_kwh_m2, else the stored irradiance profile total, else TMY
+    GHI), is spread over the months by its Step 5 irradiance profile and derated
+    month by month for cell temperature from the hourly TMY temperatures, which
+    takes the place of the thermal share of the performance ratio.
+    
     Returns:
-        dict: Yield profiles and summary data
+        dict: yield_profiles DataFrame (one row per system), (systems x 12)
+              monthly_yields array and summary data
     """
     try:
-        if pv_specs is None or len(pv_specs) == 0:
-            return {'yield_profiles': [], 'total_annual_yield': 0, 'is_valid': False}
-        
-        yield_profiles = []
-        total_annual_yield = 0
+        specs = _pv_spec_frame(pv_specs) if pv_specs is not None else pd.DataFrame()
+        if len(specs) == 0:
+            return {'yield_profiles': pd.DataFrame(), 'monthly_yields': np.zeros((0, 12)),
+                    'total_annual_yield': 0, 'is_valid': False}
         
         # Get environmental shading factor
         shading_reduction = 0
@@ -93,68 +136,96 @@ def calculate_pv_yields(project_id, pv_specs, tmy_data, environmental_factors=No
             shading_reduction = environmental_factors.get('shading_reduction', 0)
         shading_factor = 1 - (shading_reduction / 100)
         
-        # Calculate annual TMY radiation if available
-        tmy_annual_ghi = 0
-        if tmy_data and len(tmy_data) > 0:
-            tmy_annual_ghi = sum(
-                record.get('ghi', record.get('GHI_Wm2', record.get('GHI', 0))) 
-                for record in tmy_data
-            ) / 1000  # Convert to kWh/m²/year
-        
-        # Process each PV system
-        for idx, (_, system) in enumerate(pv_specs.iterrows()):
-            capacity_kw = safe_float(system.get('capacity_kw', 0))
-            glass_area = safe_float(system.get('glass_area_m2', system.get('bipv_area_m2', 1.5)))
-            efficiency = safe_float(system.get('efficiency', 0.08))
-            
-            # Calculate realistic annual energy
-            performance_ratio = 0.85  # Typical for BIPV systems
-            
-            if tmy_annual_ghi > 100:  # Valid TMY data
-                annual_radiation = tmy_annual_ghi
+        system_count = len(specs)
+        if 'element_id' in specs:
+            element_ids = specs['element_id'].astype(object).to_numpy()
+        else:
+            element_ids = np.full(system_count, None, dtype=object)
+        missing_ids = pd.isna(element_ids)
+        element_ids[missing_ids] = [f'System_{idx + 1}' for idx in np.flatnonzero(missing_ids)]
+        
+        capacity_kw = _numeric_column(specs, ['capacity_kw'], 0.0)
+        glass_area = _numeric_column(specs, ['glass_area_m2', 'bipv_area_m2'], 1.5)
+        efficiency = _numeric_column(specs, ['efficiency'], 0.08)
+        azimuth = _numeric_column(specs, ['azimuth'], 180.0)
+        spec_radiation = _numeric_column(specs, ['annual_radiation_kwh_m2'], 0.0)
+        
+        # Stored Step 5 month x hour profiles give each element its real seasonal shape
+        profile_ids, profiles = load_element_profiles(project_id) if project_id else ([], None)
+        profile_index = {element_id: position for position, element_id in enumerate(profile_ids)}
+        positions = np.array([profile_index.get(str(element_id), -1) for element_id in element_ids])
+        has_profile = positions >= 0
+        profile_monthly = np.zeros((system_count, 12))
+        if has_profile.any():
+            profile_monthly[has_profile] = profiles[positions[has_profile]].sum(axis=2)
+        profile_total = profile_monthly.sum(axis=1)
+        has_profile &= profile_total > 0
+        
+        tmy_arrays = tmy_hourly_arrays(tmy_data, latitude, longitude, require_positions=False)
+        tmy_annual_ghi = tmy_arrays['ghi'].sum() / 1000 if tmy_arrays is not None else 0  # kWh/m²/year
+        fallback_radiation = tmy_annual_ghi if tmy_annual_ghi > 100 else FALLBACK_ANNUAL_RADIATION
+        
+        annual_radiation = np.where(spec_radiation > 0, spec_radiation,
+                                    np.where(has_profile, profile_total, fallback_radiation))
+        radiation_source = np.where(spec_radiation > 0, 'step6_specification',
+                                    np.where(has_profile, 'element_profile', 'tmy_ghi' if tmy_annual_ghi > 100 else 'default'))
+        
+        monthly_distribution = np.where(
+            has_profile[:, np.newaxis],
+            profile_monthly / np.where(profile_total > 0, profile_total, 1.0)[:, np.newaxis],
+            DEFAULT_MONTHLY_DISTRIBUTION
+        )
+        
+        # Irradiance-weighted cell temperature derating per orientation and month; it
+        # replaces the thermal share of PERFORMANCE_RATIO, which stays in use without TMY temperatures
+        temperature_factors = np.full((system_count, 12), PR_TEMPERATURE_FACTOR)
+        if tmy_arrays is not None and not np.isnan(tmy_arrays['temperature']).all():
+            group_azimuths, groups = orientation_groups(azimuth)
+            if np.isnan(tmy_arrays['solar_elevation']).any():
+                poa = tmy_arrays['ghi'][np.newaxis, :]
+                groups = np.zeros(system_count, dtype=int)
             else:
-                annual_radiation = 1200  # Fallback for Central Europe
-            
-            # Energy = Area × Efficiency × Solar Radiation × Performance Ratio × Environmental Shading
-            annual_energy = glass_area * efficiency * annual_radiation * performance_ratio * shading_factor
-            
-            # Calculate capacity if missing
-            if capacity_kw <= 0:
-                capacity_kw = glass_area * efficiency
-            
-            # Calculate specific yield
-            specific_yield = annual_energy / capacity_kw if capacity_kw > 0 else 0
-            
-            # Calculate monthly distribution (simplified seasonal pattern)
-            monthly_distribution = [0.03, 0.05, 0.08, 0.11, 0.14, 0.15, 0.14, 0.12, 0.09, 0.06, 0.03, 0.02]
-            monthly_yields = [annual_energy * factor for factor in monthly_distribution]
-            
-            system_data = {
-                'element_id': system.get('element_id', f'System_{idx+1}'),
-                'capacity_kw': capacity_kw,
-                'annual_yield': annual_energy,
-                'specific_yield': specific_yield,
-                'monthly_yields': monthly_yields,
-                'environmental_shading_reduction': shading_reduction,
-                'shading_factor': shading_factor,
-                'glass_area': glass_area,
-                'efficiency': efficiency
-            }
-            
-            yield_profiles.append(system_data)
-            total_annual_yield += annual_energy
+                poa = orientation_poa(tmy_arrays, group_azimuths)
+            temperature_factors = monthly_temperature_derating(poa, tmy_arrays['temperature'])[groups]
+        
+        # Energy = Area × Efficiency × Solar Radiation × Non-thermal PR × Environmental Shading × Temperature
+        base_energy = glass_area * efficiency * annual_radiation * NON_THERMAL_PERFORMANCE_RATIO * shading_factor
+        monthly_yields = base_energy[:, np.newaxis] * monthly_distribution * temperature_factors
+        annual_energy = monthly_yields.sum(axis=1)
+        
+        # Calculate capacity if missing
+        capacity_kw = np.where(capacity_kw > 0, capacity_kw, glass_area * efficiency)
+        specific_yield = np.divide(annual_energy, capacity_kw, out=np.zeros(system_count), where=capacity_kw > 0)
+        
+        yield_profiles = pd.DataFrame({
+            'element_id': element_ids,
+            'capacity_kw': capacity_kw,
+            'annual_yield': annual_energy,
+            'specific_yield': specific_yield,
+            'annual_radiation': annual_radiation,
+            'radiation_source': radiation_source,
+            'monthly_profile_source': np.where(has_profile, 'element_profile', 'seasonal_default'),
+            'temperature_factor': np.divide(annual_energy, base_energy, out=np.ones(system_count), where=base_energy > 0),
+            'environmental_shading_reduction': shading_reduction,
+            'shading_factor': shading_factor,
+            'glass_area': glass_area,
+            'efficiency': efficiency,
+            'azimuth': azimuth
+        })
         
         return {
             'yield_profiles': yield_profiles,
-            'total_annual_yield': total_annual_yield,
-            'total_capacity_kw': sum(profile['capacity_kw'] for profile in yield_profiles),
-            'average_specific_yield': np.mean([p['specific_yield'] for p in yield_profiles]) if yield_profiles else 0,
+            'monthly_yields': monthly_yields,
+            'total_annual_yield': float(annual_energy.sum()),
+            'total_capacity_kw': float(capacity_kw.sum()),
+            'average_specific_yield': float(specific_yield.mean()),
             'is_valid': True
         }
         
     except Exception as e:
         return {
-            'yield_profiles': [],
+            'yield_profiles': pd.DataFrame(),
+            'monthly_yields': np.zeros((0, 12)),
             'total_annual_yield': 0,
             'is_valid': False,
             'error': f"Yield calculation error: {str(e)}"
@@ -173,14 +244,9 @@ def calculate_energy_balance(demand_data, yield_data, electricity_rates):
             return {'is_valid': False, 'error': "Invalid input data"}
         
         monthly_demand = demand_data['monthly_demand']
-        yield_profiles = yield_data['yield_profiles']
         
         # Calculate monthly totals
-        monthly_yield_totals = [0] * 12
-        for profile in yield_profiles:
-            monthly_yields = profile['monthly_yields']
-            for month in range(12):
-                monthly_yield_totals[month] += monthly_yields[month]
+        monthly_yield_totals = np.asarray(yield_data['monthly_yields'], dtype=float).reshape(-1, 12).sum(axis=0)
         
         # Calculate energy balance for each month
         energy_balance = []
@@ -192,7 +258,7 @@ def calculate_energy_balance(demand_data, yield_data, electricity_rates):
         
         for month in range(12):
             demand = monthly_demand[month]
-            generation = monthly_yield_totals[month]
+            generation = float(monthly_yield_totals[month])
             
             # Calculate net energy flows
             net_import = max(0, demand - generation)
@@ -223,7 +289,7 @@ def calculate_energy_balance(demand_data, yield_data, electricity_rates):
         
         # Calculate annual summary metrics
         annual_demand = sum(monthly_demand)
-        annual_generation = sum(monthly_yield_totals)
+        annual_generation = float(monthly_yield_totals.sum())
         coverage_ratio = (annual_generation / annual_demand * 100) if annual_demand > 0 else 0
         
         return {
@@ -244,6 +310,133 @@ def calculate_energy_balance(demand_data, yield_data, electricity_rates):
         }
 
 
+def calculate_hourly_energy_balance(demand_data, yield_data, electricity_rates, tmy_data,
+                                    latitude=None, longitude=None, year=2023):
+    """
+    Calculate the energy balance hour by hour over a TMY year.
+    
+    Monthly yields are shaped with per-orientation POA profiles from the TMY data
+    and monthly demand with the Step 2 building type / occupancy pattern load
+    profile for the calendar year; imports, exports and
+    self-consumption are summed from the 8,760 hourly balances. Falls back to
+    the monthly calculate_energy_balance when the TMY data cannot be placed on
+    an hourly grid.
+    
+    Returns:
+        dict: calculate_energy_balance output plus hourly peak metrics
+    """
+    try:
+        if not demand_data['is_valid'] or not yield_data['is_valid']:
+            return {'is_valid': False, 'error': "Invalid input data"}
+        
+        tmy_arrays = tmy_hourly_arrays(tmy_data, latitude, longitude)
+        yield_profiles = yield_data['yield_profiles']
+        if tmy_arrays is None or len(yield_profiles) == 0:
+            return calculate_energy_balance(demand_data, yield_data, electricity_rates)
+        
+        monthly_yields = yield_data['monthly_yields']
+        azimuths = yield_profiles['azimuth'].to_numpy(dtype=float)
+        hourly_demand = build_load_profiles(
+            np.asarray(demand_data['monthly_demand'], dtype=float)[:12],
+            demand_data.get('building_type'), demand_data.get('occupancy_pattern'), year
+        )
+        
+        balance = calculate_hourly_balance(monthly_yields, azimuths, tmy_arrays, hourly_demand)
+        
+        import_rate = electricity_rates.get('import_rate', 0.25)
+        export_rate = electricity_rates.get('export_rate', 0.08)
+        
+        energy_balance = []
+        for month in range(12):
+            demand = float(balance['monthly_demand'][month])
+            self_consumption = float(balance['monthly_self_consumption'][month])
+            surplus_export = float(balance['monthly_export'][month])
+            electricity_cost_savings = self_consumption * import_rate
+            feed_in_revenue = surplus_export * export_rate
+            
+            energy_balance.append({
+                'month': month + 1,
+                'demand_kwh': demand,
+                'generation_kwh': float(balance['monthly_generation'][month]),
+                'net_import_kwh': float(balance['monthly_import'][month]),
+                'surplus_export_kwh': surplus_export,
+                'self_consumption_kwh': self_consumption,
+                'self_consumption_ratio': self_consumption / demand if demand > 0 else 0,
+                'electricity_cost_savings': electricity_cost_savings,
+                'feed_in_revenue': feed_in_revenue,
+                'total_monthly_savings': electricity_cost_savings + feed_in_revenue
+            })
+        
+        # Per-system share of on-site use and of generation at demand peaks
+        yield_profiles['self_consumption_kwh'] = balance['system_self_consumption']
+        yield_profiles['export_kwh'] = balance['system_export']
+        yield_profiles['peak_coincidence'] = balance['system_peak_coincidence']
+        
+        annual_demand = float(balance['demand'].sum())
+        annual_generation = float(balance['generation'].sum())
+        annual_self_consumption = float(balance['self_consumption'].sum())
+        total_annual_savings = sum(month['total_monthly_savings'] for month in energy_balance)
+        
+        return {
+            'energy_balance': energy_balance,
+            'annual_demand': annual_demand,
+            'annual_generation': annual_generation,
+            'coverage_ratio': (annual_generation / annual_demand * 100) if annual_demand > 0 else 0,
+            'total_annual_savings': total_annual_savings,
+            'total_feed_in_revenue': sum(month['feed_in_revenue'] for month in energy_balance),
+            'average_monthly_savings': total_annual_savings / 12,
+            'resolution': 'hourly',
+            'annual_self_consumption': annual_self_consumption,
+            'self_consumption_rate': (annual_self_consumption / annual_generation * 100) if annual_generation > 0 else 0,
+            'peak_demand_kw': balance['peak_demand_kw'],
+            'peak_import_kw': balance['peak_import_kw'],
+            'peak_coincidence': balance['peak_coincidence'],
+            'is_valid': True
+        }
+        
+    except Exception as e:
+        return {
+            'is_valid': False,
+            'error': f"Hourly energy balance calculation error: {str(e)}"
+        }
+
+
+def calculate_lifetime_projection(balance_data, electricity_rates, config, years=DEFAULT_LIFETIME_YEARS):
+    """
+    Project the first-year energy balance over the system lifetime.
+    
+    Generation degrades by the configured system degradation, demand grows by
+    the configured demand growth rate; self-consumption comes from the
+    balance (hourly or monthly) and is scaled with them in later years.
+    
+    Returns:
+        dict: Annual lifetime series and totals
+    """
+    energy_balance = balance_data['energy_balance']
+    projection = project_lifetime(
+        [[month['generation_kwh'] for month in energy_balance]],
+        0.0,
+        electricity_rates.get('import_rate', 0.25),
+        years=years,
+        degradation_rate=config.get('system_degradation', 0) / 100,
+        monthly_demand=[month['demand_kwh'] for month in energy_balance],
+        demand_growth_rate=config.get('demand_growth_rate', 0) / 100,
+        self_consumption_kwh=[[month['self_consumption_kwh'] for month in energy_balance]],
+        feed_in_tariff=electricity_rates.get('export_rate', 0.08)
+    )
+    
+    return {
+        'years': list(range(1, years + 1)),
+        'annual_generation': projection.annual_generation[0].tolist(),
+        'annual_demand': projection.demand_kwh[0].sum(axis=1).tolist(),
+        'annual_self_consumption': projection.self_consumption_kwh[0].sum(axis=1).tolist(),
+        'annual_savings': projection.annual_savings[0].tolist(),
+        'cumulative_savings': projection.cumulative_cash_flows[0, 1:].tolist(),
+        'lifetime_generation': float(projection.lifetime_generation[0]),
+        'lifetime_savings': float(projection.cumulative_cash_flows[0, -1])
+    }
+
+
 def save_analysis_results(project_id, analysis_data, config):
     """Save analysis results to database."""
     try:
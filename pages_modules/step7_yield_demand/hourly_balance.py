@@ -0,0 +1,252 @@
+"""
+Hourly (8,760-step) energy balance engine for Step 7 Yield vs Demand Analysis
+
+Monthly PV yields are shaped hour by hour with TMY-driven plane-of-array
+profiles per orientation and balanced against an hourly demand profile
+(core.load_profiles), so self-consumption and export reflect when energy is
+produced and used.
+"""
+
+import numpy as np
+
+from core.solar_math import calculate_irradiance_on_surfaces, calculate_solar_positions_iso
+
+HOURS_PER_YEAR = 8760
+DAYS_PER_MONTH = np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31])
+HOUR_MONTH = np.repeat(np.arange(12), DAYS_PER_MONTH * 24)        # month index of each hour
+MONTH_STARTS = np.concatenate([[0], np.cumsum(DAYS_PER_MONTH * 24)[:-1]])
+HOUR_OF_DAY = np.tile(np.arange(24), 365)
+
+AZIMUTH_STEP = 5.0              # degrees; systems in the same step share a POA profile
+PEAK_DEMAND_SHARE = 0.10        # demand hours counted as peak for coincidence metrics
+DEFAULT_CHUNK_SIZE = 64         # orientation profiles balanced per array operation
+
+# Cell temperature derating (NOCT model) relative to 25 °C STC
+TEMPERATURE_COEFFICIENT = -0.004    # 1/°C, crystalline silicon
+NOCT = 45.0                         # °C at 800 W/m² and 20 °C ambient
+
+GHI_FIELDS = ('ghi', 'GHI', 'GHI_Wm2', 'Global_Horizontal_Irradiance')
+DNI_FIELDS = ('dni', 'DNI', 'DNI_Wm2', 'Direct_Normal_Irradiance')
+DHI_FIELDS = ('dhi', 'DHI', 'DHI_Wm2', 'Diffuse_Horizontal_Irradiance')
+TEMPERATURE_FIELDS = ('temperature', 'temp_air', 'Temperature', 'dry_bulb_temperature')
+
+
+def monthly_sums(hourly):
+    """Sum the last (8,760-hour) axis of an array into 12 months."""
+    return np.add.reduceat(np.asarray(hourly, dtype=float), MONTH_STARTS, axis=-1)
+
+
+def _first_value(record, fields, default=0.0):
+    for field in fields:
+        value = record.get(field)
+        if value is not None:
+            try:
+                return float(value)
+            except (ValueError, TypeError):
+                continue
+    return default
+
+
+def tmy_hourly_arrays(tmy_data, latitude=None, longitude=None, require_positions=True):
+    """
+    Place TMY records on the 8,760-hour grid.
+
+    Records are positioned by day_of_year / hour (or their order when those are
+    missing); hours without a record stay at zero irradiance and NaN
+    temperature. Solar positions come from the records when every record
+    carries them, otherwise from latitude / longitude; without either they are
+    NaN, or the result is None when require_positions is set.
+
+    Returns:
+        dict: ghi, dni, dhi, temperature, solar_elevation, solar_azimuth
+              arrays, or None if the data cannot place a year of hours
+    """
+    if not tmy_data:
+        return None
+
+    positions = np.full(len(tmy_data), -1, dtype=np.int64)
+    ghi, dni, dhi = (np.zeros(len(tmy_data)) for _ in range(3))
+    temperature = np.full(len(tmy_data), np.nan)
+    elevation, azimuth = np.full(len(tmy_data), np.nan), np.full(len(tmy_data), np.nan)
+
+    for index, record in enumerate(tmy_data):
+        day = record.get('day_of_year', record.get('day'))
+        hour = record.get('hour')
+        if day is not None and hour is not None:
+            positions[index] = (int(day) - 1) * 24 + int(hour)
+        else:
+            positions[index] = index
+        ghi[index] = _first_value(record, GHI_FIELDS)
+        dni[index] = _first_value(record, DNI_FIELDS)
+        dhi[index] = _first_value(record, DHI_FIELDS)
+        temperature[index] = _first_value(record, TEMPERATURE_FIELDS, np.nan)
+        if record.get('solar_elevation') is not None and record.get('solar_azimuth') is not None:
+            elevation[index] = float(record['solar_elevation'])
+            azimuth[index] = float(record['solar_azimuth'])
+
+    valid = (positions >= 0) & (positions < HOURS_PER_YEAR)
+    if not valid.any():
+        return None
+
+    arrays = {}
+    for name, values in (('ghi', ghi), ('dni', dni), ('dhi', dhi), ('temperature', temperature),
+                         ('solar_elevation', elevation), ('solar_azimuth', azimuth)):
+        grid = np.full(HOURS_PER_YEAR, np.nan) if name == 'temperature' else np.zeros(HOURS_PER_YEAR)
+        grid[positions[valid]] = values[valid]
+        arrays[name] = grid
+
+    if np.isnan(elevation[valid]).any():
+        if latitude is None or longitude is None:
+            if require_positions:
+                return None
+            arrays['solar_elevation'] = np.full(HOURS_PER_YEAR, np.nan)
+            arrays['solar_azimuth'] = np.full(HOURS_PER_YEAR, np.nan)
+            return arrays
+        day_of_year = np.arange(HOURS_PER_YEAR) // 24 + 1
+        arrays['solar_elevation'], arrays['solar_azimuth'] = calculate_solar_positions_iso(
+            float(latitude), float(longitude), day_of_year, HOUR_OF_DAY
+        )
+    return arrays
+
+
+def orientation_groups(azimuths):
+    """
+    Group systems by AZIMUTH_STEP-rounded azimuth (NaN counts as south).
+
+    Returns:
+        tuple: (distinct group azimuths, group index per system)
+    """
+    azimuths = np.nan_to_num(np.asarray(azimuths, dtype=float), nan=180.0)
+    rounded = np.mod(np.round(azimuths / AZIMUTH_STEP) * AZIMUTH_STEP, 360)
+    return np.unique(rounded, return_inverse=True)
+
+
+def orientation_poa(tmy_arrays, group_azimuths, surface_tilt=90):
+    """(groups x 8760) POA irradiance in W/m² for surfaces facing group_azimuths."""
+    return calculate_irradiance_on_surfaces(
+        tmy_arrays['dni'], tmy_arrays['ghi'], tmy_arrays['dhi'],
+        tmy_arrays['solar_elevation'], tmy_arrays['solar_azimuth'],
+        group_azimuths, surface_tilt
+    )
+
+
+def temperature_derating(poa, air_temperature, temperature_coefficient=TEMPERATURE_COEFFICIENT,
+                         noct=NOCT):
+    """
+    Hourly power factor from the NOCT cell temperature model.
+
+    Cell temperature is air temperature plus (NOCT - 20) / 800 per W/m² of
+    POA irradiance; the factor is 1 + temperature_coefficient x (cell - 25 °C),
+    and 1 for hours without an air temperature.
+    """
+    cell_temperature = air_temperature + (noct - 20.0) / 800.0 * np.asarray(poa, dtype=float)
+    return np.where(np.isnan(cell_temperature), 1.0,
+                    1.0 + temperature_coefficient * (cell_temperature - 25.0))
+
+
+def monthly_temperature_derating(poa, air_temperature, **kwargs):
+    """
+    Irradiance-weighted monthly temperature derating per row of poa.
+
+    Returns:
+        (rows x 12) factors, 1 for months without irradiance
+    """
+    poa = np.atleast_2d(np.asarray(poa, dtype=float))
+    irradiation = monthly_sums(poa)
+    derated = monthly_sums(poa * temperature_derating(poa, air_temperature, **kwargs))
+    return np.divide(derated, irradiation, out=np.ones_like(irradiation), where=irradiation > 0)
+
+
+def orientation_profiles(tmy_arrays, azimuths, surface_tilt=90):
+    """
+    Hourly weights per distinct (AZIMUTH_STEP-rounded) system azimuth.
+
+    Each row is the POA irradiance of a vertical surface with that azimuth,
+    normalized to sum to 1 within every month; months without any POA
+    irradiance are spread evenly over their hours.
+
+    Returns:
+        tuple: (group index per system, (groups x 8760) weights)
+    """
+    group_azimuths, groups = orientation_groups(azimuths)
+    poa = orientation_poa(tmy_arrays, group_azimuths, surface_tilt)
+
+    hourly_totals = monthly_sums(poa)[:, HOUR_MONTH]
+    even = 1.0 / (DAYS_PER_MONTH[HOUR_MONTH] * 24)
+    weights = np.where(hourly_totals > 0, poa / np.where(hourly_totals > 0, hourly_totals, 1.0), even)
+    return groups, weights
+
+
+def calculate_hourly_balance(monthly_yields, azimuths, tmy_arrays, hourly_demand,
+                             chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Balance PV generation against demand for every hour of the year.
+
+    Systems with the same rounded azimuth share an hourly shape, so the
+    (systems x 8,760) generation matrix factors into (groups x 12) monthly
+    yields times (groups x 8,760) weights, evaluated chunk_size groups at a
+    time. Per-system self-consumption, export and peak coincidence follow
+    exactly from each group's monthly hour-weighted shares.
+
+    Args:
+        monthly_yields: (systems x 12) monthly PV yield in kWh
+        azimuths: (systems,) system azimuths in degrees
+        tmy_arrays: Output of tmy_hourly_arrays
+        hourly_demand: (8760,) demand in kWh
+
+    Returns:
+        dict: hourly generation / demand / import / export / self-consumption
+              arrays, monthly sums of each, annual peak metrics and per-system
+              self-consumption, export and peak coincidence arrays
+    """
+    monthly_yields = np.asarray(monthly_yields, dtype=float).reshape(-1, 12)
+    hourly_demand = np.asarray(hourly_demand, dtype=float)
+    groups, weights = orientation_profiles(tmy_arrays, azimuths)
+
+    # Monthly yield per orientation group (groups x 12)
+    group_monthly = np.zeros((weights.shape[0], 12))
+    np.add.at(group_monthly, groups, monthly_yields)
+
+    generation = np.zeros(HOURS_PER_YEAR)
+    for start in range(0, weights.shape[0], chunk_size):
+        chunk = slice(start, start + chunk_size)
+        generation += (group_monthly[chunk][:, HOUR_MONTH] * weights[chunk]).sum(axis=0)
+
+    self_consumption = np.minimum(hourly_demand, generation)
+    grid_import = np.maximum(0, hourly_demand - generation)
+    export = np.maximum(0, generation - hourly_demand)
+
+    threshold = np.quantile(hourly_demand, 1 - PEAK_DEMAND_SHARE) if hourly_demand.any() else np.inf
+    peak_hours = hourly_demand >= threshold
+
+    # Share of each hour's generation consumed on site / produced at peak, per group and month
+    self_share = np.divide(self_consumption, generation, out=np.zeros(HOURS_PER_YEAR), where=generation > 0)
+    weighted_self, weighted_peak = np.zeros((weights.shape[0], 12)), np.zeros((weights.shape[0], 12))
+    for start in range(0, weights.shape[0], chunk_size):
+        chunk = slice(start, start + chunk_size)
+        weighted_self[chunk] = monthly_sums(weights[chunk] * self_share)
+        weighted_peak[chunk] = monthly_sums(weights[chunk] * peak_hours)
+
+    system_self = (monthly_yields * weighted_self[groups]).sum(axis=1)
+    system_peak = (monthly_yields * weighted_peak[groups]).sum(axis=1)
+    system_annual = monthly_yields.sum(axis=1)
+
+    return {
+        'generation': generation,
+        'demand': hourly_demand,
+        'import': grid_import,
+        'export': export,
+        'self_consumption': self_consumption,
+        'monthly_generation': monthly_sums(generation),
+        'monthly_demand': monthly_sums(hourly_demand),
+        'monthly_import': monthly_sums(grid_import),
+        'monthly_export': monthly_sums(export),
+        'monthly_self_consumption': monthly_sums(self_consumption),
+        'peak_demand_kw': float(hourly_demand.max()) if len(hourly_demand) else 0.0,
+        'peak_import_kw': float(grid_import.max()) if len(grid_import) else 0.0,
+        'peak_coincidence': float(generation[peak_hours].sum() / generation.sum()) if generation.sum() > 0 else 0.0,
+        'system_self_consumption': system_self,
+        'system_export': system_annual - system_self,
+        'system_peak_coincidence': np.divide(system_peak, system_annual, out=np.zeros_like(system_peak),
+                                             where=system_annual > 0)
+    }
@@ -246,6 +246,14 @@ def render_analysis_configuration():
                 key="system_degradation_yield",
                 help="Annual reduction in PV system performance"
             )
+        
+        hourly_balance = st.checkbox(
+            "Hourly energy balance (8,760 h)",
+            value=True,
+            key="hourly_balance_yield",
+            help="Match generation and demand hour by hour using Step 3 TMY data; "
+                 "uses monthly totals when no TMY data is available"
+        )
     
     return {
         'start_date': analysis_start.strftime('%Y-%m-%d'),
@@ -253,7 +261,8 @@ def render_analysis_configuration():
         'electricity_price': electricity_price,
         'feed_in_tariff': feed_in_tariff,
         'demand_growth_rate': demand_growth_rate,
-        'system_degradation': system_degradation
+        'system_degradation': system_degradation,
+        'hourly_balance': hourly_balance
     }
 
 
@@ -454,6 +463,37 @@ def render_analysis_results(analysis_data):
         
         st.plotly_chart(fig_surplus, use_container_width=True)
     
+    # Lifetime projection with demand growth and system degradation
+    lifetime = analysis_data.get('lifetime_projection')
+    if lifetime:
+        st.subheader(f"📅 {len(lifetime['years'])}-Year Energy Projection")
+        
+        fig_lifetime = go.Figure()
+        fig_lifetime.add_trace(go.Scatter(
+            x=lifetime['years'], y=lifetime['annual_demand'],
+            mode='lines', name='Energy Demand', line=dict(color='red', width=3)
+        ))
+        fig_lifetime.add_trace(go.Scatter(
+            x=lifetime['years'], y=lifetime['annual_generation'],
+            mode='lines', name='Solar Generation', line=dict(color='green', width=3)
+        ))
+        fig_lifetime.add_trace(go.Scatter(
+            x=lifetime['years'], y=lifetime['annual_self_consumption'],
+            mode='lines', name='Self-Consumption', line=dict(color='gold', width=3)
+        ))
+        fig_lifetime.update_layout(
+            xaxis_title="Operating Year",
+            yaxis_title="Energy (kWh/year)",
+            height=400
+        )
+        st.plotly_chart(fig_lifetime, use_container_width=True)
+        
+        col_life1, col_life2 = st.columns(2)
+        with col_life1:
+            st.metric("Lifetime Generation", f"{lifetime['lifetime_generation']:,.0f} kWh")
+        with col_life2:
+            st.metric("Lifetime Savings", f"€{lifetime['lifetime_savings']:,.0f}")
+    
     # Energy Coverage Analysis
     st.subheader("📊 Energy Coverage Analysis")
     
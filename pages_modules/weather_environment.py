@@ -13,7 +13,9 @@ import plotly.express as px
 import plotly.graph_objects as go
 
 # Core imports
-from core.solar_math import calculate_solar_position_iso, SimpleMath
+from core.solar_math import SimpleMath
+from core.solar_ephemeris import get_solar_ephemeris
+from core.time_grids import get_time_grid
 from services.io import get_current_project_id, find_nearest_wmo_station
 from database_manager import BIPVDatabaseManager
 from utils.database_helper import DatabaseHelper
@@ -91,11 +93,14 @@ def generate_tmy_from_wmo_station(weather_station: Dict, coordinates: Dict, cont
     tmy_data = []
     debug_records = []
     
+    # ISO 15927-4 solar positions for all 8760 hours, computed once per station
+    ephemeris = get_solar_ephemeris(station_lat, station_lon, get_time_grid('tmy_8760'), model='iso')
+    
     # Generate 8760 hourly records (365 days × 24 hours)
     for day in range(1, 366):
         for hour in range(24):
-            # Calculate solar position using ISO 15927-4 methodology
-            solar_pos = calculate_solar_position_iso(station_lat, station_lon, day, hour)
+            # Solar position using ISO 15927-4 methodology
+            solar_pos = ephemeris.position((day - 1) * 24 + hour)
             
             # Initialize irradiance values
             dni = dhi = ghi = 0.0
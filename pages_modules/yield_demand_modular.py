@@ -12,6 +12,8 @@ from .step7_yield_demand import (
     calculate_monthly_demand,
     calculate_pv_yields,
     calculate_energy_balance,
+    calculate_hourly_energy_balance,
+    calculate_lifetime_projection,
     save_analysis_results,
     render_step7_header,
     render_data_usage_info,
@@ -71,6 +73,9 @@ def render_yield_demand():
                 
                 # Get TMY data from Step 3
                 tmy_data = project_data.get('weather_analysis', {}).get('tmy_data', [])
+                if not tmy_data:
+                    weather_data = db_manager.get_weather_data(project_id) or {}
+                    tmy_data = weather_data.get('tmy_data') or []
                 
                 # Get electricity rates from Step 1
                 electricity_rates = project_data.get('electricity_rates', {
@@ -88,7 +93,10 @@ def render_yield_demand():
                 
                 # Calculate PV yields
                 st.info("☀️ Calculating PV energy yields...")
-                yield_data = calculate_pv_yields(project_id, pv_specs, tmy_data, environmental_factors)
+                yield_data = calculate_pv_yields(
+                    project_id, pv_specs, tmy_data, environmental_factors,
+                    project_data.get('latitude'), project_data.get('longitude')
+                )
                 
                 if not yield_data['is_valid']:
                     st.error(f"❌ Yield calculation failed: {yield_data.get('error', 'Unknown error')}")
@@ -96,12 +104,23 @@ def render_yield_demand():
                 
                 # Calculate energy balance
                 st.info("⚖️ Calculating energy balance...")
-                balance_data = calculate_energy_balance(demand_data, yield_data, electricity_rates)
+                if config.get('hourly_balance'):
+                    balance_data = calculate_hourly_energy_balance(
+                        demand_data, yield_data, electricity_rates, tmy_data,
+                        project_data.get('latitude'), project_data.get('longitude'),
+                        dt.strptime(config['start_date'], '%Y-%m-%d').year
+                    )
+                else:
+                    balance_data = calculate_energy_balance(demand_data, yield_data, electricity_rates)
                 
                 if not balance_data['is_valid']:
                     st.error(f"❌ Energy balance calculation failed: {balance_data.get('error', 'Unknown error')}")
                     return
                 
+                balance_data['lifetime_projection'] = calculate_lifetime_projection(
+                    balance_data, electricity_rates, config
+                )
+                
                 # Save results to database
                 st.info("💾 Saving analysis results...")
                 if save_analysis_results(project_id, balance_data, config):
@@ -9,14 +9,33 @@ import math
 from datetime import datetime
 from database_manager import db_manager
 from psycopg2.extras import RealDictCursor
-from core.solar_math import calculate_solar_position_simple, calculate_irradiance_on_surface
+from psycopg2 import Binary
+from core.solar_math import calculate_irradiance_on_surfaces
+from core.solar_ephemeris import get_solar_ephemeris
+from core.time_grids import day_hour_grid
+from services.radiation_profiles import build_profile, pack_profile, ensure_profile_schema
+from services.building_topology import TopologyIndex, load_topology_index
 
 class AdvancedRadiationAnalyzer:
     """Advanced radiation analysis with sophisticated calculations - database-driven"""
     
-    def __init__(self, project_id):
+    # Irradiance field name conventions found in stored TMY data (including CSV format)
+    GHI_FIELDS = ['ghi', 'GHI', 'Global_Horizontal_Irradiance', 'ghi_wm2', 'GHI_Wm2']
+    DNI_FIELDS = ['dni', 'DNI', 'Direct_Normal_Irradiance', 'dni_wm2', 'DNI_Wm2']
+    DHI_FIELDS = ['dhi', 'DHI', 'Diffuse_Horizontal_Irradiance', 'dhi_wm2', 'DHI_Wm2']
+    
+    def __init__(self, project_id, level_heights=None, floor_height=3.5):
+        """
+        Args:
+            project_id: Project identifier
+            level_heights: Optional {building_level: window height from ground in m};
+                overrides the floor_height heuristic for the listed levels
+            floor_height: Storey height used for levels without an explicit height
+        """
         self.project_id = project_id
         self.db_manager = db_manager
+        self.level_heights = level_heights or {}
+        self.floor_height = floor_height
         
     def get_suitable_elements(self):
         """Get window elements only from database for BIPV analysis"""
@@ -143,6 +162,100 @@ class AdvancedRadiationAnalyzer:
         except (ValueError, TypeError):
             return 3.5  # Default to ground floor window height
     
+    def build_level_table(self, levels):
+        """
+        Precompute height-dependent factors once per distinct building level.
+        
+        Heights come from the user supplied level_heights mapping when present,
+        otherwise from the floor height heuristic.
+        
+        Returns:
+            {level: {'height_from_ground', 'height_factor', 'ground_reflectance'}}
+        """
+        level_table = {}
+        for level in set(levels):
+            if level in self.level_heights:
+                height_from_ground = float(self.level_heights[level])
+            else:
+                height_from_ground = self.estimate_height_from_ground(level, self.floor_height)
+            
+            level_table[level] = {
+                'height_from_ground': height_from_ground,
+                'height_factor': self.calculate_height_dependent_ghi_effects(height_from_ground, 1.0)['height_factor'],
+                'ground_reflectance': self.calculate_ground_reflectance_factor(height_from_ground)
+            }
+        return level_table
+    
+    def _first_field_value(self, data, fields, require_positive=False):
+        """Read the first parseable irradiance value from a TMY record."""
+        value = 0
+        for field in fields:
+            if field in data and data[field] is not None:
+                try:
+                    value = float(data[field])
+                    if value > 0 or not require_positive:
+                        break
+                except (ValueError, TypeError):
+                    continue
+        return value
+    
+    def build_sample_series(self, tmy_data, latitude, longitude, sample_hours, days_sample):
+        """
+        Resolve the sampled TMY records and solar positions once per analysis.
+        
+        Only daylight samples (GHI > 0) are kept; every element shares these
+        arrays instead of scanning tmy_data for each of its time points.
+        
+        Returns:
+            Dict of numpy arrays ghi, dni, dhi, month_index, hour, sun_elevation,
+            sun_azimuth and a solar_positions list
+        """
+        # Index TMY rows by (day, hour), keeping the first match as the scan did
+        tmy_index = {}
+        for hour_data in tmy_data or []:
+            key = (hour_data.get('day_of_year', hour_data.get('day', 0)), hour_data.get('hour', 0))
+            if key not in tmy_index:
+                tmy_index[key] = hour_data
+        
+        # Sun positions for every sampled (day, hour) come from the shared ephemeris cache
+        ephemeris = get_solar_ephemeris(
+            latitude, longitude, day_hour_grid(tuple(days_sample), tuple(sample_hours)), model='simple'
+        )
+        
+        ghi_values, dni_values, dhi_values, month_indices, hours, solar_positions = [], [], [], [], [], []
+        for day_position, day in enumerate(days_sample):
+            for hour_position, hour in enumerate(sample_hours):
+                matching_data = tmy_index.get((day, hour))
+                if not matching_data:
+                    continue
+                
+                ghi = self._first_field_value(matching_data, self.GHI_FIELDS, require_positive=True)
+                if ghi <= 0:
+                    continue  # Skip night hours
+                
+                # Monthly totals - calculate month from day_of_year if month not available
+                month = matching_data.get('month', 0)
+                if month == 0:
+                    month = ((day - 1) // 30) + 1  # Approximate month calculation
+                
+                ghi_values.append(ghi)
+                dni_values.append(self._first_field_value(matching_data, self.DNI_FIELDS))
+                dhi_values.append(self._first_field_value(matching_data, self.DHI_FIELDS))
+                month_indices.append(month - 1)  # 0-based index
+                hours.append(hour)
+                solar_positions.append(ephemeris.position(day_position * len(sample_hours) + hour_position))
+        
+        return {
+            'ghi': np.array(ghi_values, dtype=float),
+            'dni': np.array(dni_values, dtype=float),
+            'dhi': np.array(dhi_values, dtype=float),
+            'month_index': np.array(month_indices, dtype=int),
+            'hour': np.array(hours, dtype=int),
+            'sun_elevation': np.array([position.get('elevation', 0) for position in solar_positions], dtype=float),
+            'sun_azimuth': np.array([position.get('azimuth', 180) for position in solar_positions], dtype=float),
+            'solar_positions': solar_positions
+        }
+    
     def calculate_precise_shading_factor(self, window_element, walls_data, solar_position):
         """Calculate precise shading factor for a window from building walls."""
         if not walls_data:
@@ -220,6 +333,59 @@ class AdvancedRadiationAnalyzer:
         except Exception as e:
             return 0.9  # Conservative default shading factor
     
+    def shading_factor_series(self, window_element, topology, sample_series, cache=None):
+        """
+        calculate_precise_shading_factor for every sample of a sample series.
+        
+        Only walls the topology index places within 90° of the window azimuth
+        can shade it, so just those are evaluated (unplaced walls keep their
+        constant 0.9). Windows sharing azimuth and level share the result
+        through cache.
+        """
+        window_azimuth = float(window_element.get('azimuth', 180))
+        window_level = topology.level_code(window_element.get('building_level', 'Level 1'))
+        cache_key = (window_azimuth, window_level)
+        if cache is not None and cache_key in cache:
+            return cache[cache_key]
+        
+        if 0 <= window_azimuth < 360:
+            candidates = topology.walls_near(window_azimuth, 90.0)
+        else:
+            candidates = np.flatnonzero(topology.wall_placed)
+        wall_azimuth = topology.wall_azimuth[candidates]
+        azimuth_diff = np.abs(wall_azimuth - window_azimuth)
+        azimuth_diff = np.where(azimuth_diff > 180, 360 - azimuth_diff, azimuth_diff)
+        shading = azimuth_diff < 90
+        candidates, wall_azimuth, azimuth_diff = candidates[shading], wall_azimuth[shading], azimuth_diff[shading]
+        
+        # Proximity scaled by level compatibility, per candidate wall
+        weight = np.maximum(0, 1 - (azimuth_diff / 90)) * np.where(
+            topology.wall_level[candidates] == window_level, 1.0, 0.5
+        )
+        
+        # Samples x candidate walls; walls shade when the sun is behind them
+        wall_sun_angle = np.abs(wall_azimuth[np.newaxis, :] - sample_series['sun_azimuth'][:, np.newaxis])
+        wall_sun_angle = np.where(wall_sun_angle > 180, 360 - wall_sun_angle, wall_sun_angle)
+        shadow_intensity = np.minimum(0.6, (wall_sun_angle - 90) / 90 * 0.6)
+        wall_factors = np.where(wall_sun_angle > 90, np.maximum(0.4, 1.0 - shadow_intensity * weight), 1.0)
+        
+        combined = wall_factors.prod(axis=1)
+        combined[sample_series['sun_elevation'] <= 0] = 1.0
+        combined *= 0.9 ** len(topology.unplaced_walls)
+        factors = np.maximum(0.2, combined)
+        
+        if cache is not None:
+            cache[cache_key] = factors
+        return factors
+    
+    def get_wall_topology(self):
+        """Stored topology index of the project, built from the walls table if missing"""
+        topology = load_topology_index(self.db_manager, self.project_id)
+        if topology is None:
+            walls_data = self.get_walls_data()
+            topology = TopologyIndex.from_walls(walls_data) if walls_data else None
+        return topology
+    
     def get_walls_data(self):
         """Get walls data from database for shading calculations"""
         conn = self.db_manager.get_connection()
@@ -256,16 +422,41 @@ class AdvancedRadiationAnalyzer:
             return False
         
         # Get walls data for shading - only use authentic data
-        walls_data = []
+        walls_data = None
         if include_shading:
             try:
-                walls_data = self.get_walls_data()
-                if not walls_data and progress_callback:
+                walls_data = self.get_wall_topology()
+                if (walls_data is None or not walls_data.wall_count) and progress_callback:
                     progress_callback("No wall data available - shading calculations disabled", 0, 0)
             except Exception as e:
                 if progress_callback:
                     progress_callback(f"Wall data retrieval failed: {str(e)}", 0, 0)
         
+        radiation_results = self.calculate_radiation(
+            suitable_elements, tmy_data, latitude, longitude, precision,
+            walls_data, apply_corrections, progress_callback
+        )
+        
+        # Save results to database
+        if radiation_results:
+            return self._save_advanced_results(radiation_results)
+        
+        return False
+    
+    def calculate_radiation(self, suitable_elements, tmy_data, latitude, longitude,
+                            precision="Daily Peak", walls_data=None, apply_corrections=True,
+                            progress_callback=None):
+        """
+        Calculate radiation for the given elements without touching the database.
+        
+        walls_data is a list of wall dicts (get_walls_data) or a TopologyIndex.
+        
+        Returns the per-element result dicts that run_advanced_analysis stores.
+        """
+        if walls_data and not isinstance(walls_data, TopologyIndex):
+            walls_data = TopologyIndex.from_walls(walls_data)
+        shading_cache = {}
+        
         # Configure precision settings with proper scaling for annual totals
         precision_settings = {
             "Hourly": {"hours": list(range(7, 18)), "days": list(range(1, 366)), "scaling": 1.0},
@@ -279,6 +470,13 @@ class AdvancedRadiationAnalyzer:
         days_sample = settings["days"]
         scaling_factor = settings["scaling"]
         
+        # Element independent inputs are resolved once: sampled TMY records with
+        # solar positions, and height effects per distinct building level
+        sample_series = self.build_sample_series(tmy_data, latitude, longitude, sample_hours, days_sample)
+        level_table = self.build_level_table(
+            self._element_level(element) for element in suitable_elements
+        )
+        
         # Process each element
         radiation_results = []
         total_elements = len(suitable_elements)
@@ -292,7 +490,9 @@ class AdvancedRadiationAnalyzer:
                 radiation_data = self._calculate_element_radiation_advanced(
                     element, tmy_data, latitude, longitude,
                     sample_hours, days_sample, scaling_factor,
-                    walls_data, apply_corrections
+                    walls_data, apply_corrections,
+                    sample_series=sample_series, level_table=level_table,
+                    shading_cache=shading_cache
                 )
                 
                 if radiation_data:
@@ -302,123 +502,63 @@ class AdvancedRadiationAnalyzer:
                 st.error(f"Error processing element {element['element_id']}: {str(e)}")
                 continue
         
-        # Save results to database
-        if radiation_results:
-            return self._save_advanced_results(radiation_results)
-        
-        return False
+        return radiation_results
+    
+    def _element_level(self, element):
+        """Building level of an element as stored in building_elements."""
+        return element.get('building_level', element.get('level', 'Level 1'))
     
     def _calculate_element_radiation_advanced(self, element, tmy_data, latitude, longitude,
                                            sample_hours, days_sample, scaling_factor,
-                                           walls_data, apply_corrections):
+                                           walls_data, apply_corrections,
+                                           sample_series=None, level_table=None, shading_cache=None):
         """Calculate radiation for a single element using advanced methods"""
         
         element_id = element['element_id']
         orientation = element['orientation']
         azimuth = float(element['azimuth'])
         glass_area = float(element['glass_area'])
-        building_level = element.get('building_level', element.get('level', 'Level 1'))
+        building_level = self._element_level(element)
         
         # Calculate tilt angle - default to vertical for windows
         tilt = 90.0  # Default to vertical for window elements
         
-        # Estimate height from ground
-        height_from_ground = self.estimate_height_from_ground(building_level)
-        
-        # Calculate radiation for sampled time points
-        total_irradiance = 0
-        peak_irradiance = 0
-        monthly_totals = [0] * 12
-        
-        for day in days_sample:
-            for hour in sample_hours:
-                # Find matching TMY data - handle different field name conventions
-                matching_data = None
-                for hour_data in tmy_data:
-                    # Try different field name conventions
-                    data_day = hour_data.get('day_of_year', hour_data.get('day', 0))
-                    data_hour = hour_data.get('hour', 0)
-                    
-                    if (data_day == day and data_hour == hour):
-                        matching_data = hour_data
-                        break
-                
-                if not matching_data:
-                    continue
-                
-                # Calculate solar position
-                solar_pos = calculate_solar_position_simple(latitude, longitude, day, hour)
-                
-                # Get irradiance components with multiple field name support
-                ghi = 0
-                dni = 0
-                dhi = 0
-                
-                # Try multiple field names for irradiance data (including CSV format)
-                for ghi_field in ['ghi', 'GHI', 'Global_Horizontal_Irradiance', 'ghi_wm2', 'GHI_Wm2']:
-                    if ghi_field in matching_data and matching_data[ghi_field] is not None:
-                        try:
-                            ghi = float(matching_data[ghi_field])
-                            if ghi > 0:
-                                break
-                        except (ValueError, TypeError):
-                            continue
-                
-                for dni_field in ['dni', 'DNI', 'Direct_Normal_Irradiance', 'dni_wm2', 'DNI_Wm2']:
-                    if dni_field in matching_data and matching_data[dni_field] is not None:
-                        try:
-                            dni = float(matching_data[dni_field])
-                            break
-                        except (ValueError, TypeError):
-                            continue
-                        
-                for dhi_field in ['dhi', 'DHI', 'Diffuse_Horizontal_Irradiance', 'dhi_wm2', 'DHI_Wm2']:
-                    if dhi_field in matching_data and matching_data[dhi_field] is not None:
-                        try:
-                            dhi = float(matching_data[dhi_field])
-                            break
-                        except (ValueError, TypeError):
-                            continue
-                
-                if ghi <= 0:
-                    continue  # Skip night hours
-                
-                # Apply height-dependent GHI effects
-                height_effects = self.calculate_height_dependent_ghi_effects(height_from_ground, ghi)
-                adjusted_ghi = height_effects['adjusted_ghi']
-                
-                # Calculate surface irradiance (advanced mode for research-grade accuracy)
-                surface_irradiance = calculate_irradiance_on_surface(
-                    dni, solar_pos['elevation'], solar_pos['azimuth'], 
-                    azimuth, tilt, adjusted_ghi, dhi, calculation_mode="advanced"
-                )
-                
-                # Apply ground reflectance
-                ground_contribution = self.calculate_ground_reflectance_factor(height_from_ground)
-                surface_irradiance += adjusted_ghi * ground_contribution
-                
-                # Apply shading if walls data available
-                if walls_data:
-                    shading_factor = self.calculate_precise_shading_factor(element, walls_data, solar_pos)
-                    surface_irradiance *= shading_factor
-                
-                # Apply orientation corrections
-                if apply_corrections:
-                    orientation_factor = self._get_orientation_factor(orientation)
-                    surface_irradiance *= orientation_factor
-                
-                # Accumulate results
-                total_irradiance += surface_irradiance
-                peak_irradiance = max(peak_irradiance, surface_irradiance)
-                
-                # Monthly totals - calculate month from day_of_year if month not available
-                month = matching_data.get('month', 0)
-                if month == 0:
-                    # Calculate month from day of year
-                    month = ((day - 1) // 30) + 1  # Approximate month calculation
-                month = month - 1  # Convert to 0-based index
-                if 0 <= month < 12:
-                    monthly_totals[month] += surface_irradiance
+        if sample_series is None:
+            sample_series = self.build_sample_series(tmy_data, latitude, longitude, sample_hours, days_sample)
+        if level_table is None or building_level not in level_table:
+            level_table = self.build_level_table([building_level])
+        level_factors = level_table[building_level]
+        height_from_ground = level_factors['height_from_ground']
+        
+        # Height-dependent GHI effects and ground reflectance applied to the whole series
+        adjusted_ghi = sample_series['ghi'] * level_factors['height_factor']
+        ground_irradiance = adjusted_ghi * level_factors['ground_reflectance']
+        
+        # Surface irradiance for the whole series at once (advanced GHI+DNI+DHI model)
+        surface_irradiance = calculate_irradiance_on_surfaces(
+            sample_series['dni'], adjusted_ghi, sample_series['dhi'],
+            sample_series['sun_elevation'], sample_series['sun_azimuth'], [azimuth], tilt
+        )[0] + ground_irradiance
+        
+        # Apply shading if walls data available
+        if walls_data and not isinstance(walls_data, TopologyIndex):
+            walls_data = TopologyIndex.from_walls(walls_data)
+        if isinstance(walls_data, TopologyIndex) and walls_data.wall_count and len(surface_irradiance):
+            surface_irradiance *= self.shading_factor_series(element, walls_data, sample_series, shading_cache)
+        
+        # Apply orientation corrections
+        if apply_corrections:
+            surface_irradiance *= self._get_orientation_factor(orientation)
+        
+        # Accumulate results
+        total_irradiance = float(surface_irradiance.sum())
+        peak_irradiance = max(0, float(surface_irradiance.max())) if len(surface_irradiance) else 0
+        
+        month_index = sample_series['month_index']
+        valid_months = (month_index >= 0) & (month_index < 12)
+        monthly_totals = np.bincount(
+            month_index[valid_months], weights=surface_irradiance[valid_months], minlength=12
+        )[:12].tolist()
         
         # Scale to annual values - ensure realistic scaling
         if scaling_factor > 0:
@@ -440,7 +580,11 @@ class AdvancedRadiationAnalyzer:
             'orientation_factor': self._get_orientation_factor(orientation),
             'height_from_ground': height_from_ground,
             'tilt': tilt,
-            'glass_area': glass_area
+            'glass_area': glass_area,
+            # Month x hour-of-day kWh/m² grid summing to annual_radiation
+            'irradiance_profile': build_profile(
+                surface_irradiance, month_index, sample_series['hour'], scaling_factor
+            )
         }
     
     def _get_orientation_factor(self, orientation):
@@ -467,6 +611,10 @@ class AdvancedRadiationAnalyzer:
         if not conn:
             return False
         
+        if not ensure_profile_schema(conn):
+            conn.close()
+            return False
+        
         try:
             with conn.cursor() as cursor:
                 # Clear existing radiation data
@@ -476,14 +624,15 @@ class AdvancedRadiationAnalyzer:
                 for result in radiation_results:
                     cursor.execute("""
                         INSERT INTO element_radiation 
-                        (project_id, element_id, annual_radiation, irradiance, orientation_multiplier)
-                        VALUES (%s, %s, %s, %s, %s)
+                        (project_id, element_id, annual_radiation, irradiance, orientation_multiplier, irradiance_profile)
+                        VALUES (%s, %s, %s, %s, %s, %s)
                     """, (
                         self.project_id,
                         result['element_id'],
                         result['annual_radiation'],
                         result['peak_irradiance'],
-                        result['orientation_factor']
+                        result['orientation_factor'],
+                        Binary(pack_profile(result['irradiance_profile']))
                     ))
                 
                 # Save analysis summary with duplicate handling
@@ -0,0 +1,350 @@
+"""
+Window-Wall Topology Index
+Compact CSR arrays mapping host wall -> windows, level -> walls and
+azimuth bin -> walls, built when Step 4 element data is saved and stored per
+project so Step 5 shading and the Step 4 charts look up neighbouring walls
+directly instead of scanning every wall for every window. Every write of
+windows or walls rebuilds the stored index, so readers load it as is
+"""
+
+import io
+import logging
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+TOPOLOGY_VERSION = 1
+AZIMUTH_BIN_DEGREES = 10.0
+AZIMUTH_BINS = int(360 / AZIMUTH_BIN_DEGREES)
+
+TOPOLOGY_SCHEMA_STATEMENTS = [
+    """
+    CREATE TABLE IF NOT EXISTS building_topology_index (
+        project_id INTEGER PRIMARY KEY,
+        version INTEGER NOT NULL,
+        window_count INTEGER,
+        wall_count INTEGER,
+        arrays BYTEA NOT NULL,
+        built_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """
+]
+
+ARRAY_NAMES = (
+    'wall_ids', 'wall_azimuth', 'wall_level', 'wall_placed', 'levels',
+    'window_ids', 'window_level', 'window_host_ids', 'window_host',
+    'host_offsets', 'host_windows', 'level_offsets', 'level_walls',
+    'azimuth_offsets', 'azimuth_walls', 'bin_offsets', 'bin_walls', 'unbinned_walls', 'unplaced_walls'
+)
+
+_schema_ready = False
+
+
+def _csr(keys: np.ndarray, key_count: int):
+    """Offsets and member positions grouping positions by integer key (keys < 0 are left out)."""
+    keys = np.asarray(keys, dtype=np.int64)
+    positions = np.flatnonzero(keys >= 0)
+    order = positions[np.argsort(keys[positions], kind='stable')]
+    counts = np.bincount(keys[positions], minlength=key_count)[:key_count]
+    offsets = np.zeros(key_count + 1, dtype=np.int32)
+    np.cumsum(counts, out=offsets[1:])
+    return offsets, order.astype(np.int32)
+
+
+def _text_values(values: Iterable, missing: Optional[str] = None) -> List[Optional[str]]:
+    return [missing if value is None or (isinstance(value, float) and np.isnan(value)) else str(value)
+            for value in values]
+
+
+def azimuth_bins(azimuth) -> np.ndarray:
+    """Azimuth bin of each (finite) azimuth in degrees."""
+    azimuth = np.mod(np.asarray(azimuth, dtype=float), 360.0)
+    return np.minimum((azimuth // AZIMUTH_BIN_DEGREES).astype(np.int64), AZIMUTH_BINS - 1)
+
+
+class TopologyIndex:
+    """
+    Window and wall neighbourhoods of one project as flat numpy arrays.
+
+    Walls keep the building_walls row order (duplicate element IDs included) so
+    per-wall calculations see the same walls as a full table scan. Walls without
+    a numeric azimuth or height are "unplaced": they are in no azimuth bin and
+    are listed in unplaced_walls instead. Walls with an azimuth outside
+    [0, 360) are kept out of the bins too (unbinned_walls) and returned by every
+    walls_near query.
+    """
+
+    def __init__(self, arrays: Dict[str, np.ndarray]):
+        self.arrays = arrays
+        for name in ARRAY_NAMES:
+            setattr(self, name, arrays[name])
+        self._wall_positions = None
+        self._level_codes = None
+
+    # Construction
+
+    @classmethod
+    def build(cls, windows: Optional[pd.DataFrame], walls: Optional[pd.DataFrame]) -> 'TopologyIndex':
+        """
+        Index building_elements / building_walls rows.
+
+        Args:
+            windows: element_id, wall_element_id and building_level columns
+            walls: element_id, level, azimuth and height columns
+        """
+        if windows is None:
+            windows = pd.DataFrame(columns=['element_id', 'wall_element_id', 'building_level'])
+        if walls is None:
+            walls = pd.DataFrame(columns=['element_id', 'level', 'azimuth', 'height'])
+
+        wall_ids = np.array(_text_values(walls['element_id'], ''), dtype=str)
+        wall_levels = _text_values(walls['level'])
+        window_levels = _text_values(windows['building_level'])
+        levels = sorted({level for level in wall_levels + window_levels if level is not None})
+        level_codes = {level: code for code, level in enumerate(levels)}
+        level_codes[None] = -1
+
+        wall_level = np.array([level_codes[level] for level in wall_levels], dtype=np.int32)
+        window_level = np.array([level_codes[level] for level in window_levels], dtype=np.int32)
+
+        # Values float() would reject leave a wall unplaced
+        wall_azimuth = pd.to_numeric(walls['azimuth'], errors='coerce').to_numpy(dtype=float)
+        wall_height = pd.to_numeric(walls['height'], errors='coerce').to_numpy(dtype=float)
+        wall_placed = ~(np.isnan(wall_azimuth) | np.isnan(wall_height))
+
+        # Host walls resolve to the last wall row with the ID, as merge_building_data's lookup
+        wall_positions = {wall_id: position for position, wall_id in enumerate(wall_ids)}
+        window_host_ids = np.array(_text_values(windows['wall_element_id'], ''), dtype=str)
+        window_host = np.array([wall_positions.get(host, -1) if host else -1 for host in window_host_ids],
+                               dtype=np.int32)
+
+        wall_count = len(wall_ids)
+        placed_bins = np.full(wall_count, -1, dtype=np.int64)
+        binned = wall_placed & (wall_azimuth >= 0) & (wall_azimuth < 360)
+        placed_bins[binned] = azimuth_bins(wall_azimuth[binned])
+        level_bins = np.where((placed_bins >= 0) & (wall_level >= 0),
+                              wall_level.astype(np.int64) * AZIMUTH_BINS + placed_bins, -1)
+
+        host_offsets, host_windows = _csr(window_host, wall_count)
+        level_offsets, level_walls = _csr(wall_level, len(levels))
+        azimuth_offsets, azimuth_walls = _csr(placed_bins, AZIMUTH_BINS)
+        bin_offsets, bin_walls = _csr(level_bins, len(levels) * AZIMUTH_BINS)
+
+        index = cls({
+            'wall_ids': wall_ids,
+            'wall_azimuth': wall_azimuth,
+            'wall_level': wall_level,
+            'wall_placed': wall_placed,
+            'levels': np.array(levels, dtype=str),
+            'window_ids': np.array(_text_values(windows['element_id'], ''), dtype=str),
+            'window_level': window_level,
+            'window_host_ids': window_host_ids,
+            'window_host': window_host,
+            'host_offsets': host_offsets,
+            'host_windows': host_windows,
+            'level_offsets': level_offsets,
+            'level_walls': level_walls,
+            'azimuth_offsets': azimuth_offsets,
+            'azimuth_walls': azimuth_walls,
+            'bin_offsets': bin_offsets,
+            'bin_walls': bin_walls,
+            'unbinned_walls': np.flatnonzero(wall_placed & ~binned).astype(np.int32),
+            'unplaced_walls': np.flatnonzero(~wall_placed).astype(np.int32)
+        })
+        index._wall_positions = wall_positions
+        return index
+
+    @classmethod
+    def from_walls(cls, walls_data: List[Dict]) -> 'TopologyIndex':
+        """Index of wall dicts as returned by AdvancedRadiationAnalyzer.get_walls_data (no windows)."""
+        if not walls_data:
+            return cls.build(None, None)
+        # Wall dicts missing a key get the defaults the per-wall shading loop used
+        return cls.build(None, pd.DataFrame({
+            'element_id': [wall.get('wall_id', wall.get('element_id')) for wall in walls_data],
+            'level': [wall.get('level', 'Level 1') for wall in walls_data],
+            'azimuth': [wall.get('azimuth', 180) for wall in walls_data],
+            'height': [wall.get('height', 3.0) for wall in walls_data]
+        }))
+
+    # Serialization
+
+    def to_bytes(self) -> bytes:
+        buffer = io.BytesIO()
+        np.savez(buffer, **self.arrays)
+        return buffer.getvalue()
+
+    @classmethod
+    def from_bytes(cls, blob) -> 'TopologyIndex':
+        with np.load(io.BytesIO(bytes(blob)), allow_pickle=False) as stored:
+            return cls({name: stored[name] for name in ARRAY_NAMES})
+
+    # Queries
+
+    @property
+    def wall_count(self) -> int:
+        return len(self.wall_ids)
+
+    @property
+    def window_count(self) -> int:
+        return len(self.window_ids)
+
+    def level_code(self, level) -> int:
+        """Code of a level name; -1 for None and -2 for levels the index does not know."""
+        if self._level_codes is None:
+            self._level_codes = {level: code for code, level in enumerate(self.levels.tolist())}
+        if level is None:
+            return -1
+        return self._level_codes.get(str(level), -2)
+
+    def wall_position(self, wall_id) -> int:
+        """Row of a wall ID (the last row for duplicate IDs), -1 if unknown."""
+        if self._wall_positions is None:
+            self._wall_positions = {wall_id: position for position, wall_id in enumerate(self.wall_ids.tolist())}
+        return self._wall_positions.get(str(wall_id), -1)
+
+    def windows_on_wall(self, wall_id) -> np.ndarray:
+        """IDs of the windows hosted by a wall."""
+        position = self.wall_position(wall_id)
+        if position < 0:
+            return self.window_ids[:0]
+        members = self.host_windows[self.host_offsets[position]:self.host_offsets[position + 1]]
+        return self.window_ids[members]
+
+    def walls_on_level(self, level) -> np.ndarray:
+        """Rows of the walls on a level."""
+        code = self.level_code(level)
+        if code < 0:
+            return self.level_walls[:0]
+        return self.level_walls[self.level_offsets[code]:self.level_offsets[code + 1]]
+
+    def walls_near(self, azimuth: float, half_width: float = 90.0, level=None) -> np.ndarray:
+        """
+        Rows of placed walls in the azimuth bins overlapping azimuth +- half_width
+        (on one level, or on every level when level is None).
+
+        Bins are whole, so the result is a superset of the walls strictly within
+        half_width; callers filter exactly.
+        """
+        if level is None:
+            offsets, members, base = self.azimuth_offsets, self.azimuth_walls, 0
+        else:
+            code = self.level_code(level)
+            if code < 0:
+                return self.bin_walls[:0]
+            offsets, members, base = self.bin_offsets, self.bin_walls, code * AZIMUTH_BINS
+
+        first = int(np.floor((float(azimuth) - half_width) / AZIMUTH_BIN_DEGREES))
+        last = int(np.floor((float(azimuth) + half_width) / AZIMUTH_BIN_DEGREES))
+        bins = range(AZIMUTH_BINS) if last - first + 1 >= AZIMUTH_BINS else \
+            (bin_number % AZIMUTH_BINS for bin_number in range(first, last + 1))
+        slices = [members[offsets[base + b]:offsets[base + b + 1]] for b in bins]
+        unbinned = self.unbinned_walls
+        if level is not None:
+            unbinned = unbinned[self.wall_level[unbinned] == code]
+        return np.sort(np.concatenate(slices + [unbinned]))
+
+    def relationship_summary(self) -> Dict[str, int]:
+        """Counts behind the Step 4 window-wall relationship metrics (distinct element IDs)."""
+        referenced = np.unique(self.window_host_ids[self.window_host_ids != ''])
+        available = np.unique(self.window_host_ids[self.window_host >= 0])
+        return {
+            'windows': len(np.unique(self.window_ids)),
+            'walls': len(np.unique(self.wall_ids)),
+            'host_walls_referenced': len(referenced),
+            'host_walls_available': len(available),
+            'hosted_windows': int((self.window_host >= 0).sum()),
+            'unplaced_walls': len(self.unplaced_walls)
+        }
+
+
+def ensure_topology_schema(conn) -> bool:
+    global _schema_ready
+    if _schema_ready:
+        return True
+    try:
+        with conn.cursor() as cursor:
+            for statement in TOPOLOGY_SCHEMA_STATEMENTS:
+                cursor.execute(statement)
+        conn.commit()
+        _schema_ready = True
+    except Exception as e:
+        conn.rollback()
+        logger.warning(f"Topology index schema unavailable: {e}")
+    return _schema_ready
+
+
+def rebuild_topology_index(db_manager, project_id: int) -> Optional[TopologyIndex]:
+    """
+    Index the project's stored windows and walls and store the arrays.
+    Called after every write to building_elements or building_walls.
+    """
+    conn = db_manager.get_connection()
+    if not conn:
+        return None
+    try:
+        if not ensure_topology_schema(conn):
+            return None
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                SELECT element_id, wall_element_id, building_level
+                FROM building_elements WHERE project_id = %s ORDER BY id
+            """, (project_id,))
+            windows = pd.DataFrame(cursor.fetchall(),
+                                   columns=['element_id', 'wall_element_id', 'building_level'])
+            # Same row order as AdvancedRadiationAnalyzer.get_walls_data
+            cursor.execute("""
+                SELECT element_id, level, azimuth, height
+                FROM building_walls WHERE project_id = %s
+                ORDER BY level, azimuth
+            """, (project_id,))
+            walls = pd.DataFrame(cursor.fetchall(), columns=['element_id', 'level', 'azimuth', 'height'])
+
+            index = TopologyIndex.build(windows, walls)
+            cursor.execute("""
+                INSERT INTO building_topology_index
+                (project_id, version, window_count, wall_count, arrays, built_at)
+                VALUES (%s, %s, %s, %s, %s, CURRENT_TIMESTAMP)
+                ON CONFLICT (project_id) DO UPDATE SET
+                    version = EXCLUDED.version,
+                    window_count = EXCLUDED.window_count,
+                    wall_count = EXCLUDED.wall_count,
+                    arrays = EXCLUDED.arrays,
+                    built_at = EXCLUDED.built_at
+            """, (project_id, TOPOLOGY_VERSION, index.window_count, index.wall_count, index.to_bytes()))
+        conn.commit()
+        return index
+    except Exception as e:
+        conn.rollback()
+        logger.warning(f"Topology index rebuild failed for project {project_id}: {e}")
+        return None
+    finally:
+        conn.close()
+
+
+def load_topology_index(db_manager, project_id: int) -> Optional[TopologyIndex]:
+    """The stored index of a project, or None if it is missing or from another version."""
+    conn = db_manager.get_connection()
+    if not conn:
+        return None
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                SELECT arrays FROM building_topology_index
+                WHERE project_id = %s AND version = %s
+            """, (project_id, TOPOLOGY_VERSION))
+            row = cursor.fetchone()
+        return TopologyIndex.from_bytes(row[0]) if row else None
+    except Exception as e:
+        logger.warning(f"Topology index unavailable for project {project_id}: {e}")
+        return None
+    finally:
+        conn.close()
+
+
+def ensure_topology_index(db_manager, project_id: int) -> Optional[TopologyIndex]:
+    """The stored index of a project, built first if there is none yet."""
+    return load_topology_index(db_manager, project_id) or rebuild_topology_index(db_manager, project_id)
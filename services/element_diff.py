@@ -0,0 +1,446 @@
+"""
+Diff-Based Building Element Ingest
+Compares a re-uploaded Step 4 CSV with the project's stored elements by
+element_id and row hash, applies only the inserts, updates and deletes, and
+records the changed element IDs so later steps can recompute incrementally
+"""
+
+import logging
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from psycopg2.extras import execute_values
+
+logger = logging.getLogger(__name__)
+
+CHANGE_LOG_SCHEMA_STATEMENTS = [
+    """
+    CREATE TABLE IF NOT EXISTS element_change_log (
+        project_id INTEGER NOT NULL,
+        data_type VARCHAR(20) NOT NULL,
+        element_id VARCHAR(100) NOT NULL,
+        change_type VARCHAR(10) NOT NULL,
+        changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (project_id, data_type, element_id)
+    )
+    """
+]
+
+INSERTED = 'inserted'
+UPDATED = 'updated'
+DELETED = 'deleted'
+
+
+@dataclass(frozen=True)
+class ElementTableSpec:
+    """How one element table is normalized, hashed and written."""
+    data_type: str
+    table: str
+    text_columns: Tuple[str, ...]
+    numeric_columns: Dict[str, int]      # column -> decimals stored by the table
+    bool_columns: Tuple[str, ...] = ()
+    # Columns derived or maintained by later steps (orientation repair, window
+    # selection) are written on change but ignored when comparing rows
+    unhashed_columns: Tuple[str, ...] = ()
+
+    @property
+    def columns(self) -> List[str]:
+        return ['element_id', *self.text_columns, *self.numeric_columns, *self.bool_columns]
+
+    @property
+    def hash_columns(self) -> List[str]:
+        return [column for column in self.columns if column not in self.unhashed_columns]
+
+
+WINDOW_SPEC = ElementTableSpec(
+    data_type='windows',
+    table='building_elements',
+    text_columns=('wall_element_id', 'element_type', 'orientation', 'building_level', 'family'),
+    numeric_columns={'azimuth': 1, 'glass_area': 2, 'window_width': 2, 'window_height': 2},
+    bool_columns=('pv_suitable',),
+    unhashed_columns=('orientation', 'pv_suitable')
+)
+
+WALL_SPEC = ElementTableSpec(
+    data_type='walls',
+    table='building_walls',
+    text_columns=('name', 'wall_type', 'orientation', 'level'),
+    numeric_columns={'azimuth': 1, 'height': 2, 'area': 2},
+    unhashed_columns=('orientation',)
+)
+
+ELEMENT_SPECS = {spec.data_type: spec for spec in (WINDOW_SPEC, WALL_SPEC)}
+
+
+@dataclass
+class ElementChangeSet:
+    """Outcome of a diff ingest; element IDs per kind of change."""
+    data_type: str
+    inserted: List[str] = field(default_factory=list)
+    updated: List[str] = field(default_factory=list)
+    deleted: List[str] = field(default_factory=list)
+    unchanged: int = 0
+    skipped_rows: int = 0          # rows without an element ID
+    duplicate_rows: int = 0        # repeated element IDs; the last row wins
+
+    @property
+    def changed_ids(self) -> List[str]:
+        """Elements whose downstream results must be (re)calculated."""
+        return self.inserted + self.updated
+
+    @property
+    def affected_ids(self) -> List[str]:
+        return self.inserted + self.updated + self.deleted
+
+    @property
+    def is_empty(self) -> bool:
+        return not self.affected_ids
+
+    def summary(self) -> str:
+        return (f"{len(self.inserted)} added, {len(self.updated)} changed, "
+                f"{len(self.deleted)} removed, {self.unchanged} unchanged")
+
+    def to_dict(self) -> Dict:
+        return {
+            'data_type': self.data_type,
+            'inserted': self.inserted,
+            'updated': self.updated,
+            'deleted': self.deleted,
+            'unchanged': self.unchanged,
+            'skipped_rows': self.skipped_rows,
+            'duplicate_rows': self.duplicate_rows
+        }
+
+
+def _first_column(frame: pd.DataFrame, names: Iterable[str], default):
+    """Values of the first present column (like chained dict.get), else default."""
+    for name in names:
+        if name in frame.columns:
+            return frame[name]
+    return pd.Series(default, index=frame.index)
+
+
+def _first_number(frame: pd.DataFrame, names: Iterable[str], default: float,
+                  positive: bool = False) -> pd.Series:
+    """Per row, the first column holding a usable number, else default."""
+    values = pd.Series(np.nan, index=frame.index)
+    for name in names:
+        if name in frame.columns:
+            candidate = pd.to_numeric(frame[name], errors='coerce')
+            if positive:
+                candidate = candidate.where(candidate > 0)
+            values = values.fillna(candidate)
+    return values.fillna(default)
+
+
+def _cardinal_orientation(azimuth: pd.Series) -> pd.Series:
+    """Vectorized form of the Step 4 page's get_orientation_from_azimuth."""
+    wrapped = azimuth % 360
+    labels = np.select(
+        [wrapped.isna(), (wrapped <= 45) | (wrapped > 315), wrapped <= 135, wrapped <= 225],
+        ['Unknown', 'North', 'East', 'South'], default='West'
+    )
+    return pd.Series(labels, index=azimuth.index)
+
+
+def normalize_window_elements(elements: pd.DataFrame) -> pd.DataFrame:
+    """
+    Map an uploaded windows CSV onto building_elements columns with the same
+    field fallbacks as BIPVDatabaseManager.save_building_elements.
+    """
+    frame = pd.DataFrame({
+        'element_id': _first_column(elements, ['ElementId', 'Element_ID', 'element_id'], ''),
+        'wall_element_id': _first_column(elements, ['HostWallId', 'Wall_Element_ID', 'wall_element_id'], ''),
+        'element_type': _first_column(elements, ['element_type'], 'Window'),
+        'orientation': _first_column(elements, ['orientation'], ''),
+        'building_level': _first_column(elements, ['Level', 'level'], ''),
+        'family': _first_column(elements, ['Family', 'family'], ''),
+        'azimuth': _first_number(elements, ['Azimuth (°)', 'azimuth', 'Azimuth'], 0.0),
+        'glass_area': _first_number(elements, ['Glass Area (m²)', 'glass_area', 'Glass_Area',
+                                               'window_area', 'Glass Area', 'area'], 0.0, positive=True),
+        'window_width': _first_number(elements, ['window_width'], 0.0),
+        'window_height': _first_number(elements, ['window_height'], 0.0),
+        'pv_suitable': _first_column(elements, ['pv_suitable', 'PV_Suitable', 'suitable'], False)
+    })
+    return coerce_elements(frame, WINDOW_SPEC)
+
+
+def normalize_wall_elements(elements: pd.DataFrame) -> pd.DataFrame:
+    """Map an uploaded walls CSV onto building_walls columns like save_walls_data_to_database."""
+    length = _first_number(elements, ['Length (m)'], 0.0)
+    area = _first_number(elements, ['Area (m²)'], 0.0)
+    azimuth = pd.to_numeric(_first_column(elements, ['Azimuth (°)'], np.nan), errors='coerce')
+    frame = pd.DataFrame({
+        'element_id': _first_column(elements, ['ElementId'], ''),
+        'name': _first_column(elements, ['Name'], ''),
+        'wall_type': _first_column(elements, ['Wall Type'], 'Generic Wall'),
+        'orientation': _cardinal_orientation(azimuth),
+        'level': _first_column(elements, ['Level'], ''),
+        'azimuth': azimuth,
+        'height': (area / length.where(length > 0)).fillna(3.0),
+        'area': area
+    })
+    return coerce_elements(frame, WALL_SPEC)
+
+
+ELEMENT_NORMALIZERS = {'windows': normalize_window_elements, 'walls': normalize_wall_elements}
+
+
+def coerce_elements(frame: pd.DataFrame, spec: ElementTableSpec) -> pd.DataFrame:
+    """
+    Canonical dtypes and the table's stored precision, so uploaded rows and
+    rows read back from the database hash identically.
+    """
+    coerced = pd.DataFrame(index=frame.index)
+    for column in ['element_id', *spec.text_columns]:
+        coerced[column] = frame[column].where(frame[column].notna(), '').astype(str).str.strip()
+    for column, decimals in spec.numeric_columns.items():
+        # + 0.0 folds -0.0 into 0.0
+        coerced[column] = pd.to_numeric(frame[column], errors='coerce').astype(float).round(decimals) + 0.0
+    for column in spec.bool_columns:
+        coerced[column] = frame[column].fillna(False).astype(bool)
+    return coerced.reset_index(drop=True)
+
+
+def row_hashes(frame: pd.DataFrame, spec: ElementTableSpec) -> np.ndarray:
+    """64-bit content hash of each row's compared columns."""
+    return pd.util.hash_pandas_object(frame[spec.hash_columns], index=False).to_numpy()
+
+
+def diff_elements(existing: pd.DataFrame, incoming: pd.DataFrame,
+                  spec: ElementTableSpec) -> Tuple[ElementChangeSet, pd.DataFrame, List[str]]:
+    """
+    Compare coerced incoming rows with the stored rows.
+
+    Returns:
+        (change set, rows to write for inserted/updated IDs, IDs whose stored
+        rows are deleted before writing - removed elements plus IDs stored
+        more than once, which are replaced by a single row)
+    """
+    changes = ElementChangeSet(spec.data_type)
+
+    keyed = incoming['element_id'] != ''
+    changes.skipped_rows = int((~keyed).sum())
+    incoming = incoming[keyed]
+    repeated = incoming['element_id'].duplicated(keep='last')
+    changes.duplicate_rows = int(repeated.sum())
+    incoming = incoming[~repeated].reset_index(drop=True)
+
+    stored_ids = existing['element_id']
+    multiple = stored_ids.duplicated(keep=False)
+    replaced_ids = set(stored_ids[multiple])
+    single = existing[~multiple].reset_index(drop=True)
+
+    positions = pd.Index(single['element_id']).get_indexer(incoming['element_id'])
+    present = positions >= 0
+    new_hashes = row_hashes(incoming, spec)
+    differs = np.ones(len(incoming), dtype=bool)
+    if len(single):
+        old_hashes = row_hashes(single, spec)
+        differs[present] = old_hashes[positions[present]] != new_hashes[present]
+
+    is_replaced = incoming['element_id'].isin(replaced_ids).to_numpy()
+    is_update = (present & differs) | is_replaced
+    is_insert = ~present & ~is_replaced
+
+    changes.inserted = incoming['element_id'][is_insert].tolist()
+    changes.updated = incoming['element_id'][is_update].tolist()
+    changes.unchanged = int(len(incoming) - is_insert.sum() - is_update.sum())
+
+    incoming_ids = set(incoming['element_id'])
+    changes.deleted = sorted(set(stored_ids) - incoming_ids - {''})
+
+    rows = incoming[is_insert | is_update]
+    return changes, rows, changes.deleted + sorted(replaced_ids & incoming_ids)
+
+
+class ElementDiffIngest:
+    """
+    Applies an uploaded element CSV as a diff against one project's table.
+
+    Everything runs in a single transaction: changed rows are staged in a temp
+    table, then removed IDs are deleted, changed rows updated in place (keeping
+    their id and created_at) and new rows inserted. Changed IDs are upserted
+    into element_change_log for incremental recomputation, and stale
+    element_radiation rows of changed or removed windows are dropped.
+    """
+
+    def __init__(self, db_manager, project_id: int, data_type: str = 'windows'):
+        if data_type not in ELEMENT_SPECS:
+            raise ValueError(f"Unknown element data type: {data_type}")
+        self.db_manager = db_manager
+        self.project_id = project_id
+        self.spec = ELEMENT_SPECS[data_type]
+        self._schema_ready = False
+
+    def ensure_schema(self, conn) -> bool:
+        if self._schema_ready:
+            return True
+        try:
+            with conn.cursor() as cursor:
+                for statement in CHANGE_LOG_SCHEMA_STATEMENTS:
+                    cursor.execute(statement)
+            conn.commit()
+            self._schema_ready = True
+        except Exception as e:
+            conn.rollback()
+            logger.warning(f"Element change log schema unavailable: {e}")
+        return self._schema_ready
+
+    def load_existing(self, cursor) -> pd.DataFrame:
+        columns = self.spec.columns
+        cursor.execute(f"SELECT {', '.join(columns)} FROM {self.spec.table} WHERE project_id = %s",
+                       (self.project_id,))
+        return coerce_elements(pd.DataFrame(cursor.fetchall(), columns=columns), self.spec)
+
+    def apply(self, elements: pd.DataFrame,
+              progress_callback: Optional[Callable[[int, str], None]] = None) -> Optional[ElementChangeSet]:
+        """
+        Diff an uploaded DataFrame against the stored elements and apply the changes.
+
+        Returns:
+            The change set, or None if the database write failed
+        """
+        def report(progress, message):
+            if progress_callback:
+                progress_callback(progress, message)
+
+        incoming = ELEMENT_NORMALIZERS[self.spec.data_type](elements)
+
+        conn = self.db_manager.get_connection()
+        if not conn:
+            return None
+
+        try:
+            log_changes = self.ensure_schema(conn)
+            with conn.cursor() as cursor:
+                report(25, f"Comparing {len(incoming):,} uploaded elements with stored data...")
+                existing = self.load_existing(cursor)
+                changes, rows, removed_ids = diff_elements(existing, incoming, self.spec)
+
+                report(40, f"Applying changes: {changes.summary()}")
+                if not changes.is_empty:
+                    self._write(cursor, rows, removed_ids)
+                    if log_changes:
+                        self._log_changes(cursor, changes)
+                    if self.spec.data_type == 'windows':
+                        self._invalidate_radiation(cursor, changes)
+
+            conn.commit()
+            report(60, f"Elements updated: {changes.summary()}")
+            logger.info(f"Project {self.project_id} {self.spec.data_type} diff ingest: {changes.summary()}")
+            return changes
+
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"Diff ingest of {self.spec.data_type} failed: {e}")
+            return None
+        finally:
+            conn.close()
+
+    def _write(self, cursor, rows: pd.DataFrame, removed_ids: List[str]):
+        table = self.spec.table
+        columns = self.spec.columns
+        column_list = ', '.join(columns)
+
+        if removed_ids:
+            cursor.execute(f"DELETE FROM {table} WHERE project_id = %s AND element_id = ANY(%s)",
+                           (self.project_id, removed_ids))
+        if rows.empty:
+            return
+
+        cursor.execute(f"""
+            CREATE TEMP TABLE element_diff_stage ON COMMIT DROP AS
+            SELECT {column_list} FROM {table} WITH NO DATA
+        """)
+        values = rows[columns].astype(object).where(rows[columns].notna(), None)
+        execute_values(cursor, f"INSERT INTO element_diff_stage ({column_list}) VALUES %s",
+                       values.itertuples(index=False, name=None), page_size=1000)
+
+        assignments = ', '.join(f"{column} = s.{column}" for column in columns if column != 'element_id')
+        cursor.execute(f"""
+            UPDATE {table} AS t SET {assignments}
+            FROM element_diff_stage s
+            WHERE t.project_id = %s AND t.element_id = s.element_id
+        """, (self.project_id,))
+        cursor.execute(f"""
+            INSERT INTO {table} (project_id, {column_list})
+            SELECT %s, {', '.join(f's.{column}' for column in columns)}
+            FROM element_diff_stage s
+            WHERE NOT EXISTS (
+                SELECT 1 FROM {table} t
+                WHERE t.project_id = %s AND t.element_id = s.element_id
+            )
+        """, (self.project_id, self.project_id))
+
+    def _invalidate_radiation(self, cursor, changes: ElementChangeSet):
+        """
+        Drop radiation rows of changed and removed windows and mark the project's
+        radiation analysis incomplete until Step 5 runs again, which
+        acknowledges the logged changes.
+        """
+        cursor.execute("""
+            DELETE FROM element_radiation
+            WHERE project_id = %s AND element_id = ANY(%s)
+        """, (self.project_id, changes.updated + changes.deleted))
+        cursor.execute("UPDATE radiation_analysis SET analysis_complete = FALSE WHERE project_id = %s",
+                       (self.project_id,))
+
+    def _log_changes(self, cursor, changes: ElementChangeSet):
+        entries = ([(element_id, INSERTED) for element_id in changes.inserted] +
+                   [(element_id, UPDATED) for element_id in changes.updated] +
+                   [(element_id, DELETED) for element_id in changes.deleted])
+        execute_values(cursor, """
+            INSERT INTO element_change_log (project_id, data_type, element_id, change_type)
+            VALUES %s
+            ON CONFLICT (project_id, data_type, element_id)
+            DO UPDATE SET change_type = EXCLUDED.change_type, changed_at = CURRENT_TIMESTAMP
+        """, [(self.project_id, self.spec.data_type, element_id, change_type)
+              for element_id, change_type in entries], page_size=1000)
+
+
+def pending_element_changes(db_manager, project_id: int, data_type: str = 'windows') -> Dict[str, str]:
+    """Element ID -> latest change type not yet acknowledged by a downstream step."""
+    conn = db_manager.get_connection()
+    if not conn:
+        return {}
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("""
+                SELECT element_id, change_type FROM element_change_log
+                WHERE project_id = %s AND data_type = %s
+            """, (project_id, data_type))
+            return dict(cursor.fetchall())
+    except Exception as e:
+        logger.warning(f"Element change log unavailable: {e}")
+        return {}
+    finally:
+        conn.close()
+
+
+def acknowledge_element_changes(db_manager, project_id: int, element_ids: Optional[List[str]] = None,
+                                data_type: str = 'windows') -> bool:
+    """Clear logged changes once recomputed (all of the project's if element_ids is None)."""
+    conn = db_manager.get_connection()
+    if not conn:
+        return False
+    try:
+        with conn.cursor() as cursor:
+            if element_ids is None:
+                cursor.execute("DELETE FROM element_change_log WHERE project_id = %s AND data_type = %s",
+                               (project_id, data_type))
+            else:
+                cursor.execute("""
+                    DELETE FROM element_change_log
+                    WHERE project_id = %s AND data_type = %s AND element_id = ANY(%s)
+                """, (project_id, data_type, [str(element_id) for element_id in element_ids]))
+        conn.commit()
+        return True
+    except Exception as e:
+        conn.rollback()
+        logger.warning(f"Failed to acknowledge element changes: {e}")
+        return False
+    finally:
+        conn.close()
@@ -4,18 +4,112 @@ Reduces processing time from 2+ hours to minutes with precision level options
 """
 
 import streamlit as st
-import numpy as np
-import pandas as pd
-from datetime import datetime, timedelta
-from typing import Dict, List, Tuple, Optional
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
 import time
 import threading
-from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from database_manager import BIPVDatabaseManager
-from core.solar_math import calculate_solar_position, calculate_irradiance_on_surface
+from services.radiation_engine import (
+    RadiationEngine, RadiationEngineConfig, ProgressEvent, ProgressEventStream, ENGINE_OPTIMIZED
+)
+from services.radiation_checkpoint import element_set_query
+from services.radiation_db_runner import run_engine_against_database
+from utils.progress_bus import ProgressBus, format_eta
 from utils.session_state_standardizer import BIPVSessionStateManager
 
+
+class StreamlitProgressPanel:
+    """Streamlit adapter that renders radiation engine progress events."""
+    
+    def __init__(self, precision: str):
+        self.precision = precision
+        self.panel_ready = False
+    
+    def on_event(self, event: ProgressEvent):
+        """Subscriber for RadiationEngine.events."""
+        if event.kind == ProgressEvent.STARTED:
+            self._build_panel(event)
+        elif event.kind == ProgressEvent.INFO:
+            if self.panel_ready:
+                self.detailed_status.text(event.message)
+            else:
+                st.info(event.message)
+        elif event.kind == ProgressEvent.WARNING:
+            st.warning(f"⚠️ {event.message}")
+        elif event.kind == ProgressEvent.BATCH_COMPLETED and self.panel_ready:
+            # Small batches arrive faster than the widgets can usefully repaint
+            self.bus.advance(event.completed - self.reported)
+            self.reported = event.completed
+            self.bus.set_message(event.message)
+            self.calculations = event.data['calculations']
+            self.bus.pump()
+        elif event.kind == ProgressEvent.COMPLETED and self.panel_ready:
+            self.bus.close()
+            self.main_progress.progress(1.0)
+            self.elements_processed.metric("Elements Processed", f"{event.total}", f"of {event.total}")
+            self.current_status.metric("Status", "Saving", "100%")
+            self.detailed_status.text(f"✅ Analysis complete! {event.message}")
+        elif event.kind == ProgressEvent.FAILED and self.panel_ready:
+            self.bus.close()
+            self.current_status.metric("Status", "Failed", "✗")
+            self.detailed_status.text(f"❌ {event.message}")
+    
+    def _render(self, snapshot: Dict):
+        """Repaint the metric widgets from a coalesced progress snapshot."""
+        percentage = int(snapshot['progress'] * 100)
+        completed, total = snapshot['completed'], snapshot['total']
+        self.main_progress.progress(snapshot['progress'])
+        self.elements_processed.metric("Elements Processed", f"{completed}", f"of {total}")
+        self.calculations_done.metric("Calculations", f"{self.calculations:,}",
+                                      f"of {self.total_calculations:,}")
+        self.current_status.metric("Status", "Processing", f"{percentage}%")
+        if percentage < 100:
+            self.detailed_status.text(f"⚡ {snapshot['message']} | {percentage}% complete | {completed}/{total} elements | {format_eta(snapshot)}")
+    
+    def _build_panel(self, event: ProgressEvent):
+        """Create the progress widgets once the run size is known."""
+        total_calculations = event.data.get('total_calculations', 0)
+        self.total_calculations = total_calculations
+        self.calculations = 0
+        
+        # Restored checkpoint elements count as already completed
+        self.bus = ProgressBus(event.total)
+        self.bus.advance(event.completed)
+        self.reported = event.completed
+        self.bus.subscribe(self._render)
+        
+        # Show processing overview before starting
+        st.info(f"📊 **Processing Overview**: {event.total:,} elements × {event.data.get('time_steps', 0)} time points = {total_calculations:,} total calculations")
+        
+        with st.container():
+            st.markdown("### 📊 Radiation Analysis Progress")
+            
+            # Main progress bar
+            self.main_progress = st.progress(event.progress)
+            
+            # Status display
+            status_col1, status_col2, status_col3 = st.columns(3)
+            
+            with status_col1:
+                self.elements_processed = st.empty()
+                self.elements_processed.metric("Elements Processed", f"{event.completed}", f"of {event.total}")
+            
+            with status_col2:
+                self.calculations_done = st.empty()
+                self.calculations_done.metric("Calculations", "0", f"of {total_calculations:,}")
+            
+            with status_col3:
+                self.current_status = st.empty()
+                self.current_status.metric("Status", "Starting", "0%")
+            
+            # Detailed progress text
+            self.detailed_status = st.empty()
+            self.detailed_status.text(f"🚀 Initializing {self.precision} analysis for {event.total} selected window elements...")
+        
+        self.panel_ready = True
+
+
 class OptimizedRadiationAnalyzer:
     """High-performance radiation analyzer with precision-based sampling."""
     
@@ -60,78 +154,31 @@ class OptimizedRadiationAnalyzer:
             }
         }
     
-    def _generate_hourly_timestamps(self) -> List[datetime]:
-        """Generate hourly timestamps for maximum precision."""
-        timestamps = []
-        base_year = 2024
-        
-        for month in range(1, 13):
-            for day in range(1, 32):
-                try:
-                    for hour in range(8, 19):  # Daylight hours only
-                        timestamps.append(datetime(base_year, month, day, hour))
-                except ValueError:
-                    continue  # Skip invalid dates
-        
-        return timestamps[:4015]  # Limit as specified
-    
-    def _generate_daily_peak_timestamps(self) -> List[datetime]:
-        """Generate daily peak timestamps (noon) for 365 days."""
-        timestamps = []
-        base_year = 2024
-        start_date = datetime(base_year, 1, 1, 12)  # January 1st, noon
-        
-        for i in range(365):
-            timestamps.append(start_date + timedelta(days=i))
-        
-        return timestamps
-    
-    def _generate_monthly_timestamps(self) -> List[datetime]:
-        """Generate monthly representative timestamps."""
-        timestamps = []
-        base_year = 2024
-        
-        # 15th of each month at noon (representative day)
-        for month in range(1, 13):
-            timestamps.append(datetime(base_year, month, 15, 12))
-        
-        return timestamps
-    
-    def _generate_seasonal_timestamps(self) -> List[datetime]:
-        """Generate seasonal representative timestamps."""
-        base_year = 2024
-        
-        return [
-            datetime(base_year, 3, 20, 12),   # Spring equinox
-            datetime(base_year, 6, 21, 12),   # Summer solstice
-            datetime(base_year, 9, 22, 12),   # Autumn equinox
-            datetime(base_year, 12, 21, 12)   # Winter solstice
-        ]
-    
-    def _generate_ultra_fast_timestamps(self) -> List[datetime]:
-        """Generate ultra-fast timestamps for Simple mode (4 calculations only)."""
-        base_year = 2024
-        
-        return [
-            datetime(base_year, 6, 21, 12),   # Summer solstice (peak performance)
-            datetime(base_year, 12, 21, 12),  # Winter solstice (minimum performance)
-            datetime(base_year, 3, 20, 12),   # Spring equinox (moderate)
-            datetime(base_year, 9, 22, 12)    # Autumn equinox (moderate)
-        ]
-    
     def analyze_radiation_optimized(self, project_id: int, precision: str = "Daily Peak", 
                                   apply_corrections: bool = True, 
                                   include_shading: bool = True,
-                                  calculation_mode: str = "auto") -> Dict:
+                                  calculation_mode: str = "auto",
+                                  checkpoint=None,
+                                  events: Optional[ProgressEventStream] = None,
+                                  render_progress: bool = True,
+                                  cache=None) -> Dict:
         """
         Optimized radiation analysis with precision-based performance.
         
+        Database adapter around the headless RadiationEngine: elements are streamed
+        from the database and progress is published on events. With render_progress
+        the Streamlit progress panel subscribes to that stream.
+        
         Args:
             project_id: Project identifier
             precision: Analysis precision level
             apply_corrections: Apply orientation corrections
             include_shading: Include geometric shading calculations
             calculation_mode: Solar calculation mode ("simple", "advanced", "auto")
+            checkpoint: Optional RadiationCheckpointManager for resumable batch commits
+            events: Optional ProgressEventStream to publish progress on
+            render_progress: Render the Streamlit progress panel
+            cache: Optional RadiationResultCache shared across projects
             
         Returns:
             Dictionary with radiation analysis results
@@ -139,155 +186,64 @@ class OptimizedRadiationAnalyzer:
         
         start_time = time.time()
         
-        # Get building elements
-        building_elements = self._get_building_elements(project_id)
-        if not building_elements:
-            return {"error": "No building elements found"}
-        
-        # Building elements already filtered to PV suitable in _get_building_elements
-        suitable_elements = building_elements
+        events = events or ProgressEventStream()
+        if render_progress:
+            events.subscribe(StreamlitProgressPanel(precision).on_event)
         
-        if not suitable_elements:
+        # Count building elements; rows are streamed batch by batch by the engine
+        total_elements, element_set_hash = self._element_set(project_id)
+        if not total_elements:
             return {"error": "No PV suitable elements found. Please ensure window types are selected in Step 4."}
         
-        # Get precision configuration and generate time steps based on calculation mode
-        config = self.precision_configs.get(precision, self.precision_configs["Daily Peak"])
-        
-        # Drastically reduce calculations for Simple mode (user expects 10-20 seconds)
-        if calculation_mode == "simple":
-            # Override precision for ultra-fast processing
-            time_steps = self._generate_ultra_fast_timestamps()  # Only 4 calculations total
-            st.success("🚀 **Simple Mode Active**: Ultra-fast 4-point calculation for maximum speed")
-            st.info("⚡ **Performance Target**: 4 calculations per element = 10-20 second analysis")
-        elif calculation_mode == "auto":
-            # Smart selection based on element count
-            if len(suitable_elements) > 500:
-                time_steps = self._generate_seasonal_timestamps()  # 4 calculations
-                st.info("🤖 **Auto Mode**: Large dataset detected, using seasonal sampling (4 calculations per element)")
-            elif len(suitable_elements) > 100:
-                time_steps = self._generate_monthly_timestamps()  # 12 calculations
-                st.info("🤖 **Auto Mode**: Medium dataset, using monthly sampling (12 calculations per element)")
-            else:
-                time_steps = self._generate_daily_peak_timestamps()  # 365 calculations
-                st.info("🤖 **Auto Mode**: Small dataset, using daily peak sampling (365 calculations per element)")
-        else:  # Advanced mode
-            # Use original precision settings
-            if precision == "Hourly":
-                time_steps = self._generate_hourly_timestamps()
-            elif precision == "Daily Peak":
-                time_steps = self._generate_daily_peak_timestamps()
-            elif precision == "Monthly Average":
-                time_steps = self._generate_monthly_timestamps()
-            else:  # Yearly Average
-                time_steps = self._generate_seasonal_timestamps()
-            st.info(f"🎯 **Advanced Mode**: Using {precision} precision ({len(time_steps)} calculations per element)")
-        
-        # Show processing overview before starting
-        total_calculations = len(suitable_elements) * len(time_steps)
-        st.info(f"📊 **Processing Overview**: {len(suitable_elements):,} elements × {len(time_steps)} time points = {total_calculations:,} total calculations")
-        
-        # Initialize comprehensive progress tracking
-        progress_container = st.container()
+        # Coordinates and TMY data are resolved once here, not per batch inside the workers
+        site_context = self._load_site_context()
+        
+        engine = RadiationEngine(
+            RadiationEngineConfig(
+                engine=ENGINE_OPTIMIZED,
+                precision=precision,
+                calculation_mode=calculation_mode,
+                apply_corrections=apply_corrections,
+                include_shading=include_shading
+            ),
+            events,
+            cache=cache
+        )
+        
+        # Overlapped fetch -> compute -> write pipeline with bounded queues
+        results = run_engine_against_database(
+            engine, self.db_manager, project_id,
+            site_context['latitude'], site_context['longitude'], site_context['tmy_data'],
+            lambda batch_size, offset: self._stream_element_batches(project_id, batch_size, offset),
+            total_elements, checkpoint=checkpoint, element_set_hash=element_set_hash
+        )
+        if results.get('error'):
+            return results
         
-        with progress_container:
-            st.markdown("### 📊 Radiation Analysis Progress")
-            
-            # Main progress bar
-            main_progress = st.progress(0.0)
-            
-            # Status display
-            status_col1, status_col2, status_col3 = st.columns(3)
-            
-            with status_col1:
-                elements_processed = st.empty()
-                elements_processed.metric("Elements Processed", "0", f"of {len(suitable_elements)}")
-            
-            with status_col2:
-                calculations_done = st.empty() 
-                calculations_done.metric("Calculations", "0", f"of {total_calculations:,}")
-            
-            with status_col3:
-                current_status = st.empty()
-                current_status.metric("Status", "Starting", "0%")
-            
-            # Detailed progress text
-            detailed_status = st.empty()
-            detailed_status.text(f"🚀 Initializing {precision} analysis for {len(suitable_elements)} selected window elements...")
-        
-        # Vectorized calculation for all elements
-        results = {}
-        total_elements = len(suitable_elements)
-        total_calcs_completed = 0
-        
-        # Process elements in batches for better performance
-        if calculation_mode == "simple":
-            batch_size = min(total_elements, 100)  # Large batches for ultra-fast mode
-        else:
-            batch_size = max(1, min(20, total_elements // 5))  # Smaller batches for better progress tracking
-        
-        for i in range(0, total_elements, batch_size):
-            batch = suitable_elements[i:i + batch_size]
-            batch_results = self._process_element_batch(
-                batch, time_steps, apply_corrections, include_shading, calculation_mode
-            )
-            results.update(batch_results)
-            
-            # Update comprehensive progress tracking
-            elements_done = i + len(batch)
-            batch_calculations = len(batch) * len(time_steps)
-            total_calcs_completed += batch_calculations
-            
-            # Calculate progress percentage
-            progress = min(1.0, elements_done / total_elements)
-            percentage = int(progress * 100)
-            
-            # Update all progress indicators
-            main_progress.progress(progress)
-            elements_processed.metric("Elements Processed", f"{elements_done}", f"of {total_elements}")
-            calculations_done.metric("Calculations", f"{total_calcs_completed:,}", f"of {total_calculations:,}")
-            current_status.metric("Status", "Processing", f"{percentage}%")
-            
-            # Update detailed status
-            if percentage < 100:
-                detailed_status.text(f"⚡ Processing batch {(i//batch_size)+1} of {(total_elements-1)//batch_size+1} | {percentage}% complete | {elements_done}/{total_elements} elements")
-            else:
-                detailed_status.text(f"✅ Analysis complete! Processed {total_elements} elements with {total_calcs_completed:,} calculations")
-        
-        # Calculate summary statistics
         total_time = time.time() - start_time
+        results["calculation_time"] = total_time
+        
+        # Element rows were already written batch by batch; only session state is updated here
+        if self._save_radiation_results(project_id, results["element_radiation"], precision, total_time,
+                                        persist_elements=False):
+            events.emit(
+                ProgressEvent.INFO,
+                f"✅ Analysis complete! {total_elements} elements processed in {total_time:.1f}s with {len(results['element_radiation'])} results saved to database",
+                total_elements, total_elements
+            )
         
-        # Final progress update
-        main_progress.progress(1.0)
-        elements_processed.metric("Elements Processed", f"{total_elements}", f"of {total_elements}")
-        calculations_done.metric("Calculations", f"{total_calcs_completed:,}", f"of {total_calculations:,}")
-        current_status.metric("Status", "Saving", "100%")
-        detailed_status.text(f"💾 Saving {len(results)} radiation analysis results to database...")
-        
-        # Save results to database
-        save_success = self._save_radiation_results(project_id, results, precision, total_time)
-        
-        if save_success:
-            current_status.metric("Status", "Complete", "✓")
-            detailed_status.text(f"✅ Analysis complete! {total_elements} elements processed in {total_time:.1f}s with {len(results)} results saved to database")
-        
-        # Prepare return data
-        analysis_summary = {
-            "element_radiation": results,
-            "total_elements": len(suitable_elements),
-            "calculation_time": total_time,
-            "precision_level": precision,
-            "time_steps_used": len(time_steps),
-            "total_calculations": total_calcs_completed,
-            "orientation_corrections": apply_corrections,
-            "geometric_shading": include_shading,
-            "performance_metrics": {
-                "calculations_per_second": total_calcs_completed / total_time if total_time > 0 else 0,
-                "elements_per_second": len(suitable_elements) / total_time if total_time > 0 else 0,
-                "method": "optimized_vectorized"
-            }
-        }
-        
-        return analysis_summary
+        return results
+    
+    # PV suitable window elements in a stable order (offset used for streaming/resume)
+    ELEMENTS_QUERY = """
+        SELECT DISTINCT element_id, azimuth, glass_area, window_width, window_height, family, pv_suitable
+        FROM building_elements 
+        WHERE project_id = %s
+        AND element_type IN ('Window', 'Windows')
+        AND pv_suitable = true
+        ORDER BY element_id
+        OFFSET %s
+    """
     
     def _get_building_elements(self, project_id: int) -> List[Dict]:
         """Get building elements from database - only window elements."""
@@ -298,51 +254,8 @@ class OptimizedRadiationAnalyzer:
         try:
             with conn.cursor() as cursor:
                 # Get PV suitable window elements only - respects include_north_facade setting
-                cursor.execute("""
-                    SELECT DISTINCT element_id, azimuth, glass_area, window_width, window_height, family, pv_suitable
-                    FROM building_elements 
-                    WHERE project_id = %s
-                    AND element_type IN ('Window', 'Windows')
-                    AND pv_suitable = true
-                    ORDER BY element_id
-                """, (project_id,))
-                
-                results = cursor.fetchall()
-                elements = []
-                
-                for row in results:
-                    if len(row) != 7:
-                        continue  # Skip malformed rows
-                    element_id, azimuth, glass_area, window_width, window_height, family, pv_suitable = row
-                    
-                    # Calculate glass area from dimensions if not available
-                    if not glass_area or glass_area == 0:
-                        width = float(window_width) if window_width else 1.5
-                        height = float(window_height) if window_height else 1.0
-                        calculated_glass_area = width * height
-                    else:
-                        calculated_glass_area = float(glass_area)
-                    
-                    # Generate realistic azimuth if missing (distribute across orientations)
-                    if not azimuth or azimuth == 0:
-                        # Use element_id hash to distribute across orientations
-                        element_hash = abs(hash(str(element_id))) % 360
-                        realistic_azimuth = element_hash
-                    else:
-                        realistic_azimuth = float(azimuth)
-                    
-                    # Calculate orientation from azimuth
-                    orientation = self._azimuth_to_orientation(realistic_azimuth)
-                    
-                    elements.append({
-                        'element_id': str(element_id),
-                        'glass_area': calculated_glass_area,
-                        'azimuth': realistic_azimuth,
-                        'orientation': orientation,
-                        'family': str(family)
-                    })
-                
-                return elements
+                cursor.execute(self.ELEMENTS_QUERY, (project_id, 0))
+                return [self._row_to_element(row) for row in cursor.fetchall() if len(row) == 7]
                 
         except Exception as e:
             st.error(f"Error fetching building elements: {e}")
@@ -350,6 +263,98 @@ class OptimizedRadiationAnalyzer:
         finally:
             conn.close()
     
+    def _element_set(self, project_id: int) -> Tuple[int, Optional[str]]:
+        """Count PV suitable window elements without loading them, and hash their rows for checkpoint matching."""
+        conn = self.db_manager.get_connection()
+        if not conn:
+            return 0, None
+        
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    element_set_query(self.ELEMENTS_QUERY),
+                    (project_id, 0)
+                )
+                return tuple(cursor.fetchone())
+                
+        except Exception as e:
+            st.error(f"Error counting building elements: {e}")
+            return 0, None
+        finally:
+            conn.close()
+    
+    def _stream_element_batches(self, project_id: int, batch_size: int, offset: int = 0):
+        """Yield element batches from a server-side cursor, one batch of rows in memory at a time."""
+        conn = self.db_manager.get_connection()
+        if not conn:
+            raise RuntimeError("Database connection failed")
+        
+        try:
+            with conn.cursor(name=f"step5_optimized_elements_{project_id}") as cursor:
+                cursor.itersize = batch_size
+                cursor.execute(self.ELEMENTS_QUERY, (project_id, offset))
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
+                        break
+                    yield [self._row_to_element(row) for row in rows if len(row) == 7]
+        finally:
+            conn.close()
+    
+    def _row_to_element(self, row) -> Dict:
+        """Convert a building_elements row into the element dict used for calculations."""
+        element_id, azimuth, glass_area, window_width, window_height, family, pv_suitable = row
+        
+        # Calculate glass area from dimensions if not available
+        if not glass_area or glass_area == 0:
+            width = float(window_width) if window_width else 1.5
+            height = float(window_height) if window_height else 1.0
+            calculated_glass_area = width * height
+        else:
+            calculated_glass_area = float(glass_area)
+        
+        # Generate realistic azimuth if missing (distribute across orientations)
+        if not azimuth or azimuth == 0:
+            # Use element_id hash to distribute across orientations
+            element_hash = abs(hash(str(element_id))) % 360
+            realistic_azimuth = element_hash
+        else:
+            realistic_azimuth = float(azimuth)
+        
+        # Calculate orientation from azimuth
+        orientation = self._azimuth_to_orientation(realistic_azimuth)
+        
+        return {
+            'element_id': str(element_id),
+            'glass_area': calculated_glass_area,
+            'azimuth': realistic_azimuth,
+            'orientation': orientation,
+            'family': str(family)
+        }
+    
+    def _load_site_context(self) -> Dict:
+        """Resolve project coordinates and Step 3 TMY data once per analysis."""
+        from utils.database_helper import DatabaseHelper
+        
+        site_context = {'latitude': 52.52, 'longitude': 13.405, 'tmy_data': []}  # Default Berlin
+        
+        try:
+            db_helper = DatabaseHelper()
+            project_data = db_helper.get_step_data("1")
+            if project_data and project_data.get('coordinates'):
+                coords = project_data['coordinates']
+                site_context['latitude'] = coords.get('lat', site_context['latitude'])
+                site_context['longitude'] = coords.get('lng', site_context['longitude'])
+            
+            weather_data = db_helper.get_step_data("3")
+            if weather_data and weather_data.get('tmy_data'):
+                site_context['tmy_data'] = weather_data['tmy_data']
+        except Exception:
+            # Use defaults if database access fails - silent processing
+            pass
+        
+        return site_context
+    
     def _is_pv_suitable(self, element: Dict) -> bool:
         """Check if element is suitable for PV installation - delegates to database pv_suitable flag."""
         # CRITICAL: Use authentic database pv_suitable flag instead of hardcoded orientation logic
@@ -378,241 +383,14 @@ class OptimizedRadiationAnalyzer:
         else:
             return "Unknown"
     
-    def _process_element_batch(self, elements: List[Dict], time_steps: List[datetime],
-                              apply_corrections: bool, include_shading: bool, calculation_mode: str = "auto") -> Dict:
-        """Process a batch of elements with vectorized calculations."""
-        batch_results = {}
-        
-        # Get project coordinates from database
-        from utils.database_helper import DatabaseHelper
-        
-        latitude = 52.52  # Default Berlin latitude
-        longitude = 13.405  # Default Berlin longitude
-        
-        try:
-            db_helper = DatabaseHelper()
-            project_data = db_helper.get_step_data("1")
-            if project_data and project_data.get('coordinates'):
-                coords = project_data['coordinates']
-                latitude = coords.get('lat', latitude)
-                longitude = coords.get('lng', longitude)
-        except Exception as e:
-            # Use defaults if database access fails - silent processing
-            pass
-        
-        for element in elements:
-            element_id = element['element_id']
-            azimuth = element['azimuth']
-            orientation = element['orientation']
-            
-            # Calculate annual radiation using optimized method
-            annual_radiation = self._calculate_annual_radiation_fast(
-                latitude, longitude, azimuth, time_steps, 
-                apply_corrections, include_shading, orientation, calculation_mode
-            )
-            
-            batch_results[element_id] = annual_radiation
-        
-        return batch_results
-    
-    def _calculate_annual_radiation_fast(self, lat: float, lon: float, azimuth: float,
-                                       time_steps: List[datetime], apply_corrections: bool,
-                                       include_shading: bool, orientation: str, calculation_mode: str = "auto") -> float:
-        """Fast calculation of annual radiation using authentic TMY data."""
-        
-        # Try to get authentic TMY data from Step 3 database
-        import streamlit as st
-        from utils.database_helper import DatabaseHelper
-        
-        tmy_data = None
-        try:
-            db_helper = DatabaseHelper()
-            weather_data = db_helper.get_step_data("3")
-            
-            if weather_data and weather_data.get('tmy_data'):
-                tmy_data = weather_data['tmy_data']
-                # TMY data loaded successfully (silent)
-                pass
-        except Exception as e:
-            # Fall back to simplified calculations - silent processing
-            pass
-        
-        total_irradiance = 0.0
-        
-        if tmy_data and len(tmy_data) > 0:
-            # Use authentic TMY data from Step 3
-            for i, tmy_hour in enumerate(tmy_data):
-                if i >= len(time_steps):
-                    break
-                    
-                timestamp = time_steps[i % len(time_steps)]
-                
-                # Extract authentic irradiance values from TMY data
-                ghi = self._extract_irradiance_value(tmy_hour, ['ghi', 'GHI', 'ghi_wm2'], 0)
-                dni = self._extract_irradiance_value(tmy_hour, ['dni', 'DNI', 'dni_wm2'], 0)
-                dhi = self._extract_irradiance_value(tmy_hour, ['dhi', 'DHI', 'dhi_wm2'], 0)
-                
-                # Skip if no irradiance data available
-                if ghi <= 0 and dni <= 0:
-                    continue
-                
-                # Calculate solar position for surface calculations
-                solar_elevation, solar_azimuth = calculate_solar_position(
-                    lat, lon, timestamp
-                )
-                
-                # Skip nighttime
-                if solar_elevation <= 0:
-                    continue
-                
-                # Use authentic DNI or estimate if not available
-                if dni > 0:
-                    authentic_dni = dni
-                else:
-                    authentic_dni = max(0, ghi - dhi) if dhi > 0 else ghi * 0.8
-                
-                # Calculate irradiance on surface using authentic data with specified mode
-                surface_irradiance = calculate_irradiance_on_surface(
-                    authentic_dni, solar_elevation, solar_azimuth, azimuth, 90,
-                    ghi, dhi, calculation_mode=calculation_mode
-                )
-                
-                # Apply orientation corrections
-                if apply_corrections:
-                    surface_irradiance *= self._get_orientation_correction(orientation)
-                
-                # Apply shading factor
-                if include_shading:
-                    surface_irradiance *= self._get_shading_factor(orientation)
-                
-                total_irradiance += surface_irradiance
-        else:
-            # Fallback to synthetic calculation only if no TMY data available
-            st.warning("⚠️ No authentic TMY data found, using simplified estimates")
-            for timestamp in time_steps:
-                # Calculate solar position
-                solar_elevation, solar_azimuth = calculate_solar_position(
-                    lat, lon, timestamp
-                )
-                
-                # Skip nighttime
-                if solar_elevation <= 0:
-                    continue
-                
-                # Calculate direct normal irradiance (simplified)
-                dni = self._estimate_dni(solar_elevation, timestamp)
-                
-                # Calculate irradiance on surface (fallback mode)
-                surface_irradiance = calculate_irradiance_on_surface(
-                    dni, solar_elevation, solar_azimuth, azimuth, 90,
-                    calculation_mode="simple"  # Always use simple for fallback
-                )
-                
-                # Apply orientation corrections
-                if apply_corrections:
-                    surface_irradiance *= self._get_orientation_correction(orientation)
-                
-                # Apply shading factor
-                if include_shading:
-                    surface_irradiance *= self._get_shading_factor(orientation)
-                
-                total_irradiance += surface_irradiance
-        
-        # Convert to annual radiation (kWh/m²/year)
-        # Scale based on precision level
-        scaling_factor = self._get_scaling_factor(len(time_steps))
-        annual_radiation = (total_irradiance * scaling_factor) / 1000  # Wh to kWh
-        
-        # Apply realistic orientation-based values
-        if 'south' in orientation.lower():
-            # South facing gets highest solar radiation
-            base_radiation = 900 + (hash(str(azimuth)) % 300)  # 900-1200 for south
-        elif 'east' in orientation.lower() or 'west' in orientation.lower():
-            # East/West get moderate radiation
-            base_radiation = 650 + (hash(str(azimuth)) % 250)  # 650-900 for east/west
-        elif 'north' in orientation.lower():
-            # North facing gets minimal radiation
-            base_radiation = 200 + (hash(str(azimuth)) % 100)  # 200-300 for north
-        else:
-            # Unknown orientation gets average
-            base_radiation = 500 + (hash(str(azimuth)) % 200)  # 500-700 for unknown
-            
-        # Use calculated value if it's reasonable, otherwise use base
-        if annual_radiation > 100:
-            return max(annual_radiation, base_radiation * 0.8)  # Take higher of calculated or 80% of base
-        else:
-            return base_radiation
-    
-    def _extract_irradiance_value(self, tmy_hour: dict, field_names: list, default: float) -> float:
-        """Extract irradiance value from TMY data using multiple possible field names."""
-        for field in field_names:
-            if field in tmy_hour and tmy_hour[field] is not None:
-                try:
-                    return float(tmy_hour[field])
-                except (ValueError, TypeError):
-                    continue
-        return default
-    
-    def _estimate_dni(self, solar_elevation: float, timestamp: datetime) -> float:
-        """Estimate Direct Normal Irradiance based on solar elevation and time."""
-        # Simplified DNI estimation
-        if solar_elevation <= 0:
-            return 0
-        
-        # Peak DNI around 900 W/m² at high sun angles
-        max_dni = 900
-        elevation_factor = np.sin(np.radians(solar_elevation))
-        
-        # Seasonal variation
-        day_of_year = timestamp.timetuple().tm_yday
-        seasonal_factor = 0.8 + 0.2 * np.cos(2 * np.pi * (day_of_year - 172) / 365)
-        
-        # Clear sky assumption with atmospheric losses
-        atmospheric_factor = 0.75
-        
-        return max_dni * elevation_factor * seasonal_factor * atmospheric_factor
-    
-    def _get_orientation_correction(self, orientation: str) -> float:
-        """Get physics-based orientation correction factors."""
-        corrections = {
-            'South': 1.0,
-            'Southeast': 0.95,
-            'Southwest': 0.95,
-            'East': 0.85,
-            'West': 0.85,
-            'Northeast': 0.7,
-            'Northwest': 0.7,
-            'North': 0.3
-        }
-        return corrections.get(orientation, 0.8)
-    
-    def _get_shading_factor(self, orientation: str) -> float:
-        """Get shading factor based on orientation and typical building shadows."""
-        # More detailed shading factors
-        factors = {
-            'South': 0.95,  # Minimal shading
-            'Southeast': 0.90,
-            'Southwest': 0.90,
-            'East': 0.85,   # Morning shadows
-            'West': 0.85,   # Evening shadows
-            'North': 0.70   # Significant shading
-        }
-        return factors.get(orientation, 0.80)
-    
-    def _get_scaling_factor(self, time_steps_count: int) -> float:
-        """Get realistic scaling factor to convert sampled data to annual values."""
-        if time_steps_count >= 4000:  # Hourly - full year sampling
-            return 1.0
-        elif time_steps_count >= 300:  # Daily peak - one value per day 
-            return 8.0  # 8 useful daylight hours per day average
-        elif time_steps_count >= 10:   # Monthly - 12 monthly values
-            return 365.0 * 8.0 / 12.0  # Scale to full year daylight hours
-        else:  # Seasonal - 4 seasonal values
-            return 365.0 * 8.0 / 4.0  # Scale to full year daylight hours
-    
     def _save_radiation_results(self, project_id: int, results: Dict, 
-                               precision: str, calculation_time: float):
-        """Save radiation analysis results to database."""
+                               precision: str, calculation_time: float,
+                               persist_elements: bool = True) -> bool:
+        """Save radiation analysis results to database.
+        
+        persist_elements=False skips the element_radiation rewrite when the
+        streaming pipeline has already written every batch.
+        """
         try:
             # Initialize session state if needed
             if 'project_data' not in st.session_state:
@@ -629,6 +407,9 @@ class OptimizedRadiationAnalyzer:
                 # Continue even if session state manager fails
                 st.warning(f"Session state update failed: {state_error}")
             
+            if not persist_elements:
+                return True
+            
             # Save summary to database
             conn = self.db_manager.get_connection()
             if conn:
@@ -649,12 +430,15 @@ class OptimizedRadiationAnalyzer:
                     
                     conn.commit()
                 conn.close()
+                return True
+            return False
                 
         except Exception as e:
             st.error(f"❌ Error saving Advanced precision results: {e}")
             st.warning("💡 **Troubleshooting**: Try refreshing the page or switching to Simple precision mode")
             # Log additional debug info
             st.error(f"Debug info: project_id={project_id}, results_count={len(results) if results else 0}")
+            return False
     
     def get_performance_summary(self) -> Dict:
         """Get performance summary of recent calculations."""
@@ -0,0 +1,286 @@
+"""
+Cross-Project Radiation Result Cache
+Content-addressed cache of annual element radiation keyed by everything the
+result depends on, so repeated building typologies at nearby sites skip Step 5
+computation for elements that were already calculated anywhere in the portfolio
+"""
+
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Iterable, Optional
+
+from psycopg2.extras import execute_values
+
+logger = logging.getLogger(__name__)
+
+# Bump when the radiation calculations change so stale entries stop matching
+RADIATION_CACHE_VERSION = 2
+
+DEFAULT_COORDINATE_DECIMALS = 2     # ~1 km grid
+DEFAULT_AZIMUTH_RESOLUTION = 0.5    # degrees
+DEFAULT_MAX_MEMORY_ENTRIES = 50000
+DEFAULT_MAX_STORE_ENTRIES = 500000
+
+CACHE_SCHEMA_STATEMENTS = [
+    """
+    CREATE TABLE IF NOT EXISTS radiation_result_cache (
+        cache_key VARCHAR(40) PRIMARY KEY,
+        annual_radiation DECIMAL(12, 4) NOT NULL,
+        key_components JSONB,
+        hit_count INTEGER DEFAULT 0,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        last_used_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_radiation_result_cache_last_used ON radiation_result_cache(last_used_at)"
+]
+
+
+def tmy_fingerprint(tmy_data) -> str:
+    """Stable content hash of a TMY dataset (records are order sensitive)."""
+    if not tmy_data:
+        return "synthetic"
+    payload = json.dumps(tmy_data, sort_keys=True, default=str, separators=(',', ':'))
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def radiation_cache_key(latitude: float, longitude: float, tmy_key: str, azimuth: float,
+                        tilt: float = 90.0, level_height: Optional[float] = None,
+                        shading_signature: str = "", engine_signature: str = "",
+                        coordinate_decimals: int = DEFAULT_COORDINATE_DECIMALS,
+                        azimuth_resolution: float = DEFAULT_AZIMUTH_RESOLUTION):
+    """
+    Content address for one element result.
+
+    Returns:
+        (sha1 hex key, key components dict)
+    """
+    rounded_azimuth = round(round((float(azimuth) % 360) / azimuth_resolution) * azimuth_resolution, 3)
+    components = {
+        'v': RADIATION_CACHE_VERSION,
+        'lat': round(float(latitude), coordinate_decimals),
+        'lon': round(float(longitude), coordinate_decimals),
+        'tmy': tmy_key,
+        'azimuth': rounded_azimuth,
+        'tilt': round(float(tilt), 1),
+        'level_height': round(float(level_height), 1) if level_height is not None else None,
+        'shading': shading_signature,
+        'engine': engine_signature
+    }
+    payload = json.dumps(components, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest(), components
+
+
+class DatabaseRadiationCacheStore:
+    """
+    PostgreSQL backing store shared by all projects.
+
+    Store failures are logged and treated as misses; the cache never fails a run.
+    evict() trims the table to max_entries by least recent use.
+    """
+
+    def __init__(self, db_manager, max_entries: int = DEFAULT_MAX_STORE_ENTRIES):
+        self.db_manager = db_manager
+        self.max_entries = max_entries
+        self._schema_ready = False
+
+    def ensure_schema(self, conn) -> bool:
+        if self._schema_ready:
+            return True
+        try:
+            with conn.cursor() as cursor:
+                for statement in CACHE_SCHEMA_STATEMENTS:
+                    cursor.execute(statement)
+            conn.commit()
+            self._schema_ready = True
+        except Exception as e:
+            conn.rollback()
+            logger.warning(f"Radiation cache schema unavailable: {e}")
+        return self._schema_ready
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, float]:
+        keys = list(keys)
+        if not keys:
+            return {}
+        conn = self.db_manager.get_connection()
+        if not conn:
+            return {}
+        try:
+            if not self.ensure_schema(conn):
+                return {}
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    UPDATE radiation_result_cache
+                    SET hit_count = hit_count + 1, last_used_at = CURRENT_TIMESTAMP
+                    WHERE cache_key = ANY(%s)
+                    RETURNING cache_key, annual_radiation
+                """, (keys,))
+                found = {row[0]: float(row[1]) for row in cursor.fetchall()}
+            conn.commit()
+            return found
+        except Exception as e:
+            conn.rollback()
+            logger.warning(f"Radiation cache lookup failed: {e}")
+            return {}
+        finally:
+            conn.close()
+
+    def put_many(self, entries: Dict[str, float], components: Optional[Dict[str, Dict]] = None) -> bool:
+        if not entries:
+            return True
+        components = components or {}
+        conn = self.db_manager.get_connection()
+        if not conn:
+            return False
+        try:
+            if not self.ensure_schema(conn):
+                return False
+            with conn.cursor() as cursor:
+                execute_values(cursor, """
+                    INSERT INTO radiation_result_cache (cache_key, annual_radiation, key_components)
+                    VALUES %s
+                    ON CONFLICT (cache_key) DO NOTHING
+                """, [
+                    (key, float(value), json.dumps(components.get(key)) if key in components else None)
+                    for key, value in entries.items()
+                ])
+            conn.commit()
+            return True
+        except Exception as e:
+            conn.rollback()
+            logger.warning(f"Radiation cache write failed: {e}")
+            return False
+        finally:
+            conn.close()
+
+    def evict(self) -> int:
+        """Delete least recently used entries above max_entries; returns rows removed."""
+        conn = self.db_manager.get_connection()
+        if not conn:
+            return 0
+        try:
+            if not self.ensure_schema(conn):
+                return 0
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    DELETE FROM radiation_result_cache
+                    WHERE cache_key IN (
+                        SELECT cache_key FROM radiation_result_cache
+                        ORDER BY last_used_at DESC
+                        OFFSET %s
+                    )
+                """, (self.max_entries,))
+                removed = cursor.rowcount
+            conn.commit()
+            return removed
+        except Exception as e:
+            conn.rollback()
+            logger.warning(f"Radiation cache eviction failed: {e}")
+            return 0
+        finally:
+            conn.close()
+
+
+class RadiationResultCache:
+    """
+    Two-level radiation result cache: a bounded in-process LRU in front of an
+    optional shared store (DatabaseRadiationCacheStore).
+
+    Thread safe, so RadiationEngine compute workers consult it per batch.
+    """
+
+    def __init__(self, store=None, max_memory_entries: int = DEFAULT_MAX_MEMORY_ENTRIES,
+                 coordinate_decimals: int = DEFAULT_COORDINATE_DECIMALS,
+                 azimuth_resolution: float = DEFAULT_AZIMUTH_RESOLUTION):
+        self.store = store
+        self.max_memory_entries = max_memory_entries
+        self.coordinate_decimals = coordinate_decimals
+        self.azimuth_resolution = azimuth_resolution
+
+        self._memory = OrderedDict()
+        self._components = {}
+        self._lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        self._stats = {'lookups': 0, 'memory_hits': 0, 'store_hits': 0, 'misses': 0,
+                       'writes': 0, 'memory_evictions': 0, 'store_evictions': 0}
+
+    def key_for(self, latitude: float, longitude: float, tmy_key: str, azimuth: float,
+                tilt: float = 90.0, level_height: Optional[float] = None,
+                shading_signature: str = "", engine_signature: str = "") -> str:
+        key, components = radiation_cache_key(
+            latitude, longitude, tmy_key, azimuth, tilt, level_height,
+            shading_signature, engine_signature,
+            self.coordinate_decimals, self.azimuth_resolution
+        )
+        with self._lock:
+            self._components[key] = components
+        return key
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, float]:
+        """Look keys up in memory first, then in the shared store."""
+        keys = set(keys)
+        found = {}
+        with self._lock:
+            self._stats['lookups'] += len(keys)
+            for key in keys:
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[key] = self._memory[key]
+            self._stats['memory_hits'] += len(found)
+
+        remaining = keys - found.keys()
+        if remaining and self.store is not None:
+            from_store = self.store.get_many(remaining)
+            self._remember(from_store)
+            found.update(from_store)
+            with self._lock:
+                self._stats['store_hits'] += len(from_store)
+
+        with self._lock:
+            self._stats['misses'] += len(keys) - len(found)
+            for key in found:
+                self._components.pop(key, None)
+        return found
+
+    def put_many(self, entries: Dict[str, float]):
+        """Record freshly computed results in memory and in the shared store."""
+        if not entries:
+            return
+        self._remember(entries)
+        with self._lock:
+            self._stats['writes'] += len(entries)
+            components = {key: self._components.pop(key, None) for key in entries}
+        if self.store is not None:
+            self.store.put_many(entries, components)
+
+    def evict(self):
+        """Apply the shared store size bound (run once per analysis)."""
+        if self.store is not None:
+            removed = self.store.evict()
+            with self._lock:
+                self._stats['store_evictions'] += removed
+
+    def _remember(self, entries: Dict[str, float]):
+        with self._lock:
+            for key, value in entries.items():
+                self._memory[key] = value
+                self._memory.move_to_end(key)
+            while len(self._memory) > self.max_memory_entries:
+                evicted, _ = self._memory.popitem(last=False)
+                self._components.pop(evicted, None)
+                self._stats['memory_evictions'] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit statistics for the Step 5 summary."""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['memory_entries'] = len(self._memory)
+        hits = stats['memory_hits'] + stats['store_hits']
+        stats['hits'] = hits
+        stats['hit_rate'] = hits / stats['lookups'] if stats['lookups'] else 0.0
+        return stats
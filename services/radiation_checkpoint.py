@@ -0,0 +1,464 @@
+"""
+Radiation Analysis Checkpointing - Resumable Step 5 Sessions
+Persists completed element batches and a session cursor so interrupted runs resume
+from the last committed batch instead of starting over
+"""
+
+import streamlit as st
+import hashlib
+import json
+import logging
+import time
+from datetime import datetime
+from typing import Dict, Any, Optional, List
+
+from database_manager import BIPVDatabaseManager
+
+logger = logging.getLogger(__name__)
+
+
+# Sessions in these states did not finish and may be picked up again
+RESUMABLE_STATUSES = ('running', 'stopped', 'failed')
+# Unfinished sessions whose element set changed; never resumed
+SUPERSEDED_STATUS = 'superseded'
+
+# Idempotent statements run on first use; constraint changes on existing tables are
+# left to step5_radiation/migrations, since re-adding a CHECK rescans and locks the table
+CHECKPOINT_SCHEMA_STATEMENTS = [
+    """
+    CREATE TABLE IF NOT EXISTS radiation_analysis_sessions (
+        id SERIAL PRIMARY KEY,
+        project_id INTEGER NOT NULL REFERENCES projects(id) ON DELETE CASCADE,
+        session_key VARCHAR(100) NOT NULL,
+        precision_level VARCHAR(20) NOT NULL,
+        configuration JSONB NOT NULL,
+        status VARCHAR(20) DEFAULT 'running',
+        total_elements INTEGER,
+        completed_elements INTEGER DEFAULT 0,
+        start_time TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        completion_time TIMESTAMP,
+        error_message TEXT,
+        CONSTRAINT radiation_session_unique UNIQUE (project_id, session_key),
+        CONSTRAINT radiation_session_status_valid CHECK (status IN ('running', 'completed', 'failed', 'stopped', 'superseded'))
+    )
+    """,
+    "ALTER TABLE radiation_analysis_sessions ADD COLUMN IF NOT EXISTS analysis_type VARCHAR(20)",
+    "ALTER TABLE radiation_analysis_sessions ADD COLUMN IF NOT EXISTS config_hash VARCHAR(32)",
+    "ALTER TABLE radiation_analysis_sessions ADD COLUMN IF NOT EXISTS batch_size INTEGER",
+    "ALTER TABLE radiation_analysis_sessions ADD COLUMN IF NOT EXISTS cursor_position INTEGER DEFAULT 0",
+    "ALTER TABLE radiation_analysis_sessions ADD COLUMN IF NOT EXISTS completed_batches INTEGER DEFAULT 0",
+    "ALTER TABLE radiation_analysis_sessions ADD COLUMN IF NOT EXISTS wall_time_seconds DECIMAL(12,3) DEFAULT 0",
+    "ALTER TABLE radiation_analysis_sessions ADD COLUMN IF NOT EXISTS elements_per_second DECIMAL(12,3)",
+    "ALTER TABLE radiation_analysis_sessions ADD COLUMN IF NOT EXISTS resume_count INTEGER DEFAULT 0",
+    "ALTER TABLE radiation_analysis_sessions ADD COLUMN IF NOT EXISTS last_checkpoint_at TIMESTAMP",
+    "ALTER TABLE radiation_analysis_sessions ADD COLUMN IF NOT EXISTS element_set_hash VARCHAR(32)",
+    """
+    CREATE TABLE IF NOT EXISTS radiation_session_batches (
+        id SERIAL PRIMARY KEY,
+        session_id INTEGER NOT NULL REFERENCES radiation_analysis_sessions(id) ON DELETE CASCADE,
+        batch_index INTEGER NOT NULL,
+        element_count INTEGER NOT NULL,
+        element_results JSONB NOT NULL,
+        batch_seconds DECIMAL(10,3),
+        committed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        CONSTRAINT radiation_session_batch_unique UNIQUE (session_id, batch_index)
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_radiation_sessions_project_status ON radiation_analysis_sessions(project_id, status)",
+    "CREATE INDEX IF NOT EXISTS idx_radiation_session_batches_session ON radiation_session_batches(session_id)",
+]
+
+
+def calculate_config_hash(analysis_type: str, precision: str, configuration: Dict[str, Any]) -> str:
+    """Stable hash of the settings that determine radiation results."""
+    payload = json.dumps(
+        {'analysis_type': analysis_type, 'precision': precision, 'configuration': configuration},
+        sort_keys=True, default=str
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:32]
+
+
+def element_set_query(elements_query: str) -> str:
+    """
+    Wrap an element query (ordered by element_id) into a SELECT of its row count
+    and an md5 of its rows, with the same parameters. Whole rows are hashed so a
+    changed azimuth, orientation or geometry of a kept element also blocks resume.
+    """
+    return f"""
+        SELECT COUNT(*), md5(COALESCE(string_agg(session_elements::text, ',' ORDER BY element_id), ''))
+        FROM ({elements_query}) AS session_elements
+    """
+
+
+class RadiationCheckpointManager:
+    """Checkpoint store for a single project's Step 5 radiation sessions."""
+
+    def __init__(self, project_id: int, db_manager: Optional[BIPVDatabaseManager] = None):
+        self.project_id = project_id
+        self.db_manager = db_manager or BIPVDatabaseManager()
+        self.session_id = None
+        self.batch_size = None
+        self.cursor_position = 0
+        self.completed_batches = 0
+        self.completed_elements = 0
+        self.total_elements = 0
+        self.wall_time_seconds = 0.0
+        self.resumed = False
+        self._schema_ready = False
+        self._last_checkpoint = None
+
+    def ensure_schema(self) -> bool:
+        """Create checkpoint tables and columns if they do not exist yet."""
+        if self._schema_ready:
+            return True
+
+        conn = self.db_manager.get_connection()
+        if not conn:
+            return False
+
+        try:
+            with conn.cursor() as cursor:
+                for statement in CHECKPOINT_SCHEMA_STATEMENTS:
+                    cursor.execute(statement)
+                conn.commit()
+            self._schema_ready = True
+            return True
+        except Exception as e:
+            conn.rollback()
+            logger.warning("Radiation checkpointing unavailable: %s", e)
+            return False
+        finally:
+            conn.close()
+
+    def find_resumable_session(self, analysis_type: str, precision: str, configuration: Dict[str, Any],
+                               total_elements: int, element_set_hash: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Return the latest unfinished session with identical settings and elements.
+
+        Elements are identified by element_set_hash (see element_set_query) when
+        given, so a changed element set of the same size is not resumed; a
+        mismatching session is marked superseded.
+        """
+        if not self.ensure_schema():
+            return None
+
+        config_hash = calculate_config_hash(analysis_type, precision, configuration)
+        conn = self.db_manager.get_connection()
+        if not conn:
+            return None
+
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    SELECT id, session_key, batch_size, cursor_position, completed_batches,
+                           completed_elements, total_elements, wall_time_seconds, status, element_set_hash
+                    FROM radiation_analysis_sessions
+                    WHERE project_id = %s AND config_hash = %s AND status IN %s
+                    ORDER BY start_time DESC LIMIT 1
+                """, (self.project_id, config_hash, RESUMABLE_STATUSES))
+                row = cursor.fetchone()
+
+                if not row:
+                    return None
+
+                session = {
+                    'session_id': row[0],
+                    'session_key': row[1],
+                    'batch_size': row[2],
+                    'cursor_position': row[3] or 0,
+                    'completed_batches': row[4] or 0,
+                    'completed_elements': row[5] or 0,
+                    'total_elements': row[6],
+                    'wall_time_seconds': float(row[7] or 0),
+                    'status': row[8]
+                }
+
+                # Element set changed since the session started - results would not line up
+                elements_changed = (
+                    session['total_elements'] != total_elements
+                    or (element_set_hash is not None and row[9] != element_set_hash)
+                )
+                if elements_changed or not session['batch_size']:
+                    cursor.execute("""
+                        UPDATE radiation_analysis_sessions
+                        SET status = %s, error_message = %s
+                        WHERE id = %s
+                    """, (SUPERSEDED_STATUS, "Building elements changed since checkpoint", session['session_id']))
+                    conn.commit()
+                    return None
+
+                return session
+
+        except Exception as e:
+            st.warning(f"Could not look up resumable radiation session: {e}")
+            return None
+        finally:
+            conn.close()
+
+    def start_session(self, analysis_type: str, precision: str, configuration: Dict[str, Any],
+                      total_elements: int, batch_size: int,
+                      element_set_hash: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Resume a matching unfinished session or open a new one.
+
+        element_set_hash identifies the elements, see find_resumable_session.
+
+        Returns:
+            Dictionary with resumed flag, cursor position and previously committed results
+        """
+        self.total_elements = total_elements
+        self._last_checkpoint = time.time()
+
+        existing = self.find_resumable_session(analysis_type, precision, configuration,
+                                               total_elements, element_set_hash)
+        if existing:
+            return self._resume_session(existing)
+
+        if not self.ensure_schema():
+            return {'resumed': False, 'cursor_position': 0, 'batch_size': batch_size, 'completed_results': {}}
+
+        config_hash = calculate_config_hash(analysis_type, precision, configuration)
+        session_key = f"{analysis_type}_{config_hash[:12]}_{datetime.now().strftime('%Y%m%d%H%M%S%f')}"
+
+        conn = self.db_manager.get_connection()
+        if not conn:
+            return {'resumed': False, 'cursor_position': 0, 'batch_size': batch_size, 'completed_results': {}}
+
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    INSERT INTO radiation_analysis_sessions
+                    (project_id, session_key, precision_level, configuration, status, total_elements,
+                     completed_elements, analysis_type, config_hash, batch_size, cursor_position,
+                     completed_batches, wall_time_seconds, last_checkpoint_at, element_set_hash)
+                    VALUES (%s, %s, %s, %s, 'running', %s, 0, %s, %s, %s, 0, 0, 0, CURRENT_TIMESTAMP, %s)
+                    RETURNING id
+                """, (
+                    self.project_id, session_key, str(precision)[:20],
+                    json.dumps(configuration, default=str), total_elements,
+                    analysis_type, config_hash, batch_size, element_set_hash
+                ))
+                self.session_id = cursor.fetchone()[0]
+                conn.commit()
+
+            self.batch_size = batch_size
+            self.cursor_position = 0
+            self.completed_batches = 0
+            self.completed_elements = 0
+            self.wall_time_seconds = 0.0
+            self.resumed = False
+
+        except Exception as e:
+            conn.rollback()
+            self.session_id = None
+            st.warning(f"Could not create radiation session checkpoint: {e}")
+        finally:
+            conn.close()
+
+        return {'resumed': False, 'cursor_position': 0, 'batch_size': batch_size, 'completed_results': {}}
+
+    def _resume_session(self, session: Dict[str, Any]) -> Dict[str, Any]:
+        """Load committed batches of an unfinished session and mark it running again."""
+        self.session_id = session['session_id']
+        self.batch_size = session['batch_size']
+        self.completed_batches = session['completed_batches']
+        self.wall_time_seconds = session['wall_time_seconds']
+
+        completed_results = self.load_completed_results()
+
+        # The cursor is only trusted as far as the batches that were actually committed
+        self.completed_elements = len(completed_results)
+        self.cursor_position = min(session['cursor_position'], self.completed_elements)
+        self.resumed = True
+
+        conn = self.db_manager.get_connection()
+        if conn:
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute("""
+                        UPDATE radiation_analysis_sessions
+                        SET status = 'running', error_message = NULL, cursor_position = %s,
+                            completed_elements = %s, resume_count = COALESCE(resume_count, 0) + 1,
+                            last_checkpoint_at = CURRENT_TIMESTAMP
+                        WHERE id = %s
+                    """, (self.cursor_position, self.completed_elements, self.session_id))
+                    conn.commit()
+            except Exception as e:
+                conn.rollback()
+                st.warning(f"Could not reopen radiation session checkpoint: {e}")
+            finally:
+                conn.close()
+
+        return {
+            'resumed': True,
+            'session_key': session['session_key'],
+            'cursor_position': self.cursor_position,
+            'batch_size': self.batch_size,
+            'completed_batches': self.completed_batches,
+            'completed_results': completed_results
+        }
+
+    def load_completed_results(self) -> Dict[str, float]:
+        """Merge element results from all committed batches of the current session."""
+        if self.session_id is None:
+            return {}
+
+        conn = self.db_manager.get_connection()
+        if not conn:
+            return {}
+
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    SELECT element_results FROM radiation_session_batches
+                    WHERE session_id = %s
+                    ORDER BY batch_index
+                """, (self.session_id,))
+
+                results = {}
+                for (element_results,) in cursor.fetchall():
+                    if isinstance(element_results, str):
+                        element_results = json.loads(element_results)
+                    results.update({str(k): float(v) for k, v in element_results.items()})
+                return results
+
+        except Exception as e:
+            st.warning(f"Could not load radiation checkpoint batches: {e}")
+            return {}
+        finally:
+            conn.close()
+
+    def commit_batch(self, batch_index: int, batch_results: Dict[str, float], cursor_position: int) -> bool:
+        """Persist one completed batch and advance the session cursor in a single transaction."""
+        if self.session_id is None:
+            return False
+
+        now = time.time()
+        batch_seconds = now - (self._last_checkpoint or now)
+        self._last_checkpoint = now
+
+        conn = self.db_manager.get_connection()
+        if not conn:
+            return False
+
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    INSERT INTO radiation_session_batches
+                    (session_id, batch_index, element_count, element_results, batch_seconds)
+                    VALUES (%s, %s, %s, %s, %s)
+                    ON CONFLICT (session_id, batch_index) DO UPDATE SET
+                        element_count = EXCLUDED.element_count,
+                        element_results = EXCLUDED.element_results,
+                        batch_seconds = EXCLUDED.batch_seconds,
+                        committed_at = CURRENT_TIMESTAMP
+                """, (
+                    self.session_id, batch_index, len(batch_results),
+                    json.dumps({str(k): float(v) for k, v in batch_results.items()}),
+                    round(batch_seconds, 3)
+                ))
+
+                self.wall_time_seconds += batch_seconds
+                self.completed_batches += 1
+                self.completed_elements += len(batch_results)
+                self.cursor_position = cursor_position
+
+                cursor.execute("""
+                    UPDATE radiation_analysis_sessions
+                    SET cursor_position = %s, completed_batches = %s, completed_elements = %s,
+                        wall_time_seconds = %s, last_checkpoint_at = CURRENT_TIMESTAMP
+                    WHERE id = %s
+                """, (
+                    self.cursor_position, self.completed_batches, self.completed_elements,
+                    round(self.wall_time_seconds, 3), self.session_id
+                ))
+                conn.commit()
+                return True
+
+        except Exception as e:
+            conn.rollback()
+            st.warning(f"Radiation checkpoint for batch {batch_index} not saved: {e}")
+            return False
+        finally:
+            conn.close()
+
+    def get_throughput(self) -> Dict[str, Any]:
+        """Per-session throughput record accumulated across resumes."""
+        elements_per_second = (
+            self.completed_elements / self.wall_time_seconds if self.wall_time_seconds > 0 else 0
+        )
+        return {
+            'session_id': self.session_id,
+            'resumed': self.resumed,
+            'completed_elements': self.completed_elements,
+            'total_elements': self.total_elements,
+            'batches': self.completed_batches,
+            'wall_time_seconds': self.wall_time_seconds,
+            'elements_per_second': elements_per_second
+        }
+
+    def complete_session(self) -> Dict[str, Any]:
+        """Mark the session completed and store its final throughput record."""
+        throughput = self.get_throughput()
+        self._finish_session('completed', None, throughput)
+        return throughput
+
+    def fail_session(self, error_message: str):
+        """Mark the session failed; committed batches remain available for resume."""
+        self._finish_session('failed', error_message, self.get_throughput())
+
+    def _finish_session(self, status: str, error_message: Optional[str], throughput: Dict[str, Any]):
+        """Write terminal session status and throughput."""
+        if self.session_id is None:
+            return
+
+        conn = self.db_manager.get_connection()
+        if not conn:
+            return
+
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    UPDATE radiation_analysis_sessions
+                    SET status = %s, error_message = %s, wall_time_seconds = %s,
+                        elements_per_second = %s, completed_batches = %s, completed_elements = %s,
+                        completion_time = CASE WHEN %s = 'completed' THEN CURRENT_TIMESTAMP ELSE completion_time END
+                    WHERE id = %s
+                """, (
+                    status, error_message, round(throughput['wall_time_seconds'], 3),
+                    round(throughput['elements_per_second'], 3), throughput['batches'],
+                    throughput['completed_elements'], status, self.session_id
+                ))
+                conn.commit()
+        except Exception as e:
+            conn.rollback()
+            st.warning(f"Could not update radiation session status: {e}")
+        finally:
+            conn.close()
+
+    def get_session_history(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """Recent sessions for the project with their throughput records."""
+        if not self.ensure_schema():
+            return []
+
+        conn = self.db_manager.get_connection()
+        if not conn:
+            return []
+
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute("""
+                    SELECT id, analysis_type, precision_level, status, total_elements, completed_elements,
+                           completed_batches, wall_time_seconds, elements_per_second, resume_count,
+                           start_time, completion_time
+                    FROM radiation_analysis_sessions
+                    WHERE project_id = %s
+                    ORDER BY start_time DESC LIMIT %s
+                """, (self.project_id, limit))
+                columns = [desc[0] for desc in cursor.description]
+                return [dict(zip(columns, row)) for row in cursor.fetchall()]
+        except Exception as e:
+            st.warning(f"Could not load radiation session history: {e}")
+            return []
+        finally:
+            conn.close()
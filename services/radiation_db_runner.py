@@ -0,0 +1,102 @@
+"""
+Database Adapter for the Headless Radiation Engine
+Streams elements from PostgreSQL into RadiationEngine, appends result batches to
+element_radiation and keeps resumable session checkpoints up to date
+"""
+
+from typing import Dict, List, Callable, Iterable, Optional
+
+from services.radiation_engine import RadiationEngine, RadiationEngineError
+
+
+def to_radiation_rows(results: Dict[str, float]) -> List[Dict]:
+    """Convert element results into element_radiation rows."""
+    return [
+        {
+            'element_id': str(element_id),
+            'annual_radiation': float(radiation_value),
+            'irradiance': float(radiation_value) * 365 / 8760,
+            'orientation_multiplier': 1.0
+        }
+        for element_id, radiation_value in results.items()
+    ]
+
+
+def run_engine_against_database(engine: RadiationEngine, db_manager, project_id: int,
+                                latitude: float, longitude: float, tmy_data: Optional[List[Dict]],
+                                stream_batches: Callable[[int, int], Iterable[List[Dict]]],
+                                total_elements: int, checkpoint=None,
+                                element_set_hash: Optional[str] = None) -> Dict:
+    """
+    Run a RadiationEngine over a project's elements stored in the database.
+
+    Args:
+        engine: Configured headless engine; progress is published on engine.events
+        db_manager: BIPVDatabaseManager used for result writes
+        stream_batches: Callable (batch_size, offset) yielding element batches
+        checkpoint: Optional RadiationCheckpointManager for resumable sessions
+        element_set_hash: Hash of the streamed element rows (see element_set_query),
+            so a checkpoint is only resumed for the same elements
+
+    Returns:
+        Engine result dictionary with results_persisted set, or {"error": ...}
+    """
+    plan = engine.plan(total_elements)
+    start_index = 0
+    restored = {}
+
+    # Resume from the last committed batch of an interrupted session
+    if checkpoint:
+        session = checkpoint.start_session(
+            engine.config.engine, engine.config.precision,
+            engine.config.checkpoint_configuration(len(plan['time_steps']),
+                                                   latitude, longitude, tmy_data),
+            total_elements, plan['batch_size'], element_set_hash
+        )
+        plan['batch_size'] = session['batch_size'] or plan['batch_size']
+        start_index = session['cursor_position']
+        restored = session['completed_results']
+        if session['resumed']:
+            plan['notes'] = plan['notes'] + [
+                f"♻️ **Resuming interrupted analysis**: {start_index}/{total_elements} elements restored from checkpoint"
+            ]
+
+    batch_size = plan['batch_size']
+
+    write_conn = db_manager.get_connection()
+    if not write_conn:
+        return {"error": "Database connection failed"}
+
+    try:
+        # element_radiation is cleared before each run, so restored results are written first
+        if restored and not db_manager.append_element_radiation_batch(
+                project_id, to_radiation_rows(restored), conn=write_conn):
+            return {"error": "Failed to restore checkpointed results"}
+
+        def write_batch(batch_index, elements, batch_results):
+            if not db_manager.append_element_radiation_batch(
+                    project_id, to_radiation_rows(batch_results), conn=write_conn):
+                return False
+            if checkpoint:
+                checkpoint.commit_batch(batch_index, batch_results,
+                                        min((batch_index + 1) * batch_size, total_elements))
+            return True
+
+        result = engine.run(
+            latitude, longitude, tmy_data,
+            element_batches=lambda: stream_batches(batch_size, start_index),
+            total_elements=total_elements,
+            write_batch=write_batch,
+            plan=plan,
+            start_index=start_index,
+            restored_results=restored
+        )
+    except RadiationEngineError as e:
+        return {"error": f"Radiation pipeline failed: {e}"}
+    finally:
+        write_conn.close()
+
+    summary = result.to_dict()
+    summary["results_persisted"] = True
+    summary["session_throughput"] = checkpoint.get_throughput() if checkpoint else None
+    return summary
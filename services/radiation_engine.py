@@ -0,0 +1,795 @@
+"""
+Headless Radiation Engine - Step 5 Computation Without Streamlit
+Takes project geometry, TMY data and configuration, returns a results object and
+publishes structured progress events that UI adapters subscribe to
+"""
+
+import logging
+import threading
+import time
+import zlib
+from collections import deque
+from typing import Dict, List, Optional, Callable, Iterable, Any, Sequence, Tuple
+
+import numpy as np
+
+from core.solar_math import calculate_irradiance_on_surface
+from core.solar_ephemeris import get_solar_ephemeris
+from core.time_grids import TimeGrid, as_time_grid, get_time_grid
+from services.radiation_pipeline import RadiationPipeline
+from services.radiation_cache import DEFAULT_COORDINATE_DECIMALS, tmy_fingerprint
+
+logger = logging.getLogger(__name__)
+
+ENGINE_ULTRA_FAST = 'ultra_fast'
+ENGINE_OPTIMIZED = 'optimized'
+
+
+class RadiationEngineError(RuntimeError):
+    """Raised when a radiation engine run cannot complete."""
+
+
+class ProgressEvent:
+    """Structured progress event published by the radiation engine."""
+
+    STARTED = 'started'
+    INFO = 'info'
+    WARNING = 'warning'
+    BATCH_COMPLETED = 'batch_completed'
+    COMPLETED = 'completed'
+    FAILED = 'failed'
+
+    def __init__(self, kind: str, message: str = "", completed: int = 0, total: int = 0,
+                 data: Optional[Dict[str, Any]] = None):
+        self.kind = kind
+        self.message = message
+        self.completed = completed
+        self.total = total
+        self.data = data or {}
+        self.timestamp = time.time()
+
+    @property
+    def progress(self) -> float:
+        """Completed fraction in the 0-1 range."""
+        if self.total <= 0:
+            return 1.0 if self.kind == self.COMPLETED else 0.0
+        return min(1.0, self.completed / self.total)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'kind': self.kind,
+            'message': self.message,
+            'completed': self.completed,
+            'total': self.total,
+            'progress': self.progress,
+            'data': self.data,
+            'timestamp': self.timestamp
+        }
+
+
+class ProgressEventStream:
+    """Publish/subscribe stream of ProgressEvents with a bounded history."""
+
+    def __init__(self, history_size: int = 200):
+        self._subscribers: List[Callable[[ProgressEvent], None]] = []
+        self.history = deque(maxlen=history_size)
+
+    def subscribe(self, callback: Callable[[ProgressEvent], None]) -> Callable[[ProgressEvent], None]:
+        """Register a subscriber; returns it so it can be unsubscribed later."""
+        self._subscribers.append(callback)
+        return callback
+
+    def unsubscribe(self, callback: Callable[[ProgressEvent], None]):
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def emit(self, kind: str, message: str = "", completed: int = 0, total: int = 0,
+             **data) -> ProgressEvent:
+        """Create an event, record it and deliver it to every subscriber."""
+        event = ProgressEvent(kind, message, completed, total, data)
+        self.history.append(event)
+        for callback in list(self._subscribers):
+            try:
+                callback(event)
+            except Exception as e:
+                logger.warning(f"Progress subscriber failed: {e}")
+        return event
+
+
+def widget_progress_subscriber(progress_bar=None, status_text=None) -> Callable[[ProgressEvent], None]:
+    """
+    Adapter that mirrors events onto a progress bar and status text widget.
+
+    Any objects with progress(float) and text(str) methods work, so UI pages
+    subscribe Streamlit widgets without the engine depending on Streamlit.
+    """
+    def on_event(event: ProgressEvent):
+        progress = event.data.get('progress')
+        if event.kind == ProgressEvent.BATCH_COMPLETED:
+            progress = event.progress
+            message = f"Processed {event.completed}/{event.total} elements ({event.progress*100:.0f}%)"
+        else:
+            message = event.message
+
+        if progress_bar is not None and progress is not None:
+            progress_bar.progress(min(max(progress, 0.0), 1.0))
+        if status_text is not None and message:
+            status_text.text(message)
+
+    return on_event
+
+
+class RadiationEngineConfig:
+    """Configuration for one headless radiation run."""
+
+    def __init__(self, engine: str = ENGINE_OPTIMIZED, precision: str = "Daily Peak",
+                 calculation_mode: str = "auto", apply_corrections: bool = True,
+                 include_shading: bool = True, batch_size: Optional[int] = None,
+                 compute_workers: int = 2, queue_size: int = 4, realistic_bounds: bool = True):
+        if engine not in (ENGINE_ULTRA_FAST, ENGINE_OPTIMIZED):
+            raise ValueError(f"Unknown radiation engine: {engine}")
+        self.engine = engine
+        self.precision = precision
+        self.calculation_mode = calculation_mode
+        self.apply_corrections = apply_corrections
+        self.include_shading = include_shading
+        self.batch_size = batch_size
+        self.compute_workers = compute_workers
+        self.queue_size = queue_size
+        # False returns raw calculated values without apply_realistic_bounds (benchmarks)
+        self.realistic_bounds = realistic_bounds
+
+    def checkpoint_configuration(self, time_steps_count: int, latitude: float, longitude: float,
+                                 tmy_data: Optional[List[Dict]]) -> Dict[str, Any]:
+        """Settings and inputs that make two runs' results interchangeable (used for resume)."""
+        configuration = {
+            'lat': round(float(latitude), DEFAULT_COORDINATE_DECIMALS),
+            'lon': round(float(longitude), DEFAULT_COORDINATE_DECIMALS),
+            'tmy': tmy_fingerprint(tmy_data),
+            'apply_corrections': self.apply_corrections,
+            'include_shading': self.include_shading,
+            'time_steps': time_steps_count
+        }
+        if self.engine == ENGINE_OPTIMIZED:
+            configuration['calculation_mode'] = self.calculation_mode
+        if not self.realistic_bounds:
+            configuration['realistic_bounds'] = False
+        return configuration
+
+    def engine_signature(self, time_steps_count: int) -> str:
+        """
+        Engine part of the radiation cache key (shading and corrections are per element).
+        Cached values are unbounded, so realistic_bounds is not part of the signature.
+        """
+        signature = f"{self.engine}|{self.precision}|steps={time_steps_count}"
+        if self.engine == ENGINE_OPTIMIZED:
+            signature += f"|{self.calculation_mode}"
+        return signature
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'engine': self.engine,
+            'precision': self.precision,
+            'calculation_mode': self.calculation_mode,
+            'apply_corrections': self.apply_corrections,
+            'include_shading': self.include_shading,
+            'batch_size': self.batch_size,
+            'compute_workers': self.compute_workers,
+            'queue_size': self.queue_size,
+            'realistic_bounds': self.realistic_bounds
+        }
+
+
+class RadiationEngineResult:
+    """Results of a radiation run, convertible to the analyzer result dictionary."""
+
+    def __init__(self, element_radiation: Dict[str, float], total_elements: int,
+                 calculation_time: float, precision_level: str, time_steps_used: int,
+                 method: str, apply_corrections: bool, include_shading: bool,
+                 pipeline_stats: Optional[Dict[str, Any]] = None,
+                 cache_stats: Optional[Dict[str, Any]] = None):
+        self.element_radiation = element_radiation
+        self.total_elements = total_elements
+        self.calculation_time = calculation_time
+        self.precision_level = precision_level
+        self.time_steps_used = time_steps_used
+        self.method = method
+        self.apply_corrections = apply_corrections
+        self.include_shading = include_shading
+        self.pipeline_stats = pipeline_stats or {}
+        self.cache_stats = cache_stats
+
+    @property
+    def total_calculations(self) -> int:
+        return len(self.element_radiation) * self.time_steps_used
+
+    @property
+    def performance_metrics(self) -> Dict[str, Any]:
+        return {
+            "calculations_per_second": self.total_calculations / self.calculation_time if self.calculation_time > 0 else 0,
+            "elements_per_second": self.total_elements / self.calculation_time if self.calculation_time > 0 else 0,
+            "method": self.method
+        }
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "element_radiation": self.element_radiation,
+            "total_elements": self.total_elements,
+            "calculation_time": self.calculation_time,
+            "precision_level": self.precision_level,
+            "time_steps_used": self.time_steps_used,
+            "total_calculations": self.total_calculations,
+            "orientation_corrections": self.apply_corrections,
+            "geometric_shading": self.include_shading,
+            "optimization_method": self.method,
+            "performance_metrics": self.performance_metrics,
+            "pipeline_stats": self.pipeline_stats,
+            "cache_stats": self.cache_stats
+        }
+
+
+class RadiationEngine:
+    """
+    Headless Step 5 radiation engine.
+
+    Inputs are project geometry (element dicts with element_id, azimuth and orientation,
+    given as a list or as a batch source), site coordinates, TMY records and a
+    RadiationEngineConfig. Progress is published on a ProgressEventStream; the engine
+    never touches Streamlit or the database, so it runs in worker processes,
+    batch jobs and benchmarks alike. An optional RadiationResultCache is consulted
+    per batch; elements whose content address is cached skip computation.
+    """
+
+    def __init__(self, config: Optional[RadiationEngineConfig] = None,
+                 events: Optional[ProgressEventStream] = None, cache=None):
+        self.config = config or RadiationEngineConfig()
+        self.events = events or ProgressEventStream()
+        self.cache = cache
+        self._cache_lock = threading.Lock()
+        self._cache_counts = {'cached_elements': 0, 'computed_elements': 0}
+
+    def plan(self, total_elements: int) -> Dict[str, Any]:
+        """Resolve time steps and batch size for a run over total_elements."""
+        if self.config.engine == ENGINE_ULTRA_FAST:
+            time_steps, notes = self._ultra_fast_time_steps(self.config.precision)
+            default_batch = 100 if self.config.precision.lower() == "simple" else 50
+        else:
+            time_steps, notes = self._optimized_time_steps(
+                self.config.precision, self.config.calculation_mode, total_elements
+            )
+            if self.config.calculation_mode == "simple":
+                default_batch = min(total_elements, 100)  # Large batches for ultra-fast mode
+            else:
+                default_batch = max(1, min(20, total_elements // 5))  # Smaller batches for progress tracking
+
+        return {
+            'time_steps': time_steps,
+            'batch_size': max(1, self.config.batch_size or default_batch),
+            'notes': notes
+        }
+
+    def run(self, latitude: float, longitude: float, tmy_data: Optional[List[Dict]] = None,
+            elements: Optional[List[Dict]] = None,
+            element_batches: Optional[Callable[[], Iterable[List[Dict]]]] = None,
+            total_elements: Optional[int] = None,
+            write_batch: Optional[Callable[[int, List[Dict], Dict[str, float]], bool]] = None,
+            plan: Optional[Dict[str, Any]] = None, start_index: int = 0,
+            restored_results: Optional[Dict[str, float]] = None) -> RadiationEngineResult:
+        """
+        Compute annual radiation for every element.
+
+        Args:
+            latitude, longitude: Site coordinates
+            tmy_data: Hourly TMY records (dicts with ghi/dni/dhi); synthetic irradiance when empty
+            elements: In-memory element list, or
+            element_batches: Callable returning an iterable of element batches (e.g. a DB cursor)
+                together with total_elements
+            write_batch: Optional writer called in batch order with (batch_index, elements, results)
+            plan: Result of plan(); computed when omitted
+            start_index: Number of leading elements already done (resumed runs)
+            restored_results: Results of those leading elements
+
+        Returns:
+            RadiationEngineResult; raises RadiationEngineError on failure
+        """
+        start_time = time.time()
+
+        if elements is not None:
+            total_elements = len(elements)
+        if not total_elements:
+            raise RadiationEngineError("No PV suitable elements to analyze")
+
+        plan = plan or self.plan(total_elements)
+        time_steps = plan['time_steps']
+        batch_size = plan['batch_size']
+        tmy_data = tmy_data or []
+
+        if element_batches is None:
+            element_list = elements or []
+
+            def element_batches():
+                for i in range(start_index, len(element_list), batch_size):
+                    yield element_list[i:i + batch_size]
+
+        for note in plan.get('notes', []):
+            self.events.emit(ProgressEvent.INFO, note, start_index, total_elements)
+
+        total_calculations = total_elements * len(time_steps)
+        self.events.emit(
+            ProgressEvent.STARTED,
+            f"Processing {total_elements:,} elements × {len(time_steps)} time points",
+            start_index, total_elements,
+            engine=self.config.engine, time_steps=len(time_steps), batch_size=batch_size,
+            total_calculations=total_calculations, resumed=start_index > 0
+        )
+
+        if not tmy_data:
+            self.events.emit(ProgressEvent.WARNING, "No authentic TMY data found, using simplified estimates",
+                             start_index, total_elements)
+
+        if self.cache is not None:
+            # The cache stores unbounded values; _with_cache applies the bounds per element
+            compute_batch = self._make_batch_calculator(latitude, longitude, tmy_data, time_steps,
+                                                        realistic_bounds=False)
+            self._cache_counts = {'cached_elements': 0, 'computed_elements': 0}
+            compute_batch = self._with_cache(compute_batch, latitude, longitude, tmy_data, len(time_steps))
+        else:
+            compute_batch = self._make_batch_calculator(latitude, longitude, tmy_data, time_steps)
+        total_batches = (total_elements - 1) // batch_size + 1
+        first_batch_index = start_index // batch_size
+
+        def on_batch_written(batches_done, elements_done):
+            completed = min(start_index + elements_done, total_elements)
+            self.events.emit(
+                ProgressEvent.BATCH_COMPLETED,
+                f"Processed batch {first_batch_index + batches_done} of {total_batches}",
+                completed, total_elements,
+                batch=first_batch_index + batches_done, total_batches=total_batches,
+                calculations=completed * len(time_steps), total_calculations=total_calculations
+            )
+
+        pipeline = RadiationPipeline(
+            fetch_batches=element_batches,
+            compute_batch=compute_batch,
+            write_batch=write_batch,
+            compute_workers=self.config.compute_workers,
+            queue_size=self.config.queue_size,
+            first_batch_index=first_batch_index
+        )
+        outcome = pipeline.run(on_batch_written)
+
+        if outcome.get('error'):
+            self.events.emit(ProgressEvent.FAILED, outcome['error'], start_index, total_elements)
+            raise RadiationEngineError(outcome['error'])
+
+        element_radiation = dict(restored_results or {})
+        element_radiation.update(outcome['results'])
+
+        result = RadiationEngineResult(
+            element_radiation=element_radiation,
+            total_elements=total_elements,
+            calculation_time=time.time() - start_time,
+            precision_level=self.config.precision,
+            time_steps_used=len(time_steps),
+            method=f"{self.config.engine}_streaming",
+            apply_corrections=self.config.apply_corrections,
+            include_shading=self.config.include_shading,
+            pipeline_stats=outcome['stats'],
+            cache_stats=self._collect_cache_stats()
+        )
+
+        self.events.emit(
+            ProgressEvent.COMPLETED,
+            f"Processed {total_elements} elements with {result.total_calculations:,} calculations",
+            total_elements, total_elements,
+            calculation_time=result.calculation_time
+        )
+        return result
+
+    def _make_batch_calculator(self, latitude: float, longitude: float, tmy_data: List[Dict],
+                               time_steps: TimeGrid, realistic_bounds: Optional[bool] = None
+                               ) -> Callable[[List[Dict]], Dict[str, float]]:
+        """
+        Bind site data and time steps into a per-batch compute function.
+        realistic_bounds defaults to the engine configuration.
+        """
+        config = self.config
+        if realistic_bounds is None:
+            realistic_bounds = config.realistic_bounds
+        time_steps = as_time_grid(time_steps)
+
+        # Solar positions depend only on site and time grid, so every element shares them
+        solar_positions = get_solar_ephemeris(latitude, longitude, time_steps).position_lists()
+
+        if config.engine == ENGINE_ULTRA_FAST:
+            # Extract only the TMY records matching the time steps for Simple mode
+            if config.precision.lower() == "simple" and tmy_data:
+                tmy_subset = extract_tmy_subset(tmy_data, time_steps)
+            else:
+                tmy_subset = tmy_data
+
+            def compute(batch):
+                return {
+                    element['element_id']: calculate_element_radiation_ultra_fast(
+                        latitude, longitude, element['azimuth'], element['orientation'],
+                        time_steps, tmy_subset, config.apply_corrections, config.include_shading,
+                        solar_positions=solar_positions, realistic_bounds=realistic_bounds
+                    )
+                    for element in batch
+                }
+        else:
+            def compute(batch):
+                return {
+                    element['element_id']: calculate_element_radiation_optimized(
+                        latitude, longitude, element['azimuth'], element['orientation'],
+                        time_steps, tmy_data, config.apply_corrections, config.include_shading,
+                        config.calculation_mode, solar_positions=solar_positions,
+                        realistic_bounds=realistic_bounds
+                    )
+                    for element in batch
+                }
+
+        return compute
+
+    def _with_cache(self, compute_batch: Callable[[List[Dict]], Dict[str, float]],
+                    latitude: float, longitude: float, tmy_data: List[Dict],
+                    time_steps_count: int) -> Callable[[List[Dict]], Dict[str, float]]:
+        """
+        Wrap an unbounded batch calculator so cached elements skip computation.
+        Bounds are applied after lookup with each element's own azimuth, since
+        elements sharing a content address may differ within the azimuth resolution.
+        """
+        cache = self.cache
+        config = self.config
+        tmy_key = tmy_fingerprint(tmy_data)
+        engine_signature = config.engine_signature(time_steps_count)
+
+        def cached_compute(batch):
+            keys = {
+                element['element_id']: cache.key_for(
+                    latitude, longitude, tmy_key, element['azimuth'],
+                    tilt=element.get('tilt', 90.0),
+                    shading_signature=f"{element['orientation']}|shading={config.include_shading}|corrections={config.apply_corrections}",
+                    engine_signature=engine_signature
+                )
+                for element in batch
+            }
+            found = cache.get_many(keys.values())
+
+            # Compute one representative element per missing content address
+            representatives = {}
+            for element in batch:
+                key = keys[element['element_id']]
+                if key not in found and key not in representatives:
+                    representatives[key] = element
+            computed = compute_batch(list(representatives.values()))
+            fresh = {key: computed[element['element_id']] for key, element in representatives.items()}
+            cache.put_many(fresh)
+            found.update(fresh)
+
+            with self._cache_lock:
+                self._cache_counts['computed_elements'] += len(fresh)
+                self._cache_counts['cached_elements'] += len(batch) - len(fresh)
+
+            if not config.realistic_bounds:
+                return {element_id: found[key] for element_id, key in keys.items()}
+            return {
+                element['element_id']: apply_realistic_bounds(
+                    found[keys[element['element_id']]], element['orientation'], element['azimuth'])
+                for element in batch
+            }
+
+        return cached_compute
+
+    def _collect_cache_stats(self) -> Optional[Dict[str, Any]]:
+        """Element level cache hits for this run plus the cache's own counters."""
+        if self.cache is None:
+            return None
+        self.cache.evict()
+        stats = self.cache.stats()
+        with self._cache_lock:
+            stats.update(self._cache_counts)
+            self._cache_counts = {'cached_elements': 0, 'computed_elements': 0}
+        processed = stats['cached_elements'] + stats['computed_elements']
+        stats['element_hit_rate'] = stats['cached_elements'] / processed if processed else 0.0
+        return stats
+
+    @staticmethod
+    def _ultra_fast_time_steps(precision: str):
+        """Ultra-fast sampling: 4 seasonal, 12 monthly or 52 weekly points."""
+        if precision.lower() == "simple":
+            return get_time_grid('ultra_fast_simple'), []
+        elif precision.lower() == "advanced":
+            return get_time_grid('ultra_fast_monthly'), []
+        return get_time_grid('ultra_fast_weekly'), []
+
+    @staticmethod
+    def _optimized_time_steps(precision: str, calculation_mode: str, total_elements: int):
+        """Optimized sampling chosen by calculation mode, precision and dataset size."""
+        if calculation_mode == "simple":
+            return get_time_grid('ultra_fast'), [
+                "🚀 **Simple Mode Active**: Ultra-fast 4-point calculation for maximum speed",
+                "⚡ **Performance Target**: 4 calculations per element = 10-20 second analysis"
+            ]
+        elif calculation_mode == "auto":
+            if total_elements > 500:
+                return get_time_grid('seasonal'), [
+                    "🤖 **Auto Mode**: Large dataset detected, using seasonal sampling (4 calculations per element)"
+                ]
+            elif total_elements > 100:
+                return get_time_grid('monthly'), [
+                    "🤖 **Auto Mode**: Medium dataset, using monthly sampling (12 calculations per element)"
+                ]
+            return get_time_grid('daily_peak'), [
+                "🤖 **Auto Mode**: Small dataset, using daily peak sampling (365 calculations per element)"
+            ]
+
+        if precision == "Hourly":
+            time_steps = get_time_grid('hourly')
+        elif precision == "Daily Peak":
+            time_steps = get_time_grid('daily_peak')
+        elif precision == "Monthly Average":
+            time_steps = get_time_grid('monthly')
+        else:  # Yearly Average
+            time_steps = get_time_grid('seasonal')
+        return time_steps, [
+            f"🎯 **Advanced Mode**: Using {precision} precision ({len(time_steps)} calculations per element)"
+        ]
+
+
+# Per-element radiation calculations
+
+def _resolve_solar_positions(latitude: float, longitude: float, time_steps,
+                             solar_positions: Optional[Tuple[Sequence[float], Sequence[float]]]):
+    """Time grid plus (elevations, azimuths), from the ephemeris cache when not supplied."""
+    time_steps = as_time_grid(time_steps)
+    if solar_positions is None:
+        solar_positions = get_solar_ephemeris(latitude, longitude, time_steps).position_lists()
+    return time_steps, solar_positions
+
+
+def calculate_element_radiation_ultra_fast(latitude: float, longitude: float, azimuth: float,
+                                           orientation: str, time_steps: TimeGrid,
+                                           tmy_subset: List, apply_corrections: bool,
+                                           include_shading: bool,
+                                           solar_positions: Optional[Tuple[Sequence[float], Sequence[float]]] = None,
+                                           realistic_bounds: bool = True) -> float:
+    """
+    Annual radiation for one element from sampled time steps (ultra-fast engine).
+
+    solar_positions: (elevations, azimuths) for time_steps, shared across elements
+    realistic_bounds: False skips apply_realistic_bounds
+    """
+    time_steps, (elevations, solar_azimuths) = _resolve_solar_positions(
+        latitude, longitude, time_steps, solar_positions
+    )
+    total_irradiance = 0.0
+
+    if tmy_subset and len(tmy_subset) > 0:
+        # Use optimized TMY subset
+        for i, tmy_hour in enumerate(tmy_subset[:len(time_steps)]):
+            ghi = extract_irradiance_value(tmy_hour, ['ghi', 'GHI', 'ghi_wm2'], 0)
+            dni = extract_irradiance_value(tmy_hour, ['dni', 'DNI', 'dni_wm2'], 0)
+            dhi = extract_irradiance_value(tmy_hour, ['dhi', 'DHI', 'dhi_wm2'], 0)
+
+            if ghi <= 0 and dni <= 0:
+                continue
+
+            solar_elevation, solar_azimuth = elevations[i], solar_azimuths[i]
+
+            if solar_elevation <= 0:
+                continue
+
+            surface_irradiance = calculate_irradiance_on_surface(
+                dni if dni > 0 else ghi * 0.8,
+                solar_elevation, solar_azimuth, azimuth, 90,
+                ghi, dhi, calculation_mode="simple"
+            )
+
+            if apply_corrections:
+                surface_irradiance *= get_orientation_correction(orientation)
+
+            if include_shading:
+                surface_irradiance *= get_shading_factor(orientation)
+
+            total_irradiance += surface_irradiance
+    else:
+        # Synthetic calculation for missing TMY data
+        for solar_elevation, solar_azimuth, day_of_year in zip(elevations, solar_azimuths,
+                                                               time_steps.day_of_year.tolist()):
+            if solar_elevation <= 0:
+                continue
+
+            dni = estimate_dni(solar_elevation, day_of_year)
+
+            surface_irradiance = calculate_irradiance_on_surface(
+                dni, solar_elevation, solar_azimuth, azimuth, 90,
+                calculation_mode="simple"
+            )
+
+            if apply_corrections:
+                surface_irradiance *= get_orientation_correction(orientation)
+
+            if include_shading:
+                surface_irradiance *= get_shading_factor(orientation)
+
+            total_irradiance += surface_irradiance
+
+    # Scale to annual radiation (kWh/m²/year)
+    annual_radiation = (total_irradiance * get_scaling_factor(len(time_steps))) / 1000
+
+    if not realistic_bounds:
+        return annual_radiation
+    return apply_realistic_bounds(annual_radiation, orientation, azimuth)
+
+
+def calculate_element_radiation_optimized(latitude: float, longitude: float, azimuth: float,
+                                          orientation: str, time_steps: TimeGrid,
+                                          tmy_data: List, apply_corrections: bool,
+                                          include_shading: bool, calculation_mode: str = "auto",
+                                          solar_positions: Optional[Tuple[Sequence[float], Sequence[float]]] = None,
+                                          realistic_bounds: bool = True) -> float:
+    """
+    Annual radiation for one element using authentic TMY data (optimized engine).
+
+    solar_positions: (elevations, azimuths) for time_steps, shared across elements
+    realistic_bounds: False skips apply_realistic_bounds
+    """
+    time_steps, (elevations, solar_azimuths) = _resolve_solar_positions(
+        latitude, longitude, time_steps, solar_positions
+    )
+    total_irradiance = 0.0
+
+    if tmy_data and len(tmy_data) > 0:
+        for i, tmy_hour in enumerate(tmy_data[:len(time_steps)]):
+            ghi = extract_irradiance_value(tmy_hour, ['ghi', 'GHI', 'ghi_wm2'], 0)
+            dni = extract_irradiance_value(tmy_hour, ['dni', 'DNI', 'dni_wm2'], 0)
+            dhi = extract_irradiance_value(tmy_hour, ['dhi', 'DHI', 'dhi_wm2'], 0)
+
+            # Skip if no irradiance data available
+            if ghi <= 0 and dni <= 0:
+                continue
+
+            solar_elevation, solar_azimuth = elevations[i], solar_azimuths[i]
+
+            # Skip nighttime
+            if solar_elevation <= 0:
+                continue
+
+            # Use authentic DNI or estimate if not available
+            if dni > 0:
+                authentic_dni = dni
+            else:
+                authentic_dni = max(0, ghi - dhi) if dhi > 0 else ghi * 0.8
+
+            surface_irradiance = calculate_irradiance_on_surface(
+                authentic_dni, solar_elevation, solar_azimuth, azimuth, 90,
+                ghi, dhi, calculation_mode=calculation_mode
+            )
+
+            if apply_corrections:
+                surface_irradiance *= get_orientation_correction(orientation)
+
+            if include_shading:
+                surface_irradiance *= get_shading_factor(orientation)
+
+            total_irradiance += surface_irradiance
+    else:
+        # Fallback to synthetic calculation only if no TMY data available
+        for solar_elevation, solar_azimuth, day_of_year in zip(elevations, solar_azimuths,
+                                                               time_steps.day_of_year.tolist()):
+            if solar_elevation <= 0:
+                continue
+
+            dni = estimate_dni(solar_elevation, day_of_year)
+
+            surface_irradiance = calculate_irradiance_on_surface(
+                dni, solar_elevation, solar_azimuth, azimuth, 90,
+                calculation_mode="simple"  # Always use simple for fallback
+            )
+
+            if apply_corrections:
+                surface_irradiance *= get_orientation_correction(orientation)
+
+            if include_shading:
+                surface_irradiance *= get_shading_factor(orientation)
+
+            total_irradiance += surface_irradiance
+
+    # Convert to annual radiation (kWh/m²/year), scaled by sampling density
+    annual_radiation = (total_irradiance * get_scaling_factor(len(time_steps))) / 1000
+
+    if not realistic_bounds:
+        return annual_radiation
+    return apply_realistic_bounds(annual_radiation, orientation, azimuth)
+
+
+# Shared helpers
+
+def extract_tmy_subset(tmy_data: List, time_steps: TimeGrid) -> List:
+    """Pick the TMY record closest to each time step instead of scanning all 8,760 hours."""
+    if not tmy_data or not isinstance(tmy_data, list) or len(tmy_data) == 0:
+        return []
+
+    time_steps = as_time_grid(time_steps)
+    target_hours = time_steps.day_of_year * 24 + time_steps.hour
+
+    # Use last available record as fallback past the end of the data
+    return [tmy_data[target_hour] for target_hour in np.minimum(target_hours, len(tmy_data) - 1).tolist()]
+
+
+def extract_irradiance_value(tmy_hour: dict, field_names: list, default: float) -> float:
+    """Extract an irradiance value from a TMY record using multiple possible field names."""
+    for field in field_names:
+        if field in tmy_hour and tmy_hour[field] is not None:
+            try:
+                return float(tmy_hour[field])
+            except (ValueError, TypeError):
+                continue
+    return default
+
+
+def estimate_dni(solar_elevation: float, day_of_year: int) -> float:
+    """Estimate clear-sky Direct Normal Irradiance from solar elevation and season."""
+    if solar_elevation <= 0:
+        return 0
+
+    max_dni = 900  # Peak DNI around 900 W/m² at high sun angles
+    elevation_factor = np.sin(np.radians(solar_elevation))
+    seasonal_factor = 0.8 + 0.2 * np.cos(2 * np.pi * (day_of_year - 172) / 365)
+    atmospheric_factor = 0.75
+
+    return max_dni * elevation_factor * seasonal_factor * atmospheric_factor
+
+
+def get_orientation_correction(orientation: str) -> float:
+    """Physics-based orientation correction factor."""
+    corrections = {
+        'South': 1.0, 'Southeast': 0.95, 'Southwest': 0.95,
+        'East': 0.85, 'West': 0.85, 'Northeast': 0.7,
+        'Northwest': 0.7, 'North': 0.3
+    }
+    return corrections.get(orientation, 0.8)
+
+
+def get_shading_factor(orientation: str) -> float:
+    """Shading factor based on orientation and typical building shadows."""
+    factors = {
+        'South': 0.95, 'Southeast': 0.90, 'Southwest': 0.90,
+        'East': 0.85, 'West': 0.85, 'North': 0.70
+    }
+    return factors.get(orientation, 0.80)
+
+
+def get_scaling_factor(time_steps_count: int) -> float:
+    """Scaling factor converting sampled irradiance sums to annual values."""
+    if time_steps_count >= 4000:  # Hourly - full year sampling
+        return 1.0
+    elif time_steps_count >= 300:  # Daily peak - 8 useful daylight hours per day
+        return 8.0
+    elif time_steps_count >= 10:   # Monthly or weekly samples
+        return 365.0 * 8.0 / 12.0
+    else:  # 4 seasonal points
+        return 365.0 * 8.0 / 4.0
+
+
+def _azimuth_variation(azimuth: float) -> int:
+    """Stable per-azimuth spread for the bound floors (hash() is randomized per process)."""
+    return zlib.crc32(str(azimuth).encode('utf-8'))
+
+
+def apply_realistic_bounds(calculated_radiation: float, orientation: str, azimuth: float) -> float:
+    """Keep annual radiation within realistic orientation-based bounds."""
+    if 'south' in orientation.lower():
+        base_radiation = 900 + (_azimuth_variation(azimuth) % 300)  # 900-1200 for south
+    elif 'east' in orientation.lower() or 'west' in orientation.lower():
+        base_radiation = 650 + (_azimuth_variation(azimuth) % 250)  # 650-900 for east/west
+    elif 'north' in orientation.lower():
+        base_radiation = 200 + (_azimuth_variation(azimuth) % 100)  # 200-300 for north
+    else:
+        base_radiation = 500 + (_azimuth_variation(azimuth) % 200)  # 500-700 for unknown
+
+    # Use calculated value if it's reasonable, otherwise use base
+    if calculated_radiation > 100:
+        return max(calculated_radiation, base_radiation * 0.8)
+    return base_radiation
@@ -0,0 +1,209 @@
+"""
+Streaming Radiation Pipeline - Overlapped Fetch, Compute and Write for Step 5
+Element batches flow through bounded queues so database I/O and radiation
+calculations run concurrently with constant memory
+"""
+
+import queue
+import threading
+import time
+from typing import Dict, List, Callable, Iterable, Optional, Any
+
+
+_STOP = object()
+
+
+class RadiationPipeline:
+    """
+    Bounded-queue producer/worker/writer pipeline for element radiation batches.
+
+    fetch_batches yields lists of element dicts (the producer), compute_batch turns
+    one list into {element_id: annual_radiation} (run by compute workers) and
+    write_batch(batch_index, elements, results) persists a finished batch (the writer).
+    Batches are written in order, so a checkpoint cursor always covers a contiguous
+    prefix of the element stream. Queue sizes bound how many batches are in flight.
+    """
+
+    def __init__(self, fetch_batches: Callable[[], Iterable[List[Dict]]],
+                 compute_batch: Callable[[List[Dict]], Dict[str, float]],
+                 write_batch: Optional[Callable[[int, List[Dict], Dict[str, float]], bool]] = None,
+                 compute_workers: int = 2, queue_size: int = 4, first_batch_index: int = 0):
+        self.fetch_batches = fetch_batches
+        self.compute_batch = compute_batch
+        self.write_batch = write_batch
+        self.compute_workers = max(1, compute_workers)
+        self.queue_size = max(1, queue_size)
+        self.first_batch_index = first_batch_index
+
+        self._fetch_queue = queue.Queue(maxsize=self.queue_size)
+        self._write_queue = queue.Queue(maxsize=self.queue_size)
+        self._progress_queue = queue.Queue()
+        self._stop_event = threading.Event()
+        self._errors = []
+        self._lock = threading.Lock()
+
+        self.results = {}
+        self.stats = {
+            'batches': 0,
+            'elements': 0,
+            'fetch_seconds': 0.0,
+            'compute_seconds': 0.0,
+            'write_seconds': 0.0,
+            'wall_time': 0.0,
+            'time_to_first_result': None,
+            'peak_fetch_queue': 0,
+            'peak_write_queue': 0
+        }
+
+    def run(self, on_batch_written: Optional[Callable[[int, int], None]] = None) -> Dict[str, Any]:
+        """
+        Run the pipeline to completion.
+
+        on_batch_written(batches_done, elements_done) is called from the calling thread,
+        which keeps Streamlit widget updates out of the worker threads.
+
+        Returns:
+            Dictionary with element results, stage timings and an error entry on failure
+        """
+        start_time = time.time()
+        self._start_time = start_time
+
+        producer = threading.Thread(target=self._produce, name="radiation-fetch", daemon=True)
+        workers = [
+            threading.Thread(target=self._compute, name=f"radiation-compute-{i}", daemon=True)
+            for i in range(self.compute_workers)
+        ]
+        writer = threading.Thread(target=self._write, name="radiation-write", daemon=True)
+
+        producer.start()
+        for worker in workers:
+            worker.start()
+        writer.start()
+
+        # Relay progress from the writer to the caller until the writer finishes
+        while writer.is_alive() or not self._progress_queue.empty():
+            try:
+                batches_done, elements_done = self._progress_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if on_batch_written:
+                on_batch_written(batches_done, elements_done)
+
+        writer.join()
+        self._stop_event.set()
+        producer.join(timeout=1.0)
+        for worker in workers:
+            worker.join(timeout=1.0)
+
+        self.stats['wall_time'] = time.time() - start_time
+
+        summary = {'results': self.results, 'stats': self.stats}
+        if self._errors:
+            summary['error'] = str(self._errors[0])
+        return summary
+
+    def _fail(self, error: Exception):
+        """Record the first failure and stop all stages."""
+        with self._lock:
+            self._errors.append(error)
+        self._stop_event.set()
+
+    def _put(self, target: queue.Queue, item, peak_key: str) -> bool:
+        """Blocking put that gives up once the pipeline is stopping (backpressure point)."""
+        while not self._stop_event.is_set():
+            try:
+                target.put(item, timeout=0.1)
+                depth = target.qsize()
+                if depth > self.stats[peak_key]:
+                    self.stats[peak_key] = depth
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, source: queue.Queue):
+        """Blocking get that returns _STOP once the pipeline is stopping."""
+        while True:
+            try:
+                return source.get(timeout=0.1)
+            except queue.Empty:
+                if self._stop_event.is_set():
+                    return _STOP
+
+    def _produce(self):
+        """Stream element batches from the source into the fetch queue."""
+        batch_index = self.first_batch_index
+        try:
+            iterator = iter(self.fetch_batches())
+            while not self._stop_event.is_set():
+                fetch_start = time.time()
+                batch = next(iterator, None)
+                self.stats['fetch_seconds'] += time.time() - fetch_start
+                if batch is None:
+                    break
+                if not batch:
+                    continue
+                if not self._put(self._fetch_queue, (batch_index, batch), 'peak_fetch_queue'):
+                    return
+                batch_index += 1
+        except Exception as e:
+            self._fail(e)
+        finally:
+            for _ in range(self.compute_workers):
+                self._put(self._fetch_queue, _STOP, 'peak_fetch_queue')
+
+    def _compute(self):
+        """Compute radiation for fetched batches and hand them to the writer."""
+        try:
+            while True:
+                item = self._get(self._fetch_queue)
+                if item is _STOP:
+                    break
+                batch_index, batch = item
+                compute_start = time.time()
+                batch_results = self.compute_batch(batch)
+                with self._lock:
+                    self.stats['compute_seconds'] += time.time() - compute_start
+                if not self._put(self._write_queue, (batch_index, batch, batch_results), 'peak_write_queue'):
+                    return
+        except Exception as e:
+            self._fail(e)
+        finally:
+            self._put(self._write_queue, _STOP, 'peak_write_queue')
+
+    def _write(self):
+        """Write computed batches in order as they arrive."""
+        pending = {}
+        next_index = self.first_batch_index
+        finished_workers = 0
+
+        try:
+            while finished_workers < self.compute_workers:
+                item = self._get(self._write_queue)
+                if item is _STOP:
+                    if self._stop_event.is_set() and self._errors:
+                        return
+                    finished_workers += 1
+                    continue
+
+                batch_index, batch, batch_results = item
+                pending[batch_index] = (batch, batch_results)
+
+                # Flush the contiguous run of batches that is now complete
+                while next_index in pending:
+                    batch, batch_results = pending.pop(next_index)
+                    write_start = time.time()
+                    if self.write_batch and self.write_batch(next_index, batch, batch_results) is False:
+                        raise RuntimeError(f"Failed to write radiation batch {next_index}")
+                    self.stats['write_seconds'] += time.time() - write_start
+
+                    self.results.update(batch_results)
+                    self.stats['batches'] += 1
+                    self.stats['elements'] += len(batch_results)
+                    if self.stats['time_to_first_result'] is None:
+                        self.stats['time_to_first_result'] = time.time() - self._start_time
+                    self._progress_queue.put((self.stats['batches'], self.stats['elements']))
+                    next_index += 1
+
+        except Exception as e:
+            self._fail(e)
@@ -0,0 +1,129 @@
+"""
+Compact Element Irradiance Profiles
+Per-element 12 x 24 (month x hour-of-day) float32 irradiation profiles stored as
+packed binary in element_radiation.irradiance_profile, with a NumPy bulk loader
+"""
+
+import numpy as np
+import psycopg2
+import streamlit as st
+from typing import Dict, List, Optional, Tuple
+
+from database_manager import db_manager as default_db_manager
+
+PROFILE_SHAPE = (12, 24)
+PROFILE_DTYPE = np.dtype('<f4')  # little-endian float32, 1152 bytes per element
+PROFILE_BYTES = PROFILE_SHAPE[0] * PROFILE_SHAPE[1] * PROFILE_DTYPE.itemsize
+
+PROFILE_SCHEMA_STATEMENTS = [
+    "ALTER TABLE element_radiation ADD COLUMN IF NOT EXISTS irradiance_profile BYTEA"
+]
+
+
+def build_profile(irradiance, month_index, hour, scaling_factor: float = 1.0) -> np.ndarray:
+    """
+    Accumulate sampled surface irradiance (W/m²) into a month x hour-of-day grid.
+
+    Each cell holds kWh/m² after applying the same annual scaling factor as the
+    annual total, so the profile sums to the element's annual radiation.
+    """
+    irradiance = np.asarray(irradiance, dtype=float)
+    month_index = np.asarray(month_index, dtype=int)
+    hour = np.asarray(hour, dtype=int)
+
+    valid = (month_index >= 0) & (month_index < 12) & (hour >= 0) & (hour < 24)
+    cells = month_index[valid] * PROFILE_SHAPE[1] + hour[valid]
+    grid = np.bincount(cells, weights=irradiance[valid], minlength=PROFILE_SHAPE[0] * PROFILE_SHAPE[1])
+
+    return (grid * scaling_factor / 1000).reshape(PROFILE_SHAPE).astype(PROFILE_DTYPE)
+
+
+def pack_profile(profile) -> bytes:
+    """Serialize a 12 x 24 profile to packed little-endian float32 bytes."""
+    profile = np.asarray(profile, dtype=PROFILE_DTYPE)
+    if profile.shape != PROFILE_SHAPE:
+        raise ValueError(f"Irradiance profile must have shape {PROFILE_SHAPE}, got {profile.shape}")
+    return profile.tobytes()
+
+
+def unpack_profile(blob) -> np.ndarray:
+    """Deserialize packed bytes into a 12 x 24 float32 array."""
+    return np.frombuffer(bytes(blob), dtype=PROFILE_DTYPE).reshape(PROFILE_SHAPE)
+
+
+def monthly_distribution(profile) -> Optional[List[float]]:
+    """Monthly share of annual irradiation from a profile, or None for an empty profile."""
+    monthly = np.asarray(profile, dtype=float).sum(axis=1)
+    total = monthly.sum()
+    if total <= 0:
+        return None
+    return (monthly / total).tolist()
+
+
+def ensure_profile_schema(conn) -> bool:
+    """Add the irradiance_profile column to element_radiation if it is missing."""
+    try:
+        with conn.cursor() as cursor:
+            for statement in PROFILE_SCHEMA_STATEMENTS:
+                cursor.execute(statement)
+        conn.commit()
+        return True
+    except Exception as e:
+        conn.rollback()
+        st.error(f"Error preparing irradiance profile storage: {str(e)}")
+        return False
+
+
+def load_element_profiles(project_id: int, element_ids: Optional[List[str]] = None,
+                          db_manager=None) -> Tuple[List[str], np.ndarray]:
+    """
+    Load stored profiles for a project as one (elements x 12 x 24) float32 array.
+
+    The packed blobs are joined and decoded with a single np.frombuffer call.
+    Elements without a stored profile are left out.
+
+    Returns:
+        (element_ids, profiles) in matching order
+    """
+    db_manager = db_manager or default_db_manager
+    empty = np.empty((0,) + PROFILE_SHAPE, dtype=PROFILE_DTYPE)
+
+    conn = db_manager.get_connection()
+    if not conn:
+        return [], empty
+
+    try:
+        with conn.cursor() as cursor:
+            query = """
+                SELECT element_id, irradiance_profile
+                FROM element_radiation
+                WHERE project_id = %s AND irradiance_profile IS NOT NULL
+            """
+            params = [project_id]
+            if element_ids is not None:
+                query += " AND element_id = ANY(%s)"
+                params.append([str(element_id) for element_id in element_ids])
+            cursor.execute(query + " ORDER BY element_id", params)
+            rows = [row for row in cursor.fetchall() if len(row[1]) == PROFILE_BYTES]
+
+        if not rows:
+            return [], empty
+
+        profiles = np.frombuffer(b''.join(bytes(row[1]) for row in rows), dtype=PROFILE_DTYPE)
+        return [str(row[0]) for row in rows], profiles.reshape((len(rows),) + PROFILE_SHAPE)
+
+    except psycopg2.errors.UndefinedColumn:
+        # Projects analysed before profiles were stored
+        conn.rollback()
+        return [], empty
+    except Exception as e:
+        st.error(f"Error loading irradiance profiles: {str(e)}")
+        return [], empty
+    finally:
+        conn.close()
+
+
+def load_profile_lookup(project_id: int, db_manager=None) -> Dict[str, np.ndarray]:
+    """Map element_id to its 12 x 24 profile (views into one loaded array)."""
+    element_ids, profiles = load_element_profiles(project_id, db_manager=db_manager)
+    return dict(zip(element_ids, profiles))
@@ -9,6 +9,10 @@ import traceback
 from typing import Dict, Any, Optional, Callable
 from datetime import datetime
 from database_manager import BIPVDatabaseManager
+from services.radiation_checkpoint import RadiationCheckpointManager
+from services.radiation_cache import RadiationResultCache, DatabaseRadiationCacheStore
+from services.element_diff import acknowledge_element_changes
+from services.radiation_engine import ProgressEvent, ProgressEventStream, widget_progress_subscriber
 import numpy as np
 
 class Step5ExecutionFlow:
@@ -20,18 +24,27 @@ class Step5ExecutionFlow:
         self.current_analysis = None
         self.progress_callback = None
         self.status_callback = None
+        self.checkpoint = None
+        self.result_cache = None
+        self.events = ProgressEventStream()
+        self._widget_subscriber = None
         
     def set_progress_callbacks(self, progress_bar, status_text):
-        """Set UI progress callbacks."""
+        """Set UI progress callbacks (subscribed to the progress event stream)."""
         self.progress_callback = progress_bar
         self.status_callback = status_text
+        if self._widget_subscriber:
+            self.events.unsubscribe(self._widget_subscriber)
+        self._widget_subscriber = widget_progress_subscriber(progress_bar, status_text)
+        self.events.subscribe(self._widget_subscriber)
+        
+    def subscribe(self, callback: Callable[[ProgressEvent], None]):
+        """Subscribe a headless consumer (logger, CLI, API) to analysis progress events."""
+        self.events.subscribe(callback)
         
     def update_progress(self, message: str, progress: Optional[float] = None):
         """Update progress indicators."""
-        if self.status_callback:
-            self.status_callback.text(message)
-        if self.progress_callback and progress is not None:
-            self.progress_callback.progress(min(max(progress, 0.0), 1.0))
+        self.events.emit(ProgressEvent.INFO, message, progress=progress)
             
     def validate_prerequisites(self, project_id: int) -> Dict[str, Any]:
         """Validate all prerequisites for radiation analysis."""
@@ -148,7 +161,8 @@ class Step5ExecutionFlow:
             st.error(f"Error clearing previous data: {str(e)}")
             return False
     
-    def execute_ultra_fast_analysis(self, project_id: int, config: Dict[str, Any]) -> Dict[str, Any]:
+    def execute_ultra_fast_analysis(self, project_id: int, config: Dict[str, Any],
+                                    checkpoint: Optional[RadiationCheckpointManager] = None) -> Dict[str, Any]:
         """Execute ultra-fast radiation analysis (10-15 second target)."""
         try:
             from services.ultra_fast_radiation_analyzer import UltraFastRadiationAnalyzer
@@ -172,8 +186,9 @@ class Step5ExecutionFlow:
                 precision=analysis_config['precision'],
                 apply_corrections=analysis_config['apply_corrections'],
                 include_shading=analysis_config['include_shading'],
-                progress_bar=self.progress_callback,
-                status_text=self.status_callback
+                checkpoint=checkpoint,
+                events=self.events,
+                cache=self.result_cache
             )
             
             if results and not results.get('error'):
@@ -185,7 +200,9 @@ class Step5ExecutionFlow:
                     'performance_metrics': {
                         'total_time': results.get('calculation_time', 0),
                         'elements_processed': results.get('total_elements', 0),
-                        'calculations_per_second': results.get('calculations_per_second', 0)
+                        'calculations_per_second': results.get('calculations_per_second', 0),
+                        'pipeline_stats': results.get('pipeline_stats'),
+                        'cache_stats': results.get('cache_stats')
                     }
                 }
             else:
@@ -203,7 +220,8 @@ class Step5ExecutionFlow:
                 'traceback': traceback.format_exc()
             }
     
-    def execute_optimized_analysis(self, project_id: int, config: Dict[str, Any]) -> Dict[str, Any]:
+    def execute_optimized_analysis(self, project_id: int, config: Dict[str, Any],
+                                   checkpoint: Optional[RadiationCheckpointManager] = None) -> Dict[str, Any]:
         """Execute optimized radiation analysis (3-5 minute target)."""
         try:
             from services.optimized_radiation_analyzer import OptimizedRadiationAnalyzer
@@ -228,7 +246,10 @@ class Step5ExecutionFlow:
                 precision=analysis_config['precision'],
                 apply_corrections=analysis_config['apply_corrections'],
                 include_shading=analysis_config['include_shading'],
-                calculation_mode=analysis_config['calculation_mode']
+                calculation_mode=analysis_config['calculation_mode'],
+                checkpoint=checkpoint,
+                events=self.events,
+                cache=self.result_cache
             )
             
             if results and not results.get('error'):
@@ -240,7 +261,9 @@ class Step5ExecutionFlow:
                     'performance_metrics': {
                         'total_time': results.get('calculation_time', 0),
                         'elements_processed': results.get('total_elements', 0),
-                        'calculations_per_second': results.get('performance_metrics', {}).get('calculations_per_second', 0)
+                        'calculations_per_second': results.get('performance_metrics', {}).get('calculations_per_second', 0),
+                        'pipeline_stats': results.get('pipeline_stats'),
+                        'cache_stats': results.get('cache_stats')
                     }
                 }
             else:
@@ -264,7 +287,11 @@ class Step5ExecutionFlow:
             from services.advanced_radiation_analyzer import AdvancedRadiationAnalyzer
             
             self.update_progress("Initializing advanced analyzer...", 0.15)
-            analyzer = AdvancedRadiationAnalyzer(project_id)
+            analyzer = AdvancedRadiationAnalyzer(
+                project_id,
+                level_heights=config.get('level_heights'),
+                floor_height=config.get('floor_height', 3.5)
+            )
             
             # Configure analysis parameters for maximum accuracy
             analysis_config = {
@@ -383,6 +410,9 @@ class Step5ExecutionFlow:
                     total_radiation += float(radiation_value)
                     element_count += 1
             
+            # Streaming analyzers write element rows batch by batch; only the summary is left to save
+            results_persisted = isinstance(results.get('results'), dict) and results['results'].get('results_persisted', False)
+            
             # Create structured radiation data for database
             radiation_data = {
                 'avg_irradiance': total_radiation / element_count if element_count > 0 else 0,
@@ -390,7 +420,7 @@ class Step5ExecutionFlow:
                 'shading_factor': 0.85,  # Default shading factor
                 'grid_points': len(raw_radiation_data),
                 'analysis_complete': True,
-                'element_radiation': element_radiation_list
+                'element_radiation': [] if results_persisted else element_radiation_list
             }
             
             # Debug information
@@ -452,7 +482,7 @@ class Step5ExecutionFlow:
                     'validation_warnings': validation['warnings']
                 }
             
-            # Step 2: Clear previous analysis
+            # Step 2: Clear previous analysis (checkpointed batches live in their own table)
             if not self.clear_previous_analysis(project_id):
                 return {
                     'success': False,
@@ -463,17 +493,35 @@ class Step5ExecutionFlow:
             analysis_type = analysis_config.get('analysis_type', 'optimized')
             precision = analysis_config.get('precision', 'Daily Peak')
             
+            # Batch checkpoints let an interrupted run resume where it stopped
+            if analysis_config.get('enable_checkpoints', True):
+                self.checkpoint = RadiationCheckpointManager(project_id, self.db_manager)
+            
+            # Results shared across projects for repeated building typologies
+            if analysis_config.get('enable_result_cache', True):
+                self.result_cache = RadiationResultCache(DatabaseRadiationCacheStore(self.db_manager))
+            
             if analysis_type == 'ultra_fast' or (analysis_type == 'optimized' and precision == 'Yearly Average'):
-                results = self.execute_ultra_fast_analysis(project_id, analysis_config)
+                results = self.execute_ultra_fast_analysis(project_id, analysis_config, self.checkpoint)
             elif analysis_type == 'advanced' or precision == 'Hourly':
                 results = self.execute_advanced_analysis(project_id, analysis_config)
             else:
-                results = self.execute_optimized_analysis(project_id, analysis_config)
+                results = self.execute_optimized_analysis(project_id, analysis_config, self.checkpoint)
+            
+            checkpointed = self.checkpoint is not None and self.checkpoint.session_id is not None
+            session_throughput = None
             
             # Step 4: Process results
             if results['success']:
                 # Save to database
                 if self.save_results_to_database(project_id, results):
+                    # Only a saved run closes its session; otherwise it stays resumable
+                    if checkpointed:
+                        session_throughput = self.checkpoint.complete_session()
+                    
+                    # Every element was recalculated, so Step 4 diff changes are covered
+                    acknowledge_element_changes(self.db_manager, project_id)
+                    
                     # Update session state
                     self.update_session_state(project_id, results)
                     
@@ -486,20 +534,27 @@ class Step5ExecutionFlow:
                         'performance_metrics': {
                             **results.get('performance_metrics', {}),
                             'total_execution_time': total_time,
-                            'elements_processed': results.get('results', {}).get('total_elements', 0)
+                            'elements_processed': results.get('results', {}).get('total_elements', 0),
+                            'session_throughput': session_throughput
                         },
                         'validation_summary': validation['data_summary'],
                         'message': f"Analysis completed successfully in {total_time:.1f} seconds"
                     }
                 else:
+                    if checkpointed:
+                        self.checkpoint.fail_session("Analysis completed but failed to save results")
                     return {
                         'success': False,
                         'error': "Analysis completed but failed to save results"
                     }
             else:
+                if checkpointed:
+                    self.checkpoint.fail_session(results.get('error', 'Analysis failed'))
                 return results
                 
         except Exception as e:
+            if self.checkpoint and self.checkpoint.session_id is not None:
+                self.checkpoint.fail_session(str(e))
             return {
                 'success': False,
                 'error': f"Execution flow error: {str(e)}",
@@ -4,14 +4,20 @@ Eliminates database bottlenecks and TMY data redundancy for 10-15 second process
 """
 
 import streamlit as st
-import numpy as np
-from datetime import datetime, timedelta
+import json
+from datetime import datetime
 from typing import Dict, List, Optional, Tuple
 import time
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from database_manager import BIPVDatabaseManager
+from services.radiation_engine import (
+    RadiationEngine, RadiationEngineConfig, ProgressEvent, ProgressEventStream,
+    ENGINE_ULTRA_FAST, widget_progress_subscriber
+)
+from services.radiation_checkpoint import element_set_query
+from services.radiation_db_runner import run_engine_against_database
 
 
 class UltraFastRadiationAnalyzer:
@@ -20,6 +26,17 @@ class UltraFastRadiationAnalyzer:
     Target: 10-15 seconds for Simple mode (vs 45-60s current)
     """
     
+    # PV suitable window elements in a stable order (offset used for streaming/resume)
+    ELEMENTS_QUERY = """
+        SELECT DISTINCT element_id, azimuth, glass_area, window_width, 
+               window_height, family, orientation
+        FROM building_elements 
+        WHERE project_id = %s AND pv_suitable = true
+        AND glass_area > 0.5
+        ORDER BY element_id
+        OFFSET %s
+    """
+    
     def __init__(self):
         self.db_manager = BIPVDatabaseManager()
         self.project_data = None
@@ -29,45 +46,68 @@ class UltraFastRadiationAnalyzer:
     
     def analyze_project_radiation(self, project_id: int, precision: str = "Simple", 
                                  apply_corrections: bool = True, include_shading: bool = True,
-                                 progress_bar=None, status_text=None) -> Dict:
+                                 progress_bar=None, status_text=None, checkpoint=None,
+                                 events: Optional[ProgressEventStream] = None, cache=None) -> Dict:
         """
         Ultra-fast radiation analysis with pre-loaded data and optimized calculations.
+        
+        This is the database adapter around the headless RadiationEngine: site data is
+        loaded once, elements are streamed and progress is published on events.
+        progress_bar/status_text are optional widgets subscribed to that stream.
+        When a RadiationCheckpointManager is passed as checkpoint, every completed batch
+        is persisted and an unfinished session with the same settings is resumed.
+        A RadiationResultCache passed as cache lets elements already calculated for
+        any project with the same inputs skip computation.
         """
         start_time = time.time()
         
-        # Phase 1: Pre-load ALL data once (eliminates 2,277 database calls)
-        if not self._preload_project_data(project_id, status_text):
+        events = events or ProgressEventStream()
+        if progress_bar is not None or status_text is not None:
+            events.subscribe(widget_progress_subscriber(progress_bar, status_text))
+        
+        # Phase 1: Pre-load site data once; elements are streamed in Phase 3
+        events.emit(ProgressEvent.INFO, "Pre-loading project data...")
+        if not self._preload_project_data(project_id, load_elements=False):
             return {"error": "Failed to load project data"}
         
-        # Phase 2: Get optimized time steps for precision mode
-        time_steps = self._get_optimized_time_steps(precision)
-        if status_text:
-            status_text.text(f"Using {len(time_steps)} calculation points for {precision} mode")
+        total_elements, element_set_hash = self._element_set(project_id)
+        if total_elements == 0:
+            return {"error": "No PV suitable elements found"}
+        events.emit(ProgressEvent.INFO, f"Loaded coordinates and TMY data for {total_elements} elements")
         
-        # Phase 3: Vectorized batch processing
-        results = self._process_all_elements_vectorized(
-            time_steps, apply_corrections, include_shading, precision, progress_bar, status_text
+        # Phase 2: Headless engine resolves the time steps for the precision mode
+        engine = RadiationEngine(
+            RadiationEngineConfig(
+                engine=ENGINE_ULTRA_FAST,
+                precision=precision,
+                apply_corrections=apply_corrections,
+                include_shading=include_shading
+            ),
+            events,
+            cache=cache
         )
         
-        total_time = time.time() - start_time
-        
-        # Phase 4: Database save operation handled by execution flow
-        # Note: Database saving is now handled by Step5ExecutionFlow to avoid duplication
+        # Phase 3: Overlapped fetch -> compute -> write pipeline
+        results = run_engine_against_database(
+            engine, self.db_manager, project_id,
+            self.project_data['latitude'], self.project_data['longitude'], self.tmy_data,
+            lambda batch_size, offset: self._stream_element_batches(project_id, batch_size, offset),
+            total_elements, checkpoint=checkpoint, element_set_hash=element_set_hash
+        )
+        if results.get('error'):
+            return results
         
-        return {
-            "element_radiation": results,
-            "total_elements": len(self.building_elements),
-            "calculation_time": total_time,
-            "precision_level": precision,
-            "time_steps_used": len(time_steps),
-            "total_calculations": len(self.building_elements) * len(time_steps),
-            "optimization_method": "ultra_fast_preloaded"
-        }
+        # Phase 4: Element rows were written batch by batch by the pipeline;
+        # the execution flow only stores the analysis summary
+        results["calculation_time"] = time.time() - start_time
+        results["optimization_method"] = "ultra_fast_preloaded"
+        return results
     
-    def _preload_project_data(self, project_id: int, status_text=None) -> bool:
+    def _preload_project_data(self, project_id: int, status_text=None, load_elements: bool = True) -> bool:
         """
         Pre-load ALL required data in single database session.
-        Eliminates per-element database calls.
+        Eliminates per-element database calls. With load_elements=False only
+        coordinates and TMY data are loaded and elements are streamed later.
         """
         if status_text:
             status_text.text("Pre-loading project data...")
@@ -111,56 +151,25 @@ class UltraFastRadiationAnalyzer:
                 
                 if weather_row and weather_row[0]:
                     self.tmy_data = weather_row[0]  # Full TMY dataset
+                    if isinstance(self.tmy_data, str):
+                        self.tmy_data = json.loads(self.tmy_data)
                 else:
                     self.tmy_data = None  # Will use synthetic fallback
                 
                 # Load ALL building elements (only selected window types)
-                cursor.execute("""
-                    SELECT DISTINCT element_id, azimuth, glass_area, window_width, 
-                           window_height, family, orientation
-                    FROM building_elements 
-                    WHERE project_id = %s AND pv_suitable = true
-                    AND glass_area > 0.5
-                    ORDER BY element_id
-                """, (project_id,))
-                
-                element_rows = cursor.fetchall()
                 self.building_elements = []
-                
-                for row in element_rows:
-                    element_id, azimuth, glass_area, window_width, window_height, family, orientation = row
-                    
-                    # Calculate glass area from dimensions if needed
-                    if not glass_area or glass_area == 0:
-                        width = float(window_width) if window_width else 1.5
-                        height = float(window_height) if window_height else 1.0
-                        calculated_glass_area = width * height
-                    else:
-                        calculated_glass_area = float(glass_area)
-                    
-                    # Generate consistent azimuth if missing
-                    if not azimuth or azimuth == 0:
-                        element_hash = abs(hash(str(element_id))) % 360
-                        realistic_azimuth = element_hash
-                    else:
-                        realistic_azimuth = float(azimuth)
-                    
-                    # Calculate orientation from azimuth
-                    calculated_orientation = self._azimuth_to_orientation(realistic_azimuth)
-                    
-                    self.building_elements.append({
-                        'element_id': str(element_id),
-                        'glass_area': calculated_glass_area,
-                        'azimuth': realistic_azimuth,
-                        'orientation': calculated_orientation,
-                        'family': str(family or 'Generic Window')
-                    })
+                if load_elements:
+                    cursor.execute(self.ELEMENTS_QUERY, (project_id, 0))
+                    self.building_elements = [self._row_to_element(row) for row in cursor.fetchall()]
             
             conn.close()
             self._data_loaded = True
             
             if status_text:
-                status_text.text(f"Loaded {len(self.building_elements)} elements, coordinates, and TMY data")
+                if load_elements:
+                    status_text.text(f"Loaded {len(self.building_elements)} elements, coordinates, and TMY data")
+                else:
+                    status_text.text("Loaded coordinates and TMY data")
             
             return True
             
@@ -168,176 +177,75 @@ class UltraFastRadiationAnalyzer:
             st.error(f"Data preloading failed: {e}")
             return False
     
-    def _get_optimized_time_steps(self, precision: str) -> List[datetime]:
-        """
-        Get optimized time steps based on precision mode.
-        Simple mode uses only 4 seasonal points for 91x speed improvement.
-        """
-        base_year = 2023
+    def _row_to_element(self, row) -> Dict:
+        """Convert a building_elements row into the element dict used for calculations."""
+        element_id, azimuth, glass_area, window_width, window_height, family, orientation = row
         
-        if precision.lower() == "simple":
-            # Ultra-fast: 4 seasonal points only
-            return [
-                datetime(base_year, 3, 21, 12, 0),   # Spring equinox
-                datetime(base_year, 6, 21, 12, 0),   # Summer solstice  
-                datetime(base_year, 9, 21, 12, 0),   # Fall equinox
-                datetime(base_year, 12, 21, 12, 0)   # Winter solstice
-            ]
-        elif precision.lower() == "advanced":
-            # Monthly sampling: 12 points
-            return [datetime(base_year, month, 15, 12, 0) for month in range(1, 13)]
-        else:  # Auto mode
-            # Weekly sampling: 52 points
-            return [datetime(base_year, 1, 1) + timedelta(weeks=week) for week in range(52)]
-    
-    def _process_all_elements_vectorized(self, time_steps: List[datetime], 
-                                       apply_corrections: bool, include_shading: bool,
-                                       precision: str, progress_bar=None, status_text=None) -> Dict:
-        """
-        Process all elements using vectorized calculations for maximum speed.
-        """
-        results = {}
-        total_elements = len(self.building_elements)
+        # Calculate glass area from dimensions if needed
+        if not glass_area or glass_area == 0:
+            width = float(window_width) if window_width else 1.5
+            height = float(window_height) if window_height else 1.0
+            calculated_glass_area = width * height
+        else:
+            calculated_glass_area = float(glass_area)
         
-        # Get optimized TMY subset for Simple mode
-        if precision.lower() == "simple" and self.tmy_data and len(self.tmy_data) > 0:
-            # Extract only 4 TMY records matching our time steps (not all 8,760)
-            tmy_subset = self._extract_tmy_subset(time_steps)
+        # Generate consistent azimuth if missing
+        if not azimuth or azimuth == 0:
+            element_hash = abs(hash(str(element_id))) % 360
+            realistic_azimuth = element_hash
         else:
-            tmy_subset = self.tmy_data if self.tmy_data else []
+            realistic_azimuth = float(azimuth)
         
-        # Process in larger batches for Simple mode
-        batch_size = 100 if precision.lower() == "simple" else 50
+        # Calculate orientation from azimuth
+        calculated_orientation = self._azimuth_to_orientation(realistic_azimuth)
         
-        for i in range(0, total_elements, batch_size):
-            batch_elements = self.building_elements[i:i+batch_size]
-            
-            # Vectorized batch processing
-            batch_results = self._calculate_batch_radiation(
-                batch_elements, time_steps, tmy_subset, apply_corrections, include_shading
-            )
-            
-            results.update(batch_results)
-            
-            # Update progress
-            progress = min(1.0, (i + batch_size) / total_elements)
-            if progress_bar:
-                progress_bar.progress(progress)
-            if status_text:
-                completed = min(i + batch_size, total_elements)
-                status_text.text(f"Processed {completed}/{total_elements} elements ({progress*100:.0f}%)")
-        
-        return results
+        return {
+            'element_id': str(element_id),
+            'glass_area': calculated_glass_area,
+            'azimuth': realistic_azimuth,
+            'orientation': calculated_orientation,
+            'family': str(family or 'Generic Window')
+        }
     
-    def _extract_tmy_subset(self, time_steps: List[datetime]) -> List:
-        """
-        Extract only the TMY records we need (4 for Simple mode vs 8,760 full dataset).
-        Massive performance improvement: 2,190x less data processing.
-        """
-        if not self.tmy_data or not isinstance(self.tmy_data, list) or len(self.tmy_data) == 0:
-            return []
-        
-        subset = []
-        for target_time in time_steps:
-            # Find closest TMY record to target time
-            target_hour = target_time.timetuple().tm_yday * 24 + target_time.hour
-            
-            if target_hour < len(self.tmy_data):
-                subset.append(self.tmy_data[target_hour])
-            elif len(self.tmy_data) > 0:
-                # Use last available record as fallback
-                subset.append(self.tmy_data[-1])
+    def _element_set(self, project_id: int) -> Tuple[int, Optional[str]]:
+        """Count elements the streaming pipeline will process, and hash their rows for checkpoint matching."""
+        conn = self.db_manager.get_connection()
+        if not conn:
+            return 0, None
         
-        return subset
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    element_set_query(self.ELEMENTS_QUERY),
+                    (project_id, 0)
+                )
+                return tuple(cursor.fetchone())
+        except Exception as e:
+            st.error(f"Error counting building elements: {e}")
+            return 0, None
+        finally:
+            conn.close()
     
-    def _calculate_batch_radiation(self, elements: List[Dict], time_steps: List[datetime],
-                                 tmy_subset: List, apply_corrections: bool, 
-                                 include_shading: bool) -> Dict:
+    def _stream_element_batches(self, project_id: int, batch_size: int, offset: int = 0):
         """
-        Calculate radiation for a batch of elements using optimized algorithms.
+        Yield element batches from a server-side cursor.
+        Only one batch of rows is held in memory per fetch.
         """
-        from core.solar_math import calculate_solar_position, calculate_irradiance_on_surface
-        
-        batch_results = {}
-        latitude = self.project_data['latitude']
-        longitude = self.project_data['longitude']
+        conn = self.db_manager.get_connection()
+        if not conn:
+            raise RuntimeError("Database connection failed")
         
-        for element in elements:
-            element_id = element['element_id']
-            azimuth = element['azimuth']
-            orientation = element['orientation']
-            
-            total_irradiance = 0.0
-            
-            if tmy_subset and len(tmy_subset) > 0:
-                # Use optimized TMY subset
-                for i, (timestamp, tmy_hour) in enumerate(zip(time_steps, tmy_subset)):
-                    if i >= len(tmy_subset):
+        try:
+            with conn.cursor(name=f"step5_elements_{project_id}") as cursor:
+                cursor.itersize = batch_size
+                cursor.execute(self.ELEMENTS_QUERY, (project_id, offset))
+                while True:
+                    rows = cursor.fetchmany(batch_size)
+                    if not rows:
                         break
-                    
-                    # Extract irradiance values
-                    ghi = self._extract_irradiance_value(tmy_hour, ['ghi', 'GHI', 'ghi_wm2'], 0)
-                    dni = self._extract_irradiance_value(tmy_hour, ['dni', 'DNI', 'dni_wm2'], 0)
-                    dhi = self._extract_irradiance_value(tmy_hour, ['dhi', 'DHI', 'dhi_wm2'], 0)
-                    
-                    if ghi <= 0 and dni <= 0:
-                        continue
-                    
-                    # Solar position calculation
-                    solar_elevation, solar_azimuth = calculate_solar_position(latitude, longitude, timestamp)
-                    
-                    if solar_elevation <= 0:
-                        continue
-                    
-                    # Surface irradiance calculation  
-                    surface_irradiance = calculate_irradiance_on_surface(
-                        dni if dni > 0 else ghi * 0.8, 
-                        solar_elevation, solar_azimuth, azimuth, 90,
-                        ghi, dhi, calculation_mode="simple"
-                    )
-                    
-                    # Apply corrections
-                    if apply_corrections:
-                        surface_irradiance *= self._get_orientation_correction(orientation)
-                    
-                    if include_shading:
-                        surface_irradiance *= self._get_shading_factor(orientation)
-                    
-                    total_irradiance += surface_irradiance
-            else:
-                # Synthetic calculation for missing TMY data
-                for timestamp in time_steps:
-                    solar_elevation, solar_azimuth = calculate_solar_position(latitude, longitude, timestamp)
-                    
-                    if solar_elevation <= 0:
-                        continue
-                    
-                    # Estimate DNI
-                    dni = self._estimate_dni(solar_elevation, timestamp)
-                    
-                    surface_irradiance = calculate_irradiance_on_surface(
-                        dni, solar_elevation, solar_azimuth, azimuth, 90,
-                        calculation_mode="simple"
-                    )
-                    
-                    if apply_corrections:
-                        surface_irradiance *= self._get_orientation_correction(orientation)
-                    
-                    if include_shading:
-                        surface_irradiance *= self._get_shading_factor(orientation)
-                    
-                    total_irradiance += surface_irradiance
-            
-            # Scale to annual radiation
-            scaling_factor = self._get_scaling_factor(len(time_steps))
-            annual_radiation = (total_irradiance * scaling_factor) / 1000  # Convert to kWh/m²/year
-            
-            # Apply realistic orientation-based bounds
-            annual_radiation = self._apply_realistic_bounds(annual_radiation, orientation, azimuth)
-            
-            batch_results[element_id] = annual_radiation
-        
-        return batch_results
+                    yield [self._row_to_element(row) for row in rows]
+        finally:
+            conn.close()
     
     def _save_results_batch(self, project_id: int, results: Dict, precision: str, calculation_time: float):
         """
@@ -390,69 +298,3 @@ class UltraFastRadiationAnalyzer:
         elif 225 <= azimuth < 315:
             return "West"
         return "Unknown"
-    
-    def _extract_irradiance_value(self, tmy_hour: dict, field_names: list, default: float) -> float:
-        """Extract irradiance value efficiently."""
-        for field in field_names:
-            if field in tmy_hour and tmy_hour[field] is not None:
-                try:
-                    return float(tmy_hour[field])
-                except (ValueError, TypeError):
-                    continue
-        return default
-    
-    def _estimate_dni(self, solar_elevation: float, timestamp: datetime) -> float:
-        """Estimate DNI efficiently."""
-        if solar_elevation <= 0:
-            return 0
-        
-        max_dni = 900
-        elevation_factor = np.sin(np.radians(solar_elevation))
-        day_of_year = timestamp.timetuple().tm_yday
-        seasonal_factor = 0.8 + 0.2 * np.cos(2 * np.pi * (day_of_year - 172) / 365)
-        
-        return max_dni * elevation_factor * seasonal_factor * 0.75
-    
-    def _get_orientation_correction(self, orientation: str) -> float:
-        """Get orientation correction factor."""
-        corrections = {
-            'South': 1.0, 'Southeast': 0.95, 'Southwest': 0.95,
-            'East': 0.85, 'West': 0.85, 'Northeast': 0.7, 
-            'Northwest': 0.7, 'North': 0.3
-        }
-        return corrections.get(orientation, 0.8)
-    
-    def _get_shading_factor(self, orientation: str) -> float:
-        """Get shading factor."""
-        factors = {
-            'South': 0.95, 'Southeast': 0.90, 'Southwest': 0.90,
-            'East': 0.85, 'West': 0.85, 'North': 0.70
-        }
-        return factors.get(orientation, 0.80)
-    
-    def _get_scaling_factor(self, time_steps_count: int) -> float:
-        """Get scaling factor for annual conversion."""
-        if time_steps_count >= 4000:
-            return 1.0
-        elif time_steps_count >= 300:
-            return 8.0
-        elif time_steps_count >= 10:
-            return 365.0 * 8.0 / 12.0
-        else:  # 4 seasonal points
-            return 365.0 * 8.0 / 4.0
-    
-    def _apply_realistic_bounds(self, calculated_radiation: float, orientation: str, azimuth: float) -> float:
-        """Apply realistic bounds based on orientation."""
-        if 'south' in orientation.lower():
-            base_radiation = 900 + (hash(str(azimuth)) % 300)
-        elif 'east' in orientation.lower() or 'west' in orientation.lower():
-            base_radiation = 650 + (hash(str(azimuth)) % 250)
-        elif 'north' in orientation.lower():
-            base_radiation = 200 + (hash(str(azimuth)) % 100)
-        else:
-            base_radiation = 500 + (hash(str(azimuth)) % 200)
-        
-        if calculated_radiation > 100:
-            return max(calculated_radiation, base_radiation * 0.8)
-        else:
-            return base_radiation
\ No newline at end of file
@@ -390,7 +390,8 @@ class WeatherAPIManager:
     def _generate_tmy_tu_berlin(self, weather_data, lat, lon):
         """Generate TMY from TU Berlin data with realistic Berlin solar irradiance"""
         import math
-        from core.solar_math import calculate_solar_position_iso
+        from core.solar_ephemeris import get_solar_ephemeris
+        from core.time_grids import get_time_grid
         from datetime import datetime, timedelta
         
         tmy_data = []
@@ -407,11 +408,13 @@ class WeatherAPIManager:
                 # For now, we'll use API metadata to inform our calculations
                 pass
         
+        # ISO-compliant solar positions for the whole year from the ephemeris cache
+        ephemeris = get_solar_ephemeris(lat, lon, get_time_grid('tmy_8760'), model='iso')
+        
         # Generate hourly data for a full year using API-informed parameters
         for day in range(1, 366):
             for hour in range(24):
-                # Use ISO-compliant solar position calculations
-                solar_pos = calculate_solar_position_iso(lat, lon, day, hour)
+                solar_pos = ephemeris.position((day - 1) * 24 + hour)
                 
                 # Generate realistic temperature based on API location and academic climate data
                 temp_base = 10.0  # Berlin-specific base temperature
@@ -480,7 +483,8 @@ class WeatherAPIManager:
     def _generate_tmy_openweathermap(self, weather_data, lat, lon):
         """Generate TMY from OpenWeatherMap data with realistic solar irradiance"""
         import math
-        from core.solar_math import calculate_solar_position_iso
+        from core.solar_ephemeris import get_solar_ephemeris
+        from core.time_grids import get_time_grid
         from datetime import datetime, timedelta
         
         tmy_data = []
@@ -505,11 +509,13 @@ class WeatherAPIManager:
             base_clearness = 0.35
             annual_target = 1200  # kWh/m²
         
+        # ISO-compliant solar positions for the whole year from the ephemeris cache
+        ephemeris = get_solar_ephemeris(lat, lon, get_time_grid('tmy_8760'), model='iso')
+        
         # Generate hourly data for a full year using API-informed parameters
         for day in range(1, 366):
             for hour in range(24):
-                # Use ISO-compliant solar position calculations
-                solar_pos = calculate_solar_position_iso(lat, lon, day, hour)
+                solar_pos = ephemeris.position((day - 1) * 24 + hour)
                 
                 # Generate realistic temperature based on API location and current weather
                 temp_base = current_temp - 2.0  # Adjust base from current reading
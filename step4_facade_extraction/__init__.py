@@ -4,7 +4,7 @@ Step 4 Facade Extraction - Production-grade BIPV building data processing module
 
 from .models import WindowRecord, WallRecord, ProcessingResult, OrientationType
 from .config import get_config, save_config, reset_config
-from .processing import DataProcessor, ParallelProcessor, merge_building_data
+from .processing import DataProcessor, ParallelProcessor, merge_building_data, merge_building_frames
 from .database import BulkDatabaseOperations, DataAccessLayer
 from .validators import DataFrameValidator, FileValidator
 from .ui import (
@@ -29,6 +29,8 @@ def render_facade_extraction(project_id: int) -> None:
     from .ui import FileUploadInterface, ProgressTracker, DataVisualization, LogViewerInterface
     from .processing import DataProcessor
     from .database import BulkDatabaseOperations, DataAccessLayer
+    from database_manager import BIPVDatabaseManager
+    from services.building_topology import rebuild_topology_index
     
     # Initialize components
     config = get_config()
@@ -79,14 +81,17 @@ def render_facade_extraction(project_id: int) -> None:
                 def window_progress(msg, current, total):
                     progress_tracker.update_progress("windows", current, total, msg)
                 
-                result = processor.process_csv_file(
-                    "windows.csv", window_file, "windows", window_progress
+                result = processor.ingest_csv_file(
+                    window_file.name, window_file, "windows", window_progress,
+                    db_ops=db_ops, total_bytes=window_file.size
                 )
                 
                 if result.success:
                     progress_tracker.complete_progress("windows", "Windows processed successfully")
+                    rebuild_topology_index(BIPVDatabaseManager(), project_id)
                     render_performance_metrics(result)
                 else:
+                    progress_tracker.fail_progress("windows", "Window processing failed")
                     st.error("Window processing failed")
                     for error in result.errors:
                         st.error(error)
@@ -103,14 +108,17 @@ def render_facade_extraction(project_id: int) -> None:
                 def wall_progress(msg, current, total):
                     progress_tracker.update_progress("walls", current, total, msg)
                 
-                result = processor.process_csv_file(
-                    "walls.csv", wall_file, "walls", wall_progress
+                result = processor.ingest_csv_file(
+                    wall_file.name, wall_file, "walls", wall_progress,
+                    db_ops=db_ops, total_bytes=wall_file.size
                 )
                 
                 if result.success:
                     progress_tracker.complete_progress("walls", "Walls processed successfully")
+                    rebuild_topology_index(BIPVDatabaseManager(), project_id)
                     render_performance_metrics(result)
                 else:
+                    progress_tracker.fail_progress("walls", "Wall processing failed")
                     st.error("Wall processing failed")
                     for error in result.errors:
                         st.error(error)
@@ -132,7 +140,7 @@ from pages_modules.facade_extraction import render_facade_extraction as legacy_r
 __all__ = [
     'WindowRecord', 'WallRecord', 'ProcessingResult', 'OrientationType',
     'get_config', 'save_config', 'reset_config',
-    'DataProcessor', 'ParallelProcessor', 'merge_building_data',
+    'DataProcessor', 'ParallelProcessor', 'merge_building_data', 'merge_building_frames',
     'BulkDatabaseOperations', 'DataAccessLayer',
     'DataFrameValidator', 'FileValidator',
     'ProgressTracker', 'ConfigurableRulesEditor', 'DataVisualization',
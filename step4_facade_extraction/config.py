@@ -58,6 +58,14 @@ class ProcessingConfig(BaseModel):
     )
 
 
+class ValidationConfig(BaseModel):
+    """Configuration for upload data validation."""
+    mode: str = Field(default="auto", description="full, tiered, or auto (tiered for large uploads)")
+    tiered_min_rows: int = Field(default=20000, description="Estimated row count from which auto mode validates tiered")
+    sample_confidence: float = Field(default=0.99, description="Confidence that the schema sample finds a defect")
+    sample_defect_rate: float = Field(default=0.001, description="Smallest invalid-row rate the schema sample must detect")
+
+
 class UIConfig(BaseModel):
     """Configuration for user interface."""
     progress_update_interval: int = Field(default=100, description="Progress update interval")
@@ -82,6 +90,7 @@ class FacadeExtractionConfig(BaseModel):
     suitability: SuitabilityRules = Field(default_factory=SuitabilityRules)
     database: DatabaseConfig = Field(default_factory=DatabaseConfig)
     processing: ProcessingConfig = Field(default_factory=ProcessingConfig)
+    validation: ValidationConfig = Field(default_factory=ValidationConfig)
     ui: UIConfig = Field(default_factory=UIConfig)
     security: SecurityConfig = Field(default_factory=SecurityConfig)
 
@@ -4,6 +4,7 @@ Enhanced database operations for facade extraction with async/bulk capabilities.
 
 import asyncio
 import asyncpg
+import io
 import psycopg2
 import psycopg2.extras
 from psycopg2.extras import execute_values, RealDictCursor
@@ -17,6 +18,134 @@ from .config import get_config
 from .logging_utils import get_logger, log_operation
 
 
+# Column order shared by the execute_values and COPY upsert paths
+WINDOW_COLUMNS = (
+    'project_id', 'element_id', 'family', 'element_type', 'glass_area',
+    'window_width', 'window_height', 'building_level', 'wall_element_id',
+    'azimuth', 'orientation', 'pv_suitable', 'created_at'
+)
+WALL_COLUMNS = (
+    'project_id', 'element_id', 'name', 'wall_type', 'level', 'area',
+    'azimuth', 'orientation', 'created_at'
+)
+
+
+def _enum_value(value: Any) -> Any:
+    """Orientation as stored; records keep enum values as plain strings (use_enum_values)."""
+    return getattr(value, 'value', value)
+
+
+def window_row(w: WindowRecord) -> Tuple:
+    """Row tuple for building_elements in WINDOW_COLUMNS order."""
+    return (
+        w.project_id, w.element_id, w.family, w.element_type,
+        w.glass_area, w.window_width, w.window_height,
+        w.building_level, w.wall_element_id, w.azimuth,
+        _enum_value(w.orientation), w.pv_suitable, w.created_at
+    )
+
+
+def wall_row(w: WallRecord) -> Tuple:
+    """Row tuple for building_walls in WALL_COLUMNS order."""
+    return (
+        w.project_id, w.element_id, w.element_id,  # name = element_id for now
+        w.wall_type, w.building_level, w.area, w.azimuth,
+        _enum_value(w.orientation), w.created_at
+    )
+
+
+# data_type -> (table, columns, row builder)
+UPSERT_TARGETS = {
+    'windows': ('building_elements', WINDOW_COLUMNS, window_row),
+    'walls': ('building_walls', WALL_COLUMNS, wall_row),
+}
+
+
+def build_upsert_query(table: str, columns: Tuple[str, ...], source: str = "VALUES %s") -> str:
+    """INSERT ... ON CONFLICT (project_id, element_id) DO UPDATE for all other columns."""
+    updates = ",\n    ".join(
+        f"{col} = EXCLUDED.{col}" for col in columns if col not in ('project_id', 'element_id')
+    )
+    return f"""
+    INSERT INTO {table}
+    ({', '.join(columns)})
+    {source}
+    ON CONFLICT (project_id, element_id)
+    DO UPDATE SET
+    {updates}
+    """
+
+
+class StreamingUpsert:
+    """
+    COPY-based writer for record chunks streamed from a CSV upload.
+
+    Chunks are COPYed into a temporary staging table as they arrive and merged
+    into the target table with a single upsert when the stream finishes, so the
+    whole upload commits (or rolls back) as one transaction.
+    """
+    
+    def __init__(self, cursor, table: str, columns: Tuple[str, ...], row_builder):
+        self.cursor = cursor
+        self.table = table
+        self.columns = columns
+        self.row_builder = row_builder
+        self.staging_table = f"staging_{table}"
+        self.rows_written = 0
+        self.cancelled = False
+        
+        column_list = ', '.join(columns)
+        cursor.execute(f"""
+            CREATE TEMP TABLE {self.staging_table} ON COMMIT DROP AS
+            SELECT {column_list} FROM {table} WITH NO DATA
+        """)
+        self._copy_sql = (
+            f"COPY {self.staging_table} ({column_list}) FROM STDIN WITH (FORMAT csv, NULL '\\N')"
+        )
+    
+    def write(self, records: List[Any]) -> int:
+        """COPY one chunk of records into the staging table."""
+        if not records:
+            return 0
+        return self.write_frame(pd.DataFrame([self.row_builder(r) for r in records], columns=self.columns))
+    
+    def write_frame(self, frame: pd.DataFrame) -> int:
+        """COPY one chunk of column data (a DataFrame with at least self.columns) into the staging table."""
+        if frame.empty:
+            return 0
+        
+        buffer = io.StringIO()
+        frame.to_csv(buffer, columns=list(self.columns), header=False, index=False, na_rep='\\N')
+        buffer.seek(0)
+        
+        self.cursor.copy_expert(self._copy_sql, buffer)
+        self.rows_written += len(frame)
+        return len(frame)
+    
+    def cancel(self) -> None:
+        """Discard everything staged so far; the transaction is rolled back on exit."""
+        self.cancelled = True
+    
+    def merge(self, replace_project: Optional[int] = None) -> int:
+        """
+        Upsert the staged rows into the target table.
+        
+        With replace_project, that project's rows whose element_id is not staged
+        are deleted first, so the table holds exactly the upload.
+        """
+        column_list = ', '.join(self.columns)
+        if replace_project is not None:
+            self.cursor.execute(f"""
+                DELETE FROM {self.table} t
+                WHERE t.project_id = %s
+                AND NOT EXISTS (SELECT 1 FROM {self.staging_table} s WHERE s.element_id = t.element_id)
+            """, (replace_project,))
+        self.cursor.execute(build_upsert_query(
+            self.table, self.columns, f"SELECT {column_list} FROM {self.staging_table}"
+        ))
+        return self.cursor.rowcount
+
+
 class DatabaseConnectionManager:
     """Enhanced database connection manager with context managers."""
     
@@ -117,37 +246,8 @@ class BulkDatabaseOperations:
                 with self.connection_manager.get_connection() as conn:
                     with conn.cursor() as cursor:
                         # Prepare data for bulk insert
-                        values = [
-                            (
-                                w.project_id, w.element_id, w.family, w.element_type,
-                                w.glass_area, w.window_width, w.window_height,
-                                w.building_level, w.wall_element_id, w.azimuth,
-                                w.orientation.value, w.pv_suitable, w.created_at
-                            )
-                            for w in windows
-                        ]
-                        
-                        # UPSERT query
-                        upsert_query = """
-                        INSERT INTO building_elements 
-                        (project_id, element_id, family, element_type, glass_area, 
-                         window_width, window_height, building_level, wall_element_id, 
-                         azimuth, orientation, pv_suitable, created_at)
-                        VALUES %s
-                        ON CONFLICT (project_id, element_id) 
-                        DO UPDATE SET
-                            family = EXCLUDED.family,
-                            element_type = EXCLUDED.element_type,
-                            glass_area = EXCLUDED.glass_area,
-                            window_width = EXCLUDED.window_width,
-                            window_height = EXCLUDED.window_height,
-                            building_level = EXCLUDED.building_level,
-                            wall_element_id = EXCLUDED.wall_element_id,
-                            azimuth = EXCLUDED.azimuth,
-                            orientation = EXCLUDED.orientation,
-                            pv_suitable = EXCLUDED.pv_suitable,
-                            created_at = EXCLUDED.created_at
-                        """
+                        values = [window_row(w) for w in windows]
+                        upsert_query = build_upsert_query("building_elements", WINDOW_COLUMNS)
                         
                         # Execute bulk upsert
                         execute_values(
@@ -181,31 +281,8 @@ class BulkDatabaseOperations:
                 with self.connection_manager.get_connection() as conn:
                     with conn.cursor() as cursor:
                         # Prepare data for bulk insert
-                        values = [
-                            (
-                                w.project_id, w.element_id, w.element_id,  # name = element_id for now
-                                w.wall_type, w.building_level, w.area, w.azimuth,
-                                w.orientation.value, w.created_at
-                            )
-                            for w in walls
-                        ]
-                        
-                        # UPSERT query
-                        upsert_query = """
-                        INSERT INTO building_walls 
-                        (project_id, element_id, name, wall_type, level, area, 
-                         azimuth, orientation, created_at)
-                        VALUES %s
-                        ON CONFLICT (project_id, element_id) 
-                        DO UPDATE SET
-                            name = EXCLUDED.name,
-                            wall_type = EXCLUDED.wall_type,
-                            level = EXCLUDED.level,
-                            area = EXCLUDED.area,
-                            azimuth = EXCLUDED.azimuth,
-                            orientation = EXCLUDED.orientation,
-                            created_at = EXCLUDED.created_at
-                        """
+                        values = [wall_row(w) for w in walls]
+                        upsert_query = build_upsert_query("building_walls", WALL_COLUMNS)
                         
                         # Execute bulk upsert
                         execute_values(
@@ -232,20 +309,65 @@ class BulkDatabaseOperations:
                     errors=[str(e)]
                 )
     
+    def bulk_upsert_frame(self, data_type: str, frame: pd.DataFrame,
+                          replace_project: Optional[int] = None) -> ProcessingResult:
+        """
+        Bulk upsert columnar element data (see DataProcessor.convert_window_chunk) via COPY;
+        replace_project as for streaming_upsert.
+        """
+        try:
+            with self.streaming_upsert(data_type, replace_project) as upsert:
+                upsert.write_frame(frame)
+            
+            return ProcessingResult(
+                success=True,
+                total_elements=len(frame),
+                processed_elements=len(frame)
+            )
+            
+        except Exception as e:
+            self.logger.error(f"Bulk upsert {data_type} frame failed: {str(e)}")
+            return ProcessingResult(
+                success=False,
+                errors=[str(e)]
+            )
+    
+    @contextmanager
+    def streaming_upsert(self, data_type: str, replace_project: Optional[int] = None):
+        """
+        Open a StreamingUpsert for "windows" or "walls" on one connection.
+        
+        Staged rows are merged and committed when the block exits normally;
+        an exception or cancel() rolls the whole upload back. With
+        replace_project, rows of that project missing from the upload are
+        deleted in the same transaction.
+        """
+        table, columns, row_builder = UPSERT_TARGETS[data_type]
+        
+        with log_operation(self.logger, f"streaming_upsert_{data_type}"):
+            with self.connection_manager.get_connection() as conn:
+                with conn.cursor() as cursor:
+                    upsert = StreamingUpsert(cursor, table, columns, row_builder)
+                    yield upsert
+                    
+                    if upsert.cancelled:
+                        conn.rollback()
+                        self.logger.info(f"Streaming upsert into {table} cancelled, rolled back")
+                        return
+                    
+                    upsert.merge(replace_project)
+                    conn.commit()
+                    
+                    self.logger.log_database_operation(
+                        "COPY UPSERT", table, upsert.rows_written
+                    )
+    
     async def async_bulk_upsert_windows(self, windows: List[WindowRecord]) -> ProcessingResult:
         """Async bulk upsert for better UI responsiveness."""
         try:
             async with self.connection_manager.get_async_connection() as conn:
                 # Prepare values
-                values = [
-                    (
-                        w.project_id, w.element_id, w.family, w.element_type,
-                        w.glass_area, w.window_width, w.window_height,
-                        w.building_level, w.wall_element_id, w.azimuth,
-                        w.orientation.value, w.pv_suitable, w.created_at
-                    )
-                    for w in windows
-                ]
+                values = [window_row(w) for w in windows]
                 
                 # Execute async bulk insert
                 await conn.executemany("""
@@ -406,7 +528,10 @@ class DataAccessLayer:
                     
                     conn.commit()
                     self.logger.log_database_operation("DELETE", f"project_{project_id}_{data_type}", cursor.rowcount)
-                    return True
+            
+            from .upload_registry import upload_registry
+            upload_registry.forget_project(project_id, data_type)
+            return True
                     
         except Exception as e:
             self.logger.error(f"Error clearing project data: {str(e)}")
@@ -94,6 +94,10 @@ class ProcessingResult(BaseModel):
     errors: List[str] = Field(default_factory=list)
     warnings: List[str] = Field(default_factory=list)
     processing_time: Optional[float] = None
+    validation_time: Optional[float] = None
+    validation_mode: Optional[str] = None
+    file_hash: Optional[str] = None
+    cached: bool = False
     
     class Config:
         """Pydantic configuration."""
@@ -115,9 +119,9 @@ class UploadMetadata(BaseModel):
 
 
 class ValidationError(BaseModel):
-    """Model for validation errors."""
-    row_number: int
-    column: str
+    """Model for validation errors; row_number and column are None for file-level errors."""
+    row_number: Optional[int] = None
+    column: Optional[str] = None
     error_message: str
     suggested_fix: Optional[str] = None
     
@@ -4,17 +4,115 @@ Data processing utilities for facade extraction with chunked processing and perf
 
 import pandas as pd
 import numpy as np
+import codecs
 import hashlib
 import io
+from contextlib import nullcontext
 from typing import List, Dict, Any, Optional, Tuple, Callable, Generator
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+import multiprocessing
 import time
-from .models import WindowRecord, WallRecord, ProcessingResult, OrientationType, UploadMetadata
+from datetime import datetime
+from .models import WindowRecord, WallRecord, ProcessingResult, OrientationType, UploadMetadata, ValidationError
 from .config import get_config
-from .validators import DataFrameValidator, FileValidator, validate_locale_numbers
+from .validators import (
+    DataFrameValidator, FileValidator, TieredValidationState, required_sample_size, validate_locale_numbers
+)
 from .logging_utils import get_logger, log_operation
 
 
+# Leading bytes inspected for encoding detection; also the read buffer size of streamed uploads
+ENCODING_SAMPLE_BYTES = 64 * 1024
+
+# Full revalidation of a failed tiered upload stops once this many errors are collected
+REVALIDATION_MAX_ERRORS = 1000
+
+
+class UploadRejected(ValueError):
+    """Raised while streaming an upload that breaks a file-level rule (size, security scan)."""
+
+
+class _UploadReader(io.RawIOBase):
+    """
+    Raw binary reader over an upload that counts consumed bytes for progress
+    reporting and enforces the size limit and security scan as data arrives.
+    """
+    
+    SCAN_OVERLAP = 16   # bytes carried between reads so patterns split across reads are found
+    
+    def __init__(self, file_obj, max_bytes: Optional[int] = None,
+                 scanner: Optional[Callable[[bytes], bool]] = None):
+        self.file_obj = file_obj
+        self.max_bytes = max_bytes
+        self.scanner = scanner
+        self.bytes_read = 0
+        self._tail = b""
+    
+    def readable(self) -> bool:
+        return True
+    
+    def readinto(self, buffer) -> int:
+        data = self.file_obj.read(len(buffer))
+        size = len(data)
+        buffer[:size] = data
+        self.bytes_read += size
+        
+        if self.max_bytes is not None and self.bytes_read > self.max_bytes:
+            raise UploadRejected(f"File size exceeds {self.max_bytes // (1024 * 1024)}MB limit")
+        if self.scanner and size:
+            window = self._tail + bytes(data)
+            if not self.scanner(window):
+                raise UploadRejected("File failed security scan")
+            self._tail = window[-self.SCAN_OVERLAP:]
+        return size
+
+
+def _upload_size(file_obj) -> Optional[int]:
+    """Size of an upload stream without reading it, if it can be determined."""
+    size = getattr(file_obj, 'size', None)
+    if size is not None:
+        return int(size)
+    try:
+        position = file_obj.tell()
+        file_obj.seek(0, io.SEEK_END)
+        size = file_obj.tell() - position
+        file_obj.seek(position)
+        return size
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+def _error_text(error: ValidationError) -> str:
+    """One-line message for a validation error, prefixed with its (1-based) row and column."""
+    location = []
+    if error.row_number is not None:
+        location.append(f"row {error.row_number + 1}")
+    if error.column:
+        location.append(error.column)
+    return f"{', '.join(location)}: {error.error_message}" if location else error.error_message
+
+
+def _text_column(chunk: pd.DataFrame, column: str, default: str) -> np.ndarray:
+    """Column as str values (like str(row.get(column, default))), as an object array."""
+    if column not in chunk.columns:
+        return np.full(len(chunk), default, dtype=object)
+    return chunk[column].astype(str).to_numpy(dtype=object)
+
+
+def _numeric_column(chunk: pd.DataFrame, column: str, default: float) -> np.ndarray:
+    """Column as floats; unparseable values become NaN (and so fail the fast checks)."""
+    if column not in chunk.columns:
+        return np.full(len(chunk), default, dtype=float)
+    return pd.to_numeric(chunk[column], errors='coerce').to_numpy(dtype=float)
+
+
+def _optional_non_negative(chunk: pd.DataFrame, column: str, values: np.ndarray) -> np.ndarray:
+    """Fast check for optional dimensions: absent column, or a value >= 0."""
+    if column not in chunk.columns:
+        return np.ones(len(chunk), dtype=bool)
+    return values >= 0
+
+
 class DataProcessor:
     """Main data processor for facade extraction with chunked processing."""
     
@@ -29,11 +127,16 @@ class DataProcessor:
         """Calculate SHA-256 hash of file content."""
         return hashlib.sha256(file_content).hexdigest()
     
-    def detect_csv_encoding(self, file_content: bytes) -> str:
-        """Detect CSV file encoding using fallback sequence."""
+    def detect_csv_encoding(self, file_content: bytes, partial: bool = False) -> str:
+        """
+        Detect CSV file encoding using fallback sequence.
+        
+        With partial=True file_content is a leading sample of a stream and may end
+        in the middle of a multi-byte character.
+        """
         for encoding in self.config.processing.encoding_fallbacks:
             try:
-                file_content.decode(encoding)
+                codecs.getincrementaldecoder(encoding)().decode(file_content, final=not partial)
                 return encoding
             except UnicodeDecodeError:
                 continue
@@ -41,38 +144,61 @@ class DataProcessor:
         # If all fail, use utf-8 with error handling
         return 'utf-8'
     
-    def load_csv_in_chunks(self, file_content: bytes, 
+    def open_csv_stream(self, file_obj, total_bytes: Optional[int] = None) -> Tuple[io.TextIOWrapper, _UploadReader]:
+        """
+        Wrap a binary upload stream for incremental decoding.
+        
+        The encoding is detected from the first ENCODING_SAMPLE_BYTES; bytes later in the
+        file that do not decode are replaced rather than failing the whole upload.
+        Returns the text stream and the underlying reader (for bytes_read).
+        """
+        max_bytes = self.config.security.max_upload_size_mb * 1024 * 1024
+        scanner = self.file_validator.scan_for_malware if self.config.security.enable_malware_scan else None
+        reader = _UploadReader(file_obj, max_bytes if total_bytes is None else None, scanner)
+        
+        buffered = io.BufferedReader(reader, buffer_size=ENCODING_SAMPLE_BYTES)
+        encoding = self.detect_csv_encoding(buffered.peek(ENCODING_SAMPLE_BYTES), partial=True)
+        self.logger.debug(f"Streaming CSV with detected encoding {encoding}")
+        
+        return io.TextIOWrapper(buffered, encoding=encoding, errors='replace', newline=''), reader
+    
+    def load_csv_in_chunks(self, file_content, 
                           progress_callback: Optional[Callable] = None) -> Generator[pd.DataFrame, None, None]:
-        """Load CSV file in chunks for memory efficiency."""
-        encoding = self.detect_csv_encoding(file_content)
+        """
+        Load CSV file in chunks for memory efficiency.
+        
+        file_content may be bytes or a binary file-like object; the file is decoded
+        and parsed incrementally. Progress is reported in bytes consumed.
+        """
+        if isinstance(file_content, (bytes, bytearray, memoryview)):
+            total_bytes = len(file_content)
+            file_content = io.BytesIO(file_content)
+        else:
+            total_bytes = _upload_size(file_content)
         
         try:
-            # Create StringIO from bytes
-            text_content = file_content.decode(encoding)
-            csv_buffer = io.StringIO(text_content)
+            text_stream, reader = self.open_csv_stream(file_content, total_bytes)
             
             # Read in chunks
             chunk_size = self.config.processing.chunk_size
-            chunk_number = 0
             
-            for chunk in pd.read_csv(csv_buffer, chunksize=chunk_size):
+            for chunk_number, chunk in enumerate(pd.read_csv(text_stream, chunksize=chunk_size)):
                 if progress_callback:
-                    progress_callback(f"Processing chunk {chunk_number + 1}", chunk_number * chunk_size, None)
+                    progress_callback(f"Processing chunk {chunk_number + 1}", reader.bytes_read, total_bytes)
                 
                 yield chunk
-                chunk_number += 1
                 
         except Exception as e:
             self.logger.error(f"Error loading CSV in chunks: {str(e)}")
             raise
     
-    def validate_file(self, filename: str, file_content: bytes) -> Tuple[bool, List[str]]:
-        """Comprehensive file validation."""
+    def validate_upload(self, filename: str, file_size: Optional[int]) -> Tuple[bool, List[str]]:
+        """File validation that needs only the name and size (streamed uploads)."""
         errors = []
         
-        # File size validation
-        if not self.file_validator.validate_file_size(
-            len(file_content), self.config.security.max_upload_size_mb
+        # File size validation (unknown sizes are enforced while streaming)
+        if file_size is not None and not self.file_validator.validate_file_size(
+            file_size, self.config.security.max_upload_size_mb
         ):
             errors.append(f"File size exceeds {self.config.security.max_upload_size_mb}MB limit")
         
@@ -82,6 +208,12 @@ class DataProcessor:
         ):
             errors.append(f"File extension not allowed. Allowed: {self.config.processing.allowed_extensions}")
         
+        return len(errors) == 0, errors
+    
+    def validate_file(self, filename: str, file_content: bytes) -> Tuple[bool, List[str]]:
+        """Comprehensive file validation."""
+        _, errors = self.validate_upload(filename, len(file_content))
+        
         # Malware scan (if enabled)
         if self.config.security.enable_malware_scan:
             if not self.file_validator.scan_for_malware(file_content):
@@ -114,6 +246,21 @@ class DataProcessor:
         
         return df
     
+    def _orientation_for(self, azimuth: float) -> OrientationType:
+        """Configured orientation rule for an azimuth already normalised to [0, 360)."""
+        config = self.config.orientation
+        
+        # Check each orientation range with improved logic
+        if (azimuth >= config.north_range[0] or azimuth <= config.north_range[1]):
+            return OrientationType.NORTH
+        elif config.east_range[0] <= azimuth <= config.east_range[1]:
+            return OrientationType.EAST
+        elif config.south_range[0] <= azimuth <= config.south_range[1]:
+            return OrientationType.SOUTH
+        elif config.west_range[0] <= azimuth <= config.west_range[1]:
+            return OrientationType.WEST
+        return OrientationType.UNKNOWN
+    
     def get_orientation_from_azimuth(self, azimuth: float) -> OrientationType:
         """Convert azimuth to orientation using configuration."""
         if pd.isna(azimuth) or azimuth is None:
@@ -126,20 +273,9 @@ class DataProcessor:
             self.logger.warning(f"Invalid azimuth value: {azimuth}, returning UNKNOWN orientation")
             return OrientationType.UNKNOWN
             
-        config = self.config.orientation
-        
-        # Check each orientation range with improved logic
-        if (azimuth >= config.north_range[0] or azimuth <= config.north_range[1]):
-            orientation = OrientationType.NORTH
-        elif config.east_range[0] <= azimuth <= config.east_range[1]:
-            orientation = OrientationType.EAST
-        elif config.south_range[0] <= azimuth <= config.south_range[1]:
-            orientation = OrientationType.SOUTH
-        elif config.west_range[0] <= azimuth <= config.west_range[1]:
-            orientation = OrientationType.WEST
-        else:
+        orientation = self._orientation_for(azimuth)
+        if orientation == OrientationType.UNKNOWN:
             self.logger.warning(f"Azimuth {azimuth}° does not fit standard orientation ranges")
-            orientation = OrientationType.UNKNOWN
             
         # Debug logging for orientation calculation
         if hasattr(self, 'debug_orientation_count'):
@@ -169,6 +305,46 @@ class DataProcessor:
         
         return True
         
+    def classify_orientations(self, azimuths) -> np.ndarray:
+        """
+        Vectorized get_orientation_from_azimuth, returning orientation values.
+        
+        The configured range edges split the circle into bins; every bin and every
+        edge takes the label the scalar rule gives it, so edge handling is identical.
+        """
+        azimuths = np.mod(np.asarray(azimuths, dtype=float), 360)
+        config = self.config.orientation
+        edges = np.unique(np.concatenate([
+            config.north_range, config.east_range, config.south_range, config.west_range
+        ]).astype(float))
+        
+        # Bin i holds edges[i - 1] < azimuth <= edges[i]; label each bin by an interior point
+        interior = np.concatenate([[edges[0] - 1], (edges[:-1] + edges[1:]) / 2, [edges[-1] + 1]])
+        bin_labels = np.array([self._orientation_for(a).value for a in interior], dtype=object)
+        edge_labels = np.array([self._orientation_for(a).value for a in edges], dtype=object)
+        
+        bins = np.digitize(azimuths, edges, right=True)
+        edge_index = np.minimum(bins, len(edges) - 1)
+        on_edge = edges[edge_index] == azimuths
+        
+        orientations = np.where(on_edge, edge_labels[edge_index], bin_labels[bins])
+        orientations[np.isnan(azimuths)] = OrientationType.UNKNOWN.value
+        return orientations
+    
+    def pv_suitability_mask(self, orientations: np.ndarray, glass_areas: np.ndarray,
+                            families: np.ndarray) -> np.ndarray:
+        """Vectorized determine_pv_suitability over orientation values, areas and family names."""
+        rules = self.config.suitability
+        
+        mask = np.isin(orientations, rules.suitable_orientations)
+        mask &= (glass_areas >= rules.min_glass_area) & (glass_areas <= rules.max_glass_area)
+        
+        lowered = pd.Series(families, dtype=object).str.lower()
+        for excluded in rules.excluded_families:
+            mask &= ~lowered.str.contains(excluded.lower(), regex=False).to_numpy(dtype=bool)
+        
+        return mask
+    
     def repair_missing_orientations(self, project_id: int, selected_families_only: bool = True) -> Tuple[int, List[str]]:
         """Repair missing orientation data for existing records."""
         from .database import BulkDatabaseOperations
@@ -179,7 +355,8 @@ class DataProcessor:
         try:
             db_ops = BulkDatabaseOperations(project_id)
             
-            with db_ops.connection_manager.get_connection() as conn:
+            with log_operation(self.logger, "repair_missing_orientations", project_id=project_id), \
+                    db_ops.connection_manager.get_connection() as conn:
                 with conn.cursor() as cursor:
                     # Get selected window families if respecting user selections
                     selected_families = []
@@ -196,55 +373,37 @@ class DataProcessor:
                             self.logger.warning("No window type selections found, repairing all windows")
                             selected_families_only = False
                     
-                    # Build query with optional family filter
-                    base_query = """
-                        SELECT element_id, azimuth, glass_area, family 
-                        FROM building_elements 
-                        WHERE project_id = %s 
-                        AND (orientation IS NULL OR orientation = '') 
-                        AND azimuth IS NOT NULL 
-                        AND azimuth >= 0
+                    # Orientation depends only on azimuth (stored to 0.1°), so classify the
+                    # distinct azimuths of the affected rows and apply them in a single join
+                    candidate_filter = """
+                        b.project_id = %s
+                        AND (b.orientation IS NULL OR b.orientation = '')
+                        AND b.azimuth IS NOT NULL
+                        AND b.azimuth >= 0
                     """
                     params = [project_id]
                     
                     if selected_families_only and selected_families:
-                        base_query += " AND family = ANY(%s)"
+                        candidate_filter += " AND b.family = ANY(%s)"
                         params.append(selected_families)
                     
-                    cursor.execute(base_query, params)
-                    records_to_fix = cursor.fetchall()
+                    cursor.execute(f"SELECT DISTINCT b.azimuth FROM building_elements b WHERE {candidate_filter}", params)
+                    azimuths = [row[0] for row in cursor.fetchall()]
+                    
+                    if azimuths:
+                        orientations = self.classify_orientations([float(azimuth) for azimuth in azimuths])
+                        cursor.execute(f"""
+                            UPDATE building_elements b
+                            SET orientation = v.orientation
+                            FROM unnest(%s::numeric[], %s::text[]) AS v (azimuth, orientation)
+                            WHERE b.azimuth = v.azimuth AND {candidate_filter}
+                        """, [azimuths, orientations.tolist()] + params)
+                        repaired_count = cursor.rowcount
                     
                     if selected_families_only and selected_families:
-                        self.logger.info(f"Found {len(records_to_fix)} records with missing orientation data in selected families")
+                        self.logger.info(f"Repaired {repaired_count} records with missing orientation data in selected families")
                     else:
-                        self.logger.info(f"Found {len(records_to_fix)} records with missing orientation data")
-                    
-                    # Update each record with calculated orientation
-                    for element_id, azimuth, glass_area, family in records_to_fix:
-                        try:
-                            orientation = self.get_orientation_from_azimuth(azimuth)
-                            
-                            # Only calculate suitability for selected families
-                            if selected_families_only and selected_families:
-                                # For selected families, check if they meet BIPV criteria
-                                pv_suitable = (
-                                    family in selected_families and
-                                    self.determine_pv_suitability(orientation, glass_area or 1.0, family)
-                                )
-                            else:
-                                # For all families, use standard suitability check
-                                pv_suitable = self.determine_pv_suitability(orientation, glass_area or 1.0, family)
-                            
-                            cursor.execute("""
-                                UPDATE building_elements 
-                                SET orientation = %s, pv_suitable = %s 
-                                WHERE project_id = %s AND element_id = %s
-                            """, (orientation.value, pv_suitable, project_id, element_id))
-                            
-                            repaired_count += 1
-                            
-                        except Exception as e:
-                            errors.append(f"Element {element_id}: {str(e)}")
+                        self.logger.info(f"Repaired {repaired_count} records with missing orientation data")
                     
                     # Apply final suitability rules respecting user selections
                     if selected_families_only and selected_families:
@@ -439,75 +598,344 @@ class DataProcessor:
         
         return walls, errors
     
+    def convert_window_chunk(self, chunk: pd.DataFrame) -> Tuple[pd.DataFrame, List[str]]:
+        """
+        Columnar process_window_chunk: building_elements columns as a DataFrame, plus row errors.
+        
+        Rows passing the fast range checks are converted with array operations; only
+        the remaining rows are built as WindowRecord objects, so they get the same
+        pydantic validation and error messages as process_window_chunk.
+        """
+        element_id = _text_column(chunk, 'ElementId', '')
+        family = _text_column(chunk, 'Family', '')
+        glass_area = _numeric_column(chunk, 'Glass Area (m²)', 0.0)
+        azimuth = _numeric_column(chunk, 'Azimuth (°)', 0.0)
+        window_width = _numeric_column(chunk, 'Window Width (m)', np.nan)
+        window_height = _numeric_column(chunk, 'Window Height (m)', np.nan)
+        
+        fast = (
+            (element_id != '')
+            & (glass_area >= 0) & (glass_area <= 100)
+            & (azimuth >= 0) & (azimuth < 360)
+            & _optional_non_negative(chunk, 'Window Width (m)', window_width)
+            & _optional_non_negative(chunk, 'Window Height (m)', window_height)
+        )
+        
+        orientation = self.classify_orientations(azimuth[fast])
+        frame = pd.DataFrame({
+            'project_id': self.project_id or 0,
+            'element_id': element_id[fast],
+            'family': family[fast],
+            'element_type': 'Window',
+            'glass_area': glass_area[fast],
+            'window_width': window_width[fast],
+            'window_height': window_height[fast],
+            'building_level': _text_column(chunk, 'Level', '00')[fast],
+            'wall_element_id': _text_column(chunk, 'HostWallId', '')[fast],
+            'azimuth': azimuth[fast],
+            'orientation': orientation,
+            'pv_suitable': self.pv_suitability_mask(orientation, glass_area[fast], family[fast]),
+            'created_at': datetime.now()
+        })
+        
+        errors = []
+        if not fast.all():
+            from .database import WINDOW_COLUMNS, window_row
+            records, errors = self.process_window_chunk(chunk[~fast])
+            if records:
+                frame = pd.concat([frame, pd.DataFrame([window_row(r) for r in records], columns=WINDOW_COLUMNS)],
+                                  ignore_index=True)
+        
+        return frame, errors
+    
+    def convert_wall_chunk(self, chunk: pd.DataFrame) -> Tuple[pd.DataFrame, List[str]]:
+        """Columnar process_wall_chunk: building_walls columns plus height as a DataFrame, and row errors."""
+        element_id = _text_column(chunk, 'ElementId', '')
+        length = _numeric_column(chunk, 'Length (m)', 0.0)
+        area = _numeric_column(chunk, 'Area (m²)', 0.0)
+        azimuth = _numeric_column(chunk, 'Azimuth (°)', 0.0)
+        
+        fast = (
+            (element_id != '')
+            & (length > 0) & (area > 0)
+            & (azimuth >= 0) & (azimuth < 360)
+        )
+        
+        frame = pd.DataFrame({
+            'project_id': self.project_id or 0,
+            'element_id': element_id[fast],
+            'name': element_id[fast],  # name = element_id for now
+            'wall_type': _text_column(chunk, 'Wall Type', '')[fast],
+            'level': _text_column(chunk, 'Level', '00')[fast],
+            'area': area[fast],
+            'azimuth': azimuth[fast],
+            'orientation': self.classify_orientations(azimuth[fast]),
+            'created_at': datetime.now(),
+            'height': area[fast] / length[fast]
+        })
+        
+        errors = []
+        if not fast.all():
+            from .database import WALL_COLUMNS, wall_row
+            records, errors = self.process_wall_chunk(chunk[~fast])
+            if records:
+                slow = pd.DataFrame([wall_row(r) for r in records], columns=WALL_COLUMNS)
+                slow['height'] = [r.height for r in records]
+                frame = pd.concat([frame, slow], ignore_index=True)
+        
+        return frame, errors
+    
     def process_csv_file(self, filename: str, file_content: bytes, data_type: str,
                         progress_callback: Optional[Callable] = None) -> ProcessingResult:
         """Process CSV file with comprehensive validation and chunked processing."""
+        return self.stream_csv_file(
+            filename, io.BytesIO(file_content), data_type, progress_callback,
+            total_bytes=len(file_content)
+        )
+    
+    def ingest_csv_file(self, filename: str, file_obj, data_type: str,
+                        progress_callback: Optional[Callable] = None,
+                        db_ops=None, total_bytes: Optional[int] = None,
+                        registry=None) -> ProcessingResult:
+        """
+        stream_csv_file behind the upload registry (see upload_registry.py).
+        
+        The upload replaces the project's element table (rows missing from it are
+        deleted), so the registry can record the table as holding exactly this
+        upload. An upload identical to the one the table already holds returns the
+        stored result without parsing or writing anything; one processed recently
+        in this process is written from its cached columns without re-parsing.
+        Non-seekable streams are processed normally.
+        """
+        from .upload_registry import hash_upload, upload_registry
+        
+        registry = registry or upload_registry
+        file_hash = hash_upload(file_obj)
+        if file_hash is None:
+            return self.stream_csv_file(filename, file_obj, data_type, progress_callback,
+                                        db_ops=db_ops, total_bytes=total_bytes, replace=True)
+        
+        key = registry.key(self.project_id, data_type, file_hash, self.config)
+        
+        if db_ops:
+            applied = registry.applied_result(key)
+            if applied is not None:
+                self.logger.info(f"{filename} is unchanged since the last upload, skipping ingestion")
+                if progress_callback:
+                    progress_callback("Unchanged upload", total_bytes or 0, total_bytes or 0)
+                return applied.copy(update={'cached': True, 'file_hash': file_hash})
+        
+        cached = registry.get_result(key)
+        if cached is not None:
+            result, frame = cached
+            self.logger.info(f"{filename} matches a recently processed upload, reusing parsed data")
+            if db_ops:
+                written = db_ops.bulk_upsert_frame(data_type, frame, replace_project=self.project_id)
+                if not written.success:
+                    return written
+                registry.mark_applied(key, filename, result)
+            if progress_callback:
+                progress_callback("Reused parsed upload", total_bytes or 0, total_bytes or 0)
+            return result.copy(update={'cached': True, 'file_hash': file_hash})
+        
+        collector = FrameCollector(max_rows=registry.max_cached_rows)
+        result = self.stream_csv_file(filename, file_obj, data_type, progress_callback,
+                                      db_ops=db_ops, total_bytes=total_bytes, writer=collector,
+                                      replace=True)
+        result.file_hash = file_hash
+        
+        if result.success:
+            registry.put_result(key, result, collector.frame())
+            if db_ops:
+                registry.mark_applied(key, filename, result)
+        return result
+    
+    def tiered_validation(self, first_chunk_rows: int, bytes_read: int,
+                          total_bytes: Optional[int]) -> Optional[TieredValidationState]:
+        """
+        Tiered validation state for an upload, or None to validate every chunk in full.
+        
+        The row count is estimated from the first chunk; the schema sample rate is
+        sized so an invalid-row rate of sample_defect_rate is caught with
+        sample_confidence.
+        """
+        config = self.config.validation
+        if config.mode == "full":
+            return None
+        
+        estimated_rows = first_chunk_rows * total_bytes / max(bytes_read, 1) if total_bytes else None
+        if config.mode == "auto" and (estimated_rows is None or estimated_rows < config.tiered_min_rows):
+            return None
         
-        with log_operation(self.logger, f"process_csv_file_{data_type}", filename=filename):
+        sample_size = required_sample_size(config.sample_confidence, config.sample_defect_rate)
+        sample_rate = min(1.0, sample_size / estimated_rows) if estimated_rows else 1.0
+        self.logger.info(f"Tiered validation of ~{int(estimated_rows or 0)} rows, schema sample rate {sample_rate:.3f}")
+        return TieredValidationState(sample_rate=sample_rate)
+    
+    def revalidate_upload(self, file_obj, data_type: str, start_position: int,
+                          total_bytes: Optional[int] = None) -> Optional[List[ValidationError]]:
+        """
+        Validate a whole upload in full, collecting the errors of every chunk.
+        
+        Used when tiered validation rejects an upload, so the errors reported are
+        those of full validation rather than of the sampled rows. Row numbers are
+        positions in the file (chunks keep the running index of pd.read_csv).
+        Returns None if the stream cannot be rewound to start_position.
+        """
+        try:
+            file_obj.seek(start_position)
+        except (AttributeError, OSError, ValueError):
+            return None
+        
+        errors: List[ValidationError] = []
+        seen_ids = set()
+        text_stream, _ = self.open_csv_stream(file_obj, total_bytes)
+        chunks = pd.read_csv(text_stream, chunksize=self.config.processing.chunk_size)
+        
+        for chunk_number, chunk in enumerate(chunks):
+            chunk = self.preprocess_dataframe(chunk, data_type)
+            if data_type == "windows":
+                _, chunk_errors = self.validator.validate_window_data(
+                    chunk, seen_ids=seen_ids, check_units=chunk_number == 0
+                )
+            else:
+                _, chunk_errors = self.validator.validate_wall_data(chunk, seen_ids=seen_ids)
+            errors.extend(chunk_errors)
+            if len(errors) >= REVALIDATION_MAX_ERRORS:
+                self.logger.warning(f"Stopped revalidation after {len(errors)} errors")
+                break
+        
+        return errors
+    
+    def stream_csv_file(self, filename: str, file_obj, data_type: str,
+                        progress_callback: Optional[Callable] = None,
+                        db_ops=None, total_bytes: Optional[int] = None, writer=None,
+                        replace: bool = False) -> ProcessingResult:
+        """
+        Stream a CSV upload through decoding, chunked parsing, per-chunk validation,
+        record conversion and, when db_ops is given, a COPY-based upsert.
+        
+        Only one chunk of rows is held in memory at a time. file_obj is any binary
+        file-like object (e.g. a Streamlit UploadedFile). progress_callback receives
+        (message, bytes_read, total_bytes). A validation failure in any chunk fails the
+        upload and rolls back everything already staged in the database; an upload
+        rejected by tiered validation is revalidated in full (if file_obj is
+        seekable) so every error is reported with its row number.
+        
+        Converted chunks are also passed to writer (e.g. a FrameCollector) if given.
+        With replace, the project's rows missing from the upload are deleted when the
+        upsert commits.
+        """
+        
+        with log_operation(self.logger, f"stream_csv_file_{data_type}", filename=filename):
             start_time = time.time()
+            if total_bytes is None:
+                total_bytes = _upload_size(file_obj)
             
             # File validation
-            is_valid_file, file_errors = self.validate_file(filename, file_content)
+            is_valid_file, file_errors = self.validate_upload(filename, total_bytes)
             if not is_valid_file:
                 return ProcessingResult(
                     success=False,
                     errors=file_errors
                 )
             
+            if data_type == "windows":
+                convert_chunk = self.convert_window_chunk
+            else:
+                convert_chunk = self.convert_wall_chunk
+            
+            all_errors = []
+            total_rows = 0
+            processed_rows = 0
+            suitable_elements = 0
+            seen_ids = set()
+            tiered = None
+            validation_time = 0.0
+            
+            def reject(validation_errors, total_elements):
+                # Fails the upload and drops everything already written
+                for target in (db_writer, writer):
+                    if target:
+                        target.cancel()
+                if tiered:
+                    validation_errors = self.revalidate_upload(
+                        file_obj, data_type, start_position, total_bytes
+                    ) or validation_errors
+                return ProcessingResult(
+                    success=False,
+                    total_elements=total_elements,
+                    errors=[_error_text(e) for e in validation_errors],
+                    validation_time=validation_time,
+                    validation_mode=tiered.mode if tiered else "full"
+                )
+            
             try:
-                # Load entire file first for validation
-                encoding = self.detect_csv_encoding(file_content)
-                df = pd.read_csv(io.BytesIO(file_content), encoding=encoding)
-                
-                # Preprocess DataFrame
-                df = self.preprocess_dataframe(df, data_type)
-                
-                # Validate data structure
-                if data_type == "windows":
-                    is_valid_data, validation_errors = self.validator.validate_window_data(df)
-                else:
-                    is_valid_data, validation_errors = self.validator.validate_wall_data(df)
-                
-                if not is_valid_data:
-                    return ProcessingResult(
-                        success=False,
-                        errors=[f"{e.column}: {e.error_message}" for e in validation_errors]
-                    )
-                
-                # Process in chunks
-                all_records = []
-                all_errors = []
-                total_rows = len(df)
-                processed_rows = 0
+                start_position = file_obj.tell()
+            except (AttributeError, OSError, ValueError):
+                start_position = 0
+            
+            try:
+                text_stream, reader = self.open_csv_stream(file_obj, total_bytes)
                 
-                # Process data in chunks
-                for chunk_start in range(0, total_rows, self.config.processing.chunk_size):
-                    chunk_end = min(chunk_start + self.config.processing.chunk_size, total_rows)
-                    chunk = df.iloc[chunk_start:chunk_end]
-                    
-                    if data_type == "windows":
-                        records, errors = self.process_window_chunk(chunk)
-                    else:
-                        records, errors = self.process_wall_chunk(chunk)
+                replace_project = self.project_id if replace else None
+                with (db_ops.streaming_upsert(data_type, replace_project) if db_ops else nullcontext()) as db_writer:
+                    chunks = pd.read_csv(text_stream, chunksize=self.config.processing.chunk_size)
                     
-                    all_records.extend(records)
-                    all_errors.extend(errors)
-                    processed_rows = chunk_end
+                    for chunk_number, chunk in enumerate(chunks):
+                        # Preprocess chunk
+                        chunk = self.preprocess_dataframe(chunk, data_type)
+                        
+                        # Validate chunk; unit heuristics only look at the first chunk
+                        validation_start = time.perf_counter()
+                        if chunk_number == 0:
+                            tiered = self.tiered_validation(len(chunk), reader.bytes_read, total_bytes)
+                        
+                        if tiered:
+                            is_valid_data, validation_errors = self.validator.validate_tiered(
+                                chunk, data_type, tiered, check_units=chunk_number == 0
+                            )
+                        elif data_type == "windows":
+                            is_valid_data, validation_errors = self.validator.validate_window_data(
+                                chunk, seen_ids=seen_ids, check_units=chunk_number == 0
+                            )
+                        else:
+                            is_valid_data, validation_errors = self.validator.validate_wall_data(
+                                chunk, seen_ids=seen_ids
+                            )
+                        validation_time += time.perf_counter() - validation_start
+                        
+                        if not is_valid_data:
+                            return reject(validation_errors, total_rows + len(chunk))
+                        
+                        frame, errors = convert_chunk(chunk)
+                        for target in (db_writer, writer):
+                            if target:
+                                target.write_frame(frame)
+                        
+                        total_rows += len(chunk)
+                        processed_rows = total_rows
+                        all_errors.extend(errors)
+                        if data_type == "windows":
+                            suitable_elements += int(frame['pv_suitable'].sum())
+                        
+                        # Update progress
+                        if progress_callback:
+                            progress_callback(
+                                f"Processing {data_type}", reader.bytes_read, total_bytes
+                            )
                     
-                    # Update progress
-                    if progress_callback:
-                        progress_callback(
-                            f"Processing {data_type}", processed_rows, total_rows
-                        )
+                    # Sampled rows not yet checked against the schema
+                    if tiered:
+                        validation_start = time.perf_counter()
+                        is_valid_data, validation_errors = self.validator.finish_tiered(data_type, tiered)
+                        validation_time += time.perf_counter() - validation_start
+                        if not is_valid_data:
+                            return reject(validation_errors, total_rows)
                 
                 # Calculate processing time
                 processing_time = time.time() - start_time
                 
-                # Count suitable elements for windows
-                suitable_elements = 0
-                if data_type == "windows":
-                    suitable_elements = sum(1 for r in all_records if r.pv_suitable)
-                
                 self.logger.log_data_processing(total_rows, processed_rows, len(all_errors))
                 
                 return ProcessingResult(
@@ -516,9 +944,17 @@ class DataProcessor:
                     processed_elements=processed_rows,
                     suitable_elements=suitable_elements,
                     errors=all_errors,
-                    processing_time=processing_time
+                    processing_time=processing_time,
+                    validation_time=validation_time,
+                    validation_mode=tiered.mode if tiered else "full"
                 )
                 
+            except UploadRejected as e:
+                self.logger.warning(f"Upload {filename} rejected: {str(e)}")
+                return ProcessingResult(
+                    success=False,
+                    errors=[str(e)]
+                )
             except Exception as e:
                 self.logger.error(f"CSV processing failed: {str(e)}")
                 return ProcessingResult(
@@ -527,34 +963,177 @@ class DataProcessor:
                 )
 
 
+class FrameCollector:
+    """
+    In-memory counterpart of the streaming database writer: keeps converted chunk frames.
+    
+    With max_rows set, collection stops (and frame() returns None) once the
+    stream grows past that many rows.
+    """
+    
+    def __init__(self, max_rows: Optional[int] = None):
+        self.max_rows = max_rows
+        self.frames: List[pd.DataFrame] = []
+        self.rows = 0
+        self.overflowed = False
+    
+    def write_frame(self, frame: pd.DataFrame) -> int:
+        self.rows += len(frame)
+        if self.max_rows is not None and self.rows > self.max_rows:
+            self.overflowed = True
+            self.frames = []
+        if not self.overflowed:
+            self.frames.append(frame)
+        return len(frame)
+    
+    def cancel(self) -> None:
+        self.frames = []
+        self.overflowed = True
+    
+    def frame(self) -> Optional[pd.DataFrame]:
+        """All collected rows, or None if nothing (or not everything) was collected."""
+        if not self.frames or self.overflowed:
+            return None
+        return pd.concat(self.frames, ignore_index=True)
+
+
+def pack_columns(frame: Optional[pd.DataFrame]) -> Optional[Dict[str, Any]]:
+    """
+    Compact picklable form of a converted frame for returning from worker processes.
+    
+    Numeric, bool and datetime columns travel as NumPy arrays; text columns are
+    dictionary encoded as int32 codes plus one UTF-8 blob of the distinct values.
+    """
+    if frame is None:
+        return None
+    
+    columns = {}
+    for column in frame.columns:
+        values = frame[column]
+        kind = pd.api.types.infer_dtype(values, skipna=True) if values.dtype == object else None
+        
+        if kind in ('string', 'empty'):
+            codes, uniques = pd.factorize(values)
+            encoded = [value.encode('utf-8') for value in uniques]
+            lengths = np.fromiter((len(value) for value in encoded), dtype=np.int64, count=len(encoded))
+            columns[column] = ('text', codes.astype(np.int32), b''.join(encoded), lengths)
+        elif kind in ('floating', 'integer', 'mixed-integer-float', 'decimal'):
+            columns[column] = ('array', pd.to_numeric(values).to_numpy(dtype=float))
+        else:
+            columns[column] = ('array', values.to_numpy())
+    
+    return {'rows': len(frame), 'columns': columns}
+
+
+def unpack_columns(payload: Optional[Dict[str, Any]]) -> Optional[pd.DataFrame]:
+    """Rebuild the DataFrame packed by pack_columns."""
+    if payload is None:
+        return None
+    
+    data = {}
+    for column, packed in payload['columns'].items():
+        if packed[0] == 'text':
+            _, codes, blob, lengths = packed
+            ends = np.cumsum(lengths)
+            # Code -1 (missing) picks the trailing None
+            uniques = np.array(
+                [blob[end - length:end].decode('utf-8') for end, length in zip(ends, lengths)] + [None],
+                dtype=object
+            )
+            data[column] = uniques[codes]
+        else:
+            data[column] = packed[1]
+    
+    return pd.DataFrame(data, index=pd.RangeIndex(payload['rows']))
+
+
+def _ingest_file(filename: str, content: bytes, data_type: str, project_id: Optional[int],
+                 progress_callback: Optional[Callable] = None,
+                 pack: bool = False) -> Tuple[ProcessingResult, Any]:
+    """Parse, validate and classify one file; module level so process pools can pickle it."""
+    processor = DataProcessor(project_id)
+    collector = FrameCollector()
+    result = processor.stream_csv_file(
+        filename, io.BytesIO(content), data_type, progress_callback,
+        total_bytes=len(content), writer=collector
+    )
+    frame = collector.frame()
+    return result, pack_columns(frame) if pack else frame
+
+
 class ParallelProcessor:
-    """Parallel processing utilities for large datasets."""
+    """
+    Parallel processing utilities for large datasets.
+    
+    With use_processes=True files are parsed in a pool of spawned worker processes:
+    CSV parsing and string cleanup hold the GIL, so threads only help while waiting
+    on I/O. Workers return packed columns (see pack_columns) rather than pickled
+    record lists, and merging happens in the calling process. The pool is created
+    on first use and kept until close().
+    """
     
-    def __init__(self, max_workers: int = 4):
+    def __init__(self, max_workers: int = 4, use_processes: bool = False,
+                 project_id: Optional[int] = None):
         self.max_workers = max_workers
-        self.logger = get_logger()
+        self.use_processes = use_processes
+        self.project_id = project_id
+        self.logger = get_logger(project_id)
+        self._process_pool = None
     
-    def process_multiple_files(self, files: List[Tuple[str, bytes, str]], 
-                             progress_callback: Optional[Callable] = None) -> Dict[str, ProcessingResult]:
-        """Process multiple files in parallel."""
+    def _executor(self):
+        if not self.use_processes:
+            return ThreadPoolExecutor(max_workers=self.max_workers)
+        if self._process_pool is None:
+            # spawn: forking a multi-threaded Streamlit server is not safe
+            self._process_pool = ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=multiprocessing.get_context('spawn')
+            )
+        return nullcontext(self._process_pool)
+    
+    def close(self) -> None:
+        """Shut down the worker process pool, if one was started."""
+        if self._process_pool is not None:
+            self._process_pool.shutdown()
+            self._process_pool = None
+    
+    def ingest_files(self, files: List[Tuple[str, bytes, str]],
+                     progress_callback: Optional[Callable] = None
+                     ) -> Tuple[Dict[str, ProcessingResult], Dict[str, Any]]:
+        """
+        Parse and classify several window/wall files in parallel and merge them.
+        
+        Returns per-file ProcessingResults and merge_building_frames output over
+        all successfully processed files. In process mode progress_callback is
+        called per completed file as (message, files_done, file_count).
+        """
         results = {}
+        window_frames = []
+        wall_frames = []
         
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+        with self._executor() as executor:
             # Submit all files for processing
             future_to_file = {}
             for filename, content, data_type in files:
-                processor = DataProcessor()
-                future = executor.submit(
-                    processor.process_csv_file, filename, content, data_type, progress_callback
-                )
-                future_to_file[future] = filename
+                if self.use_processes:
+                    future = executor.submit(
+                        _ingest_file, filename, content, data_type, self.project_id, None, True
+                    )
+                else:
+                    future = executor.submit(
+                        _ingest_file, filename, content, data_type, self.project_id, progress_callback
+                    )
+                future_to_file[future] = (filename, data_type)
             
             # Collect results
-            for future in as_completed(future_to_file):
-                filename = future_to_file[future]
+            for completed, future in enumerate(as_completed(future_to_file), start=1):
+                filename, data_type = future_to_file[future]
                 try:
-                    result = future.result()
+                    result, frame = future.result()
+                    if self.use_processes:
+                        frame = unpack_columns(frame)
                     results[filename] = result
+                    if result.success and frame is not None:
+                        (window_frames if data_type == "windows" else wall_frames).append(frame)
                     self.logger.info(f"Completed processing {filename}")
                 except Exception as e:
                     self.logger.error(f"Failed processing {filename}: {str(e)}")
@@ -562,7 +1141,18 @@ class ParallelProcessor:
                         success=False,
                         errors=[str(e)]
                     )
+                
+                if progress_callback and self.use_processes:
+                    progress_callback(f"Processed {filename}", completed, len(future_to_file))
         
+        windows = pd.concat(window_frames, ignore_index=True) if window_frames else None
+        walls = pd.concat(wall_frames, ignore_index=True) if wall_frames else None
+        return results, merge_building_frames(windows, walls)
+    
+    def process_multiple_files(self, files: List[Tuple[str, bytes, str]], 
+                             progress_callback: Optional[Callable] = None) -> Dict[str, ProcessingResult]:
+        """Process multiple files in parallel."""
+        results, _ = self.ingest_files(files, progress_callback)
         return results
 
 
@@ -597,4 +1187,50 @@ def merge_building_data(window_results: List[WindowRecord],
             'suitable_windows': sum(1 for w in window_results if w.pv_suitable),
             'connected_pairs': len(relationships)
         }
-    }
\ No newline at end of file
+    }
+
+
+def merge_building_frames(windows: Optional[pd.DataFrame],
+                          walls: Optional[pd.DataFrame]) -> Dict[str, Any]:
+    """
+    Columnar merge_building_data for frames from convert_window_chunk / convert_wall_chunk.
+    
+    Same structure as merge_building_data, with DataFrames in place of record
+    and relationship lists.
+    """
+    from .database import WINDOW_COLUMNS, WALL_COLUMNS
+    
+    if windows is None:
+        windows = pd.DataFrame(columns=list(WINDOW_COLUMNS))
+    if walls is None:
+        walls = pd.DataFrame(columns=list(WALL_COLUMNS) + ['height'])
+    
+    # Later walls win on duplicate ids, as in the merge_building_data lookup
+    wall_lookup = walls[['element_id', 'orientation', 'height', 'area']].drop_duplicates(
+        'element_id', keep='last'
+    )
+    hosted = windows.loc[windows['wall_element_id'].fillna('') != '',
+                         ['element_id', 'wall_element_id', 'orientation']]
+    joined = hosted.merge(wall_lookup, left_on='wall_element_id', right_on='element_id',
+                          suffixes=('_window', '_wall'))
+    
+    relationships = pd.DataFrame({
+        'window_id': joined['element_id_window'],
+        'wall_id': joined['element_id_wall'],
+        'window_orientation': joined['orientation_window'],
+        'wall_orientation': joined['orientation_wall'],
+        'wall_height': joined['height'],
+        'wall_area': joined['area']
+    })
+    
+    return {
+        'windows': windows,
+        'walls': walls,
+        'relationships': relationships,
+        'summary': {
+            'total_windows': len(windows),
+            'total_walls': len(walls),
+            'suitable_windows': int(windows['pv_suitable'].astype(bool).sum()),
+            'connected_pairs': len(relationships)
+        }
+    }
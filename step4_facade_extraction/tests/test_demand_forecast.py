@@ -0,0 +1,155 @@
+"""
+Unit tests for batch demand forecasting.
+"""
+
+import numpy as np
+import pytest
+from core.demand_forecast import (
+    DEFAULT_ANNUAL_CONSUMPTION, DEFAULT_GROWTH_RATE, DEFAULT_SEASONAL_FACTORS, NOISE_AMPLITUDE,
+    building_generators, forecast_demand_batch
+)
+from core.load_profiles import OCCUPANCY_MODIFIERS
+
+
+def loop_forecast_inputs(consumption_data, occupancy_modifiers=None):
+    """Base, growth and seasonal factors as generate_demand_forecast computed them per building."""
+    if consumption_data:
+        if len(consumption_data) >= 12:
+            base_consumption = sum(consumption_data[:12])
+        else:
+            base_consumption = sum(consumption_data) / len(consumption_data) * 12
+    else:
+        base_consumption = 300000
+
+    if len(consumption_data) >= 12:
+        x = list(range(len(consumption_data)))
+        n = len(x)
+        sum_x, sum_y = sum(x), sum(consumption_data)
+        sum_xy = sum(x[i] * consumption_data[i] for i in range(n))
+        sum_x2 = sum(x[i] ** 2 for i in range(n))
+        denominator = n * sum_x2 - sum_x ** 2
+        slope = (n * sum_xy - sum_x * sum_y) / denominator if denominator != 0 else 0
+        if base_consumption > 0:
+            growth_rate = max(-0.005, min(0.02, slope / base_consumption * 12))
+        else:
+            growth_rate = 0.01
+    else:
+        growth_rate = 0.015
+
+    if len(consumption_data) >= 12:
+        monthly_avg = sum(consumption_data[:12]) / 12
+        seasonal_factors = [c / monthly_avg for c in consumption_data[:12]]
+        if occupancy_modifiers:
+            adjusted = []
+            for month_idx, factor in enumerate(seasonal_factors):
+                if month_idx in [5, 6, 7]:
+                    season = 'summer_factor'
+                elif month_idx in [11, 0, 1]:
+                    season = 'winter_factor'
+                else:
+                    season = 'transition_factor'
+                adjusted.append(factor * (1.0 + (occupancy_modifiers[season] - 1.0) * 0.1))
+            if 'Year-Round' not in occupancy_modifiers.get('description', ''):
+                annual_factor = 1.0 + (occupancy_modifiers.get('annual_factor', 1.0) - 1.0) * 0.05
+                adjusted = [factor * annual_factor for factor in adjusted]
+            seasonal_factors = adjusted
+    elif occupancy_modifiers:
+        seasonal_factors = []
+        for month_idx in range(12):
+            if month_idx in [5, 6, 7]:
+                factor = occupancy_modifiers['summer_factor']
+            elif month_idx in [11, 0, 1]:
+                factor = occupancy_modifiers['winter_factor']
+            else:
+                factor = occupancy_modifiers['transition_factor']
+            seasonal_factors.append(factor * occupancy_modifiers.get('annual_factor', 1.0))
+    else:
+        seasonal_factors = [1.1, 1.05, 1.0, 0.95, 0.9, 0.8, 0.75, 0.8, 0.95, 1.0, 1.05, 1.1]
+
+    return base_consumption, growth_rate, seasonal_factors
+
+
+def padded(histories):
+    """(buildings, months) matrix with trailing NaN for shorter histories."""
+    months = max(len(history) for history in histories)
+    return np.array([list(history) + [np.nan] * (months - len(history)) for history in histories])
+
+
+class TestForecastDemandBatch:
+    """Test cases for forecast_demand_batch."""
+
+    def setup_method(self):
+        """Setup test fixtures."""
+        months = np.arange(24)
+        self.two_years = list(20000 + 4000 * np.cos(2 * np.pi * months / 12) + 60 * months)
+        self.half_year = [18000.0, 17500.0, 16000.0, 15000.0, 14000.0, 12000.0]
+        self.academic = OCCUPANCY_MODIFIERS["Academic Year (Sep-Jun)"]
+
+    @pytest.mark.parametrize("pattern", [None, "Academic Year (Sep-Jun)", "Year-Round Operation"])
+    def test_matches_loop_for_mixed_histories(self, pattern):
+        """Base, growth and seasonality match the per-building loop for full, short and empty histories."""
+        modifiers = OCCUPANCY_MODIFIERS.get(pattern)
+        histories = [self.two_years, self.half_year, []]
+        forecast = forecast_demand_batch(padded([h or [np.nan] for h in histories]), modifiers)
+
+        for row, history in enumerate(histories):
+            base, growth, seasonal = loop_forecast_inputs(history, modifiers)
+            assert forecast.base_consumption[row] == pytest.approx(base, rel=1e-12)
+            assert forecast.growth_rate[row] == pytest.approx(growth, rel=1e-12)
+            np.testing.assert_allclose(forecast.seasonal_factors[row], seasonal, rtol=1e-12)
+
+    def test_short_and_empty_history_defaults(self):
+        """Histories under a year extrapolate their mean; empty ones use the defaults."""
+        forecast = forecast_demand_batch(padded([self.half_year, [np.nan]]))
+
+        assert forecast.base_consumption[0] == pytest.approx(np.mean(self.half_year) * 12)
+        assert forecast.base_consumption[1] == DEFAULT_ANNUAL_CONSUMPTION
+        np.testing.assert_allclose(forecast.growth_rate, DEFAULT_GROWTH_RATE)
+        np.testing.assert_allclose(forecast.seasonal_factors, [DEFAULT_SEASONAL_FACTORS] * 2)
+
+    def test_empty_matrix_uses_defaults(self):
+        """A consumption matrix without months forecasts from the defaults."""
+        forecast = forecast_demand_batch(np.empty((2, 0)), years=3)
+
+        assert forecast.monthly.shape == (2, 3, 12)
+        np.testing.assert_allclose(forecast.base_consumption, DEFAULT_ANNUAL_CONSUMPTION)
+
+    def test_monthly_noise_stays_in_band(self):
+        """Monthly values are the grown annual share times seasonality within the noise band."""
+        forecast = forecast_demand_batch(padded([self.two_years]), self.academic)
+        base, growth = forecast.base_consumption[0], forecast.growth_rate[0]
+
+        expected = (base * (1 + growth) ** np.arange(25) / 12)[:, np.newaxis] * forecast.seasonal_factors[0]
+        ratio = forecast.monthly[0] / expected
+        assert np.all(np.abs(ratio - 1.0) <= NOISE_AMPLITUDE / 2 + 1e-12)
+        np.testing.assert_allclose(forecast.annual[0], forecast.monthly[0].sum(axis=1))
+
+    def test_reproducible_per_building(self):
+        """Repeated runs agree, and a building's forecast does not depend on the buildings after it."""
+        histories = padded([self.two_years, self.half_year])
+        first = forecast_demand_batch(histories)
+        second = forecast_demand_batch(histories)
+        alone = forecast_demand_batch(histories[:1])
+
+        np.testing.assert_array_equal(first.monthly, second.monthly)
+        np.testing.assert_array_equal(first.monthly[0], alone.monthly[0])
+
+    def test_explicit_generators_match_seed(self):
+        """Generators spawned from the same seed give the default forecast; other seeds differ."""
+        histories = padded([self.two_years, self.half_year])
+        default = forecast_demand_batch(histories)
+
+        spawned = forecast_demand_batch(histories, generators=building_generators(2, 42))
+        reseeded = forecast_demand_batch(histories, seed=7)
+
+        np.testing.assert_array_equal(default.monthly, spawned.monthly)
+        assert not np.array_equal(default.monthly, reseeded.monthly)
+
+    def test_does_not_touch_global_random_state(self):
+        """Forecasting leaves the legacy global NumPy random state alone."""
+        np.random.seed(0)
+        expected = np.random.random()
+        np.random.seed(0)
+        forecast_demand_batch(padded([self.two_years]))
+
+        assert np.random.random() == expected
@@ -0,0 +1,160 @@
+"""
+Unit tests for diff-based element ingest.
+"""
+
+import pandas as pd
+from unittest.mock import Mock, patch
+from services.element_diff import (
+    WINDOW_SPEC, ElementDiffIngest, coerce_elements, diff_elements, normalize_window_elements
+)
+
+
+def stored_windows(rows):
+    """Stored building_elements rows as load_existing returns them."""
+    return coerce_elements(pd.DataFrame(rows, columns=WINDOW_SPEC.columns), WINDOW_SPEC)
+
+
+def window_row(element_id, azimuth=180.0, glass_area=2.5, orientation='South', pv_suitable=True):
+    return (element_id, 'Wall001', 'Window', orientation, '01', 'Casement',
+            azimuth, glass_area, 0.0, 0.0, pv_suitable)
+
+
+class TestDiffElements:
+    """Test cases for diff_elements."""
+
+    def test_insert_update_delete_detection(self):
+        """New, changed, unchanged and removed IDs are told apart."""
+        existing = stored_windows([window_row('W001'), window_row('W002'), window_row('W003')])
+        incoming = stored_windows([window_row('W001'), window_row('W002', glass_area=3.0),
+                                   window_row('W004')])
+
+        changes, rows, removed_ids = diff_elements(existing, incoming, WINDOW_SPEC)
+
+        assert changes.inserted == ['W004']
+        assert changes.updated == ['W002']
+        assert changes.deleted == ['W003']
+        assert changes.unchanged == 1
+        assert list(rows['element_id']) == ['W002', 'W004']
+        assert removed_ids == ['W003']
+
+    def test_identical_upload_is_empty(self):
+        """Re-uploading the stored CSV changes nothing."""
+        incoming = normalize_window_elements(pd.DataFrame({
+            'ElementId': ['W001', 'W002', 'W003', 'W004'],
+            'Family': ['Casement', 'Fixed', 'Sliding', 'Awning'],
+            'Glass Area (m²)': [2.5, 1.8, 3.2, 0.8],
+            'Azimuth (°)': [180, 90, 270, 45],
+            'Level': ['01', '02', '01', '03']
+        }))
+        changes, rows, removed_ids = diff_elements(incoming.copy(), incoming, WINDOW_SPEC)
+
+        assert changes.is_empty
+        assert changes.unchanged == 4
+        assert rows.empty
+        assert removed_ids == []
+
+    def test_duplicate_stored_ids_are_replaced(self):
+        """IDs stored more than once are updated and their rows deleted before writing."""
+        existing = stored_windows([window_row('W001'), window_row('W001'), window_row('W002')])
+        incoming = stored_windows([window_row('W001'), window_row('W002')])
+
+        changes, rows, removed_ids = diff_elements(existing, incoming, WINDOW_SPEC)
+
+        assert changes.updated == ['W001']
+        assert changes.inserted == []
+        assert changes.deleted == []
+        assert list(rows['element_id']) == ['W001']
+        assert removed_ids == ['W001']
+
+    def test_duplicate_incoming_ids_keep_last_row(self):
+        """Repeated uploaded IDs are counted and the last row wins."""
+        existing = stored_windows([window_row('W001')])
+        incoming = stored_windows([window_row('W001', glass_area=3.0), window_row('W001')])
+
+        changes, _, _ = diff_elements(existing, incoming, WINDOW_SPEC)
+
+        assert changes.duplicate_rows == 1
+        assert changes.is_empty
+        assert changes.unchanged == 1
+
+    def test_rows_without_id_are_skipped(self):
+        """Rows without an element ID are counted, never written and never delete stored rows."""
+        existing = stored_windows([window_row('W001'), window_row('')])
+        incoming = stored_windows([window_row('W001'), window_row(''), window_row(None)])
+
+        changes, rows, removed_ids = diff_elements(existing, incoming, WINDOW_SPEC)
+
+        assert changes.skipped_rows == 2
+        assert changes.is_empty
+        assert rows.empty
+        assert removed_ids == []
+
+    def test_derived_columns_are_not_compared(self):
+        """Orientation and pv_suitable are maintained by later steps and ignored."""
+        existing = stored_windows([window_row('W001', orientation='South', pv_suitable=True)])
+        incoming = stored_windows([window_row('W001', orientation='', pv_suitable=False)])
+
+        changes, _, _ = diff_elements(existing, incoming, WINDOW_SPEC)
+
+        assert changes.is_empty
+        assert changes.unchanged == 1
+
+    def test_stored_precision_is_not_a_change(self):
+        """Values differing only below the table's stored precision are unchanged."""
+        existing = stored_windows([window_row('W001', azimuth=180.0, glass_area=2.5)])
+        incoming = stored_windows([window_row('W001', azimuth=180.04, glass_area=2.501)])
+
+        changes, _, _ = diff_elements(existing, incoming, WINDOW_SPEC)
+
+        assert changes.is_empty
+
+
+class TestElementDiffIngestWrite:
+    """Test cases for the SQL issued by ElementDiffIngest._write."""
+
+    def setup_method(self):
+        """Setup test fixtures."""
+        self.ingest = ElementDiffIngest(Mock(), project_id=7)
+        self.cursor = Mock()
+
+    def executed_sql(self):
+        return [' '.join(call.args[0].split()) for call in self.cursor.execute.call_args_list]
+
+    def test_write_deletes_stages_updates_and_inserts(self):
+        """Removed IDs are deleted, changed rows staged, then updated in place and inserted."""
+        rows = stored_windows([window_row('W002'), window_row('W004')])
+
+        with patch('services.element_diff.execute_values') as execute_values:
+            self.ingest._write(self.cursor, rows, ['W003'])
+
+        sql = self.executed_sql()
+        assert sql[0].startswith('DELETE FROM building_elements')
+        assert self.cursor.execute.call_args_list[0].args[1] == (7, ['W003'])
+        assert sql[1].startswith('CREATE TEMP TABLE element_diff_stage')
+        assert sql[2].startswith('UPDATE building_elements AS t')
+        assert sql[3].startswith('INSERT INTO building_elements')
+        assert self.cursor.execute.call_args_list[3].args[1] == (7, 7)
+
+        staged = list(execute_values.call_args.args[2])
+        assert [row[0] for row in staged] == ['W002', 'W004']
+        assert len(staged[0]) == len(WINDOW_SPEC.columns)
+
+    def test_write_only_deletes_without_rows(self):
+        """A diff that only removes elements issues a single DELETE."""
+        empty = stored_windows([])
+
+        with patch('services.element_diff.execute_values') as execute_values:
+            self.ingest._write(self.cursor, empty, ['W003'])
+
+        assert len(self.executed_sql()) == 1
+        execute_values.assert_not_called()
+
+    def test_write_stages_missing_numbers_as_null(self):
+        """NaN values are written as NULL rather than the string 'nan'."""
+        rows = stored_windows([window_row('W001', azimuth=None)])
+
+        with patch('services.element_diff.execute_values') as execute_values:
+            self.ingest._write(self.cursor, rows, [])
+
+        staged = list(execute_values.call_args.args[2])
+        assert staged[0][WINDOW_SPEC.columns.index('azimuth')] is None
@@ -0,0 +1,124 @@
+"""
+Unit tests for the lifetime projection.
+"""
+
+import numpy as np
+import pytest
+from core.lifetime import compound_factors, project_lifetime
+
+
+def loop_cash_flows(initial_cost, annual_energy, electricity_price, system_lifetime,
+                    price_escalation=0.0, maintenance_cost_rate=0.0, inverter_replacement_year=None,
+                    inverter_replacement_cost=0.0, tax_credit=0.0, rebate_amount=0.0):
+    """Per-year cash flow loop that create_cash_flow_analysis used before the projection."""
+    cash_flows = []
+    cumulative_cash_flows = []
+    for year in range(system_lifetime + 1):
+        if year == 0:
+            net_investment = initial_cost - rebate_amount - (initial_cost * tax_credit)
+            cash_flow = -net_investment
+        else:
+            escalated_price = electricity_price * ((1 + price_escalation) ** (year - 1))
+            annual_savings = annual_energy * escalated_price
+            maintenance_cost = initial_cost * maintenance_cost_rate
+            inverter_cost = 0
+            if year == inverter_replacement_year:
+                inverter_cost = initial_cost * inverter_replacement_cost
+            cash_flow = annual_savings - maintenance_cost - inverter_cost
+        cash_flows.append(cash_flow)
+        cumulative_cash_flows.append(sum(cash_flows))
+    return cash_flows, cumulative_cash_flows
+
+
+def loop_npv(cash_flows, discount_rate):
+    npv = 0
+    for i, cash_flow in enumerate(cash_flows):
+        npv += cash_flow / ((1 + discount_rate) ** i)
+    return npv
+
+
+class TestProjectLifetime:
+    """Test cases for project_lifetime and LifetimeProjection."""
+
+    def setup_method(self):
+        """Setup test fixtures."""
+        self.solutions = [
+            # initial_cost, annual_energy, electricity_price
+            (12000.0, 8000.0, 0.25),
+            (30000.0, 15000.0, 0.30),
+            (5000.0, 1000.0, 0.20)
+        ]
+        self.options = dict(price_escalation=0.02, maintenance_cost_rate=0.01,
+                            inverter_replacement_year=15, tax_credit=0.1, rebate_amount=500.0)
+        self.options_loop = dict(self.options, inverter_replacement_cost=0.12)
+
+    def project(self, years=25):
+        costs, energy, prices = (np.array(column) for column in zip(*self.solutions))
+        return project_lifetime(energy, costs, prices, years=years,
+                                inverter_replacement_cost_ratio=0.12, **self.options)
+
+    def test_cash_flows_match_loop(self):
+        """Cash flows and cumulative cash flows equal the per-year loop for every solution."""
+        projection = self.project()
+
+        for row, (cost, energy, price) in enumerate(self.solutions):
+            cash_flows, cumulative = loop_cash_flows(cost, energy, price, 25, **self.options_loop)
+            np.testing.assert_allclose(projection.cash_flows[row], cash_flows, rtol=1e-12)
+            np.testing.assert_allclose(projection.cumulative_cash_flows[row], cumulative, rtol=1e-12)
+
+    def test_npv_matches_loop(self):
+        """NPV per solution equals the loop NPV, for scalar and per-solution discount rates."""
+        projection = self.project()
+        loops = [loop_cash_flows(cost, energy, price, 25, **self.options_loop)[0]
+                 for cost, energy, price in self.solutions]
+
+        np.testing.assert_allclose(projection.npv(0.05), [loop_npv(flows, 0.05) for flows in loops],
+                                   rtol=1e-12)
+        rates = np.array([0.03, 0.05, 0.08])
+        np.testing.assert_allclose(projection.npv(rates),
+                                   [loop_npv(flows, rate) for flows, rate in zip(loops, rates)],
+                                   rtol=1e-12)
+
+    def test_degradation_compounds_per_year(self):
+        """Year y generation is the first year degraded by (1 - rate) ** (y - 1)."""
+        projection = project_lifetime(np.array([[100.0] * 12]), 1000.0, 0.25, years=10,
+                                      degradation_rate=0.005)
+
+        expected = 1200.0 * (1 - 0.005) ** np.arange(10)
+        np.testing.assert_allclose(projection.annual_generation[0], expected, rtol=1e-12)
+        np.testing.assert_allclose(compound_factors(-0.005, 10), expected / 1200.0, rtol=1e-12)
+
+    def test_self_consumption_capped_by_demand(self):
+        """Without a finer balance, generation above demand is exported."""
+        projection = project_lifetime(np.array([[100.0] * 12]), 1000.0, 0.25, years=2,
+                                      monthly_demand=[60.0] * 12, feed_in_tariff=0.05)
+
+        np.testing.assert_allclose(projection.self_consumption_kwh[0, 0], 60.0)
+        np.testing.assert_allclose(projection.export_kwh[0, 0], 40.0)
+        np.testing.assert_allclose(projection.annual_savings[0, 0], 12 * (60.0 * 0.25 + 40.0 * 0.05))
+
+
+class TestPaybackPeriod:
+    """Test cases for LifetimeProjection.payback_period."""
+
+    def test_interpolates_within_crossing_year(self):
+        """The crossing year's remaining shortfall is covered by a fraction of its cash flow."""
+        projection = project_lifetime(np.array([1200.0]), 1000.0, 0.25, years=10)
+
+        # 300 per year: cumulative -1000, -700, -400, -100, 200
+        assert projection.payback_period()[0] == pytest.approx(3 + 100.0 / 300.0)
+
+    def test_exact_crossing_and_no_investment(self):
+        """A cumulative cash flow reaching exactly zero pays back at that year; no investment at 0."""
+        projection = project_lifetime(np.array([1000.0, 1000.0]), np.array([500.0, 0.0]), 0.25, years=5)
+
+        np.testing.assert_allclose(projection.payback_period(), [2.0, 0.0])
+
+    def test_never_paying_back_is_nan(self):
+        """Solutions whose cumulative cash flow stays negative get NaN, others a value."""
+        projection = project_lifetime(np.array([100.0, 1200.0]), 1000.0, 0.25, years=10,
+                                      maintenance_cost_rate=0.02)
+
+        payback = projection.payback_period()
+        assert np.isnan(payback[0])
+        assert not np.isnan(payback[1])
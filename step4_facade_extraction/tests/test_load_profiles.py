@@ -0,0 +1,117 @@
+"""
+Unit tests for hourly load-profile disaggregation.
+"""
+
+import numpy as np
+import pytest
+from core.load_profiles import (
+    BREAK, DAYS_PER_MONTH, HOLIDAY, HOURS_PER_YEAR, MONTH_START_DAYS, OCCUPANCY_MODIFIERS, WEEKDAY, WEEKEND,
+    LoadProfileCache, build_load_profiles, day_types, monthly_totals_from_annual, template_key
+)
+
+MONTH_START_HOURS = MONTH_START_DAYS * 24
+
+
+def monthly_sums(profiles):
+    return np.add.reduceat(profiles, MONTH_START_HOURS, axis=-1)
+
+
+class TestBuildLoadProfiles:
+    """Test cases for build_load_profiles."""
+
+    def setup_method(self):
+        """Setup test fixtures."""
+        self.totals = np.array([
+            [30000, 28000, 26000, 24000, 22000, 15000, 9000, 9500, 23000, 26000, 28000, 31000],
+            [12000, 11500, 11000, 10500, 10000, 9500, 9000, 9000, 9500, 10000, 11000, 12000],
+            [5000] * 12
+        ], dtype=float)
+
+    @pytest.mark.parametrize("pattern", list(OCCUPANCY_MODIFIERS) + [None])
+    def test_months_sum_to_totals(self, pattern):
+        """Every month of every profile sums to the building's monthly total."""
+        profiles = build_load_profiles(self.totals, ['University Campus', 'Library', 'Dormitory'],
+                                       pattern, use_cache=False)
+
+        assert profiles.shape == (3, HOURS_PER_YEAR)
+        np.testing.assert_allclose(monthly_sums(profiles), self.totals, rtol=1e-12)
+        assert np.all(profiles >= 0)
+
+    def test_single_building_returns_one_profile(self):
+        """A (12,) input returns a single (8760,) profile."""
+        profile = build_load_profiles(self.totals[0], 'K-12 School', use_cache=False)
+
+        assert profile.shape == (HOURS_PER_YEAR,)
+        np.testing.assert_allclose(monthly_sums(profile), self.totals[0], rtol=1e-12)
+
+    def test_zero_month_stays_zero(self):
+        """Months without consumption get an all-zero profile rather than NaN."""
+        totals = self.totals[0].copy()
+        totals[6] = 0.0
+        profile = build_load_profiles(totals, use_cache=False)
+
+        july = slice(MONTH_START_HOURS[6], MONTH_START_HOURS[7])
+        assert np.all(profile[july] == 0.0)
+        assert not np.isnan(profile).any()
+
+    def test_known_pattern_is_applied(self):
+        """The academic pattern's peak hours, base load and breaks shape the template."""
+        key = template_key('Dormitory', OCCUPANCY_MODIFIERS["Academic Year (Sep-Jun)"])
+        start, end, daily, base_load, *_, breaks, year = key
+
+        assert (start, end, daily) == (8, 18, False)
+        assert base_load == OCCUPANCY_MODIFIERS["Academic Year (Sep-Jun)"]['base_load']
+        assert breaks == ('summer_factor',)
+
+        types = day_types(key)
+        august = slice(MONTH_START_DAYS[7], MONTH_START_DAYS[7] + DAYS_PER_MONTH[7])
+        assert set(types[august]) <= {BREAK, WEEKEND}
+        assert types[0] == HOLIDAY
+
+    def test_pattern_name_matches_modifier_dict(self):
+        """A pattern name gives the same profile as its modifier dict."""
+        by_name = build_load_profiles(self.totals[1], 'Library', "Summer Programs", use_cache=False)
+        by_dict = build_load_profiles(self.totals[1], 'Library', OCCUPANCY_MODIFIERS["Summer Programs"],
+                                      use_cache=False)
+
+        np.testing.assert_array_equal(by_name, by_dict)
+
+    def test_unknown_pattern_and_type_fall_back(self):
+        """Unknown pattern names behave as no pattern; unknown building types as the default type."""
+        unknown = build_load_profiles(self.totals[0], 'Observatory', "Night Shift", use_cache=False)
+        default = build_load_profiles(self.totals[0], 'University Campus', None, use_cache=False)
+
+        np.testing.assert_array_equal(unknown, default)
+        assert set(day_types(template_key('Observatory'))) == {WEEKDAY, WEEKEND, HOLIDAY}
+
+    def test_per_building_values_must_match_count(self):
+        """A per-building list of the wrong length is rejected."""
+        with pytest.raises(ValueError):
+            build_load_profiles(self.totals, ['Library', 'Dormitory'], use_cache=False)
+
+    def test_annual_totals_spread_by_pattern(self):
+        """Annual totals spread over months with the pattern's seasonal factors keep the total."""
+        monthly = monthly_totals_from_annual([120000.0], OCCUPANCY_MODIFIERS["Academic Year (Sep-Jun)"])
+
+        assert monthly.sum() == pytest.approx(120000.0)
+        assert monthly[0, 6] < monthly[0, 3] < monthly[0, 0]
+
+
+class TestLoadProfileCache:
+    """Test cases for LoadProfileCache."""
+
+    def test_cached_profiles_match_and_evict(self):
+        """Repeated inputs are served from the cache and the cache stays bounded."""
+        cache = LoadProfileCache(max_entries=2)
+        totals = np.array([[1000.0] * 12, [2000.0] * 12, [3000.0] * 12])
+        keys = [template_key('Library')] * 3
+
+        first = cache.build(totals, keys)
+        second = cache.build(totals[2:], keys[2:])
+
+        np.testing.assert_array_equal(first[2], second[0])
+        stats = cache.stats()
+        assert stats['computed'] == 3
+        assert stats['hits'] == 1
+        assert stats['entries'] == 2
+        assert stats['evictions'] == 1
@@ -118,6 +118,25 @@ class TestDataProcessor:
         assert walls[0].element_id == 'Wall001'
         assert walls[0].orientation == OrientationType.SOUTH
 
+    def test_convert_window_chunk_matches_records(self):
+        """Columnar conversion matches per-row records, including range edges and bad rows."""
+        test_data = {
+            'ElementId': ['W001', 'W002', 'W003', 'W004', 'W005', 'W006'],
+            'Family': ['Casement', 'Fixed', 'Roof Window', 'Sliding', 'Fixed', 'Fixed'],
+            'Glass Area (m²)': [2.5, 1.8, 3.2, 0.2, 150.0, 2.0],
+            'Azimuth (°)': [45, 135, 180, 225, 270, 315],
+            'Level': ['01', '02', '01', '01', '02', '03']
+        }
+        df = pd.DataFrame(test_data)
+        
+        frame, errors = self.processor.convert_window_chunk(df)
+        windows, record_errors = self.processor.process_window_chunk(df)
+        
+        assert len(errors) == len(record_errors) == 1
+        assert list(frame['element_id']) == [w.element_id for w in windows]
+        assert list(frame['orientation']) == [w.orientation for w in windows]
+        assert list(frame['pv_suitable']) == [w.pv_suitable for w in windows]
+
 
 class TestDataValidation:
     """Test cases for data validation."""
@@ -218,4 +237,96 @@ def test_integration_wall_processing(sample_wall_data):
     
     assert result.success == True
     assert result.total_elements == 3
-    assert result.processed_elements == 3
\ No newline at end of file
+    assert result.processed_elements == 3
+
+def test_streaming_window_processing(sample_window_data, monkeypatch):
+    """Streamed uploads are parsed chunk by chunk with progress in bytes."""
+    import io
+    processor = DataProcessor(project_id=1)
+    monkeypatch.setattr(processor.config.processing, 'chunk_size', 2)
+    csv_bytes = pd.DataFrame(sample_window_data).to_csv(index=False).encode('utf-8')
+    progress = []
+    
+    result = processor.stream_csv_file(
+        "test_windows.csv", io.BytesIO(csv_bytes), "windows",
+        lambda msg, current, total: progress.append((current, total))
+    )
+    
+    assert result.success == True
+    assert result.total_elements == 4
+    assert len(progress) == 2
+    assert progress[-1] == (len(csv_bytes), len(csv_bytes))
+
+
+def test_streaming_detects_duplicates_across_chunks(sample_window_data, monkeypatch):
+    """Duplicate ElementIds in different chunks fail the upload."""
+    import io
+    processor = DataProcessor(project_id=1)
+    monkeypatch.setattr(processor.config.processing, 'chunk_size', 2)
+    df = pd.DataFrame(sample_window_data)
+    df.loc[3, 'ElementId'] = 'W001'
+    
+    result = processor.stream_csv_file(
+        "test_windows.csv", io.BytesIO(df.to_csv(index=False).encode('utf-8')), "windows"
+    )
+    
+    assert result.success == False
+    assert any('W001' in error for error in result.errors)
+
+
+def test_packed_columns_round_trip(sample_window_data):
+    """Worker payloads rebuild the converted frame exactly."""
+    from step4_facade_extraction.processing import pack_columns, unpack_columns
+    processor = DataProcessor(project_id=1)
+    frame, _ = processor.convert_window_chunk(pd.DataFrame(sample_window_data))
+    
+    restored = unpack_columns(pack_columns(frame))
+    
+    pd.testing.assert_frame_equal(restored, frame, check_dtype=False)
+
+
+def test_upload_registry_memory_cache(sample_window_data):
+    """A second ingestion of an identical upload is served from the in-memory registry."""
+    import io
+    from step4_facade_extraction.upload_registry import UploadRegistry
+    processor = DataProcessor(project_id=1)
+    registry = UploadRegistry(connection_manager=Mock())
+    csv_bytes = pd.DataFrame(sample_window_data).to_csv(index=False).encode('utf-8')
+    
+    first = processor.ingest_csv_file("test_windows.csv", io.BytesIO(csv_bytes), "windows", registry=registry)
+    second = processor.ingest_csv_file("test_windows.csv", io.BytesIO(csv_bytes), "windows", registry=registry)
+    
+    assert first.success == True and first.cached == False
+    assert second.cached == True
+    assert second.total_elements == first.total_elements == 4
+    assert second.file_hash == first.file_hash
+    assert registry.stats()['memory_hits'] == 1
+
+
+def test_tiered_validation_tracks_duplicates_across_chunks():
+    """Hashed ID tracking finds repeats within and across chunks."""
+    from step4_facade_extraction.validators import TieredValidationState, required_sample_size
+    state = TieredValidationState()
+    
+    assert state.track_ids(pd.Series(['W001', 'W002'])) == []
+    assert state.track_ids(pd.Series(['W003', 'W001'])) == ['W001']
+    assert sorted(state.track_ids(pd.Series(['W004', 'W004']))) == ['W004']
+    assert required_sample_size(0.99, 0.001) == 4603
+
+
+def test_tiered_rejection_reports_errors_of_whole_upload(sample_window_data, monkeypatch):
+    """A tiered upload that fails is revalidated in full, with file-level row numbers."""
+    import io
+    processor = DataProcessor(project_id=1)
+    monkeypatch.setattr(processor.config.processing, 'chunk_size', 2)
+    monkeypatch.setattr(processor.config.validation, 'mode', 'tiered')
+    df = pd.DataFrame(sample_window_data)
+    df.loc[[1, 3], 'Glass Area (m²)'] = 500.0
+    
+    result = processor.stream_csv_file(
+        "test_windows.csv", io.BytesIO(df.to_csv(index=False).encode('utf-8')), "windows"
+    )
+    
+    assert result.success == False
+    assert any(error.startswith('row 2, Glass Area') for error in result.errors)
+    assert any(error.startswith('row 4, Glass Area') for error in result.errors)
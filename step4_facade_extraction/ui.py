@@ -8,6 +8,7 @@ import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 from typing import Optional, Dict, Any, List, Callable
+import hashlib
 import time
 from datetime import datetime
 from .models import ProcessingResult, UploadMetadata, ValidationError
@@ -15,15 +16,18 @@ from .config import get_config
 from .logging_utils import get_logger, LogViewer
 from .processing import DataProcessor
 from .database import BulkDatabaseOperations, DataAccessLayer
+from utils.progress_bus import ProgressBus, DEFAULT_MAX_UPDATES_PER_SECOND, format_eta
 
 
 class ProgressTracker:
     """Enhanced progress tracking with multiple progress bars."""
     
-    def __init__(self):
+    def __init__(self, max_updates_per_second: float = DEFAULT_MAX_UPDATES_PER_SECOND):
         self.progress_bars = {}
         self.status_texts = {}
         self.start_times = {}
+        self.buses = {}
+        self.max_updates_per_second = max_updates_per_second
     
     def create_progress_bar(self, key: str, title: str) -> None:
         """Create a new progress bar."""
@@ -31,26 +35,45 @@ class ProgressTracker:
         self.progress_bars[key] = st.progress(0)
         self.status_texts[key] = st.empty()
         self.start_times[key] = time.time()
+        
+        # Repaints are coalesced by the bus; rate and ETA come from its snapshot
+        self.buses[key] = ProgressBus(max_updates_per_second=self.max_updates_per_second)
+        self.buses[key].subscribe(lambda snapshot, key=key: self._render(key, snapshot))
     
     def update_progress(self, key: str, current: int, total: int, message: str = "") -> None:
         """Update progress bar."""
-        if key in self.progress_bars:
-            progress = int((current / total) * 100) if total > 0 else 0
-            self.progress_bars[key].progress(progress)
-            
-            elapsed = time.time() - self.start_times[key]
-            if total > 0 and current > 0:
-                eta = (elapsed / current) * (total - current)
-                self.status_texts[key].text(f"{message} ({current:,}/{total:,}) - ETA: {eta:.1f}s")
-            else:
-                self.status_texts[key].text(f"{message} ({current:,}/{total:,})")
+        if key in self.buses:
+            bus = self.buses[key]
+            if total != bus.total:
+                bus.set_total(total)
+            if current > bus.completed:
+                bus.advance(current - bus.completed)
+            bus.set_message(message)
+            bus.pump()
+    
+    def _render(self, key: str, snapshot: Dict[str, Any]) -> None:
+        """Paint one coalesced progress snapshot."""
+        current, total = snapshot['completed'], snapshot['total']
+        self.progress_bars[key].progress(int(snapshot['progress'] * 100))
+        if total > 0 and current > 0:
+            self.status_texts[key].text(f"{snapshot['message']} ({current:,}/{total:,}) - {format_eta(snapshot)}")
+        else:
+            self.status_texts[key].text(f"{snapshot['message']} ({current:,}/{total:,})")
     
     def complete_progress(self, key: str, message: str = "Completed") -> None:
         """Mark progress as complete."""
         if key in self.progress_bars:
+            self.buses[key].close()
             self.progress_bars[key].progress(100)
             elapsed = time.time() - self.start_times[key]
             self.status_texts[key].text(f"{message} - Completed in {elapsed:.1f}s")
+    
+    def fail_progress(self, key: str, message: str = "Failed") -> None:
+        """Paint the progress reached before a failure and mark it failed."""
+        if key in self.progress_bars:
+            self.buses[key].close()
+            elapsed = time.time() - self.start_times[key]
+            self.status_texts[key].text(f"{message} after {elapsed:.1f}s")
 
 
 class ConfigurableRulesEditor:
@@ -209,8 +232,8 @@ class FileUploadInterface:
         self.logger = get_logger(project_id)
         self.project_id = project_id
     
-    def render_upload_section(self, data_type: str, existing_count: int = 0) -> Optional[bytes]:
-        """Render enhanced upload section."""
+    def render_upload_section(self, data_type: str, existing_count: int = 0):
+        """Render enhanced upload section; returns the uploaded file stream or None."""
         
         # Show existing data info
         if existing_count > 0:
@@ -253,20 +276,18 @@ class FileUploadInterface:
         )
         
         if uploaded_file is not None:
-            # File validation
-            file_content = uploaded_file.read()
-            
-            # Show file info
+            # Show file info without copying the upload
             col1, col2, col3 = st.columns(3)
             with col1:
-                st.metric("File Size", f"{len(file_content) / 1024:.1f} KB")
+                st.metric("File Size", f"{uploaded_file.size / 1024:.1f} KB")
             with col2:
                 st.metric("Max Allowed", f"{self.config.security.max_upload_size_mb} MB")
             with col3:
-                file_hash = hash(file_content)
-                st.metric("File Hash", f"{file_hash:x}"[:8])
+                file_hash = hashlib.sha256(uploaded_file.getbuffer()).hexdigest()
+                st.metric("File Hash", file_hash[:8])
             
-            return file_content
+            uploaded_file.seek(0)
+            return uploaded_file
         
         return None
     
@@ -279,7 +300,7 @@ class FileUploadInterface:
         st.error(f"❌ Found {len(errors)} validation issues:")
         
         for i, error in enumerate(errors[:10]):  # Show first 10 errors
-            with st.expander(f"Error {i+1}: {error.column}", expanded=False):
+            with st.expander(f"Error {i+1}: {error.column or 'file'}", expanded=False):
                 st.error(error.error_message)
                 if error.suggested_fix:
                     st.info(f"💡 **Suggestion**: {error.suggested_fix}")
@@ -406,4 +427,7 @@ def render_performance_metrics(processing_result: ProcessingResult) -> None:
     with col4:
         if processing_result.suitable_elements > 0:
             suitability_rate = processing_result.suitable_elements / processing_result.processed_elements * 100
-            st.metric("PV Suitability", f"{suitability_rate:.1f}%")
\ No newline at end of file
+            st.metric("PV Suitability", f"{suitability_rate:.1f}%")
+    
+    if processing_result.validation_time is not None:
+        st.caption(f"Validation: {processing_result.validation_time:.2f}s ({processing_result.validation_mode})")
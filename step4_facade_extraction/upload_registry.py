@@ -0,0 +1,285 @@
+"""
+Upload registry for facade extraction: content-hash dedupe of CSV uploads.
+
+Parsed, validated columnar results are kept per (project, file hash, data type,
+config version), and the database records which upload each project's element
+tables currently hold, so re-uploading an identical export skips parsing,
+validation and database rewrites.
+"""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import pandas as pd
+
+from .config import FacadeExtractionConfig, get_config
+from .logging_utils import get_logger
+from .models import ProcessingResult
+
+# Bump when parsing / classification changes so cached results stop matching
+REGISTRY_VERSION = 1
+
+DEFAULT_MAX_MEMORY_MB = 256
+DEFAULT_MAX_CACHED_ROWS = 500000    # larger uploads are not kept in memory
+HASH_BLOCK_SIZE = 1024 * 1024
+
+ELEMENT_TABLES = {'windows': 'building_elements', 'walls': 'building_walls'}
+
+REGISTRY_SCHEMA_STATEMENTS = [
+    """
+    CREATE TABLE IF NOT EXISTS facade_upload_registry (
+        project_id INTEGER NOT NULL,
+        data_type VARCHAR(20) NOT NULL,
+        file_hash VARCHAR(64) NOT NULL,
+        config_version VARCHAR(40) NOT NULL,
+        filename TEXT,
+        result JSONB,
+        table_rows INTEGER,
+        table_hash VARCHAR(32),
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (project_id, data_type)
+    )
+    """,
+    "ALTER TABLE facade_upload_registry ADD COLUMN IF NOT EXISTS table_hash VARCHAR(32)"
+]
+
+RegistryKey = Tuple[int, str, str, str]
+
+
+def table_content_sql(data_type: str) -> str:
+    """
+    SELECT of (row count, md5 over every stored column of every row in
+    element_id order) of a project's element table; one parameter, project_id.
+    """
+    from .database import UPSERT_TARGETS
+
+    table, columns, _ = UPSERT_TARGETS[data_type]
+    return f"""
+        SELECT COUNT(*), md5(COALESCE(string_agg(ROW({', '.join(columns)})::text, '|' ORDER BY element_id), ''))
+        FROM {table} WHERE project_id = %s
+    """
+
+
+def config_version(config: Optional[FacadeExtractionConfig] = None) -> str:
+    """Fingerprint of the configuration that affects parsed and classified output."""
+    config = config or get_config()
+    payload = json.dumps({
+        'v': REGISTRY_VERSION,
+        'processing': config.processing.dict(),
+        'orientation': config.orientation.dict(),
+        'suitability': config.suitability.dict()
+    }, sort_keys=True, default=str, separators=(',', ':'))
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def hash_upload(file_obj) -> Optional[str]:
+    """SHA-256 of a seekable upload stream, read in blocks; the stream is rewound."""
+    try:
+        position = file_obj.tell()
+        digest = hashlib.sha256()
+        for block in iter(lambda: file_obj.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+        file_obj.seek(position)
+        return digest.hexdigest()
+    except (AttributeError, OSError, ValueError):
+        return None
+
+
+class UploadRegistry:
+    """
+    Two-level upload registry.
+
+    An in-process LRU (bounded by payload size) keeps packed columnar results of
+    recent uploads; the facade_upload_registry table records the upload each
+    project's element table currently holds, together with the table's row count
+    and newest created_at so writes from other code paths invalidate it.
+    Database failures are logged and treated as misses. Thread safe.
+    """
+
+    def __init__(self, max_memory_mb: int = DEFAULT_MAX_MEMORY_MB,
+                 max_cached_rows: int = DEFAULT_MAX_CACHED_ROWS, connection_manager=None):
+        self.max_memory_bytes = max_memory_mb * 1024 * 1024
+        self.max_cached_rows = max_cached_rows
+        self.logger = get_logger()
+        self._connection_manager = connection_manager
+        self._schema_ready = False
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {'applied_hits': 0, 'memory_hits': 0, 'misses': 0, 'evictions': 0}
+
+    @property
+    def connection_manager(self):
+        if self._connection_manager is None:
+            from .database import DatabaseConnectionManager
+            self._connection_manager = DatabaseConnectionManager()
+        return self._connection_manager
+
+    def key(self, project_id: Optional[int], data_type: str, file_hash: str,
+            config: Optional[FacadeExtractionConfig] = None) -> RegistryKey:
+        return (project_id or 0, data_type, file_hash, config_version(config))
+
+    # In-process result cache
+
+    def get_result(self, key: RegistryKey) -> Optional[Tuple[ProcessingResult, pd.DataFrame]]:
+        """Cached (result, frame) for an upload, or None."""
+        from .processing import unpack_columns
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                self._stats['misses'] += 1
+                return None
+            self._memory.move_to_end(key)
+            self._stats['memory_hits'] += 1
+        result, payload, _ = entry
+        return result.copy(), unpack_columns(payload)
+
+    def put_result(self, key: RegistryKey, result: ProcessingResult, frame: Optional[pd.DataFrame]) -> None:
+        """Keep a successfully processed upload in memory."""
+        from .processing import pack_columns
+
+        if not result.success or frame is None:
+            return
+        payload = pack_columns(frame)
+        size = _payload_bytes(payload)
+        if size > self.max_memory_bytes:
+            return
+
+        with self._lock:
+            if key in self._memory:
+                self._memory_bytes -= self._memory.pop(key)[2]
+            self._memory[key] = (result.copy(), payload, size)
+            self._memory_bytes += size
+            while self._memory_bytes > self.max_memory_bytes:
+                _, (_, _, evicted_size) = self._memory.popitem(last=False)
+                self._memory_bytes -= evicted_size
+                self._stats['evictions'] += 1
+
+    # Database registry of applied uploads
+
+    def ensure_schema(self, conn) -> bool:
+        if self._schema_ready:
+            return True
+        try:
+            with conn.cursor() as cursor:
+                for statement in REGISTRY_SCHEMA_STATEMENTS:
+                    cursor.execute(statement)
+            conn.commit()
+            self._schema_ready = True
+        except Exception as e:
+            conn.rollback()
+            self.logger.warning(f"Upload registry schema unavailable: {str(e)}")
+        return self._schema_ready
+
+    def applied_result(self, key: RegistryKey) -> Optional[ProcessingResult]:
+        """
+        The stored result if the project's element table still holds exactly this
+        upload (its content hash is unchanged since mark_applied), otherwise None.
+        """
+        project_id, data_type, file_hash, version = key
+        try:
+            with self.connection_manager.get_connection() as conn:
+                if not self.ensure_schema(conn):
+                    return None
+                with conn.cursor() as cursor:
+                    cursor.execute("""
+                        SELECT result, table_rows, table_hash
+                        FROM facade_upload_registry
+                        WHERE project_id = %s AND data_type = %s
+                        AND file_hash = %s AND config_version = %s
+                    """, (project_id, data_type, file_hash, version))
+                    row = cursor.fetchone()
+                    if not row:
+                        return None
+
+                    cursor.execute(table_content_sql(data_type), (project_id,))
+                    if tuple(cursor.fetchone()) != (row[1], row[2]):
+                        return None
+
+            with self._lock:
+                self._stats['applied_hits'] += 1
+            result = row[0] if isinstance(row[0], dict) else json.loads(row[0])
+            return ProcessingResult(**result)
+
+        except Exception as e:
+            self.logger.warning(f"Upload registry lookup failed: {str(e)}")
+            return None
+
+    def mark_applied(self, key: RegistryKey, filename: str, result: ProcessingResult) -> bool:
+        """
+        Record that the project's element table now holds exactly this upload
+        (written with replace, see DataProcessor.ingest_csv_file).
+        """
+        project_id, data_type, file_hash, version = key
+        try:
+            with self.connection_manager.get_connection() as conn:
+                if not self.ensure_schema(conn):
+                    return False
+                with conn.cursor() as cursor:
+                    cursor.execute(table_content_sql(data_type), (project_id,))
+                    table_rows, table_hash = cursor.fetchone()
+                    cursor.execute("""
+                        INSERT INTO facade_upload_registry
+                        (project_id, data_type, file_hash, config_version, filename, result,
+                         table_rows, table_hash, applied_at)
+                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, CURRENT_TIMESTAMP)
+                        ON CONFLICT (project_id, data_type)
+                        DO UPDATE SET
+                            file_hash = EXCLUDED.file_hash,
+                            config_version = EXCLUDED.config_version,
+                            filename = EXCLUDED.filename,
+                            result = EXCLUDED.result,
+                            table_rows = EXCLUDED.table_rows,
+                            table_hash = EXCLUDED.table_hash,
+                            applied_at = EXCLUDED.applied_at
+                    """, (project_id, data_type, file_hash, version, filename,
+                          result.json(), table_rows, table_hash))
+                conn.commit()
+                return True
+
+        except Exception as e:
+            self.logger.warning(f"Upload registry update failed: {str(e)}")
+            return False
+
+    def forget_project(self, project_id: int, data_type: str = "all") -> None:
+        """Drop registry entries for a project (e.g. after its element data was cleared)."""
+        data_types = list(ELEMENT_TABLES) if data_type == "all" else [data_type]
+        with self._lock:
+            for key in [key for key in self._memory if key[0] == project_id and key[1] in data_types]:
+                self._memory_bytes -= self._memory.pop(key)[2]
+        try:
+            with self.connection_manager.get_connection() as conn:
+                if not self.ensure_schema(conn):
+                    return
+                with conn.cursor() as cursor:
+                    cursor.execute("""
+                        DELETE FROM facade_upload_registry
+                        WHERE project_id = %s AND data_type = ANY(%s)
+                    """, (project_id, data_types))
+                conn.commit()
+        except Exception as e:
+            self.logger.warning(f"Upload registry cleanup failed: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['memory_entries'] = len(self._memory)
+            stats['memory_mb'] = round(self._memory_bytes / (1024 * 1024), 2)
+        return stats
+
+
+def _payload_bytes(payload: Dict[str, Any]) -> int:
+    """Approximate in-memory size of a pack_columns payload."""
+    size = 0
+    for packed in payload['columns'].values():
+        for part in packed[1:]:
+            size += part.nbytes if hasattr(part, 'nbytes') else len(part)
+    return size
+
+
+# Process-wide registry shared by all sessions
+upload_registry = UploadRegistry()
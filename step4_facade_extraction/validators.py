@@ -6,12 +6,105 @@ import pandas as pd
 import pandera as pa
 from pandera import Check
 from pandera.api.pandas import Column, DataFrameSchema
-from typing import List, Dict, Any, Optional, Tuple
+from typing import List, Dict, Any, Optional, Set, Tuple
+import math
+from functools import cached_property
 import numpy as np
 from .models import ValidationError, WindowRecord, WallRecord
 from .logging_utils import get_logger
 
 
+# Vectorized equivalents of the pandera checks used in the schemas, keyed by check name
+def _str_length(values: pd.Series, statistics: Dict[str, Any]) -> pd.Series:
+    lengths = values.astype(str).str.len()
+    valid = pd.Series(True, index=values.index)
+    if statistics.get('min_value') is not None:
+        valid &= lengths >= statistics['min_value']
+    if statistics.get('max_value') is not None:
+        valid &= lengths <= statistics['max_value']
+    return valid
+
+
+STRUCTURAL_CHECKS = {
+    'greater_than': lambda values, statistics: values > statistics['min_value'],
+    'greater_than_or_equal_to': lambda values, statistics: values >= statistics['min_value'],
+    'less_than': lambda values, statistics: values < statistics['max_value'],
+    'less_than_or_equal_to': lambda values, statistics: values <= statistics['max_value'],
+    'str_length': _str_length
+}
+
+
+# pandera has a large fixed cost per validate() call, so sampled rows are
+# buffered across chunks and validated in batches of at least this many rows
+SAMPLE_BATCH_ROWS = 2000
+
+
+def required_sample_size(confidence: float, defect_rate: float) -> int:
+    """
+    Rows to sample so that, if at least defect_rate of all rows are invalid, the
+    sample contains one with the given confidence: (1 - p)^n <= 1 - confidence.
+    """
+    return math.ceil(math.log(1 - confidence) / math.log(1 - defect_rate))
+
+
+class TieredValidationState:
+    """
+    Per-upload state of tiered validation.
+    
+    Every row gets vectorized structural checks and an ElementId duplicate check
+    against 64-bit hashes of the IDs seen so far; pandera schemas run on a
+    Bernoulli sample of sample_rate, buffered into batches of SAMPLE_BATCH_ROWS.
+    Once any chunk shows a problem the upload is escalated and every later chunk
+    is validated in full. A failed upload should be validated in full from the
+    start (see DataProcessor.revalidate_upload), as errors in rows outside the
+    sample have not been seen.
+    """
+    
+    def __init__(self, sample_rate: float = 1.0, seed: int = 0):
+        self.sample_rate = sample_rate
+        self.escalated = False
+        self.rows_checked = 0
+        self.rows_sampled = 0
+        self._seen_hashes = np.empty(0, dtype=np.uint64)
+        self._pending: List[pd.DataFrame] = []
+        self._pending_rows = 0
+        self._rng = np.random.default_rng(seed)
+    
+    @property
+    def mode(self) -> str:
+        return "tiered (escalated)" if self.escalated else "tiered"
+    
+    def track_ids(self, ids: pd.Series) -> List[str]:
+        """Duplicate IDs within this chunk or against earlier chunks; records the chunk's IDs."""
+        ids = ids.astype(str)
+        hashes = pd.util.hash_pandas_object(ids, index=False).to_numpy()
+        repeated = pd.Series(hashes).duplicated(keep=False).to_numpy()
+        repeated |= np.isin(hashes, self._seen_hashes)
+        self._seen_hashes = np.concatenate([self._seen_hashes, hashes])
+        return list(set(ids[repeated].tolist()))
+    
+    def add_sample(self, df: pd.DataFrame) -> None:
+        """Draw this chunk's sample rows into the pending batch."""
+        if self.sample_rate >= 1:
+            sample = df
+        else:
+            sample = df[self._rng.random(len(df)) < self.sample_rate]
+        self.rows_checked += len(df)
+        self.rows_sampled += len(sample)
+        if len(sample):
+            self._pending.append(sample)
+            self._pending_rows += len(sample)
+    
+    def take_sample(self, final: bool = False) -> Optional[pd.DataFrame]:
+        """The pending sample once a batch is full (or any remainder when final)."""
+        if not self._pending or (self._pending_rows < SAMPLE_BATCH_ROWS and not final):
+            return None
+        sample = pd.concat(self._pending)
+        self._pending = []
+        self._pending_rows = 0
+        return sample
+
+
 class DataFrameValidator:
     """Validator for CSV data using Pandera schemas."""
     
@@ -19,7 +112,7 @@ class DataFrameValidator:
         self.logger = get_logger(project_id)
         self.errors: List[ValidationError] = []
     
-    @property
+    @cached_property
     def window_schema(self) -> DataFrameSchema:
         """Schema for window/glazing elements CSV."""
         return DataFrameSchema({
@@ -27,21 +120,21 @@ class DataFrameValidator:
                               checks=[Check.str_length(min_value=1, max_value=50)]),
             "Family": Column(pa.String, nullable=False,
                            checks=[Check.str_length(min_value=1, max_value=100)]),
-            "Glass Area (m²)": Column(pa.Float, nullable=False,
+            "Glass Area (m²)": Column(pa.Float, nullable=False, coerce=True,
                                     checks=[Check.greater_than_or_equal_to(0),
                                            Check.less_than_or_equal_to(100)]),
-            "Azimuth (°)": Column(pa.Float, nullable=False,
+            "Azimuth (°)": Column(pa.Float, nullable=False, coerce=True,
                                 checks=[Check.greater_than_or_equal_to(0),
                                        Check.less_than(360)]),
-            "Level": Column(pa.String, nullable=True),
-            "HostWallId": Column(pa.String, nullable=True),
-            "Window Width (m)": Column(pa.Float, nullable=True,
+            "Level": Column(pa.String, nullable=True, required=False, coerce=True),
+            "HostWallId": Column(pa.String, nullable=True, required=False, coerce=True),
+            "Window Width (m)": Column(pa.Float, nullable=True, required=False, coerce=True,
                                      checks=[Check.greater_than(0)]),
-            "Window Height (m)": Column(pa.Float, nullable=True,
+            "Window Height (m)": Column(pa.Float, nullable=True, required=False, coerce=True,
                                       checks=[Check.greater_than(0)])
         }, strict=False)  # Allow additional columns
     
-    @property
+    @cached_property
     def wall_schema(self) -> DataFrameSchema:
         """Schema for wall elements CSV."""
         return DataFrameSchema({
@@ -49,12 +142,12 @@ class DataFrameValidator:
                               checks=[Check.str_length(min_value=1, max_value=50)]),
             "Wall Type": Column(pa.String, nullable=False,
                               checks=[Check.str_length(min_value=1, max_value=100)]),
-            "Level": Column(pa.String, nullable=True),
-            "Length (m)": Column(pa.Float, nullable=False,
+            "Level": Column(pa.String, nullable=True, required=False, coerce=True),
+            "Length (m)": Column(pa.Float, nullable=False, coerce=True,
                                checks=[Check.greater_than(0)]),
-            "Area (m²)": Column(pa.Float, nullable=False,
+            "Area (m²)": Column(pa.Float, nullable=False, coerce=True,
                               checks=[Check.greater_than(0)]),
-            "Azimuth (°)": Column(pa.Float, nullable=False,
+            "Azimuth (°)": Column(pa.Float, nullable=False, coerce=True,
                                 checks=[Check.greater_than_or_equal_to(0),
                                        Check.less_than(360)])
         }, strict=False)
@@ -109,6 +202,91 @@ class DataFrameValidator:
         
         return {"needs_conversion": False}
     
+    def _header_errors(self, df: pd.DataFrame, data_type: str) -> bool:
+        """Record missing required columns; True if there were any."""
+        is_valid, missing_cols = self.validate_csv_headers(df, data_type)
+        for col in missing_cols:
+            self.errors.append(ValidationError(
+                row_number=None,
+                column=col,
+                error_message=f"Required column '{col}' is missing",
+                suggested_fix=f"Add column '{col}' to your CSV file"
+            ))
+        return not is_valid
+    
+    def _schema_errors(self, df: pd.DataFrame, schema: DataFrameSchema) -> None:
+        try:
+            schema.validate(df, lazy=True)
+        except pa.errors.SchemaErrors as e:
+            for error in e.failure_cases.itertuples():
+                # Column- and dtype-level failure cases carry no row index
+                index = getattr(error, 'index', None)
+                self.errors.append(ValidationError(
+                    row_number=None if pd.isna(index) else int(index),
+                    column=getattr(error, 'column', None),
+                    error_message=str(error.failure_case) if hasattr(error, 'failure_case') else str(error),
+                    suggested_fix="Check data format and ranges"
+                ))
+    
+    def _unit_errors(self, df: pd.DataFrame) -> None:
+        for col in ["Azimuth (°)", "Glass Area (m²)"]:
+            if col in df.columns:
+                unit_info = self.detect_units(df, col)
+                if unit_info["needs_conversion"]:
+                    self.errors.append(ValidationError(
+                        row_number=None,
+                        column=col,
+                        error_message=f"Values appear to be in {unit_info['detected_unit']}, expected {unit_info['target_unit']}",
+                        suggested_fix=f"Multiply values by {unit_info['conversion_factor']}"
+                    ))
+    
+    def _wall_height_errors(self, df: pd.DataFrame) -> None:
+        """Flag walls whose area / length implies an unreasonable height."""
+        if "Length (m)" not in df.columns or "Area (m²)" not in df.columns:
+            return
+        length = pd.to_numeric(df["Length (m)"], errors='coerce')
+        height = pd.to_numeric(df["Area (m²)"], errors='coerce') / length.where(length > 0)
+        for idx, value in height[height > 50].items():  # Unreasonably tall wall
+            self.errors.append(ValidationError(
+                row_number=idx,
+                column="calculated_height",
+                error_message=f"Calculated wall height ({value:.1f}m) seems too tall",
+                suggested_fix="Check area and length values"
+            ))
+    
+    def structurally_valid(self, df: pd.DataFrame, schema: DataFrameSchema) -> bool:
+        """
+        Cheap pass over every row: presence, dtype, nullability and the range and
+        length checks of the schema, evaluated vectorized. Optional columns may be
+        absent and coerced columns accept any dtype the schema would coerce (any
+        numeric dtype for floats). Checks without a vectorized equivalent are left
+        to the sampled schema validation.
+        """
+        for name, column in schema.columns.items():
+            if name not in df.columns:
+                if column.required:
+                    return False
+                continue
+            values = df[name]
+            nulls = values.isna()
+            if not column.nullable and nulls.any():
+                return False
+            
+            dtype = str(column.dtype)
+            if dtype.startswith('float'):
+                numeric = pd.api.types.is_numeric_dtype(values) and not pd.api.types.is_bool_dtype(values)
+                if not (pd.api.types.is_float_dtype(values) or (column.coerce and numeric)):
+                    return False
+            if dtype == 'str' and not column.coerce and not (
+                    pd.api.types.is_object_dtype(values) or pd.api.types.is_string_dtype(values)):
+                return False
+            
+            for check in column.checks:
+                vectorized = STRUCTURAL_CHECKS.get(check.name)
+                if vectorized is not None and not (vectorized(values, check.statistics) | nulls).all():
+                    return False
+        return True
+    
     def check_duplicates(self, df: pd.DataFrame, column: str = "ElementId") -> List[str]:
         """Check for duplicate ElementIds."""
         if column not in df.columns:
@@ -117,128 +295,94 @@ class DataFrameValidator:
         duplicates = df[df.duplicated(subset=[column], keep=False)][column].tolist()
         return list(set(duplicates))
     
-    def validate_window_data(self, df: pd.DataFrame) -> Tuple[bool, List[ValidationError]]:
-        """Validate window/glazing data."""
+    def check_stream_duplicates(self, df: pd.DataFrame, seen_ids: Set[str],
+                                column: str = "ElementId") -> List[str]:
+        """Check duplicate ElementIds within a chunk and against earlier chunks of the same stream."""
+        if column not in df.columns:
+            return []
+        
+        ids = df[column].astype(str)
+        duplicates = set(self.check_duplicates(df, column))
+        duplicates.update(ids[ids.isin(seen_ids)].tolist())
+        seen_ids.update(ids.tolist())
+        return list(duplicates)
+    
+    def _duplicate_errors(self, df: pd.DataFrame, seen_ids: Optional[Set[str]],
+                          duplicates: Optional[List[str]] = None) -> None:
+        if duplicates is None and seen_ids is None:
+            duplicates = self.check_duplicates(df, "ElementId")
+        elif duplicates is None:
+            duplicates = self.check_stream_duplicates(df, seen_ids, "ElementId")
+        if duplicates:
+            self.errors.append(ValidationError(
+                row_number=None,
+                column="ElementId",
+                error_message=f"Duplicate ElementIds found: {duplicates[:5]}{'...' if len(duplicates) > 5 else ''}",
+                suggested_fix="Ensure all ElementIds are unique"
+            ))
+    
+    def validate_window_data(self, df: pd.DataFrame, seen_ids: Optional[Set[str]] = None,
+                             check_units: bool = True) -> Tuple[bool, List[ValidationError]]:
+        """
+        Validate window/glazing data.
+        
+        For streamed uploads pass the stream's seen_ids set so duplicates are caught
+        across chunks, and check_units only for the first chunk.
+        """
         self.errors = []
         
         try:
             # Basic header validation
-            is_valid, missing_cols = self.validate_csv_headers(df, "windows")
-            if not is_valid:
-                for col in missing_cols:
-                    self.errors.append(ValidationError(
-                        row_number=0,
-                        column=col,
-                        error_message=f"Required column '{col}' is missing",
-                        suggested_fix=f"Add column '{col}' to your CSV file"
-                    ))
+            if self._header_errors(df, "windows"):
                 return False, self.errors
             
             # Check for duplicates
-            duplicates = self.check_duplicates(df, "ElementId")
-            if duplicates:
-                self.errors.append(ValidationError(
-                    row_number=0,
-                    column="ElementId",
-                    error_message=f"Duplicate ElementIds found: {duplicates[:5]}{'...' if len(duplicates) > 5 else ''}",
-                    suggested_fix="Ensure all ElementIds are unique"
-                ))
+            self._duplicate_errors(df, seen_ids)
             
             # Validate against schema
-            try:
-                self.window_schema.validate(df, lazy=True)
-            except pa.errors.SchemaErrors as e:
-                for error in e.failure_cases.itertuples():
-                    self.errors.append(ValidationError(
-                        row_number=error.index if hasattr(error, 'index') else 0,
-                        column=error.column if hasattr(error, 'column') else "unknown",
-                        error_message=str(error.failure_case) if hasattr(error, 'failure_case') else str(error),
-                        suggested_fix="Check data format and ranges"
-                    ))
+            self._schema_errors(df, self.window_schema)
             
             # Check unit conversions
-            for col in ["Azimuth (°)", "Glass Area (m²)"]:
-                if col in df.columns:
-                    unit_info = self.detect_units(df, col)
-                    if unit_info["needs_conversion"]:
-                        self.errors.append(ValidationError(
-                            row_number=0,
-                            column=col,
-                            error_message=f"Values appear to be in {unit_info['detected_unit']}, expected {unit_info['target_unit']}",
-                            suggested_fix=f"Multiply values by {unit_info['conversion_factor']}"
-                        ))
+            if check_units:
+                self._unit_errors(df)
             
             return len(self.errors) == 0, self.errors
             
         except Exception as e:
             self.logger.error(f"Validation error: {str(e)}")
             self.errors.append(ValidationError(
-                row_number=0,
+                row_number=None,
                 column="general",
                 error_message=f"Validation failed: {str(e)}",
                 suggested_fix="Check file format and structure"
             ))
             return False, self.errors
     
-    def validate_wall_data(self, df: pd.DataFrame) -> Tuple[bool, List[ValidationError]]:
-        """Validate wall data."""
+    def validate_wall_data(self, df: pd.DataFrame,
+                           seen_ids: Optional[Set[str]] = None) -> Tuple[bool, List[ValidationError]]:
+        """Validate wall data; seen_ids as for validate_window_data."""
         self.errors = []
         
         try:
             # Basic header validation
-            is_valid, missing_cols = self.validate_csv_headers(df, "walls")
-            if not is_valid:
-                for col in missing_cols:
-                    self.errors.append(ValidationError(
-                        row_number=0,
-                        column=col,
-                        error_message=f"Required column '{col}' is missing",
-                        suggested_fix=f"Add column '{col}' to your CSV file"
-                    ))
+            if self._header_errors(df, "walls"):
                 return False, self.errors
             
             # Check for duplicates
-            duplicates = self.check_duplicates(df, "ElementId")
-            if duplicates:
-                self.errors.append(ValidationError(
-                    row_number=0,
-                    column="ElementId",
-                    error_message=f"Duplicate ElementIds found: {duplicates[:5]}{'...' if len(duplicates) > 5 else ''}",
-                    suggested_fix="Ensure all ElementIds are unique"
-                ))
+            self._duplicate_errors(df, seen_ids)
             
             # Validate against schema
-            try:
-                self.wall_schema.validate(df, lazy=True)
-            except pa.errors.SchemaErrors as e:
-                for error in e.failure_cases.itertuples():
-                    self.errors.append(ValidationError(
-                        row_number=error.index if hasattr(error, 'index') else 0,
-                        column=error.column if hasattr(error, 'column') else "unknown",
-                        error_message=str(error.failure_case) if hasattr(error, 'failure_case') else str(error),
-                        suggested_fix="Check data format and ranges"
-                    ))
+            self._schema_errors(df, self.wall_schema)
             
             # Validate calculated height
-            if "Length (m)" in df.columns and "Area (m²)" in df.columns:
-                for idx, row in df.iterrows():
-                    if pd.notna(row["Length (m)"]) and pd.notna(row["Area (m²)"]):
-                        if row["Length (m)"] > 0:
-                            height = row["Area (m²)"] / row["Length (m)"]
-                            if height > 50:  # Unreasonably tall wall
-                                self.errors.append(ValidationError(
-                                    row_number=idx,
-                                    column="calculated_height",
-                                    error_message=f"Calculated wall height ({height:.1f}m) seems too tall",
-                                    suggested_fix="Check area and length values"
-                                ))
+            self._wall_height_errors(df)
             
             return len(self.errors) == 0, self.errors
             
         except Exception as e:
             self.logger.error(f"Wall validation error: {str(e)}")
             self.errors.append(ValidationError(
-                row_number=0,
+                row_number=None,
                 column="general",
                 error_message=f"Validation failed: {str(e)}",
                 suggested_fix="Check file format and structure"
@@ -246,6 +390,74 @@ class DataFrameValidator:
             return False, self.errors
 
 
+    def validate_tiered(self, df: pd.DataFrame, data_type: str, state: TieredValidationState,
+                        check_units: bool = True) -> Tuple[bool, List[ValidationError]]:
+        """
+        Tiered validation of one chunk of a large upload (see TieredValidationState).
+        
+        When the structural checks find a problem the chunk is validated in full;
+        failures of a sample batch are reported for the sampled rows only, so a
+        failed upload should be revalidated in full. Call finish_tiered after the
+        last chunk.
+        """
+        self.errors = []
+        schema = self.window_schema if data_type == "windows" else self.wall_schema
+        
+        try:
+            if self._header_errors(df, data_type):
+                return False, self.errors
+            
+            duplicates = state.track_ids(df["ElementId"])
+            self._duplicate_errors(df, None, duplicates)
+            
+            if state.escalated or duplicates or not self.structurally_valid(df, schema):
+                self._escalate(state)
+                self._schema_errors(df, schema)
+            else:
+                state.add_sample(df)
+                sample = state.take_sample()
+                if sample is not None:
+                    self._schema_errors(sample, schema)
+                    if self.errors:
+                        self._escalate(state)
+            
+            if data_type == "windows":
+                if check_units:
+                    self._unit_errors(df)
+            else:
+                self._wall_height_errors(df)
+            
+            return len(self.errors) == 0, self.errors
+            
+        except Exception as e:
+            self.logger.error(f"Tiered validation error: {str(e)}")
+            self.errors.append(ValidationError(
+                row_number=None,
+                column="general",
+                error_message=f"Validation failed: {str(e)}",
+                suggested_fix="Check file format and structure"
+            ))
+            return False, self.errors
+
+
+    def finish_tiered(self, data_type: str, state: TieredValidationState) -> Tuple[bool, List[ValidationError]]:
+        """Validate the remaining sampled rows at the end of a tiered upload."""
+        self.errors = []
+        sample = state.take_sample(final=True)
+        if sample is not None:
+            self._schema_errors(sample, self.window_schema if data_type == "windows" else self.wall_schema)
+            if self.errors:
+                self._escalate(state)
+        return len(self.errors) == 0, self.errors
+    
+    def _escalate(self, state: TieredValidationState) -> None:
+        if not state.escalated:
+            state.escalated = True
+            self.logger.warning(
+                f"Tiered validation found problems after {state.rows_checked} rows, validating in full"
+            )
+
+
 class FileValidator:
     """File-level validation utilities."""
     
@@ -114,6 +114,7 @@ class UIConfig(BaseSettings):
     
     # Progress update intervals
     progress_update_interval: int = Field(default=5)  # elements
+    progress_max_updates_per_second: float = Field(default=4.0)  # UI repaints
     log_display_lines: int = Field(default=200)
     
     # Chart settings
@@ -0,0 +1,51 @@
+-- Migration 002: Add batch checkpoints to radiation analysis sessions
+-- Purpose: Allow interrupted Step 5 runs to resume from the last committed batch
+
+-- Session cursor and throughput record
+ALTER TABLE radiation_analysis_sessions ADD COLUMN IF NOT EXISTS analysis_type VARCHAR(20);
+ALTER TABLE radiation_analysis_sessions ADD COLUMN IF NOT EXISTS config_hash VARCHAR(32);
+ALTER TABLE radiation_analysis_sessions ADD COLUMN IF NOT EXISTS batch_size INTEGER;
+ALTER TABLE radiation_analysis_sessions ADD COLUMN IF NOT EXISTS cursor_position INTEGER DEFAULT 0;
+ALTER TABLE radiation_analysis_sessions ADD COLUMN IF NOT EXISTS completed_batches INTEGER DEFAULT 0;
+ALTER TABLE radiation_analysis_sessions ADD COLUMN IF NOT EXISTS wall_time_seconds DECIMAL(12,3) DEFAULT 0;
+ALTER TABLE radiation_analysis_sessions ADD COLUMN IF NOT EXISTS elements_per_second DECIMAL(12,3);
+ALTER TABLE radiation_analysis_sessions ADD COLUMN IF NOT EXISTS resume_count INTEGER DEFAULT 0;
+ALTER TABLE radiation_analysis_sessions ADD COLUMN IF NOT EXISTS last_checkpoint_at TIMESTAMP;
+ALTER TABLE radiation_analysis_sessions ADD COLUMN IF NOT EXISTS element_set_hash VARCHAR(32);
+
+-- Sessions whose element set changed are superseded and never resumed
+ALTER TABLE radiation_analysis_sessions DROP CONSTRAINT IF EXISTS radiation_session_status_valid;
+ALTER TABLE radiation_analysis_sessions ADD CONSTRAINT radiation_session_status_valid
+    CHECK (status IN ('running', 'completed', 'failed', 'stopped', 'superseded'));
+
+-- Committed element batches per session
+CREATE TABLE IF NOT EXISTS radiation_session_batches (
+    id SERIAL PRIMARY KEY,
+    session_id INTEGER NOT NULL,
+    batch_index INTEGER NOT NULL,
+    element_count INTEGER NOT NULL,
+    element_results JSONB NOT NULL,
+    batch_seconds DECIMAL(10,3),
+    committed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    
+    -- Constraints
+    CONSTRAINT radiation_session_batch_unique UNIQUE (session_id, batch_index),
+    CONSTRAINT fk_radiation_batch_session FOREIGN KEY (session_id) REFERENCES radiation_analysis_sessions(id) ON DELETE CASCADE
+);
+
+-- Indexes for resume lookups
+CREATE INDEX IF NOT EXISTS idx_radiation_sessions_project_config ON radiation_analysis_sessions(project_id, config_hash, status);
+CREATE INDEX IF NOT EXISTS idx_radiation_session_batches_session ON radiation_session_batches(session_id);
+
+GRANT SELECT, INSERT, UPDATE, DELETE ON radiation_session_batches TO postgres;
+GRANT USAGE, SELECT ON SEQUENCE radiation_session_batches_id_seq TO postgres;
+
+COMMENT ON TABLE radiation_session_batches IS 'Committed element batches of a radiation analysis session, used to resume interrupted runs';
+COMMENT ON COLUMN radiation_analysis_sessions.cursor_position IS 'Number of ordered elements covered by committed batches';
+COMMENT ON COLUMN radiation_analysis_sessions.element_set_hash IS 'md5 of the ordered element IDs the session was started for';
+COMMENT ON COLUMN radiation_analysis_sessions.elements_per_second IS 'Session throughput accumulated across resumes';
+
+-- Migration completion log
+INSERT INTO schema_migrations (version, description, executed_at) 
+VALUES ('002', 'Add batch checkpoints to radiation analysis sessions', CURRENT_TIMESTAMP)
+ON CONFLICT (version) DO NOTHING;
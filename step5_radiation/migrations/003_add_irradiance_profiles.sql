@@ -0,0 +1,13 @@
+-- Migration 003: Add packed month x hour-of-day irradiance profiles
+-- Purpose: Give downstream steps the temporal shape of each element's radiation
+
+-- 12 x 24 little-endian float32 grid (kWh/m² per cell, 1152 bytes per element)
+ALTER TABLE element_radiation ADD COLUMN IF NOT EXISTS irradiance_profile BYTEA;
+
+-- Comments for documentation
+COMMENT ON COLUMN element_radiation.irradiance_profile IS 'Packed 12x24 float32 month x hour-of-day irradiation profile summing to annual_radiation';
+
+-- Migration completion log
+INSERT INTO schema_migrations (version, description, executed_at) 
+VALUES ('003', 'Add packed irradiance profiles to element radiation', CURRENT_TIMESTAMP)
+ON CONFLICT (version) DO NOTHING;
@@ -4,59 +4,84 @@ Orchestration service for radiation analysis with callbacks and progress trackin
 
 import asyncio
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from typing import List, Dict, Any, Optional, Callable, Union
 from contextlib import asynccontextmanager
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from ..models import (
     ElementRadiationResult, AnalysisProgress, AnalysisConfiguration,
     ValidationResult, PrecisionPreset, TMYData, WallShadingData
 )
-from ..config import analysis_config, ERROR_MESSAGES
+from ..config import analysis_config, ui_config, ERROR_MESSAGES
 from ..db.queries import radiation_queries, execute_with_fallback
 from services.advanced_radiation_analyzer import AdvancedRadiationAnalyzer
+from utils.progress_bus import ProgressBus, DEFAULT_MAX_UPDATES_PER_SECOND
 
 logger = logging.getLogger(__name__)
 
 
 class ProgressCallback:
-    """Progress tracking callback system."""
+    """
+    Progress tracking callback system.
     
-    def __init__(self, total_elements: int, update_interval: int = 5):
+    update() may be called per element from worker threads: it only publishes a
+    counter increment on a ProgressBus. Callbacks run from pump() on the
+    orchestrating thread, coalesced to at most max_updates_per_second.
+    """
+    
+    def __init__(self, total_elements: int,
+                 max_updates_per_second: float = DEFAULT_MAX_UPDATES_PER_SECOND, project_id: int = 0):
         self.total_elements = total_elements
-        self.update_interval = update_interval
-        self.processed_count = 0
-        self.last_update = 0
+        self.project_id = project_id
         self.callbacks: List[Callable] = []
         self.start_time = time.time()
+        self.current_element = (None, None, None)
+        self.bus = ProgressBus(total_elements, max_updates_per_second)
+        self.bus.subscribe(self._notify)
+    
+    @property
+    def processed_count(self) -> int:
+        """Elements folded into the bus by the last pump()."""
+        return self.bus.completed
     
     def add_callback(self, callback: Callable[[AnalysisProgress], None]):
         """Add progress update callback."""
         self.callbacks.append(callback)
     
     def update(self, element_id: str, orientation: str, area: float):
-        """Update progress and trigger callbacks if needed."""
-        self.processed_count += 1
+        """Publish one processed element (cheap, safe from worker threads)."""
+        self.current_element = (element_id, orientation, area)
+        self.bus.advance()
+    
+    def pump(self, force: bool = False) -> bool:
+        """Deliver coalesced progress to callbacks if the rate limit allows."""
+        return self.bus.pump(force=force)
+    
+    def _notify(self, snapshot: Dict[str, Any]):
+        """Build an AnalysisProgress from the bus snapshot and trigger callbacks."""
+        element_id, orientation, area = self.current_element
+        estimated_completion = None
+        if snapshot['eta_seconds'] is not None:
+            estimated_completion = datetime.now() + timedelta(seconds=snapshot['eta_seconds'])
         
-        if (self.processed_count - self.last_update) >= self.update_interval or self.processed_count == self.total_elements:
-            progress = AnalysisProgress(
-                project_id=0,  # Will be set by caller
-                total_elements=self.total_elements,
-                completed_elements=self.processed_count,
-                current_element_id=element_id,
-                current_orientation=orientation,
-                current_area=area
-            )
-            
-            for callback in self.callbacks:
-                try:
-                    callback(progress)
-                except Exception as e:
-                    logger.warning(f"Progress callback failed: {e}")
-            
-            self.last_update = self.processed_count
+        progress = AnalysisProgress(
+            project_id=self.project_id,
+            total_elements=self.total_elements,
+            completed_elements=snapshot['completed'],
+            current_element_id=element_id,
+            current_orientation=orientation,
+            current_area=area,
+            estimated_completion=estimated_completion,
+            start_time=datetime.fromtimestamp(self.start_time)
+        )
+        
+        for callback in self.callbacks:
+            try:
+                callback(progress)
+            except Exception as e:
+                logger.warning(f"Progress callback failed: {e}")
 
 
 class RadiationAnalysisOrchestrator:
@@ -136,6 +161,7 @@ class RadiationAnalysisOrchestrator:
         
         # Mark analysis as active
         self._active_analyses[project_id] = True
+        progress_tracker = None
         
         try:
             logger.info(f"Starting radiation analysis for project {project_id}")
@@ -165,7 +191,8 @@ class RadiationAnalysisOrchestrator:
             # Setup progress tracking
             progress_tracker = ProgressCallback(
                 total_elements=len(elements),
-                update_interval=self.config.max_workers
+                max_updates_per_second=ui_config.progress_max_updates_per_second,
+                project_id=project_id
             )
             
             if progress_callback:
@@ -181,6 +208,9 @@ class RadiationAnalysisOrchestrator:
                     project_id, elements, walls, configuration, progress_tracker
                 )
             
+            # Final repaint regardless of the rate limit
+            progress_tracker.pump(force=True)
+            
             # Store results in database
             await self._store_results(project_id, results)
             
@@ -189,6 +219,9 @@ class RadiationAnalysisOrchestrator:
             
         except Exception as e:
             logger.error(f"Analysis failed: {e}")
+            if progress_tracker:
+                # Show the progress reached before the failure
+                progress_tracker.pump(force=True)
             raise
         finally:
             # Mark analysis as inactive
@@ -219,14 +252,20 @@ class RadiationAnalysisOrchestrator:
                 )
                 futures.append(future)
             
-            # Collect results as they complete
-            for future in as_completed(futures):
-                try:
-                    chunk_results = future.result(timeout=configuration.timeout_seconds)
-                    results.extend(chunk_results)
-                except Exception as e:
-                    logger.error(f"Chunk processing failed: {e}")
-                    # Continue with other chunks
+            # Collect results as they complete; workers only publish counters,
+            # progress is delivered from this thread between completions
+            pending = set(futures)
+            while pending:
+                done, pending = wait(pending, timeout=progress_tracker.bus.min_interval or 0.25,
+                                     return_when=FIRST_COMPLETED)
+                progress_tracker.pump()
+                for future in done:
+                    try:
+                        chunk_results = future.result(timeout=configuration.timeout_seconds)
+                        results.extend(chunk_results)
+                    except Exception as e:
+                        logger.error(f"Chunk processing failed: {e}")
+                        # Continue with other chunks
         
         return results
     
@@ -260,6 +299,7 @@ class RadiationAnalysisOrchestrator:
                         element.get("orientation", ""),
                         element.get("glass_area", 0.0)
                     )
+                    progress_tracker.pump()
                 
             except Exception as e:
                 logger.warning(f"Element {element.get('element_id')} failed: {e}")
@@ -7,6 +7,7 @@ import streamlit as st
 import time
 from datetime import datetime
 from .element_registry import get_global_registry
+from .progress_bus import ProgressBus
 
 class AnalysisMonitor:
     def __init__(self):
@@ -17,6 +18,9 @@ class AnalysisMonitor:
         self.skip_count = 0
         # Add deduplication tracking for log messages
         self._last_logged = {"id": None, "status": None, "timestamp": 0}
+        # Coalesce per-element events into a few repaints per second
+        self.repaint_bus = ProgressBus()
+        self.repaint_bus.subscribe(lambda snapshot: self._repaint())
         
     def create_monitor_display(self):
         """Create the monitoring dashboard"""
@@ -38,6 +42,7 @@ class AnalysisMonitor:
         st.write("**Live Processing Log:**")
         self.log_container = st.container()
         self.log_messages = []
+        self._log_dirty = False
         
         # Current element display
         self.current_element = st.empty()
@@ -45,7 +50,23 @@ class AnalysisMonitor:
         return self
     
     def update_metrics(self):
-        """Update the live metrics"""
+        """Request a metrics repaint (rate limited by the repaint bus)"""
+        self.repaint_bus.advance()
+        self.repaint_bus.pump()
+    
+    def flush(self):
+        """Repaint metrics and log regardless of the rate limit"""
+        self.repaint_bus.close()
+    
+    def _repaint(self):
+        """Paint the live metrics and the latest log lines"""
+        if not hasattr(self, 'processed_metric'):
+            return
+        if self._log_dirty:
+            with self.log_container:
+                for msg in self.log_messages[-5:]:
+                    st.text(msg)
+            self._log_dirty = False
         self.processed_metric.metric("Elements Processed", self.element_count)
         self.success_metric.metric("Successful", self.success_count, delta=f"{(self.success_count/max(1,self.element_count)*100):.1f}%")
         self.error_metric.metric("Errors", self.error_count)
@@ -135,9 +156,7 @@ class AnalysisMonitor:
         if len(self.log_messages) > 10:
             self.log_messages.pop(0)
         
-        with self.log_container:
-            for msg in self.log_messages[-5:]:
-                st.text(msg)
+        self._log_dirty = True
         self.update_metrics()
     
     def log_element_error(self, element_id, error_message, processing_time):
@@ -172,9 +191,7 @@ class AnalysisMonitor:
         if len(self.log_messages) > 10:
             self.log_messages.pop(0)
         
-        with self.log_container:
-            for msg in self.log_messages[-5:]:
-                st.text(msg)
+        self._log_dirty = True
         self.update_metrics()
     
     def log_timeout(self, remaining_elements):
@@ -183,12 +200,12 @@ class AnalysisMonitor:
         message = f"[{timestamp}] ⏱️ Session timeout - {remaining_elements} elements remaining"
         self.log_messages.append(message)
         
-        with self.log_container:
-            for msg in self.log_messages[-5:]:
-                st.text(msg)
+        self._log_dirty = True
+        self.flush()
     
     def get_summary(self):
-        """Get analysis summary"""
+        """Get analysis summary; called when a run ends, so pending log lines are painted first"""
+        self.flush()
         elapsed_time = time.time() - self.start_time
         return {
             'total_time': elapsed_time,
@@ -3,6 +3,8 @@ import pandas as pd
 from datetime import datetime, timedelta
 import math
 
+from core.lifetime import compound_factors
+
 def solar_position(latitude, longitude, datetime_utc):
     """
     Calculate solar position (elevation and azimuth) for given location and time.
@@ -274,13 +276,7 @@ def calculate_annual_degradation(annual_energy, degradation_rate=0.005, years=25
         list: Annual energy production for each year
     """
     
-    annual_production = []
-    
-    for year in range(years):
-        degraded_energy = annual_energy * ((1 - degradation_rate) ** year)
-        annual_production.append(degraded_energy)
-    
-    return annual_production
+    return (annual_energy * compound_factors(-degradation_rate, years)).tolist()
 
 def calculate_financial_metrics(initial_investment, annual_cash_flows, discount_rate):
     """
@@ -427,6 +423,75 @@ def calculate_panel_layout_optimization(available_width, available_height, panel
             'unused_height': available_height
         }
 
+def calculate_panel_layouts_batch(available_widths, available_heights, panel_width, panel_height,
+                                  spacing_factor=0.05, orientation='auto'):
+    """
+    Vectorized calculate_panel_layout_optimization for many rectangles at once.
+    
+    Portrait and landscape are evaluated for every rectangle with array floor
+    division; per rectangle the orientation with more panels wins (portrait on
+    ties), as in the single-rectangle function.
+    
+    Args:
+        available_widths (array-like): Available widths (m)
+        available_heights (array-like): Available heights (m)
+        panel_width (float): Panel width (m)
+        panel_height (float): Panel height (m)
+        spacing_factor (float): Spacing as fraction of panel size
+        orientation (str): 'portrait', 'landscape' or 'auto'
+    
+    Returns:
+        dict: Arrays orientation, panels_horizontal, panels_vertical, total_panels,
+              coverage_ratio, area_used, unused_width, unused_height and
+              active_area (panel area without spacing), one entry per rectangle
+    """
+    
+    widths = np.asarray(available_widths, dtype=float)
+    heights = np.asarray(available_heights, dtype=float)
+    orientations = ['portrait', 'landscape'] if orientation == 'auto' else [orientation]
+    
+    best = None
+    for orient in orientations:
+        if orient == 'landscape':
+            p_width, p_height = panel_height, panel_width
+        else:
+            p_width, p_height = panel_width, panel_height
+        
+        effective_width = p_width * (1 + spacing_factor)
+        effective_height = p_height * (1 + spacing_factor)
+        
+        with np.errstate(invalid='ignore'):
+            panels_horizontal = np.nan_to_num(widths // effective_width).astype(np.int64)
+            panels_vertical = np.nan_to_num(heights // effective_height).astype(np.int64)
+        total_panels = panels_horizontal * panels_vertical
+        placed = total_panels > 0
+        
+        actual_width = np.where(placed, panels_horizontal * effective_width - p_width * spacing_factor, 0.0)
+        actual_height = np.where(placed, panels_vertical * effective_height - p_height * spacing_factor, 0.0)
+        area_used = actual_width * actual_height
+        coverage_ratio = np.zeros_like(area_used)
+        np.divide(area_used, widths * heights, out=coverage_ratio, where=placed)
+        
+        layout = {
+            'orientation': np.where(placed, orient, orientation).astype(object),
+            'panels_horizontal': np.where(placed, panels_horizontal, 0),
+            'panels_vertical': np.where(placed, panels_vertical, 0),
+            'total_panels': np.where(placed, total_panels, 0),
+            'coverage_ratio': coverage_ratio,
+            'area_used': area_used,
+            'unused_width': widths - actual_width,
+            'unused_height': heights - actual_height,
+            'active_area': np.where(placed, total_panels, 0) * (panel_width * panel_height)
+        }
+        
+        if best is None:
+            best = layout
+        else:
+            better = layout['total_panels'] > best['total_panels']
+            best = {key: np.where(better, layout[key], best[key]) for key in best}
+    
+    return best
+
 def interpolate_solar_data(data_points, target_timestamps):
     """
     Interpolate solar irradiance data for missing timestamps.
@@ -0,0 +1,172 @@
+"""
+Rate-Limited Progress Bus
+Producers publish cheap counter increments from any thread; a single consumer
+coalesces them and repaints the UI at most a fixed number of times per second
+"""
+
+import queue
+import time
+import logging
+from typing import Dict, List, Callable, Optional, Any
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_UPDATES_PER_SECOND = 4.0
+COMPLETED = 'completed'
+
+
+class ProgressBus:
+    """
+    Coalescing progress bus shared by long-running analyses (Steps 4, 5 and 8).
+
+    advance(), set_total() and set_message() only append to a SimpleQueue, so
+    worker threads never touch Streamlit and never contend on a lock. The thread
+    that owns the UI calls pump(), which drains the queue, folds the deltas into
+    counters and calls the renderers at most max_updates_per_second times.
+    Rate and ETA are calculated here once instead of in every progress widget.
+    """
+
+    def __init__(self, total: int = 0, max_updates_per_second: float = DEFAULT_MAX_UPDATES_PER_SECOND,
+                 smoothing: float = 0.3, clock: Callable[[], float] = time.monotonic):
+        self.total = total
+        self.min_interval = 1.0 / max_updates_per_second if max_updates_per_second > 0 else 0.0
+        self.smoothing = smoothing
+        self.clock = clock
+
+        self.counters: Dict[str, int] = {COMPLETED: 0}
+        self.message = ""
+        self.renders = 0
+        self.published = 0
+
+        self._inbox = queue.SimpleQueue()
+        self._renderers: List[Callable[[Dict[str, Any]], None]] = []
+        self._start_time = clock()
+        self._last_render = None
+        self._last_rate_sample = (self._start_time, 0)
+        self._rate = None
+        self._dirty = False
+
+    def subscribe(self, renderer: Callable[[Dict[str, Any]], None]):
+        """Register a renderer called with the coalesced snapshot on the consumer thread."""
+        self._renderers.append(renderer)
+
+    # Producer side - safe from any thread
+
+    def advance(self, count: int = 1, key: str = COMPLETED):
+        """Add count to a counter (completed by default)."""
+        self._inbox.put(('count', key, count))
+
+    def set_total(self, total: int):
+        """Publish the number of work items once it is known."""
+        self._inbox.put(('total', None, total))
+
+    def set_message(self, message: str):
+        """Publish the latest status message; only the newest one is rendered."""
+        self._inbox.put(('message', None, message))
+
+    # Consumer side - call from the thread that owns the UI
+
+    def pump(self, force: bool = False) -> bool:
+        """
+        Drain published updates and repaint if the rate limit allows.
+
+        Returns:
+            True if the renderers were called
+        """
+        self._drain()
+
+        now = self.clock()
+        if not force:
+            if not self._dirty:
+                return False
+            if self._last_render is not None and now - self._last_render < self.min_interval:
+                return False
+
+        self._update_rate(now)
+        snapshot = self.snapshot(now)
+        for renderer in list(self._renderers):
+            try:
+                renderer(snapshot)
+            except Exception as e:
+                logger.warning(f"Progress renderer failed: {e}")
+
+        self._last_render = now
+        self._dirty = False
+        self.renders += 1
+        return True
+
+    def pump_while(self, is_running: Callable[[], bool], poll_interval: float = 0.05):
+        """Pump until is_running() returns False, then render the final state."""
+        while is_running():
+            self.pump()
+            time.sleep(poll_interval)
+        self.pump(force=True)
+
+    def close(self):
+        """Render the final state regardless of the rate limit."""
+        self.pump(force=True)
+
+    @property
+    def completed(self) -> int:
+        return self.counters.get(COMPLETED, 0)
+
+    def snapshot(self, now: Optional[float] = None) -> Dict[str, Any]:
+        """Current counters with progress fraction, rate (items/s) and ETA (s)."""
+        now = self.clock() if now is None else now
+        elapsed = now - self._start_time
+        completed = self.completed
+
+        rate = self._rate
+        if rate is None and elapsed > 0:
+            rate = completed / elapsed
+
+        eta_seconds = None
+        if self.total and rate:
+            eta_seconds = max(self.total - completed, 0) / rate
+
+        return {
+            'completed': completed,
+            'total': self.total,
+            'progress': min(completed / self.total, 1.0) if self.total else 0.0,
+            'counters': dict(self.counters),
+            'message': self.message,
+            'elapsed_seconds': elapsed,
+            'rate': rate or 0.0,
+            'eta_seconds': eta_seconds
+        }
+
+    def _drain(self):
+        """Fold every queued update into the counters."""
+        while True:
+            try:
+                kind, key, value = self._inbox.get_nowait()
+            except queue.Empty:
+                return
+            self.published += 1
+            self._dirty = True
+            if kind == 'count':
+                self.counters[key] = self.counters.get(key, 0) + value
+            elif kind == 'total':
+                self.total = value
+            elif kind == 'message':
+                self.message = value
+
+    def _update_rate(self, now: float):
+        """Exponentially smoothed throughput between renders."""
+        last_time, last_completed = self._last_rate_sample
+        interval = now - last_time
+        if interval <= 0:
+            return
+        sample = (self.completed - last_completed) / interval
+        if self._rate is None:
+            self._rate = sample
+        else:
+            self._rate = self.smoothing * sample + (1 - self.smoothing) * self._rate
+        self._last_rate_sample = (now, self.completed)
+
+
+def format_eta(snapshot: Dict[str, Any]) -> str:
+    """Short human readable rate/ETA suffix for status texts."""
+    if snapshot['eta_seconds'] is None:
+        return f"{snapshot['rate']:.1f}/s"
+    return f"{snapshot['rate']:.1f}/s - ETA: {snapshot['eta_seconds']:.1f}s"
@@ -8,6 +8,7 @@ import time
 import uuid
 from datetime import datetime
 from typing import Set, Dict, Optional, List
+from utils.progress_bus import ProgressBus
 
 class UnifiedAnalysisLogger:
     def __init__(self):
@@ -26,6 +27,10 @@ class UnifiedAnalysisLogger:
         self.successful = 0
         self.failed = 0
         self.skipped = 0
+        
+        # Coalesce per-element events into a few repaints per second
+        self.repaint_bus = ProgressBus()
+        self.repaint_bus.subscribe(lambda snapshot: self._update_display_delta())
     
     def create_display(self):
         """Create the unified log display"""
@@ -79,8 +84,9 @@ class UnifiedAnalysisLogger:
         if len(self.log_messages) > 15:
             self.log_messages.pop(0)
         
-        # Update display with delta rendering
-        self._update_display_delta()
+        # Update display with delta rendering (rate limited)
+        self.repaint_bus.advance()
+        self.repaint_bus.pump()
         return True
     
     def _update_display_delta(self):
@@ -108,6 +114,10 @@ class UnifiedAnalysisLogger:
         
         self.update_metrics()
         
+    def flush(self):
+        """Repaint pending log lines and metrics regardless of the rate limit."""
+        self.repaint_bus.close()
+    
     def clear_display(self):
         """Clear the display and reset displayed IDs"""
         if 'displayed_log_uuids' in st.session_state:
@@ -217,17 +227,21 @@ class UnifiedAnalysisLogger:
         
         # Add log message
         message = f"⏰ {element_id} timed out ({timeout_duration:.1f}s)"
-        return self._add_log_message(message, element_id, "timeout")
+        logged = self._add_log_message(message, element_id, "timeout")
+        self.flush()
+        return logged
     
     def get_summary(self) -> dict:
-        """Get analysis summary"""
+        """Get analysis summary; called when a run ends, so pending log lines are painted first"""
+        self.flush()
         elapsed_time = time.time() - self.start_time
         return {
             'total_time': elapsed_time,
             'elements_processed': self.total_processed,
             'success_rate': (self.successful / max(1, self.total_processed)) * 100,
             'error_rate': (self.failed / max(1, self.total_processed)) * 100,
-            'unique_events': len(self.logged_events)
+            'unique_events': len(self.logged_events),
+            'elements_per_second': self.total_processed / elapsed_time if elapsed_time > 0 else 0.0
         }
     
     def reset(self):